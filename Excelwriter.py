@@ -1,26 +1,23 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import xlwings as xw
 import os
-import threading
-import shutil
 import logging
-from debuglog import show_debug_log, TkinterLogHandler
+from debuglog import show_debug_log
+from excelbackend import BACKENDS, DEFAULT_BACKEND, get_backend
+from excelplan import UnprotectError, apply_write_plan, build_write_plan
+from rapportchecklist import CHECKLIST
+from rapportstore import bewaar_metingen_op_achtergrond
+from taskrunner import JobCancelled, TaskRunner
+from timing import NULL_RUN, start_run
 
 logger = logging.getLogger(__name__)
 
-# Attach TkinterLogHandler to root logger for GUI debuglog (only once)
-if not any(isinstance(h, TkinterLogHandler) for h in logging.getLogger().handlers):
-    log_handler = TkinterLogHandler()
-    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-    logging.getLogger().addHandler(log_handler)
-    logging.getLogger().setLevel(logging.INFO)
-
 class ExcelWriterWindow(tk.Toplevel):
     """
     A Tkinter Toplevel window that provides a GUI to write data into an Excel template,
     with options to select an Excel file, input various data sections, and write to the workbook
-    using xlwings. Supports password-protected sheets and checkboxes handling.
+    using a pluggable engine (headless package editing or xlwings). Supports password-protected
+    sheets and checkboxes handling.
     """
 
     def __init__(self, master=None):
@@ -48,6 +45,25 @@ class ExcelWriterWindow(tk.Toplevel):
         ttk.Label(path_pass_frame, text="Password:").grid(row=0, column=2, sticky='w', padx=(20,0))
         self.password_var = tk.StringVar()
         ttk.Entry(path_pass_frame, textvariable=self.password_var, show='*', width=20).grid(row=1, column=2, sticky='w', padx=(20,0))
+        ttk.Label(path_pass_frame, text="Engine:").grid(row=0, column=3, sticky='w', padx=(20,0))
+        self._engine_names = {backend.label: name for name, backend in BACKENDS.items()}
+        self.engine_var = tk.StringVar(value=BACKENDS[DEFAULT_BACKEND].label)
+        ttk.Combobox(
+            path_pass_frame,
+            textvariable=self.engine_var,
+            values=list(self._engine_names),
+            state='readonly',
+            width=20
+        ).grid(row=1, column=3, sticky='w', padx=(20,0))
+        ttk.Label(path_pass_frame, text="Contract level:").grid(row=0, column=4, sticky='w', padx=(20,0))
+        self.contract_level_var = tk.StringVar()
+        ttk.Combobox(
+            path_pass_frame,
+            textvariable=self.contract_level_var,
+            values=("",) + CHECKLIST.niveaus,
+            state='readonly',
+            width=12
+        ).grid(row=1, column=4, sticky='w', padx=(20,0))
 
         # Checkboxes for selecting which sections to write
         self.chk_vars = {
@@ -55,7 +71,10 @@ class ExcelWriterWindow(tk.Toplevel):
             "trendstorage": tk.BooleanVar(value=False),
             "cpu": tk.BooleanVar(value=False),
             "memory": tk.BooleanVar(value=False),
-            "all_licenses": tk.BooleanVar(value=False)
+            "all_licenses": tk.BooleanVar(value=False),
+            # Off by default: a required item is not a verified item, so the
+            # contract level only ticks boxes when the user asks for it
+            "contract_checkboxes": tk.BooleanVar(value=False)
         }
         chk_frame = ttk.Frame(self)
         chk_frame.pack(pady=5, padx=10, fill='x')
@@ -64,11 +83,22 @@ class ExcelWriterWindow(tk.Toplevel):
             ("Write TrendStorage Geheugen data", "trendstorage"),
             ("Write CPU data", "cpu"),
             ("Write Memory data", "memory"),
-            ("Write all 'Alle Benodigde licenties aanwezig' (C35 checkboxes)", "all_licenses")
+            ("Write all 'Alle Benodigde licenties aanwezig' (C35 checkboxes)", "all_licenses"),
+            ("Tick the checkboxes of the items required for the contract level", "contract_checkboxes")
         ]
         for i, (label, key) in enumerate(chk_labels):
             ttk.Checkbutton(chk_frame, text=label, variable=self.chk_vars[key]).grid(row=i, column=0, sticky='w')
 
+        # EBO table import: fills all four sections at once
+        ebo_frame = ttk.Frame(self)
+        ebo_frame.pack(pady=5, padx=10, fill='x')
+        ttk.Button(ebo_frame, text="Load EBO table...", command=self.load_ebo_table_file).grid(row=0, column=0, sticky='w')
+        ttk.Button(ebo_frame, text="Paste EBO table", command=self.paste_ebo_table).grid(row=0, column=1, sticky='w', padx=(10,0))
+        self.ebo_status_var = tk.StringVar()
+        ttk.Label(ebo_frame, textvariable=self.ebo_status_var, foreground='gray').grid(row=1, column=0, columnspan=2, sticky='w')
+        # Text area key -> text as filled from the EBO table, to recognise unedited sections
+        self._ebo_text = {}
+
         # Text areas for data input
         self.text_areas = {}
         for label in ["Servers", "TrendStorage Geheugen", "CPU", "Memory"]:
@@ -92,8 +122,11 @@ class ExcelWriterWindow(tk.Toplevel):
         self.progress.pack_forget()
 
         # Button to start Excel writing
-        self.write_button = ttk.Button(self, text="Write to Excel", command=self.start_edit_excel_thread)
+        self.write_button = ttk.Button(self, text="Write to Excel", command=self.start_edit_excel)
         self.write_button.pack(pady=10)
+        # Shown below the write button while a job runs
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.runner = TaskRunner(self)
 
         self.bind('<Alt-l>', lambda e: show_debug_log(self))
 
@@ -125,289 +158,322 @@ class ExcelWriterWindow(tk.Toplevel):
         if path:
             self.template_path_var.set(path)
             logger.info(f"Template selected: {path}")
+            if path.lower().endswith(".xlsm"):
+                self._load_contract_level(path)
         else:
             logger.info("No template selected")
 
-    def start_edit_excel_thread(self):
+    def _load_contract_level(self, path):
         """
-        Starts the Excel editing operation in a separate daemon thread,
-        disables the write button, and shows the progress bar.
+        Preselect the contract level from the template's 'Gegevens' sheet.
+        Read from the package without Excel and cached, so this is instant.
+
+        Args:
+            path (str): Path to the .xlsm template.
         """
-        logger.info("Starting Excel edit thread")
-        self.progress.pack(pady=10, fill='x', padx=20)
-        self.progress.start(10)
-        self.write_button.config(state='disabled')
-        threading.Thread(target=self.edit_excel, daemon=True).start()
+        try:
+            from rapportschema import lees_gegevens
+            level = CHECKLIST.niveau(lees_gegevens(path).get("contractniveau", ""))
+        except Exception as e:
+            logger.debug(f"No contract level found in {path}: {e}")
+            return
+        self.contract_level_var.set(level)
+        logger.info(f"Contract level from template: {level}")
 
-    def edit_excel(self):
+    def load_ebo_table_file(self):
         """
-        Main logic to process inputs and write data into the Excel workbook.
-        Runs in a background thread to keep the UI responsive.
+        Let the user pick an exported EBO table (csv/tsv/txt) and fill the sections from it.
         """
-        logger.info("edit_excel started")
+        path = filedialog.askopenfilename(
+            parent=self,
+            filetypes=[("EBO table", "*.csv *.tsv *.txt"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        logger.info(f"Loading EBO table from {path}")
+        try:
+            # pandas is only needed for table import, keep it out of window startup
+            from ebotable import load_ebo_table
+            table = load_ebo_table(path)
+        except Exception as e:
+            logger.exception("Failed to load EBO table")
+            messagebox.showerror("Error", f"Could not read EBO table:\n{e}", parent=self)
+            return
+        self._apply_ebo_table(table)
+
+    def paste_ebo_table(self):
+        """
+        Parse an EBO table from the clipboard and fill the sections from it.
+        """
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            messagebox.showerror("Error", "The clipboard does not contain text.", parent=self)
+            return
+        try:
+            from ebotable import parse_ebo_table
+            table = parse_ebo_table(text)
+        except Exception as e:
+            logger.exception("Failed to parse pasted EBO table")
+            messagebox.showerror("Error", f"Could not parse EBO table:\n{e}", parent=self)
+            return
+        self._apply_ebo_table(table)
+
+    def _apply_ebo_table(self, table):
+        """
+        Fill the four text areas and section checkboxes from a parsed EboTable.
+
+        Args:
+            table (ebotable.EboTable): The parsed table.
+        """
+        lines = table.section_lines()
+        for section_key, area_key in (("servers", "servers"), ("trendstorage", "trendstorage geheugen"),
+                                      ("cpu", "cpu"), ("memory", "memory")):
+            values = lines[section_key]
+            text_area = self.text_areas[area_key]
+            text_area.delete("1.0", tk.END)
+            text_area.insert("1.0", "\n".join(values))
+            self._ebo_text[area_key] = text_area.get("1.0", "end-1c")
+            self.chk_vars[section_key].set(any(value.strip() for value in values))
+
+        self.ebo_status_var.set("Filled from the EBO table: line n goes to checklist sheet n, an empty line skips its "
+                                "sheet. Edited sections are written as a list, without empty lines.")
+        summary = (f"{len(table)} server(s) loaded.\n"
+                   f"{len(table.over_threshold)} server(s) at or above {table.threshold}% CPU or memory.")
+        if table.errors:
+            shown = "\n".join(str(error) for error in table.errors[:15])
+            more = f"\n... and {len(table.errors) - 15} more" if len(table.errors) > 15 else ""
+            logger.warning(f"EBO table has {len(table.errors)} parse error(s)")
+            messagebox.showwarning("EBO table", f"{summary}\n\nValues that could not be read:\n{shown}{more}", parent=self)
+        else:
+            messagebox.showinfo("EBO table", summary, parent=self)
+
+    def _get_lines(self, area_key):
+        """
+        Return the lines of a text area.
+
+        Typed or pasted text is compacted: empty lines are dropped. A section that
+        is still exactly as filled from an EBO table keeps its empty lines, so row
+        n of the table stays on checklist sheet n.
+
+        Args:
+            area_key (str): Text area key, e.g. "cpu".
+
+        Returns:
+            list: The stripped lines.
+        """
+        text = self.text_areas[area_key].get("1.0", "end-1c")
+        if text == self._ebo_text.get(area_key):
+            return [line.strip() for line in text.rstrip().splitlines()]
+        return [line.strip() for line in text.strip().splitlines() if line.strip()]
+
+    def start_edit_excel(self):
+        """
+        Read the inputs, ask how to save, then run edit_excel as a background job.
+
+        Widgets and dialogs are only touched here and in the job's callbacks, on the Tk thread.
+        """
+        if self.runner.busy:
+            return
         path = self.template_path_var.get()
         if not os.path.isfile(path):
             logger.error("Invalid Excel file path")
-            self.after(0, self._handle_error, "Please select a valid Excel file.")
+            messagebox.showerror("Error", "Please select a valid Excel file.", parent=self)
             return
 
-        password = self.password_var.get()
-        logger.debug(f"Using password: {'*' * len(password)}")
-
-        # Helper to extract non-empty lines from text areas
-        get_lines = lambda key: [
-            line.strip() for line in self.text_areas[key].get("1.0", tk.END).strip().splitlines() if line.strip()
-        ]
-
         # Extract data lines only if respective checkbox is selected
-        servers_lines = get_lines("servers") if self.chk_vars["servers"].get() else []
-        trendstorage_lines = get_lines("trendstorage geheugen") if self.chk_vars["trendstorage"].get() else []
-        cpu_lines = get_lines("cpu") if self.chk_vars["cpu"].get() else []
-        memory_lines = get_lines("memory") if self.chk_vars["memory"].get() else []
-
-        logger.info(f"Lines to process - Servers: {len(servers_lines)}, TrendStorage: {len(trendstorage_lines)}, CPU: {len(cpu_lines)}, Memory: {len(memory_lines)}")
+        section_lines = {
+            "servers": self._get_lines("servers") if self.chk_vars["servers"].get() else [],
+            "trendstorage": self._get_lines("trendstorage geheugen") if self.chk_vars["trendstorage"].get() else [],
+            "cpu": self._get_lines("cpu") if self.chk_vars["cpu"].get() else [],
+            "memory": self._get_lines("memory") if self.chk_vars["memory"].get() else [],
+        }
+        logger.info("Lines to process - " + ", ".join(f"{key}: {len(lines)}" for key, lines in section_lines.items()))
 
-        if not (servers_lines or trendstorage_lines or cpu_lines or memory_lines or self.chk_vars["all_licenses"].get()):
+        contract_level = self.contract_level_var.get()
+        contract_checkboxes = bool(contract_level) and self.chk_vars["contract_checkboxes"].get()
+        all_licenses = self.chk_vars["all_licenses"].get()
+        if not (any(section_lines.values()) or all_licenses or contract_checkboxes):
             logger.warning("No valid lines found or no sections selected to write")
-            self.after(0, self._handle_error, "No valid lines found or no sections selected to write.")
+            messagebox.showerror("Error", "No valid lines found or no sections selected to write.", parent=self)
             return
 
         # Prompt user for save option (overwrite or new file)
-        save_option_event = threading.Event()
-        self.overwrite_original = None
-        def ask_save_option():
-            logger.info("Prompting user for save option (overwrite or copy)")
-            self.overwrite_original = messagebox.askyesnocancel(
-                "Save Option",
-                "Do you want to update the original template?\n\nYes: Overwrite original\nNo: Create a new edited copy"
+        logger.info("Prompting user for save option (overwrite or copy)")
+        overwrite_original = messagebox.askyesnocancel(
+            "Save Option",
+            "Do you want to update the original template?\n\nYes: Overwrite original\nNo: Create a new edited copy",
+            parent=self
+        )
+        if overwrite_original is None:
+            logger.info("Save cancelled by user")
+            return
+        if overwrite_original:
+            save_path = None
+            logger.info("User chose to overwrite original template")
+        else:
+            logger.info("Prompting user for save location")
+            save_path = filedialog.asksaveasfilename(
+                parent=self,
+                defaultextension=".xlsm",
+                filetypes=[("Excel Macro-Enabled Workbook", "*.xlsm")],
+                initialfile=os.path.basename(path)
             )
-            save_option_event.set()
-        self.after(0, ask_save_option)
-        save_option_event.wait()
-
-        if not self.overwrite_original:
-            save_path_event = threading.Event()
-            self.new_save_path = None
-            def ask_save_path():
-                logger.info("Prompting user for save location")
-                self.new_save_path = filedialog.asksaveasfilename(
-                    parent=self,
-                    defaultextension=".xlsm",
-                    filetypes=[("Excel Macro-Enabled Workbook", "*.xlsm")],
-                    initialfile=os.path.basename(path)
-                )
-                save_path_event.set()
-            self.after(0, ask_save_path)
-            save_path_event.wait()
-
-            if not self.new_save_path:
+            if not save_path:
                 logger.info("Save cancelled by user")
-                self.after(0, self._cancel_save)
+                messagebox.showinfo("Cancelled", "Excel writing cancelled.", parent=self)
                 return
+            # The template is opened as-is and saved under the new name, so the
+            # copy is written once instead of copied first and rewritten after
+            logger.info(f"Edited copy will be saved as: {save_path}")
+
+        engine = get_backend(self._engine_names.get(self.engine_var.get()))
+        # The dialogs above wait for the user; timing starts here
+        timer = start_run("excelwriter", workbook=os.path.basename(path), engine=engine.name)
+        with timer.span("plan"):
+            plan = self._build_plan(section_lines, all_licenses, contract_level, contract_checkboxes)
+        logger.info(f"Write plan covers {len(plan.sheets)} sheet(s)")
+
+        logger.info("Starting Excel edit job")
+        self.progress.config(mode='indeterminate', value=0)
+        self.progress.pack(pady=10, fill='x', padx=20)
+        self.progress.start(10)
+        self.write_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.cancel_button.pack(pady=(0, 10))
+        self.runner.start(self.edit_excel, engine, path, save_path, self.password_var.get(), plan, section_lines, timer,
+                          on_progress=self._show_progress, on_done=lambda result: self._show_result(plan, result),
+                          on_error=self._show_error, on_finish=self._finalize_ui)
 
-            try:
-                shutil.copy2(path, self.new_save_path)
-                edit_path = self.new_save_path
-                logger.info(f"Copied template to new file: {self.new_save_path}")
-            except Exception as e:
-                logger.error(f"Failed to copy template file: {e}")
-                self.after(0, self._handle_error, f"Failed to copy file:\n{e}")
-                return
-        else:
-            edit_path = path
-            logger.info("User chose to overwrite original template")
+    def cancel(self):
+        """
+        Stop the running edit; the workbook is closed without saving.
+        """
+        if self.runner.busy:
+            self.cancel_button.config(state='disabled')
+            self.runner.cancel()
+
+    def edit_excel(self, job, engine, path, save_path, password, plan, section_lines, timer=NULL_RUN):
+        """
+        Write the plan into the workbook and save it.
 
-        warning_triggered = False
+        Runs as a TaskRunner job: it does not touch the widgets and stops
+        before opening, between sheets and before saving when cancelled.
+
+        Args:
+            job (taskrunner.Job): The job handle.
+            engine: The excelbackend engine to open the workbook with.
+            path (str): The template workbook.
+            save_path (str): Where to save the edited copy, or None to overwrite the template.
+            password (str): Sheet protection password.
+            plan (WritePlan): The write plan.
+            section_lines (dict): The lines per section, stored with the measurements.
+            timer (timing.TimingRun, optional): The run the phases are timed in; finished here.
+
+        Returns:
+            PlanResult: What was written, or None if the job was cancelled.
+        """
+        logger.info("edit_excel started")
+        logger.debug(f"Using password: {'*' * len(password)}")
+        wb = None
+        result = None
+        saved = False
 
         try:
-            logger.info(f"Opening workbook: {edit_path}")
-            app = xw.App(visible=False)
-            app.display_alerts = False
-            app.screen_updating = False
-            wb = app.books.open(edit_path)
-
-            def get_sheet(idx):
-                sheet_name = "Checklist Regelkast" if idx == 0 else f"Checklist Regelkast ({idx + 1})"
+            job.check_cancelled()
+            with timer.span("app_start"):
+                engine.start()
+            logger.info(f"Opening workbook: {path} (engine: {engine.name})")
+            with timer.span("books.open"):
+                wb = engine.open(path)
+
+            job.check_cancelled()
+            result = apply_write_plan(wb, plan, password, timer, progress=job.progress,
+                                      cancelled=lambda: job.cancelled)
+            job.check_cancelled()
+
+            with timer.span("save"):
+                wb.save(save_path)
+            saved = True
+            logger.info(f"Workbook saved successfully at {save_path or path}")
+            bewaar_metingen_op_achtergrond(save_path or path, section_lines)
+            return result
+        except JobCancelled:
+            logger.info("Excel writing cancelled; workbook not saved")
+            raise
+        finally:
+            if wb is not None:
                 try:
-                    return wb.sheets[sheet_name], sheet_name
+                    with timer.span("close"):
+                        wb.close()
                 except Exception as e:
-                    logger.warning(f"Sheet not found: {sheet_name} - {e}")
-                    return None, sheet_name
+                    logger.warning(f"Could not close workbook: {e}")
+            timer.finish(sheets=len(plan.sheets), calls=result.calls if result else None, saved=saved,
+                         cancelled=job.cancelled)
 
-            def unprotect(sheet):
-                try:
-                    sheet.api.Unprotect(Password=password)
-                    logger.debug(f"Unprotected sheet {sheet.name}")
-                    return True
-                except Exception as e:
-                    logger.error(f"Could not unprotect sheet {sheet.name}: {e}")
-                    self.after(0, self._handle_error, f"Failed to unprotect sheet '{sheet.name}'.\nPlease check the password or sheet protection.")
-                    raise RuntimeError(f"Failed to unprotect sheet '{sheet.name}'")
+    def _show_progress(self, done, total, sheet_name=None):
+        if str(self.progress.cget('mode')) != 'determinate':
+            self.progress.stop()
+            self.progress.config(mode='determinate')
+        self.progress.config(maximum=max(total or 0, 1), value=done)
 
-            def protect(sheet):
-                try:
-                    sheet.api.Protect(Password=password)
-                    logger.debug(f"Protected sheet {sheet.name}")
-                except Exception as e:
-                    logger.warning(f"Could not protect sheet {sheet.name}: {e}")
+    def _show_result(self, plan, result):
+        """
+        Report the outcome of a finished edit, with the warnings of the plan.
+        """
+        if plan.parse_errors:
+            unreadable = "\n".join(f"{label} line {line_no}: '{line}'" for label, line_no, line in plan.parse_errors[:15])
+            messagebox.showwarning(
+                "Warning",
+                f"Some percentages could not be read; their checkboxes were not set:\n\n{unreadable}",
+                parent=self
+            )
 
-            def set_checkbox(sheet, checkbox_name, sheet_name):
-                try:
-                    shape = sheet.api.Shapes(checkbox_name)
-                    shape.OLEFormat.Object.Value = True
-                    logger.info(f"Checked {checkbox_name} on {sheet_name}")
-                    return True
-                except Exception as e:
-                    logger.warning(f"Failed to check {checkbox_name} on {sheet_name}: {e}")
-                    return False
-
-            def process_lines(lines, cell, log_prefix, checkboxes, warn_threshold=None, value_func=None):
-                """
-                Process a list of lines, write data to Excel cells, and check checkboxes conditionally.
-
-                Args:
-                    lines (list): Lines of data to write.
-                    cell (str): Cell address to write to.
-                    log_prefix (str): Prefix for logging.
-                    checkboxes (list): Checkbox names to update.
-                    warn_threshold (float, optional): Threshold for warnings, if applicable.
-                    value_func (callable, optional): Function to transform line value before writing.
-
-                Returns:
-                    bool: True if processing completed, False if unprotect failed.
-                """
-                nonlocal warning_triggered
-                for idx, line in enumerate(lines):
-                    logger.debug(f"Processing line {idx+1} for {log_prefix}: {line}")
-                    sheet, sheet_name = get_sheet(idx)
-                    if not sheet:
-                        continue
-                    try:
-                        unprotect(sheet)
-                    except RuntimeError:
-                        return False
-                    value = value_func(line) if value_func else line
-                    try:
-                        sheet.range(cell).value = value
-                        logger.info(f"[{log_prefix}] Written '{value}' to {sheet_name} {cell}")
-                    except Exception as e:
-                        logger.error(f"[{log_prefix}] Failed to write to {sheet_name} {cell}: {e}")
-                    # Checkbox logic
-                    if warn_threshold is not None:
-                        try:
-                            percent = float(value.split('%')[0].split()[-1])
-                        except Exception:
-                            percent = 0
-                        if percent >= warn_threshold:
-                            warning_triggered = True
-                            for chk in checkboxes:
-                                set_checkbox(sheet, chk, sheet_name)
-                    else:
-                        for chk in checkboxes:
-                            set_checkbox(sheet, chk, sheet_name)
-                    protect(sheet)
-                return True
-
-            # Servers data processing
-            if servers_lines:
-                if not process_lines(
-                    servers_lines,
-                    "F8",
-                    "Servers",
-                    ["Check Box 33"]
-                ):
-                    return
-
-            # TrendStorage Geheugen data processing
-            if trendstorage_lines:
-                if not process_lines(
-                    trendstorage_lines,
-                    "F8",
-                    "TrendStorage Geheugen",
-                    ["Check Box 37"]
-                ):
-                    return
-
-            # CPU data processing (percent values)
-            if cpu_lines:
-                if not process_lines(
-                    cpu_lines,
-                    "F8",
-                    "CPU",
-                    ["Check Box 39"],
-                    warn_threshold=75,
-                    value_func=lambda line: f"{line.strip()}%"
-                ):
-                    return
-
-            # Memory data processing (percent values)
-            if memory_lines:
-                if not process_lines(
-                    memory_lines,
-                    "F8",
-                    "Memory",
-                    ["Check Box 41"],
-                    warn_threshold=75,
-                    value_func=lambda line: f"{line.strip()}%"
-                ):
-                    return
-
-            # 'Alle Benodigde licenties aanwezig' checkboxes (C35)
-            if self.chk_vars["all_licenses"].get():
-                for idx in range(6):
-                    sheet, sheet_name = get_sheet(idx)
-                    if not sheet:
-                        continue
-                    try:
-                        unprotect(sheet)
-                    except RuntimeError:
-                        return
-                    for cb_idx in range(35, 41):
-                        cb_name = f"Check Box {cb_idx}"
-                        set_checkbox(sheet, cb_name, sheet_name)
-                    protect(sheet)
-
-            wb.save()
-            logger.info(f"Workbook saved successfully at {edit_path}")
-            wb.close()
-            app.quit()
-
-            if warning_triggered:
-                self.after(0, lambda: messagebox.showwarning(
-                    "Warning",
-                    "Some values exceeded 80%. Please review the checklist."
-                ))
-
-            self.after(0, lambda: messagebox.showinfo("Success", "Excel writing completed successfully."))
+        if plan.warning_triggered:
+            messagebox.showwarning("Warning", "Some values exceeded 80%. Please review the checklist.", parent=self)
 
-        except Exception as e:
-            logger.exception("Exception during Excel writing")
-            self.after(0, self._handle_error, f"An error occurred:\n{e}")
-        finally:
-            self.after(0, self._finalize_ui)
+        messagebox.showinfo(
+            "Success",
+            "Excel writing completed successfully.\n\n"
+            f"{len(result.sheets_written)} sheet(s) written with {result.calls} workbook calls "
+            f"({result.calls_saved} saved).",
+            parent=self
+        )
 
-    def _handle_error(self, message):
+    def _show_error(self, error):
         """
-        Show an error message box and reset UI components.
-
-        Args:
-            message (str): Error message to display.
+        Show the error of a failed edit.
         """
-        messagebox.showerror("Error", message)
-        self._finalize_ui()
+        if isinstance(error, UnprotectError):
+            message = f"Failed to unprotect sheet '{error.sheet_name}'.\nPlease check the password or sheet protection."
+        else:
+            message = f"An error occurred:\n{error}"
+        messagebox.showerror("Error", message, parent=self)
 
-    def _cancel_save(self):
+    def _build_plan(self, section_lines, all_licenses, contract_level, contract_checkboxes=False):
         """
-        Handle user cancellation during save dialog.
-        """
-        messagebox.showinfo("Cancelled", "Excel writing cancelled.")
-        self._finalize_ui()
+        Build the write plan for the selected sections, licenses and contract level.
 
-    def _finalize_ui(self):
+        A required item is not a verified item: the contract level only adds
+        its checkboxes (the license boxes) when contract_checkboxes is set.
+        """
+        plan = build_write_plan(section_lines, all_licenses=all_licenses)
+        if contract_level:
+            logger.info(f"Contract level {contract_level}: {len(CHECKLIST.vereist(contract_level))} required item(s)")
+            if contract_checkboxes:
+                # Checkboxes of the items required for the contract level go into the same per-sheet batch
+                CHECKLIST.checkbox_plan(contract_level, plan)
+                logger.info(f"Checkboxes of the required items for {contract_level} added to the plan")
+        return plan
+
+    def _finalize_ui(self, job=None):
         """
-        Reset UI elements after Excel operation is completed or aborted.
+        Reset UI elements after Excel operation is completed, failed or cancelled.
         """
         self.progress.stop()
         self.progress.pack_forget()
+        self.cancel_button.pack_forget()
         self.write_button.config(state='normal')
         logger.info("UI reset to ready state")
+        if job is not None and job.cancelled:
+            messagebox.showinfo("Cancelled", "Excel writing cancelled; the workbook was not saved.", parent=self)
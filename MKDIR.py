@@ -1,12 +1,15 @@
 import os
-import shutil
 import tkinter as tk
 import logging
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-from tqdm import tqdm
-import threading
 from debuglog import show_debug_log
+from fanout import DEFAULT_WORKERS, fan_out
+from mkdirjournal import JournalWriter, load_journal
+from mkdirplan import COPY, plan_mkdir
+from taskrunner import TaskRunner
+from timing import start_run
+from mkdirtree import build_trees, load_tree_spec
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +20,10 @@ class MKDIRApp(tk.Toplevel):
     Features:
     - Select base directory
     - Input folder names (one per line)
-    - Option to copy a selected file into each created directory
-    - Progress bar to indicate creation progress
+    - Option to copy a selected file into each created directory (or hardlink it)
+    - Option to build a whole folder tree with seed files per name from a template
+    - Folders are created over a thread pool, the file is read once
+    - Progress bar to indicate creation progress; a run can be cancelled
     """
 
     def __init__(self, master=None):
@@ -31,7 +36,7 @@ class MKDIRApp(tk.Toplevel):
         super().__init__(master)
         self.title("StruxureGuard MKDIR")
         self.attributes('-topmost', False)
-        self.geometry("700x450")
+        self.geometry("700x520")
 
         logger.info("MKDIR module gestart")
 
@@ -67,13 +72,40 @@ class MKDIRApp(tk.Toplevel):
         self.selected_file_label = ttk.Label(self.file_frame, text="Geen bestand geselecteerd")
         self.selected_file_label.pack(side=tk.LEFT, padx=5)
 
+        self.tree_frame = ttk.Frame(self)
+        self.tree_frame.pack(pady=5)
+        ttk.Button(self.tree_frame, text="Kies sjabloon", command=self.select_tree_spec).pack(side=tk.LEFT)
+        self.tree_spec_label = ttk.Label(self.tree_frame, text="Geen mappenstructuur (alleen één niveau)")
+        self.tree_spec_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.tree_frame, text="Wissen", command=self.clear_tree_spec).pack(side=tk.LEFT)
+
+        options_frame = ttk.Frame(self)
+        options_frame.pack(pady=5)
+        self.hardlink_var = tk.IntVar()
+        ttk.Checkbutton(options_frame, text="Hardlink i.p.v. kopie (zelfde bestand in alle mappen)",
+                        variable=self.hardlink_var).pack(side=tk.LEFT)
+        ttk.Label(options_frame, text="Threads:").pack(side=tk.LEFT, padx=(15, 2))
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        ttk.Spinbox(options_frame, from_=1, to=64, width=4, textvariable=self.workers_var).pack(side=tk.LEFT)
+
         self.progress = ttk.Progressbar(self, orient="horizontal", length=500, mode="determinate")
         self.progress.pack(pady=10)
 
-        self.run_button = ttk.Button(self, text="Start", command=self.run)
-        self.run_button.pack(pady=10)
+        button_frame = ttk.Frame(self)
+        button_frame.pack(pady=10)
+        self.check_button = ttk.Button(button_frame, text="Controleren", command=self.show_plan)
+        self.check_button.pack(side=tk.LEFT, padx=5)
+        self.run_button = ttk.Button(button_frame, text="Start", command=self.run)
+        self.run_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Annuleren", command=self.cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        self.status_label = ttk.Label(self, text="")
+        self.status_label.pack()
 
         self.selected_file = None
+        self.tree_spec = None
+        self.runner = TaskRunner(self)
 
     def toggle_file_button(self):
         """
@@ -95,6 +127,28 @@ class MKDIRApp(tk.Toplevel):
         self.lift()
         self.focus_force()
 
+    def select_tree_spec(self):
+        """
+        Choose a folder-tree template (JSON, or YAML with PyYAML) that is built for every name.
+        """
+        filepath = filedialog.askopenfilename(
+            parent=self, filetypes=[("Mappenstructuur", "*.json *.yaml *.yml"), ("Alle bestanden", "*.*")]
+        )
+        if filepath:
+            try:
+                self.tree_spec = load_tree_spec(filepath)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Fout", f"Kon sjabloon niet laden: {e}", parent=self)
+            else:
+                self.tree_spec_label.config(text=f"Sjabloon: {os.path.basename(filepath)}")
+                logger.info(f"MKDIR sjabloon geladen: {filepath}")
+        self.lift()
+        self.focus_force()
+
+    def clear_tree_spec(self):
+        self.tree_spec = None
+        self.tree_spec_label.config(text="Geen mappenstructuur (alleen één niveau)")
+
     def browse_base_path(self):
         """
         Open a directory selection dialog to set the base path for new directories.
@@ -105,40 +159,243 @@ class MKDIRApp(tk.Toplevel):
         self.lift()
         self.focus_force()
 
-    def run(self):
+    def _plan_args(self):
         """
-        Start the directory creation process in a separate thread.
+        Read the inputs for planning on the Tk thread.
+
+        Returns:
+            tuple: (base path, lines, source file or None), or None if there is nothing to plan.
         """
-        thread = threading.Thread(target=self.create_directories)
-        thread.start()
+        lines = self.textbox.get("1.0", tk.END).splitlines()
+        if not any(line.strip() for line in lines):
+            messagebox.showerror("Fout", "Geen mapnamen ingevoerd.", parent=self)
+            return None
+        source = self.selected_file if self.copy_var.get() and self.selected_file else None
+        return self.base_path.get(), lines, source
 
-    def create_directories(self):
+    def build_plan(self, job, base_path, lines, source=None):
         """
-        Create directories as specified in the textbox, optionally copying a file to each.
+        Scan the base path and plan the run (dry run, nothing is written).
+
+        Runs as a TaskRunner job: the folder scan and the stat calls can take a
+        while on a network share.
 
-        Shows progress in the progress bar and displays message boxes for errors or completion.
+        Returns:
+            MkdirPlan: The plan.
         """
-        names = self.textbox.get("1.0", tk.END).strip().splitlines()
-        total = len(names)
-        if total == 0:
-            messagebox.showerror("Fout", "Geen mapnamen ingevoerd.")
+        # An interrupted earlier run left a journal: resume instead of re-checking every copy
+        journal = load_journal(base_path)
+        plan = plan_mkdir(base_path, lines, source, journal=journal)
+        job.check_cancelled()
+        return plan
+
+    def _start_plan(self, on_done):
+        """
+        Plan in the background and hand the plan to on_done on the Tk thread.
+        """
+        if self.runner.busy:
+            return
+        args = self._plan_args()
+        if args is None:
+            return
+        self.status_label.config(text="Doelmap controleren...")
+        self._set_busy(True)
+        self.runner.start(self.build_plan, *args, on_done=on_done, on_error=self._show_plan_error,
+                          on_finish=self._finish_plan)
+
+    def _plan_details(self, plan, limit=20):
+        shown = [item for item in plan.items if item.reason][:limit]
+        details = "\n".join(str(item) for item in shown)
+        remaining = sum(1 for item in plan.items if item.reason) - len(shown)
+        if remaining > 0:
+            details += f"\n... en nog {remaining}"
+        return details
+
+    def show_plan(self):
+        """
+        Show what a run would do: folders to create, copies, skips and conflicts.
+        """
+        self._start_plan(self._show_plan)
+
+    def _show_plan(self, plan):
+        self.status_label.config(text=plan.summary())
+        details = self._plan_details(plan)
+        messagebox.showinfo("Controle", f"{plan.summary()}\n\n{details}".strip(), parent=self)
+
+    def run(self):
+        """
+        Plan the run, then do only the necessary operations as a background job.
+
+        Both jobs never touch the widgets; the TaskRunner delivers their progress
+        and outcome on the Tk loop.
+        """
+        self._start_plan(self._start_run)
+
+    def _start_run(self, plan):
+        """
+        Start the work of a finished plan, after confirming its conflicts.
+        """
+        if plan.conflicts:
+            if not messagebox.askyesno(
+                "Conflicten",
+                f"{len(plan.conflicts)} naam/namen kunnen niet worden aangemaakt:\n\n"
+                f"{self._plan_details(plan)}\n\nDe rest toch uitvoeren?",
+                parent=self,
+            ):
+                return
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = DEFAULT_WORKERS
+        link_mode = "hardlink" if self.hardlink_var.get() else "copy"
+
+        if self.tree_spec is not None:
+            # Existing site folders are completed with the missing parts of the tree
+            names = plan.names
+            target = self.create_trees
+            args = (plan.base_path, names, self.tree_spec, workers, link_mode)
+        else:
+            work = plan.work
+            if not work:
+                self.status_label.config(text=plan.summary())
+                messagebox.showinfo("Klaar", f"Niets te doen: {plan.summary()}", parent=self)
+                return
+            names = [item.name for item in work]
+            existing = {item.name for item in work if item.action == COPY}
+            target = self.create_directories
+            args = (plan.base_path, names, plan.source, workers, link_mode, existing)
+        if not names:
             return
 
         self.progress["value"] = 0
-        self.progress["maximum"] = total
+        self.progress["maximum"] = len(names)
+        self.status_label.config(text="")
+        self._set_busy(True)
+        self.runner.start(target, *args, on_progress=self._show_progress, on_done=self._show_result,
+                          on_error=self._show_error, on_finish=self._finish_run)
+
+    def _set_busy(self, busy):
+        state = tk.DISABLED if busy else tk.NORMAL
+        self.check_button.config(state=state)
+        self.run_button.config(state=state)
+        self.cancel_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+
+    def cancel(self):
+        """
+        Stop the running job: folders in progress are finished, the rest is skipped.
+        """
+        if self.runner.busy:
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Annuleren...")
+            self.runner.cancel()
+
+    def create_directories(self, job, base_path, names, source=None, workers=DEFAULT_WORKERS, link_mode="copy",
+                           existing=()):
+        """
+        Create the directories over a thread pool, optionally placing a file in each.
+
+        Runs as a TaskRunner job; progress goes through job.progress and the
+        job's cancel flag stops the fan-out.
+
+        Args:
+            job (taskrunner.Job): The job handle.
+            base_path (str): Folder in which the folders are created.
+            names (list): Folder names.
+            source (str, optional): File to copy into each folder as <name><ext>.
+            workers (int): Number of threads.
+            link_mode (str): "copy" or "hardlink".
+            existing (set): Names whose folder already exists; only the file is placed.
 
-        for i, name in enumerate(tqdm(names, desc="Mappen maken", unit="map")):
+        Returns:
+            FanoutResult: Counts, errors and whether the run was cancelled.
+        """
+        from tqdm import tqdm
+        journal = None
+        result = None
+        timer = start_run("mkdir", folders=len(names), existing=len(existing), source=bool(source),
+                          workers=workers, link_mode=link_mode)
+        try:
+            os.makedirs(base_path, exist_ok=True)
             try:
-                dir_path = os.path.join(self.base_path.get(), name)
-                os.makedirs(dir_path, exist_ok=True)
-                if self.copy_var.get() and self.selected_file:
-                    ext = os.path.splitext(self.selected_file)[1]
-                    new_path = os.path.join(dir_path, f"{name}{ext}")
-                    shutil.copy2(self.selected_file, new_path)
-            except Exception as e:
-                messagebox.showerror("Fout", f"Kon map of bestand niet aanmaken: {e}")
-                return
-            self.progress["value"] = i + 1
-            self.update_idletasks()
+                with timer.span("journal_open"):
+                    journal = JournalWriter(base_path)
+            except OSError as e:
+                logger.warning(f"MKDIR zonder journal, kan niet schrijven in {base_path}: {e}")
+            source_stat = os.stat(source) if source else None
+
+            def completed(name, file_name):
+                if journal is None:
+                    return
+                with timer.span("journal_record"):
+                    if file_name:
+                        journal.record_file(name, file_name, source_stat)
+                    else:
+                        journal.record_dir(name)
+
+            with tqdm(total=len(names), desc="Mappen maken", unit="map") as bar:
+                def progress(done, total):
+                    with timer.span("progress"):
+                        job.progress(done, total)
+                        bar.update(1)
+                with timer.span("fan_out"):
+                    result = fan_out(base_path, names, source, workers=workers, link_mode=link_mode,
+                                     progress=progress, existing=existing, completed=completed,
+                                     cancelled=lambda: job.cancelled)
+            return result
+        except Exception:
+            logger.exception("MKDIR mislukt")
+            raise
+        finally:
+            # An interrupted journal lets the next run resume the missing folders
+            if journal is not None:
+                with timer.span("journal_close"):
+                    journal.close(completed=result is not None and not result.errors and not result.cancelled)
+            timer.finish(directories=result.directories if result else 0, files=result.files if result else 0,
+                         errors=len(result.errors) if result else None,
+                         cancelled=result.cancelled if result else job.cancelled)
+
+    def create_trees(self, job, base_path, names, spec, workers=DEFAULT_WORKERS, link_mode="copy"):
+        """
+        Build the template tree for every name in one job; rolled back on failure or cancel.
+
+        Runs as a TaskRunner job, see create_directories.
+        """
+        try:
+            return build_trees(base_path, names, spec, workers=workers, link_mode=link_mode,
+                               progress=job.progress, cancelled=lambda: job.cancelled)
+        except Exception:
+            logger.exception("Mappenstructuur mislukt")
+            raise
+
+    def _show_progress(self, done, total, text=None):
+        self.progress["maximum"] = max(total or 0, 1)
+        self.progress["value"] = done
+
+    def _show_plan_error(self, error):
+        self.status_label.config(text="")
+        messagebox.showerror("Fout", f"Kon doelmap niet lezen: {error}", parent=self)
+
+    def _finish_plan(self, job):
+        if job.cancelled:
+            self.status_label.config(text="Geannuleerd")
+        # The run of a plan has already started from on_done
+        if not self.runner.busy:
+            self._set_busy(False)
+
+    def _show_error(self, error):
+        messagebox.showerror("Fout", f"Kon mappen niet aanmaken: {error}", parent=self)
+
+    def _show_result(self, result):
+        self.status_label.config(text=result.summary())
+        if result.cancelled:
+            messagebox.showinfo("Geannuleerd", f"Het aanmaken is geannuleerd.\n{result.summary()}", parent=self)
+        elif result.errors:
+            failed = "\n".join(f"{name}: {error}" for name, error in result.errors[:15])
+            more = f"\n... en nog {len(result.errors) - 15}" if len(result.errors) > 15 else ""
+            messagebox.showerror("Fout", f"{len(result.errors)} map(pen) of bestand(en) niet aangemaakt:\n{failed}{more}",
+                                 parent=self)
+        else:
+            messagebox.showinfo("Klaar", f"Alle mappen zijn aangemaakt.\n{result.summary()}", parent=self)
 
-        messagebox.showinfo("Klaar", "Alle mappen zijn aangemaakt.")
+    def _finish_run(self, job):
+        self._set_busy(False)
@@ -1,9 +1,9 @@
+import sys
 import tkinter as tk
 from tkinter import ttk
 import logging
-from VToolBox import ToolboxWindow
-from debuglog import show_debug_log, TkinterLogHandler
-from RapportageGenerator import RapportageGenerator
+from debuglog import show_debug_log, setup_gui_logging, stop_log_pump
+from logsink import start_persistent_logging, stop_persistent_logging
 
 logger = logging.getLogger(__name__)
 
@@ -25,23 +25,38 @@ class StruxureGuardApp(tk.Tk):
         self.report_button = ttk.Button(self, text="Rapportage Generator", command=self.open_report_generator)
         self.report_button.pack(pady=20)
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Keybindings
         self.bind('<F8>', self.open_toolbox_window)
         self.bind('<Alt-l>', lambda e: show_debug_log(self))
 
-        # Setup logging to GUI
-        self.log_handler = TkinterLogHandler()
-        self.log_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-        logging.getLogger().addHandler(self.log_handler)
-        logging.getLogger().setLevel(logging.INFO)
+        # Setup logging to GUI and log files
+        self.log_handler = setup_gui_logging(self)
+        start_persistent_logging()
 
         logger.info("StruxureGuard hoofdvenster gestart")
 
+    def on_close(self):
+        """
+        Shut down the shared Excel session (workbooks and hidden Excel) and close the app.
+        """
+        logger.info("StruxureGuard wordt afgesloten")
+        # The Excel session module is only loaded once a tool has used it
+        excelsession = sys.modules.get("excelsession")
+        if excelsession is not None:
+            excelsession.shutdown_session()
+        stop_log_pump()
+        stop_persistent_logging()
+        self.destroy()
+
     def open_toolbox_window(self, event=None):
         """
         Open the Toolbox window.
         """
         logger.info("Toolbox venster geopend (via F8 of button)")
+        # Tool modules are loaded on first use to keep startup fast
+        from VToolBox import ToolboxWindow
         win = ToolboxWindow(self)
         win.lift()
         win.focus_force()
@@ -51,6 +66,7 @@ class StruxureGuardApp(tk.Tk):
         Open de Rapportage Generator.
         """
         logger.info("Rapportage Generator venster geopend")
+        from RapportageGenerator import RapportageGenerator
         win = RapportageGenerator(self)  # Use the correct class name
         win.lift()
         win.focus_force()
@@ -1,65 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import xml.etree.ElementTree as ET
-import xlwings as xw
+import logging
 import os
+import threading
+from rapportbuild import bouw
+from rapportbulk import lees_xml
+from rapportchecklist import CHECKLIST
+from rapportpdf import pdf_naam
+from rapportstore import RapportStore
+from rapportschema import COMBOBOX, LINKS, SCHEIDING, SCHEMA, lees_gegevens
+from timing import start_run
 
-# Hardcoded data uit het Excel-bestand
-CONTRACTNIVEAU_KOLOMMEN = ["Omschrijving", "Basis", "Standaard", "Totaal"]
-CONTRACTNIVEAU_TABEL = [
-    ["HARDWARE REGELPANEEL", "", "", ""],
-    ["Voor aanvang LMRA EQUANS uitvoeren.", "x", "x", "x"],
-    ["Visuele NEN inspectie van bedrading, relais etc. in het regelpaneel", "x", "x", "x"],
-    ["Warmtebeeldcontrole van het regelpaneel", "x", "x", "x"],
-    ["Kastventilatie werkt naar behoren en is stofvrij", "x", "x", "x"],
-    ["Bedienbeeldscherm regelkast werkt naar behoren", "x", "x", "x"],
-    ["Regeltechnische omschrijving aanwezig en up-to-date, datum en versie", "x", "x", "x"],
-    ["Regelkastschema aanwezig en up-to-date, datum en versie", "x", "x", "x"],
-    ["DDC HARDWARE", "", "", ""],
-    ["Meting voedingsspanning regelaar(s)", "x", "x", "x"],
-    ["Interventieschakelaars op automatisch ingesteld", "x", "x", "x"],
-    ["Werking UPS en standtijd controleren, indien aanwezig", "x", "x", "x"],
-    ["Tekstlabels regelaar(s) en IO-modulen aanwezig", "x", "x", "x"],
-    ["DDC FIRMWARE", "", "", ""],
-    ["Benodigde licenties aanwezig", "x", "x", "x"],
-    ["Trendstorage geheugen", "x", "x", "x"],
-    ["Systeemdatum en -tijd correct", "x", "x", "x"],
-    ["Controle softwareversie op regelaar, modules en naregelingen", "x", "x", "x"],
-    ["Systeemload CPU/geheugen controleren", "x", "x", "x"],
-    ["Map Opmerkingen nakijken in regelaar (logboek)", "x", "x", "x"],
-    ["Back-up maken van controler", "x", "x", "x"],
-    ["Controleren aanwezigheid automatische back-up ", "x", "x", "x"],
-    ["Integriteit automatische back-up", "x", "x", "x"],
-    ["Systeem events (100) controleren", "x", "x", "x"],
-    ["FUNCTIONELE SOFTWARE (FYSIEK)", "", "", ""],
-    ["Map Programma's controleren", "x", "x", "x"],
-    ["Binding Diagnostics controleren", "x", "x", "x"],
-    ["Standaard loggen aanwezig", "", "x", "x"],
-    ["Extended loggen aanwezig", "", "x", "x"],
-    ["Standen softwareschakelaars op automatisch", "x", "x", "x"],
-    ["I/O softwarematig geforceerd", "x", "x", "x"],
-    ["Values geforceerd", "x", "x", "x"],
-    ["Alarmen disabled", "x", "x", "x"],
-    ["Aantal urgente en niet urgente alarmen noteren", "x", "x", "x"],
-    ["Storingen overzicht en historie vastleggen", "x", "x", "x"],
-    ["Instellingen prioriteiten storingen", "", "x", "x"],
-    ["Doormeldingen verzamelstoringen controleren", "x", "x", "x"],
-    ["Controleren werking overwerkschakelaars (software)", "", "", "x"],
-    ["Controleren klok- en vakantieprogramma's", "", "", "x"],
-    ["Controleren aanwezigheid van zomer-/winterblokkeringen", "", "x", "x"],
-    ["Werking snelkoppelingen grafische interface", "", "", "x"],
-    ["Regelkringen berekend setpoint/actuele waarde", "", "", "x"],
-    ["Werking brandschakelaars/schakelingen, volgens PVE en RTO", "", "", "x"],
-    ["Functietest scenario's: thermostaten vorst, minimaal, maximaal, druk", "", "", "x"],
-    ["Functietest schakelende servomotoren", "", "", "x"],
-    ["Warmtebeeldcontrole van aangesloten naregelingen", "", "", "x"],
-]
+logger = logging.getLogger(__name__)
 
 class RapportageGenerator(tk.Toplevel):
     def __init__(self, master=None):
         super().__init__(master)
         self.title("StruxureGuard - Rapportage Generator")
         self.resizable(True, True)
+        self._laad_pad = None
         self._create_widgets()
         self.after(100, self._adjust_window_size)
 
@@ -78,21 +37,6 @@ class RapportageGenerator(tk.Toplevel):
     def _create_widgets(self):
         self.entries = {}
 
-        combobox_velden = {
-            "Contractniveau:": ["Basis", "Standaard", "Totaal"],
-            "Type gebouwgebruik:": ["Kantoor (gehuurd)", "Kantoor (verhuurd)", "Kantoor eigen gebruik", "School", "Ziekenhuis", "Overig"],
-            "Aantal onderhoudsrapportages in contractjaar": ["1", "2", "3", "4"],
-            "Meet- en regel onderhoudsrapportage": ["1", "2", "3", "4"],
-            "Merk regelinstallatie": ["Schneider Electric"],
-            "Type regelinstallatie": ["Ecostruxure Building Operation"],
-            "Naregelingen op het GBS aangesloten": ["geen naregelingen aanwezig", "middels BACnet IP", "middels Modbus IP", "middels BACnet MS/tp", "middels Modbus RTU", "middels diverse protocollen"],
-            "Type naregelingen": ["B3 serie", "RP-C serie", "MP-C serie", "6-wegventielen", "diverse"],
-            "Hoofd gasmeter uitgelezen op GBS": ["Nee", "Ja"],
-            "Hoofd elektrameter uitgelezen op GBS": ["Nee", "Ja"],
-            "Warmte wordt opgewekt middels": ["nvt", "ketel(s)", "warmtepomp(en)", "bron(nen)", "WKO (bron en WP)"],
-            "Koude wordt opgewekt middels": ["nvt", "ketel(s)", "warmtepomp(en)", "bron(nen)", "WKO (bron en WP)"],
-        }
-
         top_frame = ttk.Frame(self)
         top_frame.pack(fill="x", padx=10, pady=(10, 4))
         ttk.Label(top_frame, text="Templatepad:").grid(row=0, column=0, sticky="w", pady=(6, 0))
@@ -100,6 +44,8 @@ class RapportageGenerator(tk.Toplevel):
         self.template_entry = ttk.Entry(top_frame, textvariable=self.template_path_var, width=50, state="readonly")
         self.template_entry.grid(row=0, column=1, sticky="w", pady=(6, 0))
         ttk.Button(top_frame, text="Selecteer Template", command=self._select_template).grid(row=0, column=2, padx=(10, 0), pady=(6, 0))
+        self.status_var = tk.StringVar()
+        ttk.Label(top_frame, textvariable=self.status_var, foreground="gray").grid(row=0, column=3, sticky="w", padx=(10, 0), pady=(6, 0))
 
         ttk.Label(top_frame, text="Wachtwoord:").grid(row=1, column=0, sticky="w", padx=(0, 8))
         self.password_entry = ttk.Entry(top_frame, show="*", width=30)
@@ -113,110 +59,82 @@ class RapportageGenerator(tk.Toplevel):
         left_column.grid(row=0, column=0, sticky="nsew", padx=(0, 20))
         right_column.grid(row=0, column=1, sticky="nsew")
 
-        secties_links = {
-            "KLANT- EN CONTRACTINFORMATIE": [
-                "Klantnaam/Gebouwnaam:", "Locatie:", "Adres:", "Type gebouwgebruik:",
-                "__SEPARATOR__",
-                "Contactpersoon technische dienst:", "Telefoonnummer contactpersoon:", "Email contactpersoon:",
-                "__SEPARATOR__",
-                "Contactpersoon contract:", "Telefoonnummer contactpersoon:", "Email contactpersoon:",
-                "__SEPARATOR__",
-                "Contractjaar:", "Aantal onderhoudsrapportages in contractjaar", "Contractniveau:"
-            ],
-            "INFORMATIE EQUANS SERVICES": [
-                "Onderhoud uitgevoerd door:", "Rapportage opgesteld door:", "Contractmanager Services:"
-            ],
-            
-        }
-
-        secties_rechts = {
-            "INFORMATIE ONDERHOUDSBEURT": [
-                "Meet- en regel onderhoudsrapportage", "Datum of periode uitgevoerde onderhoud:"
-            ],
-            "INFORMATIE REGELINSTALLATIE": [
-                "Merk regelinstallatie", "Type regelinstallatie", "Versie GBS software:",
-                "Aantal centrale regelpanelen aanwezig:", "Naregelingen op het GBS aangesloten", "Type naregelingen",
-                "Aantal floormanagerpanelen aanwezig:", "Aantal naregelingen aanwezig:", "Aantal ruimtebedieningen aanwezig:"
-            ],
-            "INFORMATIE KLIMAATINSTALLATIES EN ENERGIE": [
-                "Hoofd gasmeter uitgelezen op GBS", "Hoofd elektrameter uitgelezen op GBS",
-                "Warmte wordt opgewekt middels", "Koude wordt opgewekt middels",
-                "Aantal aanwezige luchtbehandelingskasten:"
-            ]
-        }
-
-        def plaats_secties(parent, secties):
+        def plaats_sectie(parent, sectie):
             entry_width = 40
             combobox_width = 37
-            for titel, velden in secties.items():
-                frame = ttk.LabelFrame(parent, text=titel)
-                frame.pack(fill="x", pady=4)
-                frame.columnconfigure(0, minsize=220)
-                frame.columnconfigure(1, minsize=320, weight=1)
-
-                for idx, veld in enumerate(velden):
-                    if veld == "__SEPARATOR__":
-                        ttk.Separator(frame, orient="horizontal").grid(row=idx, column=0, columnspan=2, sticky="ew", pady=4)
-                        continue
-
-                    label = ttk.Label(frame, text=veld, anchor="w")
-                    label.grid(row=idx, column=0, sticky="w", padx=(10, 8), pady=2)
-
-                    if veld in combobox_velden:
-                        values = combobox_velden[veld]
-                        if veld == "Contractniveau:":
-                            help_frame = ttk.Frame(frame)
-                            help_frame.grid(row=idx, column=1, padx=(0, 11), pady=2, sticky="e")
-                            combobox = ttk.Combobox(help_frame, values=values, width=32)
-                            combobox.grid(row=0, column=0, sticky="ew")
-                            help_button = ttk.Button(help_frame, text="?", width=3, command=self._toon_contractniveau_popup)
-                            help_button.grid(row=0, column=1, padx=(3, 0))
-                            self.entries[veld] = combobox
-                        else:
-                            entry = ttk.Combobox(frame, values=values, width=combobox_width)
-                            entry.grid(row=idx, column=1, padx=(0, 11), pady=2, sticky="e")
-                            self.entries[veld] = entry
+            frame = ttk.LabelFrame(parent, text=sectie.titel)
+            frame.pack(fill="x", pady=4)
+            frame.columnconfigure(0, minsize=220)
+            frame.columnconfigure(1, minsize=320, weight=1)
+
+            for idx, veld in enumerate(sectie.items):
+                if veld is SCHEIDING:
+                    ttk.Separator(frame, orient="horizontal").grid(row=idx, column=0, columnspan=2, sticky="ew", pady=4)
+                    continue
+
+                label = ttk.Label(frame, text=veld.label, anchor="w")
+                label.grid(row=idx, column=0, sticky="w", padx=(10, 8), pady=2)
+
+                if veld.type == COMBOBOX:
+                    if veld.hulp:
+                        help_frame = ttk.Frame(frame)
+                        help_frame.grid(row=idx, column=1, padx=(0, 11), pady=2, sticky="e")
+                        entry = ttk.Combobox(help_frame, values=veld.keuzes, width=32)
+                        entry.grid(row=0, column=0, sticky="ew")
+                        help_button = ttk.Button(help_frame, text="?", width=3, command=self._toon_contractniveau_popup)
+                        help_button.grid(row=0, column=1, padx=(3, 0))
                     else:
-                        entry = ttk.Entry(frame, width=entry_width)
-                        entry.grid(row=idx, column=1, padx=(0, 10), pady=2, sticky="e")
-                        self.entries[veld] = entry
+                        entry = ttk.Combobox(frame, values=veld.keuzes, width=combobox_width)
+                        entry.grid(row=idx, column=1, padx=(0, 11), pady=2, sticky="e")
+                else:
+                    entry = ttk.Entry(frame, width=entry_width)
+                    entry.grid(row=idx, column=1, padx=(0, 10), pady=2, sticky="e")
+                self.entries[veld.sleutel] = entry
 
-        plaats_secties(left_column, secties_links)
-        plaats_secties(right_column, secties_rechts)
+        for sectie in SCHEMA.secties:
+            plaats_sectie(left_column if sectie.kolom == LINKS else right_column, sectie)
 
         actions_frame = ttk.Frame(self)
         actions_frame.pack(pady=12)
         ttk.Button(actions_frame, text="Genereer Rapportage", command=self._generate_report).grid(row=0, column=0, padx=10)
         ttk.Button(actions_frame, text="Exporteer naar XML", command=self._export_to_xml).grid(row=0, column=1, padx=10)
         ttk.Button(actions_frame, text="Importeer vanuit XML", command=self._import_from_xml).grid(row=0, column=2, padx=10)
+        ttk.Button(actions_frame, text="Opslaan in archief", command=self._opslaan_in_archief).grid(row=0, column=3, padx=10)
+        ttk.Button(actions_frame, text="Openen uit archief", command=self._open_uit_archief).grid(row=0, column=4, padx=10)
 
     def _toon_contractniveau_popup(self):
+        # Het venster wordt één keer opgebouwd uit het checklistmodel en daarna hergebruikt
+        popup = getattr(self, "_contractniveau_popup", None)
+        if popup is not None and popup.winfo_exists():
+            self._markeer_contractniveau()
+            popup.deiconify()
+            popup.lift()
+            return
         popup = tk.Toplevel(self)
         popup.title("Toelichting Contractniveau")
-
-        style = ttk.Style(popup)
-        style.configure("Bold.TREEVIEW", font=("TkDefaultFont", 10, "bold"))
+        popup.protocol("WM_DELETE_WINDOW", popup.withdraw)
+        self._contractniveau_popup = popup
 
         # Treeview met scrollbar in apart frame
         frame = ttk.Frame(popup)
         frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        tree = ttk.Treeview(frame, columns=CONTRACTNIVEAU_KOLOMMEN, show="headings", height=20)
-        for col in CONTRACTNIVEAU_KOLOMMEN:
+        tree = ttk.Treeview(frame, columns=CHECKLIST.kolommen, show="headings", height=20)
+        for col in CHECKLIST.kolommen:
             tree.heading(col, text=col)
             if col == "Omschrijving":
                 tree.column(col, width=450, anchor="w")  # links uitgelijnd
             else:
                 tree.column(col, width=70, anchor="center")  # gecentreerd
 
-
-        tree.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
-
-        for row in CONTRACTNIVEAU_TABEL:
-            if all(cell == "" for cell in row[1:]):
-                tree.insert("", "end", values=row, tags=("bold",))
-            else:
-                tree.insert("", "end", values=row)
+        tree.tag_configure("categorie", font=("TkDefaultFont", 10, "bold"))
+        tree.tag_configure("vereist", background="#e6f4fb")
+        self._contractniveau_items = []
+        for waarden, tags in CHECKLIST.rijen:
+            iid = tree.insert("", "end", values=waarden, tags=tags)
+            if not tags:
+                self._contractniveau_items.append(iid)
+        self._contractniveau_tree = tree
 
         # Scrollbar toevoegen
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
@@ -228,8 +146,12 @@ class RapportageGenerator(tk.Toplevel):
         frame.rowconfigure(0, weight=1)
         frame.columnconfigure(0, weight=1)
 
+        self._contractniveau_status = tk.StringVar()
+        ttk.Label(popup, textvariable=self._contractniveau_status).pack()
+        self._markeer_contractniveau()
+
         # Sluitknop
-        ttk.Button(popup, text="Sluiten", command=popup.destroy).pack(pady=10)
+        ttk.Button(popup, text="Sluiten", command=popup.withdraw).pack(pady=10)
 
         # Laat tkinter de juiste grootte bepalen
         popup.update_idletasks()
@@ -237,6 +159,19 @@ class RapportageGenerator(tk.Toplevel):
         popup.minsize(width=w, height=900)
         popup.geometry(f"{w}x600")
 
+    def _markeer_contractniveau(self):
+        # Verplichte items van het gekozen contractniveau markeren
+        try:
+            niveau = CHECKLIST.niveau(self.entries["contractniveau"].get())
+        except ValueError:
+            niveau = None
+        vereist = CHECKLIST.vereist_sets[niveau] if niveau else frozenset()
+        for item, iid in zip(CHECKLIST.items, self._contractniveau_items):
+            self._contractniveau_tree.item(iid, tags=("vereist",) if item.nummer in vereist else ())
+        if niveau:
+            self._contractniveau_status.set(f"Contractniveau {niveau}: {len(vereist)} van {len(CHECKLIST.items)} punten verplicht")
+        else:
+            self._contractniveau_status.set("")
 
     def _select_template(self):
         file_path = filedialog.askopenfilename(filetypes=[("Templates", "*.docx *.dotx *.xlsx *.xml *.xlsm"), ("Alle bestanden", "*.*")])
@@ -247,147 +182,207 @@ class RapportageGenerator(tk.Toplevel):
                 self._laad_templategegevens(file_path)
 
     def _laad_templategegevens(self, excel_pad):
-        import xlwings as xw
-
+        """
+        Start het uitlezen van het tabblad 'Gegevens' op de achtergrond; de
+        velden worden gevuld zodra het klaar is, het venster blijft bruikbaar.
+        """
         if not os.path.exists(excel_pad):
             messagebox.showerror("Fout", f"Bestand niet gevonden: {excel_pad}")
             return
 
-        try:
-            app = xw.App(visible=False)
-            wb = app.books.open(excel_pad)
-
-            if "Gegevens" not in [s.name for s in wb.sheets]:
-                wb.close()
-                app.quit()
-                messagebox.showerror("Fout", "Tabblad 'Gegevens' niet gevonden in Excelbestand.")
-                return
-
-            sheet = wb.sheets["Gegevens"]
-
-            # Laad kolom A en B tot maximaal 200 rijen (voorkomt grote selecties)
-            kolom_a = sheet.range("A1:A200").value
-            kolom_b = sheet.range("B1:B200").value
+        resultaat = {}
+        self._laad_pad = excel_pad
+        self.status_var.set("Gegevens laden...")
 
-            wb.close()
-            app.quit()
-        except Exception as e:
+        def lees():
+            timer = start_run("templategegevens", werkboek=os.path.basename(excel_pad))
             try:
-                app.quit()
-            except:
-                pass
-            messagebox.showerror("Fout", f"Fout bij uitlezen Excelbestand: {str(e)}")
+                with timer.span("lees_gegevens"):
+                    resultaat["data"] = lees_gegevens(excel_pad)
+            except Exception as e:
+                resultaat["fout"] = e
+            timer.finish(velden=len(resultaat.get("data") or ()), fout=type(resultaat["fout"]).__name__
+                         if "fout" in resultaat else None)
+
+        thread = threading.Thread(target=lees, daemon=True)
+        thread.start()
+        self.after(20, self._wacht_op_gegevens, thread, excel_pad, resultaat)
+
+    def _wacht_op_gegevens(self, thread, excel_pad, resultaat):
+        if thread.is_alive():
+            self.after(20, self._wacht_op_gegevens, thread, excel_pad, resultaat)
+            return
+        if excel_pad != self._laad_pad:
+            # Inmiddels is een ander template gekozen
             return
+        self.status_var.set("")
+        fout = resultaat.get("fout")
+        if isinstance(fout, KeyError):
+            messagebox.showerror("Fout", "Tabblad 'Gegevens' niet gevonden in Excelbestand.")
+        elif fout is not None:
+            messagebox.showerror("Fout", f"Fout bij uitlezen Excelbestand: {str(fout)}")
+        else:
+            self._vul_velden(resultaat["data"])
+
+    def _vul_velden(self, waarden):
+        """
+        Zet veldwaarden (veldsleutel -> tekst) in het formulier; velden die niet
+        in waarden staan blijven ongewijzigd.
+        """
+        for sleutel, waarde in waarden.items():
+            entry = self.entries.get(sleutel)
+            if entry is None:
+                continue
+            if isinstance(entry, ttk.Combobox):
+                # Kijk of de waarde in de lijst staat; zo niet, voeg tijdelijk toe
+                if waarde and waarde not in entry['values']:
+                    entry['values'] = list(entry['values']) + [waarde]
+                entry.set(waarde)
+            else:
+                entry.delete(0, tk.END)
+                entry.insert(0, waarde)
 
-        # Zorg dat we altijd met lijsten werken
-        if not isinstance(kolom_a, list):
-            kolom_a = [kolom_a]
-        if not isinstance(kolom_b, list):
-            kolom_b = [kolom_b]
-
-        # Zet sleutel/waarde-paren in dictionary
-        data_dict = {}
-        for sleutel, waarde in zip(kolom_a, kolom_b):
-            if isinstance(sleutel, str) and sleutel.strip():
-                sleutel_clean = sleutel.strip().rstrip(":")
-                waarde_str = str(waarde).strip() if waarde else ""
-                if waarde_str:
-                    data_dict[sleutel_clean] = waarde_str
-
-        label_mapping = {
-        "Klantnaam": "Klantnaam/Gebouwnaam",
-        "Locatie": "Locatie",
-        "Adres": "Adres",
-        "Type gebouwgebruik door klant": "Type gebouwgebruik",
-        "Contactpersoon technische dienst, indien van toepassing:": "Contactpersoon technische dienst",
-        "Telefoonnummer contactpersoon:": "Telefoonnummer contactpersoon",
-        "Email contactpersoon:": "Email contactpersoon",
-        "Contactpersoon contract": "Contactpersoon contract",
-        "Telefoonnummer contactpersoon:": "Telefoonnummer contactpersoon",
-        "Email contactpersoon:": "Email contactpersoon",
-        "Contractjaar": "Contractjaar",
-        "Aantal onderhoudsrapportages in contractjaar": "Aantal onderhoudsrapportages in contractjaar",
-        "Contractniveau": "Contractniveau",
-        "Onderhoud uitgevoerd door": "Onderhoud uitgevoerd door",
-        "Rapportage opgesteld door": "Rapportage opgesteld door",
-        "Contractmanager Services": "Contractmanager Services",
-        "Meet- en regel onderhoudsrapportage": "Meet- en regel onderhoudsrapportage",
-        "Datum of periode uitgevoerde onderhoud:": "Datum of periode uitgevoerde onderhoud",
-        "Merk regelinstallatie": "Merk regelinstallatie",
-        "Type regelinstallatie": "Type regelinstallatie",
-        "Versie GBS software, indien van toepassing": "Versie GBS software",
-        "Aantal centrale regelpanelen aanwezig": "Aantal centrale regelpanelen aanwezig",
-        "Naregelingen aangesloten op GBS": "Naregelingen op het GBS aangesloten",
-        "Type naregelingen": "Type naregelingen",
-        "Aantal floormanagerpanelen aanwezig": "Aantal floormanagerpanelen aanwezig",
-        "Aantal naregelingen aanwezig": "Aantal naregelingen aanwezig",
-        "Aantal ruimtebedieningen aanwezig": "Aantal ruimtebedieningen aanwezig",
-        "Gasmeter op GBS": "Hoofd gasmeter uitgelezen op GBS",
-        "Elektrameter op GBS": "Hoofd elektrameter uitgelezen op GBS",
-        "Warmteopwekking": "Warmte wordt opgewekt middels",
-        "Koudeopwekking": "Koude wordt opgewekt middels",
-        "Aantal aanwezige luchtbehandelingskasten": "Aantal aanwezige luchtbehandelingskasten"
-    }
-        for label, entry in self.entries.items():
-            gui_label = label.strip(":")
-            # Zoek sleutel in mapping, anders neem de gui_label zelf
-            excel_key = next((k for k, v in label_mapping.items() if v == gui_label), gui_label)
-            if excel_key in data_dict:
-                try:
-                    if isinstance(entry, ttk.Combobox):
-                        # Kijk of de waarde in de lijst staat; zo niet, voeg tijdelijk toe
-                        combowaarde = data_dict[excel_key]
-                        if combowaarde not in entry['values']:
-                            entry['values'] = list(entry['values']) + [combowaarde]
-                        entry.set(combowaarde)
-                    else:
-                        entry.delete(0, tk.END)
-                        entry.insert(0, data_dict[excel_key])
-                except Exception:
-                    pass
+    def _waarden(self):
+        return {sleutel: entry.get() for sleutel, entry in self.entries.items()}
 
     def _generate_report(self):
-        print("Rapportage wordt gegenereerd met de volgende gegevens:")
-        print(f"Wachtwoord: {self.password_entry.get()}")
-        print(f"Templatepad: {self.template_path_var.get()}")
-        for label, entry in self.entries.items():
-            print(f"{label} {entry.get()}")
+        rapport = {"bron": "", "templatepad": self.template_path_var.get(), "velden": self._waarden()}
+        file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")],
+                                                 initialfile=pdf_naam(rapport))
+        if not file_path:
+            return
+        metingen = []
+        if rapport["templatepad"]:
+            try:
+                with RapportStore() as store:
+                    metingen = store.metingen(werkboek=rapport["templatepad"])
+            except Exception as e:
+                logger.warning(f"Kon metingen niet lezen, rapportage zonder checklist: {e}")
+        self._bouw(rapport, metingen, file_path, "pdf")
+
+    def _bouw(self, rapport, metingen, file_path, formaat):
+        # Via het manifest van de map: een ongewijzigde rapportage wordt niet opnieuw gemaakt
+        naam = os.path.basename(file_path)
+        try:
+            resultaat = bouw([(rapport, metingen)], os.path.dirname(file_path), formaat, namen=[naam])
+        except Exception as e:
+            logger.exception(f"Kon {naam} niet maken")
+            # Ook een exceptie zonder tekst is een fout
+            fout = str(e) or type(e).__name__
+        else:
+            fout = resultaat.fouten[0] if resultaat.fouten else None
+        if fout:
+            messagebox.showerror("Fout", f"Kon {naam} niet maken: {fout}")
+        elif resultaat.ongewijzigd:
+            messagebox.showinfo("Ongewijzigd", f"{naam} is al up-to-date en is niet opnieuw gemaakt.")
+        else:
+            messagebox.showinfo("Succes", f"Opgeslagen als {naam}.")
 
     def _export_to_xml(self):
-        data = {
-            "Wachtwoord": self.password_entry.get(),
-            "Templatepad": self.template_path_var.get(),
-            **{label: entry.get() for label, entry in self.entries.items()}
-        }
-        root = ET.Element("Rapportage")
-        for key, value in data.items():
-            child = ET.SubElement(root, "Veld", naam=key)
-            child.text = value
+        # Het sheetwachtwoord wordt bewust niet geëxporteerd
+        rapport = {"bron": "", "templatepad": self.template_path_var.get(), "velden": self._waarden()}
         file_path = filedialog.asksaveasfilename(defaultextension=".xml", filetypes=[("XML files", "*.xml")])
         if file_path:
-            tree = ET.ElementTree(root)
-            tree.write(file_path, encoding="utf-8", xml_declaration=True)
-            messagebox.showinfo("Succes", "Gegevens succesvol geëxporteerd naar XML.")
+            self._bouw(rapport, [], file_path, "xml")
 
     def _import_from_xml(self):
         file_path = filedialog.askopenfilename(filetypes=[("XML files", "*.xml")])
         if file_path:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            for veld in root.findall("Veld"):
-                naam = veld.attrib.get("naam")
-                waarde = veld.text or ""
-                if naam == "Wachtwoord":
-                    self.password_entry.delete(0, tk.END)
-                    self.password_entry.insert(0, waarde)
-                elif naam == "Templatepad":
-                    self.template_path_var.set(waarde)
-                elif naam in self.entries:
-                    self.entries[naam].delete(0, tk.END)
-                    self.entries[naam].insert(0, waarde)
+            try:
+                rapport = lees_xml(file_path)
+            except Exception as e:
+                messagebox.showerror("Fout", f"Kon XML niet lezen: {e}")
+                return
+            if rapport["templatepad"]:
+                self.template_path_var.set(rapport["templatepad"])
+            self._vul_velden(rapport["velden"])
             self._adjust_window_size()
             messagebox.showinfo("Succes", "Gegevens succesvol geïmporteerd uit XML.")
 
+    def _opslaan_in_archief(self):
+        rapport = {"bron": "", "templatepad": self.template_path_var.get(), "velden": self._waarden()}
+        try:
+            with RapportStore() as store:
+                resultaat = store.upsert([rapport])
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon rapportage niet opslaan: {e}")
+            return
+        if resultaat.fouten:
+            messagebox.showerror("Fout", "Vul minimaal klantnaam of locatie in om op te slaan.")
+        elif resultaat.nieuw:
+            messagebox.showinfo("Succes", f"Opgeslagen als versie {resultaat.versies[0][1]}.")
+        elif resultaat.hersteld:
+            messagebox.showinfo("Succes", f"Gelijk aan versie {resultaat.versies[0][1]}; die is weer de huidige versie.")
+        else:
+            messagebox.showinfo("Succes", f"Ongewijzigd; gelijk aan versie {resultaat.versies[0][1]}.")
+
+    def _open_uit_archief(self):
+        try:
+            store = RapportStore()
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon archief niet openen: {e}")
+            return
+
+        popup = tk.Toplevel(self)
+        popup.title("Rapportage openen uit archief")
+        zoek_var = tk.StringVar()
+        zoek_frame = ttk.Frame(popup)
+        zoek_frame.pack(fill="x", padx=10, pady=(10, 4))
+        ttk.Label(zoek_frame, text="Klantnaam:").pack(side="left")
+        zoek_entry = ttk.Entry(zoek_frame, textvariable=zoek_var, width=40)
+        zoek_entry.pack(side="left", padx=(6, 0))
+
+        kolommen = ("Klantnaam", "Locatie", "Contractjaar", "Contractniveau", "Versie")
+        tree = ttk.Treeview(popup, columns=kolommen, show="headings", height=18)
+        for col in kolommen:
+            tree.heading(col, text=col)
+            tree.column(col, width=70 if col == "Versie" else 160, anchor="w")
+        tree.pack(fill="both", expand=True, padx=10)
+        gevonden = {}
+        zoek_taak = []
+
+        def vernieuw():
+            zoek_taak.clear()
+            tekst = zoek_var.get().strip()
+            rapporten = store.zoek(limiet=500, **({"klantnaam": f"*{tekst}*"} if tekst else {}))
+            tree.delete(*tree.get_children())
+            gevonden.clear()
+            for rapport in rapporten:
+                velden = rapport["velden"]
+                item = tree.insert("", "end", values=(velden.get("klantnaam", ""), velden.get("locatie", ""),
+                                                      velden.get("contractjaar", ""), velden.get("contractniveau", ""),
+                                                      rapport["versie"]))
+                gevonden[item] = rapport
+
+        def bij_typen(_event=None):
+            for taak in zoek_taak:
+                popup.after_cancel(taak)
+            zoek_taak[:] = [popup.after(150, vernieuw)]
+
+        def openen(_event=None):
+            selectie = tree.selection()
+            if not selectie:
+                return
+            rapport = gevonden[selectie[0]]
+            if rapport["templatepad"]:
+                self.template_path_var.set(rapport["templatepad"])
+            self._vul_velden(rapport["velden"])
+            sluiten()
+
+        def sluiten():
+            store.close()
+            popup.destroy()
+
+        zoek_entry.bind("<KeyRelease>", bij_typen)
+        tree.bind("<Double-1>", openen)
+        knoppen = ttk.Frame(popup)
+        knoppen.pack(pady=10)
+        ttk.Button(knoppen, text="Openen", command=openen).grid(row=0, column=0, padx=10)
+        ttk.Button(knoppen, text="Sluiten", command=sluiten).grid(row=0, column=1, padx=10)
+        popup.protocol("WM_DELETE_WINDOW", sluiten)
+        vernieuw()
+        zoek_entry.focus_set()
+
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,8 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
 import logging
-from MKDIR import MKDIRApp
-from Excelwriter import ExcelWriterWindow
 from debuglog import show_debug_log
 from tkinter import filedialog
 
@@ -41,6 +39,8 @@ class ToolboxWindow(tk.Toplevel):
         Open the MKDIR tool window and bring it to the front.
         """
         logger.info("MKDIR tool geopend vanuit Toolbox")
+        # Tool modules are loaded on first use
+        from MKDIR import MKDIRApp
         win = MKDIRApp(self)
         win.lift()
         win.focus_force()
@@ -50,6 +50,7 @@ class ToolboxWindow(tk.Toplevel):
         Open the ExcelWriter tool window and bring it to the front.
         """
         logger.info("ExcelWriter tool geopend vanuit Toolbox")
+        from Excelwriter import ExcelWriterWindow
         win = ExcelWriterWindow(self)
         win.lift()
         win.focus_force()
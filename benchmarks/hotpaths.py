@@ -0,0 +1,359 @@
+"""
+Benchmark suite for the hot paths of the tools, headless (no Tk window, no Excel).
+
+Scenarios:
+- excel: the work of ExcelWriter.edit_excel for N checklist sheets x 4 sections
+  (build_write_plan, open, apply_write_plan, save) on the xlwings engine, with
+  tests.fakeexcel.FakeApp standing in for Excel; reports workbook calls too.
+- mkdir: the work of MKDIR.create_directories for 1k-10k folders with a large
+  seed file (plan_mkdir, fan_out with the journal), plus planning the same
+  names again once they exist.
+- xml: importing report XML files as "Importeer vanuit XML" does (lees_xml),
+  one by one and in bulk over the process pool, and into the archive.
+- logging: threads flooding the root logger through TkinterLogHandler while
+  the main thread flushes the queue like the Tk loop does; reports the longest
+  flush, which is how long the window would stall.
+
+Every scenario runs on synthetic inputs in a temporary folder. The excel, xml
+and logging timings are the best of --repeat runs; mkdir runs once per size.
+
+Usage:
+    python benchmarks/hotpaths.py [--only excel,mkdir,xml,logging] [--sheets 6,100]
+                                  [--folders 1000,10000] [--seed-kib 1024] [--reports 2000]
+                                  [--records 100000] [--threads 4] [--repeat 3]
+                                  [--output hotpaths.json] [--baseline old.json] [--threshold 0.2]
+
+With --baseline the script exits with status 1 when any rate dropped by more
+than threshold (fraction) compared to the baseline run.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+SCENARIOS = ("excel", "mkdir", "xml", "logging")
+
+
+def _best(repeat, func):
+    """
+    Run func repeat times; return (last value, fastest time in seconds).
+    """
+    best, value = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return value, best
+
+
+def _section_lines(sheets, rnd):
+    return {
+        "servers": [f"SRV-{idx:04d}" for idx in range(sheets)],
+        "trendstorage": [f"{rnd.randint(1, 500)} GB" for _ in range(sheets)],
+        "cpu": [str(rnd.randint(5, 95)) for _ in range(sheets)],
+        "memory": [str(rnd.randint(5, 95)) for _ in range(sheets)],
+    }
+
+
+def bench_excel(sheets, repeat):
+    from excelbackend import XlwingsBackend
+    from excelplan import apply_write_plan, build_write_plan
+    from excelsession import ExcelSession
+    from tests.fakeexcel import FakeApp
+
+    FakeApp.checklist_sheets = sheets
+    FakeApp.sheet_password = "geheim"
+    lines = _section_lines(sheets, random.Random(sheets))
+    session = ExcelSession(app_factory=FakeApp)
+    engine = XlwingsBackend(session)
+    try:
+        with tempfile.TemporaryDirectory(prefix="sg-excel-") as tmp:
+            path = os.path.join(tmp, "checklist.xlsm")
+            open(path, "wb").close()
+
+            def edit():
+                plan = build_write_plan(lines, all_licenses=True)
+                wb = engine.open(path)
+                try:
+                    result = apply_write_plan(wb, plan, "geheim")
+                    wb.save()
+                finally:
+                    wb.close()
+                return result
+
+            result, seconds = _best(repeat, edit)
+    finally:
+        session.shutdown()
+        FakeApp.checklist_sheets = 6
+        FakeApp.sheet_password = None
+    return {
+        "seconds": seconds,
+        "rate": sheets / seconds,
+        "unit": "sheets/s",
+        "workbook_calls": result.calls,
+        "legacy_calls": result.legacy_calls,
+    }
+
+
+def bench_mkdir(folders, seed_kib):
+    from fanout import fan_out
+    from mkdirjournal import JournalWriter
+    from mkdirplan import plan_mkdir
+
+    names = [f"Regelkast {idx:05d} - Gebouw {idx % 37}" for idx in range(folders)]
+    with tempfile.TemporaryDirectory(prefix="sg-mkdir-") as tmp:
+        source = os.path.join(tmp, "seed.xlsm")
+        with open(source, "wb") as f:
+            f.write(os.urandom(seed_kib * 1024))
+        base = os.path.join(tmp, "out")
+        os.mkdir(base)
+
+        start = time.perf_counter()
+        plan = plan_mkdir(base, names, source)
+        t_plan = time.perf_counter() - start
+        journal = JournalWriter(base)
+        source_stat = os.stat(source)
+
+        def completed(name, file_name):
+            if file_name:
+                journal.record_file(name, file_name, source_stat)
+            else:
+                journal.record_dir(name)
+
+        start = time.perf_counter()
+        result = fan_out(base, [item.name for item in plan.work], source, completed=completed)
+        journal.close(completed=not result.errors)
+        t_create = time.perf_counter() - start
+        assert not result.errors, result.errors[:3]
+
+        start = time.perf_counter()
+        replan = plan_mkdir(base, names, source)
+        t_replan = time.perf_counter() - start
+        assert not replan.work, f"{len(replan.work)} folder(s) planned again"
+    return {
+        "seconds": t_plan + t_create,
+        "rate": folders / (t_plan + t_create),
+        "unit": "folders/s",
+        "plan_seconds": t_plan,
+        "create_seconds": t_create,
+        "replan_seconds": t_replan,
+        "mb_per_second": result.mb_per_second,
+        "methods": result.methods,
+    }
+
+
+def _write_reports(folder, count):
+    from rapportbulk import schrijf_xml
+    from rapportschema import SCHEMA
+
+    rnd = random.Random(count)
+    paths = []
+    for idx in range(count):
+        velden = {}
+        for veld in SCHEMA.velden:
+            if veld.keuzes:
+                velden[veld.sleutel] = rnd.choice(veld.keuzes)
+            elif rnd.random() < 0.9:
+                velden[veld.sleutel] = f"{veld.label.rstrip(':')} {idx} " + "x" * rnd.randint(0, 30)
+        path = os.path.join(folder, f"site_{idx:05d}.xml")
+        schrijf_xml({"templatepad": f"C:/Templates/site_{idx:05d}.xlsm", "velden": velden}, path)
+        paths.append(path)
+    return paths
+
+
+def bench_xml(reports, repeat, workers=None):
+    from rapportbulk import lees_rapporten, lees_xml
+    from rapportstore import RapportStore
+
+    with tempfile.TemporaryDirectory(prefix="sg-xml-") as tmp:
+        folder = os.path.join(tmp, "xml")
+        os.mkdir(folder)
+        paths = _write_reports(folder, reports)
+
+        # What _import_from_xml does per file, without filling the form
+        _, t_single = _best(repeat, lambda: [lees_xml(path) for path in paths])
+        (rapporten, fouten), t_bulk = _best(repeat, lambda: lees_rapporten([folder], workers))
+        assert len(rapporten) == reports and not fouten, fouten[:3]
+
+        def archive():
+            with RapportStore(os.path.join(tmp, f"archief-{time.perf_counter_ns()}.db")) as store:
+                return store.upsert(rapporten)
+
+        resultaat, t_store = _best(repeat, archive)
+        assert resultaat.nieuw == reports and not resultaat.fouten
+    return {
+        "seconds": t_single,
+        "rate": reports / t_single,
+        "unit": "reports/s",
+        "bulk_rate": reports / t_bulk,
+        "archive_rate": reports / t_store,
+    }
+
+
+class _NoTkMaster:
+    """
+    Stands in for the Tk root so start_log_pump queues records instead of storing them directly.
+    """
+
+    def after(self, delay, callback):
+        pass
+
+
+def bench_logging(records, threads, repeat):
+    import debuglog
+    from debuglog import TkinterLogHandler, flush_log_queue, get_log_store, start_log_pump, stop_log_pump
+
+    root = logging.getLogger()
+    handler = TkinterLogHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    old_level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    start_log_pump(_NoTkMaster())
+    per_thread = records // threads
+    longest_flush = 0.0
+    try:
+        def flood():
+            nonlocal longest_flush
+            done = threading.Event()
+            remaining = [threads]
+            lock = threading.Lock()
+
+            def worker(idx):
+                log = logging.getLogger(f"bench.worker{idx}")
+                for seq in range(per_thread):
+                    log.info(f"Written '{seq}%' to Checklist Regelkast ({idx}) F8")
+                with lock:
+                    remaining[0] -= 1
+                    if not remaining[0]:
+                        done.set()
+
+            workers = [threading.Thread(target=worker, args=(idx,)) for idx in range(threads)]
+            for thread in workers:
+                thread.start()
+            # The Tk loop flushes every FLUSH_INTERVAL_MS
+            while not done.wait(debuglog.FLUSH_INTERVAL_MS / 1000):
+                start = time.perf_counter()
+                flush_log_queue()
+                longest_flush = max(longest_flush, time.perf_counter() - start)
+            for thread in workers:
+                thread.join()
+            start = time.perf_counter()
+            flush_log_queue()
+            longest_flush = max(longest_flush, time.perf_counter() - start)
+
+        _, seconds = _best(repeat, flood)
+        stored = len(get_log_store())
+    finally:
+        stop_log_pump()
+        root.removeHandler(handler)
+        root.setLevel(old_level)
+    return {
+        "seconds": seconds,
+        "rate": per_thread * threads / seconds,
+        "unit": "records/s",
+        "longest_flush_ms": longest_flush * 1000,
+        "records_in_store": stored,
+    }
+
+
+def _ints(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def run(only=SCENARIOS, sheets=(6, 100), folders=(1000, 10000), seed_kib=1024, reports=2000,
+        records=100000, threads=4, repeat=3, workers=None):
+    """
+    Run the selected scenarios and return the results as a JSON-serialisable dict.
+    """
+    results = {}
+    if "excel" in only:
+        for count in sheets:
+            results[f"excel_{count}_sheets"] = bench_excel(count, repeat)
+    if "mkdir" in only:
+        for count in folders:
+            results[f"mkdir_{count}_folders"] = bench_mkdir(count, seed_kib)
+    if "xml" in only:
+        results[f"xml_{reports}_reports"] = bench_xml(reports, repeat, workers)
+    if "logging" in only:
+        results[f"logging_{threads}_threads"] = bench_logging(records, threads, repeat)
+    return {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpus": os.cpu_count(),
+        "seed_kib": seed_kib,
+        "scenarios": results,
+    }
+
+
+def _rates(result):
+    # Every "rate" and "*_rate" of every scenario, higher is better
+    for name, values in result.get("scenarios", {}).items():
+        for key, value in values.items():
+            if key == "rate" or key.endswith("_rate"):
+                yield f"{name}.{key}", value
+
+
+def compare(result, baseline, threshold):
+    """
+    Return a list of regressions of result compared to baseline.
+    """
+    old_rates = dict(_rates(baseline))
+    regressions = []
+    for key, new in _rates(result):
+        old = old_rates.get(key)
+        if old and new and new < old * (1 - threshold):
+            regressions.append(f"{key}: {old:.0f} -> {new:.0f} ({(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the Excel, MKDIR, XML import and logging hot paths.")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help=f"scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--sheets", default="6,100", help="checklist sheet counts for excel (default: 6,100)")
+    parser.add_argument("--folders", default="1000,10000", help="folder counts for mkdir (default: 1000,10000)")
+    parser.add_argument("--seed-kib", type=int, default=1024, help="size of the mkdir seed file (default: 1024)")
+    parser.add_argument("--reports", type=int, default=2000, help="report files for xml (default: 2000)")
+    parser.add_argument("--records", type=int, default=100000, help="log records for logging (default: 100000)")
+    parser.add_argument("--threads", type=int, default=4, help="logging threads (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, the fastest counts (default: 3)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for xml (default: CPU count)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    result = run(only, _ints(args.sheets), _ints(args.folders), args.seed_kib, args.reports,
+                 args.records, args.threads, max(1, args.repeat), args.workers)
+    for name, values in result["scenarios"].items():
+        extra = ", ".join(f"{key} {value:.4g}" if isinstance(value, float) else f"{key} {value}"
+                          for key, value in values.items() if key not in ("seconds", "rate", "unit"))
+        print(f"{name:24s} {values['rate']:10.0f} {values['unit']:10s} {values['seconds']:8.3f}s  {extra}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Throughput benchmark for bulk report import/export (rapportbulk).
+
+Generates N report XML files in a temporary folder and measures:
+- reading all XML files serially and over the process pool,
+- writing and reading them as JSON-lines and as sgr (compact binary),
+- writing them back as XML files over the process pool,
+plus the output size per format.
+
+Usage:
+    python benchmarks/rapportbulk.py [--reports 2000] [--workers N] [--output bulk.json]
+                                     [--baseline old.json] [--threshold 0.2]
+
+With --baseline the script exits with status 1 when any throughput dropped by
+more than threshold (fraction).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import rapportbulk  # noqa: E402
+from rapportschema import SCHEMA  # noqa: E402
+
+
+def make_reports(folder, count, seed=1):
+    """
+    Write count report XML files (old style, with a password field) to folder.
+
+    Returns:
+        list: The file paths.
+    """
+    rnd = random.Random(seed)
+    paths = []
+    for idx in range(count):
+        velden = {}
+        for veld in SCHEMA.velden:
+            if veld.keuzes:
+                velden[veld.sleutel] = rnd.choice(veld.keuzes)
+            elif rnd.random() < 0.9:
+                velden[veld.sleutel] = f"{veld.label.rstrip(':')} {idx} " + "x" * rnd.randint(0, 30)
+        path = os.path.join(folder, f"site_{idx:05d}.xml")
+        rapportbulk.schrijf_xml({"templatepad": f"C:/Templates/site_{idx:05d}.xlsm", "velden": velden}, path)
+        paths.append(path)
+    # Older exports also carried the sheet password; the reader must skip it
+    with open(paths[0], encoding="utf-8") as f:
+        text = f.read()
+    with open(paths[0], "w", encoding="utf-8") as f:
+        f.write(text.replace("<Rapportage>", '<Rapportage><Veld naam="Wachtwoord">geheim</Veld>', 1))
+    return paths
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def run(count=2000, workers=None):
+    """
+    Run the benchmark and return the results as a JSON-serialisable dict.
+    """
+    with tempfile.TemporaryDirectory(prefix="sg-bulk-") as tmp:
+        source = os.path.join(tmp, "xml")
+        os.mkdir(source)
+        paths = make_reports(source, count)
+        xml_bytes = sum(os.path.getsize(path) for path in paths)
+
+        (serial, _), t_serial = _timed(rapportbulk.lees_xml_bestanden, paths, 1)
+        (reports, errors), t_pool = _timed(rapportbulk.lees_xml_bestanden, paths, workers)
+        assert len(reports) == count and not errors, errors
+        assert serial == reports
+
+        jsonl = os.path.join(tmp, "rapporten.jsonl")
+        sgr = os.path.join(tmp, "rapporten.sgr")
+        _, t_jsonl_write = _timed(rapportbulk.schrijf_jsonl, reports, jsonl)
+        jsonl_reports, t_jsonl_read = _timed(lambda: list(rapportbulk.lees_jsonl(jsonl)))
+        _, t_sgr_write = _timed(rapportbulk.schrijf_sgr, reports, sgr)
+        sgr_reports, t_sgr_read = _timed(lambda: list(rapportbulk.lees_sgr(sgr)))
+        assert jsonl_reports == sgr_reports
+        for path in (jsonl, sgr):
+            with open(path, "rb") as f:
+                assert b"geheim" not in f.read(), f"password written to {path}"
+
+        (written, write_errors), t_xml_write = _timed(rapportbulk.schrijf_rapporten, reports,
+                                                     os.path.join(tmp, "uit"), "xml", workers)
+        assert written == count and not write_errors, write_errors
+
+        def rate(seconds):
+            return count / seconds if seconds else None
+
+        return {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "reports": count,
+            "workers": workers or os.cpu_count(),
+            "reports_per_second": {
+                "xml_read_serial": rate(t_serial),
+                "xml_read_pool": rate(t_pool),
+                "xml_write_pool": rate(t_xml_write),
+                "jsonl_write": rate(t_jsonl_write),
+                "jsonl_read": rate(t_jsonl_read),
+                "sgr_write": rate(t_sgr_write),
+                "sgr_read": rate(t_sgr_read),
+            },
+            "bytes": {"xml": xml_bytes, "jsonl": os.path.getsize(jsonl), "sgr": os.path.getsize(sgr)},
+        }
+
+
+def compare(result, baseline, threshold):
+    """
+    Return a list of regressions of result compared to baseline.
+    """
+    regressions = []
+    for key, new in result["reports_per_second"].items():
+        old = baseline.get("reports_per_second", {}).get(key)
+        if old and new and new < old * (1 - threshold):
+            regressions.append(f"{key}: {old:.0f} -> {new:.0f} reports/s ({(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure bulk report import/export throughput.")
+    parser.add_argument("--reports", type=int, default=2000, help="number of report files (default: 2000)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    result = run(args.reports, args.workers)
+    for key, value in result["reports_per_second"].items():
+        print(f"{key:16s} {value:10.0f} reports/s")
+    for key, value in result["bytes"].items():
+        print(f"{key:16s} {value / 1024:10.0f} KiB ({value / result['reports']:.0f} bytes/report)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
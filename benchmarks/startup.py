@@ -0,0 +1,166 @@
+"""
+Startup benchmark for StruxureGuard.
+
+Measures, in fresh interpreter processes:
+- time-to-first-window: process start until the main window has been drawn,
+- the import time of every module loaded by "import Mainscreen" (python -X importtime),
+- which heavy modules (xlwings, pandas, tool windows, ...) are loaded at startup.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--output startup.json]
+                                 [--baseline old.json] [--threshold 0.2]
+
+With --baseline the script exits with status 1 when time-to-first-window or the
+total import time got more than threshold (fraction) slower, or when a heavy
+module is loaded at startup again.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded when a tool is opened
+HEAVY_MODULES = ["xlwings", "pandas", "numpy", "tqdm", "ebotable", "VToolBox", "MKDIR", "Excelwriter",
+                 "RapportageGenerator", "excelsession", "excelbackend"]
+
+# Runs in the child process: build the main window and report the timings
+_WINDOW_SCRIPT = r"""
+import json, sys, time
+start = time.perf_counter()
+import Mainscreen
+imported = time.perf_counter()
+error = None
+try:
+    app = Mainscreen.StruxureGuardApp()
+    app.update()
+    shown = time.perf_counter()
+    app.destroy()
+except Exception as e:
+    shown, error = None, f"{type(e).__name__}: {e}"
+heavy = [name for name in json.loads(sys.argv[1]) if name in sys.modules]
+print(json.dumps({"import": imported - start, "window": None if shown is None else shown - start,
+                  "heavy": heavy, "error": error}))
+"""
+
+
+def _child_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure_window(runs):
+    """
+    Start the app runs times and return the timings of every run.
+
+    Returns:
+        list: Dicts with process (spawn until window drawn), import, window (seconds), heavy and error.
+    """
+    results = []
+    for _ in range(runs):
+        spawn = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", _WINDOW_SCRIPT, json.dumps(HEAVY_MODULES)],
+                              cwd=REPO_DIR, env=_child_env(), capture_output=True, text=True)
+        total = time.perf_counter() - spawn
+        try:
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            result = {"import": None, "window": None, "heavy": [], "error": proc.stderr.strip()[-500:]}
+        result["process"] = total if result.get("window") is not None else None
+        results.append(result)
+    return results
+
+
+def measure_imports():
+    """
+    Return {module: (self µs, cumulative µs)} for "import Mainscreen" in a fresh process.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import Mainscreen"],
+                          cwd=REPO_DIR, env=_child_env(), capture_output=True, text=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def run(runs=5):
+    """
+    Run the benchmark and return the results as a JSON-serialisable dict.
+    """
+    windows = measure_window(runs)
+    imports = measure_imports()
+    top = sorted(imports.items(), key=lambda item: item[1][1], reverse=True)[:25]
+    return {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "runs": runs,
+        "time_to_first_window": _median(run["window"] for run in windows),
+        "process_to_first_window": _median(run["process"] for run in windows),
+        "import_mainscreen": _median(run["import"] for run in windows),
+        "import_total_us": imports.get("Mainscreen", (0, 0))[1],
+        "imports_us": {name: {"self": self_us, "cumulative": cumulative_us} for name, (self_us, cumulative_us) in top},
+        "heavy_loaded": sorted({name for run in windows for name in run["heavy"]}),
+        "errors": sorted({run["error"] for run in windows if run["error"]}),
+    }
+
+
+def compare(result, baseline, threshold):
+    """
+    Return a list of regressions of result compared to baseline.
+    """
+    regressions = []
+    for key in ("time_to_first_window", "import_total_us"):
+        old, new = baseline.get(key), result.get(key)
+        if old and new and new > old * (1 + threshold):
+            regressions.append(f"{key}: {old:.4g} -> {new:.4g} (+{(new / old - 1) * 100:.0f}%)")
+    for name in result["heavy_loaded"]:
+        if name not in baseline.get("heavy_loaded", []):
+            regressions.append(f"{name} is loaded at startup")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure StruxureGuard startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="number of app starts (default: 5)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs)
+    window = result["time_to_first_window"]
+    print(f"time to first window: {window * 1000:.1f} ms" if window is not None
+          else f"time to first window: not measured ({'; '.join(result['errors'])})")
+    print(f"import Mainscreen:    {result['import_total_us'] / 1000:.1f} ms")
+    print(f"heavy modules loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+    for name, times in list(result["imports_us"].items())[:10]:
+        print(f"  {times['cumulative'] / 1000:8.1f} ms  {name}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,358 @@
 import tkinter as tk
+from tkinter import ttk
 import logging
+import queue
+import time
+from logstore import LogEntry, LogStore
+
+# How often the Tk main loop moves queued records into the store and the window
+FLUSH_INTERVAL_MS = 100
+# Delay before a changed search text is applied
+SEARCH_DELAY_MS = 150
+
+LEVEL_FILTERS = [("Alle", logging.NOTSET), ("DEBUG", logging.DEBUG), ("INFO", logging.INFO),
+                 ("WARNING", logging.WARNING), ("ERROR", logging.ERROR)]
+ALL_LOGGERS = "(alle loggers)"
+LIVE_SOURCE = "Deze sessie"
+LEVEL_COLORS = {logging.WARNING: "#b36b00", logging.ERROR: "#c00000", logging.CRITICAL: "#c00000"}
 
 _debug_window = None
-_log_text_widget = None
-_log_messages = []  # Store all log messages here
+_log_store = LogStore()  # Bounded, indexed store with the latest log records
+_log_queue = queue.SimpleQueue()  # Records from any thread, waiting for the next flush
+_pump_master = None
+
+
+class DebugLogWindow(tk.Toplevel):
+    """
+    Debug log window that only renders the visible lines of the log store.
+
+    The Text widget always holds one screen of records; scrolling, filtering on
+    level/logger and the incremental search only change which rows of the
+    LogView are rendered, so the window opens equally fast with 100 or a
+    million records.
+    """
+
+    def __init__(self, master, store):
+        """
+        Args:
+            master (tk.Widget): The parent widget.
+            store (LogStore): The records to show.
+        """
+        super().__init__(master)
+        self.live_store = store
+        self.store = store
+        self.title("Debug Log")
+        self.geometry("800x300")
+
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill='x', padx=5, pady=(5, 0))
+        ttk.Label(filter_frame, text="Bron:").pack(side='left')
+        self._reader = None
+        self.source_var = tk.StringVar(value=LIVE_SOURCE)
+        self.source_box = ttk.Combobox(filter_frame, textvariable=self.source_var, state='readonly', width=18,
+                                       postcommand=self._update_source_choices)
+        self.source_box.pack(side='left', padx=(2, 10))
+        self.source_box.bind("<<ComboboxSelected>>", lambda e: self.select_source())
+        ttk.Label(filter_frame, text="Niveau:").pack(side='left')
+        self.level_var = tk.StringVar(value=LEVEL_FILTERS[0][0])
+        level_box = ttk.Combobox(filter_frame, textvariable=self.level_var, state='readonly', width=9,
+                                 values=[name for name, _ in LEVEL_FILTERS])
+        level_box.pack(side='left', padx=(2, 10))
+        level_box.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+
+        ttk.Label(filter_frame, text="Logger:").pack(side='left')
+        self.logger_var = tk.StringVar(value=ALL_LOGGERS)
+        self.logger_box = ttk.Combobox(filter_frame, textvariable=self.logger_var, state='readonly', width=22,
+                                       postcommand=self._update_logger_choices)
+        self.logger_box.pack(side='left', padx=(2, 10))
+        self.logger_box.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+
+        ttk.Label(filter_frame, text="Zoeken:").pack(side='left')
+        self.search_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.search_var, width=25).pack(side='left', padx=2)
+        self.search_var.trace_add("write", lambda *args: self._schedule_search())
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side='right')
+        # The word index only finds word prefixes, not arbitrary substrings
+        ttk.Label(self, foreground='gray',
+                  text="Zoeken: elk woord moet het begin van een woord in het bericht zijn, "
+                       "dus 'time' vindt 'timeout', maar 'out' niet.").pack(anchor='w', padx=5)
+
+        body = ttk.Frame(self)
+        body.pack(expand=True, fill='both', padx=5, pady=5)
+        self.scrollbar = ttk.Scrollbar(body, orient='vertical', command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.text = tk.Text(body, state='disabled', wrap='none')
+        self.text.pack(side='left', expand=True, fill='both')
+        for levelno, color in LEVEL_COLORS.items():
+            self.text.tag_configure(logging.getLevelName(levelno), foreground=color)
+        self.text.bind("<Configure>", lambda e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        for key, rows in (("<Prior>", -1), ("<Next>", 1)):
+            self.bind(key, lambda e, rows=rows: self.scroll_rows(rows * self.visible_rows()))
+        self.bind("<Control-End>", lambda e: self.scroll_to(None))
+        self.bind("<Control-Home>", lambda e: self.scroll_to(0))
+
+        self._search_job = None
+        self.top = 0
+        self.follow = True
+        self.view = store.query()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.render()
+
+    def _update_source_choices(self):
+        from logsink import LogFileReader
+        self._reader = LogFileReader()
+        self.source_box["values"] = [LIVE_SOURCE] + [self._reader.describe(idx) for idx in range(len(self._reader))]
+
+    def select_source(self):
+        """
+        Show the live records or the records of one persistent log file.
+
+        A log file is only read when it is selected.
+        """
+        choice = self.source_box.current()
+        if choice <= 0 or self._reader is None:
+            self.store = self.live_store
+        else:
+            try:
+                entries = self._reader.page(choice - 1)
+            except OSError as e:
+                self.count_label.config(text=f"Kan logbestand niet lezen: {e}")
+                return
+            self.store = LogStore(max_records=max(len(entries), 1))
+            self.store.extend(entries)
+        self.apply_filter()
+
+    def _update_logger_choices(self):
+        self.logger_box["values"] = [ALL_LOGGERS] + self.store.loggers()
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        """
+        Rebuild the view from the level, logger and search fields and show its tail.
+        """
+        self._search_job = None
+        min_level = dict(LEVEL_FILTERS).get(self.level_var.get(), logging.NOTSET)
+        logger_name = self.logger_var.get()
+        loggers = None if logger_name == ALL_LOGGERS else [logger_name]
+        self.view = self.store.query(min_level, loggers, self.search_var.get())
+        self.scroll_to(None)
+
+    def visible_rows(self):
+        line_height = max(1, int(self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")))
+        return max(1, self.text.winfo_height() // line_height)
+
+    def scroll_to(self, row):
+        """
+        Show the records starting at row; None follows the newest records.
+        """
+        last_top = max(0, len(self.view) - self.visible_rows())
+        self.top = last_top if row is None else max(0, min(row, last_top))
+        self.follow = self.top >= last_top
+        self.render()
+
+    def scroll_rows(self, delta):
+        self.scroll_to(self.top + delta)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.view)))
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def records_added(self):
+        """
+        Called after new records were flushed into the live store.
+        """
+        if self.store is not self.live_store:
+            return
+        self.view.refresh()
+        self.render()
+
+    def render(self):
+        """
+        Replace the Text contents with the visible rows of the view.
+        """
+        total = len(self.view)
+        rows = self.visible_rows()
+        if self.follow:
+            self.top = max(0, total - rows)
+        entries = self.view.rows(self.top, rows)
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        for entry in entries:
+            tag = entry.levelname if entry.levelno in LEVEL_COLORS else ()
+            # One line per record; multi-line messages (tracebacks) are shown on one row
+            self.text.insert(tk.END, entry.format().replace("\n", " | ") + "\n", tag)
+        self.text.config(state='disabled')
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        suffix = f" van {len(self.store)}" if self.view.is_filtered else ""
+        self.count_label.config(text=f"{total} regels{suffix}")
+
+    def close(self):
+        global _debug_window
+        _debug_window = None
+        self.destroy()
+
 
 def show_debug_log(master=None):
     """
     Create and display a Tkinter window showing the debug log messages.
 
     If the debug window is already open, it will be brought to the front.
-    Otherwise, a new window is created with all previously stored log messages.
+    Otherwise, a new window is created showing the newest stored log records.
 
     Args:
         master (tk.Widget, optional): The parent widget for the debug window. Defaults to None.
     """
-    global _debug_window, _log_text_widget
-    if _debug_window is None or not tk.Toplevel.winfo_exists(_debug_window):
-        _debug_window = tk.Toplevel(master)
-        _debug_window.title("Debug Log")
-        _debug_window.geometry("800x300")
-        _log_text_widget = tk.Text(_debug_window, state='disabled')
-        _log_text_widget.pack(expand=True, fill='both')
-        # Insert all stored messages
-        _log_text_widget.config(state='normal')
-        for msg in _log_messages:
-            _log_text_widget.insert(tk.END, msg + '\n')
-        _log_text_widget.see(tk.END)
-        _log_text_widget.config(state='disabled')
-        _debug_window.protocol("WM_DELETE_WINDOW", _debug_window.destroy)
+    global _debug_window
+    if _debug_window is None or not _debug_window.winfo_exists():
+        flush_log_queue()
+        _debug_window = DebugLogWindow(master, _log_store)
+        if master is not None:
+            start_log_pump(master)
     else:
         _debug_window.lift()
 
-def log_to_gui(message):
+def setup_gui_logging(master, level=logging.INFO):
     """
-    Append a log message to the internal message list and update the GUI log window if visible.
+    Send all log records to the debug log window; part of the app initialisation.
+
+    Adds a TkinterLogHandler to the root logger (only once) and starts the
+    periodic flush on master's Tk loop.
+
+    Args:
+        master (tk.Misc): The application's main window.
+        level (int): Root logger level.
+
+    Returns:
+        TkinterLogHandler: The installed handler.
+    """
+    root_logger = logging.getLogger()
+    handler = next((h for h in root_logger.handlers if isinstance(h, TkinterLogHandler)), None)
+    if handler is None:
+        handler = TkinterLogHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        root_logger.addHandler(handler)
+    root_logger.setLevel(level)
+    start_log_pump(master)
+    return handler
+
+def get_log_store():
+    """
+    Return the LogStore that holds the records shown in the debug log window.
+    """
+    return _log_store
+
+def log_to_gui(message, level=logging.INFO, logger_name="gui"):
+    """
+    Queue a log message for the GUI log window.
+
+    Safe to call from any thread: it never touches Tk. The message reaches the
+    store and the window on the next flush of the Tk main loop.
 
     Args:
-        message (str): The log message to display.
+        message (str or LogEntry): The log message to display.
+        level (int): Level for a plain message.
+        logger_name (str): Logger name for a plain message.
+    """
+    entry = message if isinstance(message, LogEntry) else LogEntry(time.time(), level, logger_name, message)
+    if _pump_master is None:
+        # No Tk loop to flush the queue (yet): store directly
+        _log_store.append(entry)
+    else:
+        _log_queue.put(entry)
+
+def flush_log_queue():
+    """
+    Move all queued records into the store in one batch and update the log window.
+
+    Must run on the Tk main thread.
+
+    Returns:
+        int: Number of records flushed.
+    """
+    batch = []
+    try:
+        # Only what is queued now, so a flood from worker threads cannot stall the Tk loop
+        for _ in range(_log_queue.qsize()):
+            batch.append(_log_queue.get_nowait())
+    except queue.Empty:
+        pass
+    if not batch:
+        return 0
+
+    _log_store.extend(batch)
+    window = _debug_window
+    if window is not None:
+        try:
+            window.records_added()
+        except tk.TclError:
+            # The window was closed in the meantime
+            pass
+    return len(batch)
+
+def _pump():
+    global _pump_master
+    if _pump_master is None:
+        return
+    flush_log_queue()
+    try:
+        _pump_master.after(FLUSH_INTERVAL_MS, _pump)
+    except tk.TclError:
+        _pump_master = None
+
+def start_log_pump(master):
+    """
+    Let the Tk main loop of master flush queued log records every FLUSH_INTERVAL_MS.
+
+    Args:
+        master (tk.Misc): Any widget of the application's Tk root.
+    """
+    global _pump_master
+    if _pump_master is not None:
+        return
+    _pump_master = master
+    master.after(FLUSH_INTERVAL_MS, _pump)
+
+def stop_log_pump():
+    """
+    Stop the periodic flush, keeping the queued records in the store.
     """
-    global _log_text_widget, _log_messages
-    _log_messages.append(message)
-    if _log_text_widget:
-        _log_text_widget.config(state='normal')
-        _log_text_widget.insert(tk.END, message + '\n')
-        _log_text_widget.see(tk.END)
-        _log_text_widget.config(state='disabled')
+    global _pump_master
+    _pump_master = None
+    batch = []
+    try:
+        while True:
+            batch.append(_log_queue.get_nowait())
+    except queue.Empty:
+        pass
+    _log_store.extend(batch)
 
 class TkinterLogHandler(logging.Handler):
     """
-    A custom logging.Handler subclass that sends log messages to the Tkinter GUI debug window.
+    A custom logging.Handler subclass that sends log records to the Tkinter GUI debug window.
     """
     def emit(self, record):
         """
-        Format and emit a logging record to the Tkinter GUI.
+        Queue a logging record for the Tkinter GUI as a structured LogEntry.
 
         Args:
             record (logging.LogRecord): The log record to be emitted.
         """
-        msg = self.format(record)
-        log_to_gui(msg)
+        try:
+            log_to_gui(LogEntry.from_record(record, self.formatter))
+        except Exception:
+            self.handleError(record)
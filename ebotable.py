@@ -0,0 +1,260 @@
+import csv
+import io
+import logging
+import re
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 75
+
+# Column order used when the pasted table has no header row
+COLUMNS = ["server", "cpu", "memory", "trendstorage"]
+
+COLUMN_ALIASES = {
+    "server": "server", "servers": "server", "naam": "server", "name": "server", "controller": "server",
+    "cpu": "cpu", "cpu load": "cpu", "cpu usage": "cpu", "processor": "cpu",
+    "memory": "memory", "mem": "memory", "geheugen": "memory", "memory usage": "memory", "ram": "memory",
+    "trendstorage": "trendstorage", "trend storage": "trendstorage", "trendstorage geheugen": "trendstorage",
+    "trend storage memory": "trendstorage", "trendlog": "trendstorage",
+}
+
+UNIT_FACTORS = {
+    "": 1.0, "b": 1.0,
+    "kb": 1024.0, "kib": 1024.0,
+    "mb": 1024.0 ** 2, "mib": 1024.0 ** 2,
+    "gb": 1024.0 ** 3, "gib": 1024.0 ** 3,
+    "tb": 1024.0 ** 4, "tib": 1024.0 ** 4,
+}
+
+_PERCENT_PATTERN = r'^\s*(-?\d+(?:[.,]\d+)?)\s*%?\s*$'
+_SIZE_PATTERN = r'(?i)^\s*(\d+(?:[.,]\d+)?)\s*([KMGT]?i?B)?\s*$'
+
+
+class ParseError:
+    """
+    A value in the pasted table that could not be parsed.
+
+    Attributes:
+        row (int): 1-based data row number.
+        column (str): Column name.
+        value (str): The raw text.
+        message (str): What was wrong.
+    """
+
+    def __init__(self, row, column, value, message):
+        self.row = row
+        self.column = column
+        self.value = value
+        self.message = message
+
+    def __str__(self):
+        return f"Row {self.row}, {self.column}: '{self.value}' ({self.message})"
+
+
+class EboTable:
+    """
+    Parsed EBO server table.
+
+    Attributes:
+        frame (pandas.DataFrame): One row per server with columns server,
+            cpu / memory (float percentages, NaN when missing or invalid),
+            trendstorage (raw text), trendstorage_bytes (float),
+            cpu_over / memory_over (bool, value >= threshold).
+        errors (list): ParseError per invalid value.
+        threshold (float): Percentage threshold used for *_over.
+    """
+
+    def __init__(self, frame, errors, threshold):
+        self.frame = frame
+        self.errors = errors
+        self.threshold = threshold
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def over_threshold(self):
+        """
+        Rows where CPU or memory reached the threshold.
+        """
+        return self.frame[self.frame["cpu_over"] | self.frame["memory_over"]]
+
+    def section_lines(self):
+        """
+        Lines per ExcelWriter section (servers, trendstorage, cpu, memory), in row order.
+
+        Invalid percentages are passed on as their raw text so the write plan
+        reports them instead of treating them as 0. Percentages outside 0-100%
+        are left empty: they are already in errors and must not be written.
+        """
+        frame = self.frame
+
+        def percent_lines(column):
+            formatted = frame[column].map(lambda v: f"{v:g}", na_action="ignore")
+            raw = frame[f"{column}_raw"].mask(frame[f"{column}_out_of_range"], "")
+            return formatted.where(frame[column].notna(), raw).tolist()
+
+        lines = {
+            "servers": frame["server"].tolist(),
+            "trendstorage": frame["trendstorage"].tolist(),
+            "cpu": percent_lines("cpu"),
+            "memory": percent_lines("memory"),
+        }
+        # Drop trailing empty cells of a column; keep inner ones so rows stay aligned with sheets
+        for key, values in lines.items():
+            while values and not str(values[-1]).strip():
+                values.pop()
+        return lines
+
+
+# Single-space separated tables: never split a value from its "%" or size unit
+_SINGLE_SPACE_SEP = r"\s+(?!%|[KMGTkmgt]?i?[Bb]\b)"
+
+
+def _detect_separator(lines):
+    first_line = lines[0]
+    if "\t" in first_line:
+        return "\t"
+    if ";" in first_line:
+        return ";"
+    if "," in first_line and not re.search(r'\d,\d', first_line):
+        return ","
+    # Aligned output uses runs of spaces; a table without any is single-space separated
+    if any(re.search(r"\S\s{2,}\S", line) for line in lines):
+        return r"\s{2,}"
+    return _SINGLE_SPACE_SEP
+
+
+def _field_counts(lines, sep):
+    """
+    Number of fields per line, split the way read_csv's python engine splits them.
+    """
+    if len(sep) == 1:
+        return [len(row) for row in csv.reader(lines, delimiter=sep, skipinitialspace=True)]
+    pattern = re.compile(sep)
+    return [len(pattern.split(line.strip())) for line in lines]
+
+
+def _collect_errors(mask, raw, column, message):
+    rows = np.flatnonzero(mask)
+    return [ParseError(int(row) + 1, column, raw.iat[row], message) for row in rows]
+
+
+def parse_ebo_table(text, threshold=DEFAULT_THRESHOLD, sep=None):
+    """
+    Parse a pasted or exported EBO table in one pass.
+
+    The table may be tab, semicolon, comma or space separated (runs of spaces
+    when any line has them, single spaces otherwise), with or without a header row (known headers such as "Server", "CPU", "Geheugen" and
+    "Trend storage" are recognised; without a header the columns are taken as
+    server, cpu, memory, trendstorage). Percentages may be written as "45", "45%"
+    or "45,5 %"; trend storage sizes may carry a unit (KB/MB/GB/TB).
+
+    Args:
+        text (str): The table text.
+        threshold (float): Percentage at or above which CPU/memory are flagged.
+        sep (str, optional): Column separator; detected from the lines if omitted.
+
+    Rows may be ragged (a trailing tab, a missing or an extra cell): short rows
+    are padded, and values beyond the first row that fall outside the known
+    columns are reported as parse errors of their row. A server without a CPU
+    or memory value is reported as well, unless the table has no such values at all.
+
+    Returns:
+        EboTable: The typed table with its per-row parse errors.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        empty = pd.DataFrame(columns=COLUMNS + ["cpu_raw", "memory_raw", "trendstorage_bytes", "cpu_over", "memory_over",
+                                                "cpu_out_of_range", "memory_out_of_range"])
+        return EboTable(empty, [], threshold)
+
+    sep = sep or _detect_separator(lines)
+    # Read as wide as the widest row, so a ragged row is padded instead of failing the whole table
+    counts = _field_counts(lines, sep)
+    width = max(counts)
+    raw = pd.read_csv(
+        io.StringIO("\n".join(lines)),
+        sep=sep,
+        header=None,
+        names=range(width),
+        dtype=str,
+        keep_default_na=False,
+        skipinitialspace=True,
+        engine="python",
+    )
+
+    raw = raw.fillna("")
+    header = [COLUMN_ALIASES.get(str(cell).strip().lower().rstrip(":")) for cell in raw.iloc[0]]
+    if any(header):
+        raw = raw.iloc[1:].reset_index(drop=True)
+        names = [name or f"extra_{idx}" for idx, name in enumerate(header)]
+    else:
+        names = COLUMNS[:raw.shape[1]] + [f"extra_{idx}" for idx in range(len(COLUMNS), raw.shape[1])]
+    raw.columns = names
+
+    errors = []
+    # Values in cells the first row does not have and no column name covers;
+    # a trailing separator only adds empty ones
+    for idx in range(counts[0], width):
+        if not names[idx].startswith("extra_"):
+            continue
+        extra = raw.iloc[:, idx].astype(str).str.strip()
+        errors += _collect_errors((extra != "").to_numpy(), extra, f"column {idx + 1}", "value outside the table columns")
+    raw = raw.loc[:, ~raw.columns.duplicated()]
+    for column in COLUMNS:
+        if column not in raw:
+            raw[column] = ""
+    raw = raw[COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+
+    frame = pd.DataFrame({"server": raw["server"], "trendstorage": raw["trendstorage"]})
+    for column in ("cpu", "memory"):
+        values = pd.to_numeric(
+            raw[column].str.extract(_PERCENT_PATTERN, expand=False).str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+        present = (raw[column] != "").to_numpy()
+        invalid = present & values.isna().to_numpy()
+        errors += _collect_errors(invalid, raw[column], column, "not a percentage")
+        out_of_range = ((values < 0) | (values > 100)).to_numpy()
+        errors += _collect_errors(out_of_range, raw[column], column, "outside 0-100%")
+        values = values.mask(out_of_range)
+        frame[column] = values.astype(float)
+        frame[f"{column}_raw"] = raw[column]
+        frame[f"{column}_out_of_range"] = out_of_range
+        frame[f"{column}_over"] = np.greater_equal(values.to_numpy(dtype=float, na_value=np.nan), threshold)
+
+    size = raw["trendstorage"].str.extract(_SIZE_PATTERN)
+    amount = pd.to_numeric(size[0].str.replace(",", ".", regex=False), errors="coerce")
+    factor = size[1].fillna("").str.lower().map(UNIT_FACTORS)
+    frame["trendstorage_bytes"] = (amount * factor).astype(float)
+    invalid = ((raw["trendstorage"] != "") & amount.isna()).to_numpy()
+    # Trend storage is written as text either way; only a bare percentage is also accepted
+    invalid = invalid & ~raw["trendstorage"].str.match(_PERCENT_PATTERN).to_numpy(dtype=bool)
+    errors += _collect_errors(invalid, raw["trendstorage"], "trendstorage", "unknown size")
+
+    missing_server = (raw["server"] == "").to_numpy() & (raw[["cpu", "memory", "trendstorage"]] != "").any(axis=1).to_numpy()
+    errors += _collect_errors(missing_server, raw["server"], "server", "missing server name")
+
+    has_server = (raw["server"] != "").to_numpy()
+    for column in ("cpu", "memory"):
+        empty = (raw[column] == "").to_numpy()
+        if not empty.all():
+            errors += _collect_errors(has_server & empty, raw[column], column, "missing value")
+
+    errors.sort(key=lambda error: error.row)
+    logger.info(
+        f"EBO table parsed: {len(frame)} row(s), {int(frame['cpu_over'].sum())} CPU and "
+        f"{int(frame['memory_over'].sum())} memory value(s) >= {threshold}%, {len(errors)} parse error(s)"
+    )
+    return EboTable(frame, errors, threshold)
+
+
+def load_ebo_table(path, threshold=DEFAULT_THRESHOLD, sep=None):
+    """
+    Read and parse an EBO table export (.csv, .tsv or .txt).
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        return parse_ebo_table(f.read(), threshold, sep)
@@ -0,0 +1,410 @@
+import os
+import logging
+import xlsmpackage as xp
+from xlsmcontrols import CheckboxIndex
+from excelsession import get_session, peek_session
+
+logger = logging.getLogger(__name__)
+
+
+def group_cell_runs(values):
+    """
+    Group cell values into runs of horizontally adjacent cells.
+
+    Args:
+        values (dict): Cell reference -> value.
+
+    Returns:
+        list: (start cell reference, list of values) tuples.
+    """
+    cells = sorted((
+        (xp.split_cell_ref(ref)[1], xp.column_index(xp.split_cell_ref(ref)[0]), value)
+        for ref, value in values.items()
+    ), key=lambda cell: cell[:2])
+    runs = []
+    for row, col, value in cells:
+        if runs and runs[-1][0] == row and runs[-1][1] + len(runs[-1][2]) == col:
+            runs[-1][2].append(value)
+        else:
+            runs.append((row, col, [value]))
+    return [(f"{xp.column_letters(col)}{row}", run) for row, col, run in runs]
+
+
+class WorkbookBackend:
+    """
+    Base class for the workbook engines used by ExcelWriter.
+
+    An engine opens a workbook and hands out sheet objects that support the
+    operations edit_excel needs: unprotect/protect, writing cells and checking
+    form-control checkboxes.
+    """
+
+    name = None
+    label = None
+
+    def start(self):
+        """
+        Start the engine ahead of the first open(), so its startup can be timed
+        on its own. Engines without startup cost do nothing.
+        """
+
+    def open(self, path):
+        """
+        Open a workbook.
+
+        Args:
+            path (str): Path to the workbook.
+
+        Returns:
+            Workbook-like object with sheet(), save() and close().
+        """
+        raise NotImplementedError
+
+
+class XlsmSheet:
+    """
+    A worksheet inside an XlsmWorkbook, edited directly in the package XML.
+    """
+
+    def __init__(self, workbook, name, part):
+        self.workbook = workbook
+        self.name = name
+        self.part = part
+        self._original_protection = None
+        self._unlocked_with = None
+
+    @property
+    def _package(self):
+        return self.workbook.package
+
+    def _xml(self):
+        return self._package.read_text(self.part)
+
+    def unprotect(self, password):
+        """
+        Remove sheet protection after verifying the password.
+
+        Raises:
+            PermissionError: If the password does not match.
+        """
+        xml = self._xml()
+        element = xp.get_protection(xml)
+        if element is None:
+            return
+        if not xp.verify_protection_password(xp.parse_attrs(element), password):
+            raise PermissionError(f"Incorrect password for sheet '{self.name}'")
+        self._original_protection = element
+        self._unlocked_with = password
+        self._package.write_part(self.part, xp.remove_protection(xml))
+
+    def protect(self, password):
+        """
+        Protect the sheet. The original protection settings are restored when the
+        sheet is protected again with the password that unlocked it.
+        """
+        xml = self._xml()
+        if self._original_protection is not None and password == self._unlocked_with:
+            element = self._original_protection
+        else:
+            element = xp.build_protection_element(password)
+        self._package.write_part(self.part, xp.insert_protection(xml, element))
+
+    def write(self, cell, value):
+        """
+        Write a value to a single cell.
+        """
+        self.write_cells({cell: value})
+
+    def write_cells(self, values):
+        """
+        Write several cells in one pass over the sheet XML.
+
+        A percentage text such as "34%" is stored the way Excel stores it when
+        it is assigned through COM: as the number 0.34 with a percent format,
+        so formulas and conditional formats on the cell see a number.
+
+        Args:
+            values (dict): Cell reference -> value.
+
+        Returns:
+            int: Number of write operations performed (always 1).
+        """
+        xml = self._xml()
+        formula_replaced = False
+        for cell, value in values.items():
+            restyle = None
+            percent = xp.percent_number(value) if isinstance(value, str) else None
+            if percent is not None:
+                value, format_id = percent
+                restyle = lambda style, format_id=format_id: self.workbook.styles.percent_style(style, format_id)
+            xml, had_formula = xp.set_cell_value(xml, cell, value, restyle)
+            formula_replaced = formula_replaced or had_formula
+        self._package.write_part(self.part, xml)
+        if formula_replaced:
+            self._package.drop_calc_chain()
+        return 1
+
+    def set_checkbox(self, checkbox_name, checked=True):
+        """
+        Check (or uncheck) a form-control checkbox by its shape name.
+
+        Returns:
+            bool: True once the checkbox is updated.
+
+        Raises:
+            KeyError: If the sheet has no control with that name.
+        """
+        if self.set_checkboxes([checkbox_name], checked):
+            raise KeyError(f"Checkbox '{checkbox_name}' not found")
+        return True
+
+    def set_checkboxes(self, checkbox_names, checked=True):
+        """
+        Check (or uncheck) several checkboxes, patching each control part once.
+
+        Returns:
+            list: Names of checkboxes that were not found on the sheet.
+        """
+        _, missing, linked = self.workbook.checkboxes.set_checked(
+            (self.name, name, checked) for name in checkbox_names)
+        # Excel updates the linked cell of a checkbox when it is toggled
+        for sheet_name, values in linked.items():
+            self.workbook.sheet(sheet_name).write_cells(values)
+        return [name for _, name in missing]
+
+
+class XlsmWorkbook:
+    """
+    Workbook opened by the headless engine.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.package = xp.XlsmPackage(path)
+        self._sheets = {}
+        self._checkboxes = None
+        self._styles = None
+
+    @property
+    def checkboxes(self):
+        """
+        The CheckboxIndex of this workbook, built on first use.
+        """
+        if self._checkboxes is None:
+            self._checkboxes = CheckboxIndex(self.package)
+        return self._checkboxes
+
+    @property
+    def styles(self):
+        """
+        The CellStyles of this workbook, read on first use.
+        """
+        if self._styles is None:
+            self._styles = xp.CellStyles(self.package)
+        return self._styles
+
+    @property
+    def sheet_names(self):
+        return list(self.package.sheets())
+
+    def sheet(self, name):
+        """
+        Return a sheet by name.
+
+        Raises:
+            KeyError: If the workbook has no sheet with that name.
+        """
+        if name not in self._sheets:
+            part = self.package.sheets()[name]
+            self._sheets[name] = XlsmSheet(self, name, part)
+        return self._sheets[name]
+
+    def save(self, path=None):
+        self.package.save(path)
+
+    def close(self):
+        self.package.close()
+
+
+class XlsmBackend(WorkbookBackend):
+    """
+    Pure-Python engine that edits the .xlsx/.xlsm package directly, without Excel.
+    """
+
+    name = "xlsm"
+    label = "Headless (no Excel)"
+
+    def open(self, path):
+        if os.path.splitext(path)[1].lower() == ".xls":
+            raise ValueError("The headless engine does not support .xls files; use the Excel (xlwings) engine.")
+        # A workbook kept open by the Excel session would lock the file on Windows
+        session = peek_session()
+        if session is not None:
+            session.close_book(path)
+        logger.debug(f"Opening {path} with headless engine")
+        return XlsmWorkbook(path)
+
+
+class XlwingsSheet:
+    """
+    A worksheet opened through xlwings (Excel COM).
+
+    Every call is executed on the Excel thread of the shared ExcelSession.
+    """
+
+    def __init__(self, workbook, sheet):
+        self.workbook = workbook
+        self.sheet = sheet
+        self.name = workbook.session.run(lambda: sheet.name)
+
+    def _run(self, func, *args, **kwargs):
+        self.workbook.modified = True
+        return self.workbook.session.run(func, *args, **kwargs)
+
+    def unprotect(self, password):
+        self._run(lambda: self.sheet.api.Unprotect(Password=password))
+
+    def protect(self, password):
+        self._run(lambda: self.sheet.api.Protect(Password=password))
+
+    def write(self, cell, value):
+        self.write_cells({cell: value})
+
+    def write_cells(self, values):
+        """
+        Write several cells, using one range assignment per horizontal run of
+        adjacent cells.
+
+        Returns:
+            int: Number of range assignments (COM calls) made.
+        """
+        runs = group_cell_runs(values)
+
+        def write_runs():
+            for start, run in runs:
+                self.sheet.range(start).value = run if len(run) > 1 else run[0]
+
+        self._run(write_runs)
+        return len(runs)
+
+    def set_checkbox(self, checkbox_name, checked=True):
+        def check():
+            shape = self.sheet.api.Shapes(checkbox_name)
+            shape.OLEFormat.Object.Value = checked
+
+        self._run(check)
+        return True
+
+    def set_checkboxes(self, checkbox_names, checked=True):
+        """
+        Check (or uncheck) several checkboxes with a single CheckBoxes(Array(...)) call.
+
+        Falls back to one call per checkbox when Excel rejects the group (for
+        example because one of the names does not exist).
+
+        Returns:
+            list: Names of checkboxes that could not be set.
+        """
+        names = list(checkbox_names)
+        if not names:
+            return []
+
+        def check_all():
+            self.sheet.api.CheckBoxes(names).Value = 1 if checked else -4146  # xlOn / xlOff
+
+        try:
+            self._run(check_all)
+            return []
+        except Exception as e:
+            logger.debug(f"Bulk checkbox update failed on {self.name}, setting one by one: {e}")
+        missing = []
+        for name in names:
+            try:
+                self.set_checkbox(name, checked)
+            except Exception:
+                missing.append(name)
+        return missing
+
+
+class XlwingsWorkbook:
+    """
+    Workbook opened in the warm Excel instance of an ExcelSession.
+
+    Closing keeps a saved workbook cached in the session; a workbook with
+    unsaved changes is closed without saving so the cache never holds edits
+    that are not on disk.
+    """
+
+    def __init__(self, session, path, book):
+        self.session = session
+        self.path = path
+        self.book = book
+        self.modified = False
+
+    @property
+    def sheet_names(self):
+        return self.session.run(lambda: [s.name for s in self.book.sheets])
+
+    def sheet(self, name):
+        try:
+            return XlwingsSheet(self, self.session.run(lambda: self.book.sheets[name]))
+        except Exception as e:
+            raise KeyError(name) from e
+
+    def save(self, path=None):
+        if path:
+            self.session.run(self.book.save, path)
+        else:
+            self.session.run(self.book.save)
+        self.session.refresh_book(self.book, self.path, path)
+        self.path = path or self.path
+        self.modified = False
+
+    def close(self):
+        if self.modified:
+            self.session.close_book(self.path)
+
+
+class XlwingsBackend(WorkbookBackend):
+    """
+    Engine that drives the shared hidden Excel instance through xlwings (Windows/macOS only).
+    """
+
+    name = "xlwings"
+    label = "Excel (xlwings)"
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session (ExcelSession, optional): Session to use. Defaults to the shared session.
+        """
+        self.session = session
+
+    def start(self):
+        # Starts the hidden Excel instance, or reuses the warm one
+        (self.session or get_session()).app
+
+    def open(self, path):
+        session = self.session or get_session()
+        return XlwingsWorkbook(session, path, session.open_book(path))
+
+
+BACKENDS = {backend.name: backend for backend in (XlsmBackend, XlwingsBackend)}
+DEFAULT_BACKEND = XlsmBackend.name
+
+
+def get_backend(name=None):
+    """
+    Instantiate a workbook engine by name.
+
+    Args:
+        name (str, optional): "xlsm" or "xlwings". Defaults to the headless engine.
+
+    Returns:
+        WorkbookBackend: The engine instance.
+    """
+    name = name or DEFAULT_BACKEND
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown workbook engine: {name}") from None
@@ -0,0 +1,206 @@
+"""
+Batch mode for ExcelWriter: fill many checklist workbooks in parallel.
+
+The manifest is a JSON file with a list of jobs (or an object with a "jobs" list
+and defaults that apply to every job):
+
+    {
+        "password": "geheim",
+        "jobs": [
+            {
+                "path": "Site A/Checklist.xlsm",
+                "output": "Site A/Checklist ingevuld.xlsm",
+                "servers": ["Server-01", "Server-02"],
+                "trendstorage": ["12 GB"],
+                "cpu": ["34", "81"],
+                "memory": ["52", "40"],
+                "all_licenses": true
+            }
+        ]
+    }
+
+Section values may be lists or pasted multi-line text. Relative paths are
+resolved against the manifest folder; without "output" the workbook is updated
+in place. Jobs run over a process pool with the headless engine.
+
+Usage:
+    python excelbatch.py manifest.json [--workers N] [--summary result.json]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excelbackend import XlsmBackend
+from excelplan import SECTIONS, apply_write_plan, build_write_plan
+
+logger = logging.getLogger(__name__)
+
+JOB_DEFAULT_KEYS = ("password", "all_licenses")
+
+
+def _lines(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.rstrip().splitlines()
+    lines = [str(line).strip() for line in value]
+    # Inner empty lines are kept so line n keeps going to sheet n
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def load_manifest(manifest_path):
+    """
+    Read a batch manifest and normalise its jobs.
+
+    Args:
+        manifest_path (str): Path to the JSON manifest.
+
+    Returns:
+        list: Job dicts with absolute "path"/"output" and section line lists.
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        defaults, jobs = {}, manifest
+    else:
+        defaults, jobs = manifest, manifest.get("jobs", [])
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    normalised = []
+    for idx, job in enumerate(jobs):
+        if "path" not in job:
+            raise ValueError(f"Job {idx + 1} in {manifest_path} has no 'path'")
+        merged = {key: defaults[key] for key in JOB_DEFAULT_KEYS if key in defaults}
+        merged.update(job)
+        merged["path"] = os.path.join(base, merged["path"])
+        merged["output"] = os.path.join(base, merged["output"]) if merged.get("output") else None
+        merged["password"] = merged.get("password") or ""
+        merged["all_licenses"] = bool(merged.get("all_licenses"))
+        for section in SECTIONS:
+            merged[section.key] = _lines(merged.get(section.key))
+        normalised.append(merged)
+    return normalised
+
+
+def run_job(job):
+    """
+    Fill one workbook, using the same write plan as ExcelWriterWindow.edit_excel.
+
+    Runs in a worker process, so it never raises: failures are returned. A
+    workbook that was saved but could not be closed stays ok; the close error
+    is still reported in "error".
+
+    Args:
+        job (dict): A normalised job from load_manifest().
+
+    Returns:
+        dict: path, output, ok, error, sheets, calls, warning, parse_errors and seconds.
+    """
+    start = time.perf_counter()
+    result = {"path": job["path"], "output": job["output"] or job["path"], "ok": False, "error": None,
+              "sheets": 0, "calls": 0, "warning": False, "parse_errors": [], "seconds": 0.0}
+    wb = None
+    try:
+        plan = build_write_plan({s.key: job[s.key] for s in SECTIONS}, job["all_licenses"])
+        if not plan:
+            raise ValueError("No lines to write and no license checkboxes selected")
+        wb = XlsmBackend().open(job["path"])
+        outcome = apply_write_plan(wb, plan, job["password"])
+        wb.save(job["output"])
+        result.update(ok=True, sheets=len(outcome.sheets_written), calls=outcome.calls,
+                      warning=plan.warning_triggered,
+                      parse_errors=[f"{label} line {line_no}: '{line}'" for label, line_no, line in plan.parse_errors])
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if wb is not None:
+            try:
+                wb.close()
+            except Exception as e:
+                logger.warning(f"Could not close {job['path']}: {e}")
+                if result["error"] is None:
+                    result["error"] = f"{type(e).__name__} while closing: {e}"
+        result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, workers=None, progress=None):
+    """
+    Run jobs over a process pool.
+
+    Args:
+        jobs (list): Normalised jobs.
+        workers (int, optional): Number of processes. Defaults to the CPU count.
+        progress (callable, optional): Called with each result as it completes.
+
+    Returns:
+        list: Job results in manifest order.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    logger.info(f"Batch started: {len(jobs)} workbook(s) over {workers} process(es)")
+    results = [None] * len(jobs)
+    if workers == 1:
+        for idx, job in enumerate(jobs):
+            results[idx] = run_job(job)
+            if progress:
+                progress(results[idx])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job): idx for idx, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(results[futures[future]])
+    return results
+
+
+def format_summary(results, elapsed):
+    """
+    Format a per-workbook success/failure summary.
+    """
+    lines = []
+    for result in results:
+        status = "OK  " if result["ok"] else "FOUT"
+        detail = (f"{result['sheets']} sheet(s), {result['calls']} calls"
+                  + (", values over threshold" if result["warning"] else "")
+                  + (f", {len(result['parse_errors'])} unreadable percentage(s)" if result["parse_errors"] else "")
+                  + (f", {result['error']}" if result["error"] else "")
+                  if result["ok"] else result["error"])
+        lines.append(f"{status} {result['seconds']:6.2f}s  {result['output']}  ({detail})")
+    failed = sum(1 for result in results if not result["ok"])
+    rate = len(results) / elapsed if elapsed else 0
+    lines.append(f"{len(results) - failed} succeeded, {failed} failed in {elapsed:.2f}s ({rate:.1f} workbooks/s)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill many ExcelWriter checklist workbooks in parallel.")
+    parser.add_argument("manifest", help="JSON manifest with the workbooks and their data")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--summary", help="also write the results as JSON to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every cell and checkbox written")
+    args = parser.parse_args(argv)
+
+    # Per-cell logging from every worker would drown the summary
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s - %(message)s')
+    logger.setLevel(logging.INFO)
+    jobs = load_manifest(args.manifest)
+    start = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+    print(format_summary(results, elapsed))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": elapsed, "results": results}, f, indent=2)
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
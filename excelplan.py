@@ -0,0 +1,273 @@
+import logging
+
+from timing import NULL_RUN
+
+logger = logging.getLogger(__name__)
+
+LICENSE_CHECKBOXES = [f"Check Box {idx}" for idx in range(35, 41)]
+LICENSE_SHEET_COUNT = 6
+
+
+def checklist_sheet_name(idx):
+    """
+    Return the name of the idx-th (0-based) "Checklist Regelkast" sheet.
+    """
+    return "Checklist Regelkast" if idx == 0 else f"Checklist Regelkast ({idx + 1})"
+
+
+def _percent_value(line):
+    return f"{line.strip()}%"
+
+
+def parse_percent(value):
+    """
+    Return the percentage in value ("45.5%", "CPU 45,5 %"), or None if there is none.
+    """
+    try:
+        return float(value.split('%')[0].split()[-1].replace(',', '.'))
+    except (IndexError, ValueError):
+        return None
+
+
+class Section:
+    """
+    Description of one ExcelWriter input section (servers, trendstorage, cpu, memory).
+
+    Line n of a section is written to the cell of the n-th checklist sheet; the
+    checkboxes are checked either always or only when the percentage reaches
+    warn_threshold.
+    """
+
+    def __init__(self, key, label, cell, checkboxes, warn_threshold=None, value_func=None):
+        self.key = key
+        self.label = label
+        self.cell = cell
+        self.checkboxes = checkboxes
+        self.warn_threshold = warn_threshold
+        self.value_func = value_func
+
+
+SECTIONS = [
+    Section("servers", "Servers", "F8", ["Check Box 33"]),
+    Section("trendstorage", "TrendStorage Geheugen", "F8", ["Check Box 37"]),
+    Section("cpu", "CPU", "F8", ["Check Box 39"], warn_threshold=75, value_func=_percent_value),
+    Section("memory", "Memory", "F8", ["Check Box 41"], warn_threshold=75, value_func=_percent_value),
+]
+
+
+class SheetPlan:
+    """
+    Everything that has to happen on one sheet: cell values and checkboxes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.values = {}
+        self.checkboxes = []
+
+    def add_value(self, cell, value):
+        self.values[cell] = value
+
+    def add_checkbox(self, name):
+        if name not in self.checkboxes:
+            self.checkboxes.append(name)
+
+
+class WritePlan:
+    """
+    Per-sheet write plan built from all selected ExcelWriter sections.
+
+    Attributes:
+        sheets (dict): Sheet index -> SheetPlan, in sheet order.
+        warning_triggered (bool): True if a percentage reached its threshold.
+        parse_errors (list): (section label, line number, line) for percentages
+            that could not be read; their checkboxes are left alone.
+        legacy_calls (int): Number of workbook calls the per-line approach would make.
+    """
+
+    def __init__(self):
+        self.sheets = {}
+        self.warning_triggered = False
+        self.parse_errors = []
+        self.legacy_calls = 0
+
+    def sheet(self, idx):
+        if idx not in self.sheets:
+            self.sheets[idx] = SheetPlan(checklist_sheet_name(idx))
+        return self.sheets[idx]
+
+    def __bool__(self):
+        return bool(self.sheets)
+
+
+class PlanResult:
+    """
+    Outcome of applying a WritePlan to a workbook.
+    """
+
+    def __init__(self):
+        self.sheets_written = []
+        self.sheets_missing = []
+        self.calls = 0
+        self.legacy_calls = 0
+        self.cancelled = False
+
+    @property
+    def calls_saved(self):
+        return max(self.legacy_calls - self.calls, 0)
+
+
+class UnprotectError(RuntimeError):
+    """
+    Raised when a sheet in the plan cannot be unprotected.
+    """
+
+    def __init__(self, sheet_name, cause):
+        super().__init__(f"Failed to unprotect sheet '{sheet_name}': {cause}")
+        self.sheet_name = sheet_name
+
+
+def build_write_plan(section_lines, all_licenses=False):
+    """
+    Merge the selected sections into a single write plan per sheet.
+
+    Later sections overwrite earlier values in the same cell, exactly like the
+    former one-section-at-a-time processing did.
+
+    Args:
+        section_lines (dict): Section key -> list of input lines; line n goes to
+            checklist sheet n, empty lines are skipped.
+        all_licenses (bool): Also check the C35 license checkboxes on the first six sheets.
+
+    Returns:
+        WritePlan: The merged plan.
+    """
+    plan = WritePlan()
+    for section in SECTIONS:
+        for idx, line in enumerate(section_lines.get(section.key) or []):
+            if not line.strip():
+                continue
+            sheet_plan = plan.sheet(idx)
+            value = section.value_func(line) if section.value_func else line
+            sheet_plan.add_value(section.cell, value)
+            logger.debug(f"[{section.label}] Planned '{value}' for {sheet_plan.name} {section.cell}")
+
+            checked = []
+            if section.warn_threshold is None:
+                checked = section.checkboxes
+            else:
+                percent = parse_percent(value)
+                if percent is None:
+                    logger.error(f"[{section.label}] Line {idx + 1} is not a percentage: '{line}'")
+                    plan.parse_errors.append((section.label, idx + 1, line))
+                elif percent >= section.warn_threshold:
+                    plan.warning_triggered = True
+                    checked = section.checkboxes
+            for name in checked:
+                sheet_plan.add_checkbox(name)
+            # unprotect + write + checkboxes + protect
+            plan.legacy_calls += 3 + len(checked)
+
+    if all_licenses:
+        for idx in range(LICENSE_SHEET_COUNT):
+            sheet_plan = plan.sheet(idx)
+            for name in LICENSE_CHECKBOXES:
+                sheet_plan.add_checkbox(name)
+            plan.legacy_calls += 2 + len(LICENSE_CHECKBOXES)
+
+    return plan
+
+
+def apply_write_plan(wb, plan, password, timer=NULL_RUN, progress=None, cancelled=None):
+    """
+    Apply a plan: per sheet one unprotect, one batched value write, one bulk
+    checkbox update and one protect.
+
+    Args:
+        wb: Workbook opened through an excelbackend engine.
+        plan (WritePlan): The plan to apply.
+        password (str): Sheet protection password.
+        timer (timing.TimingRun, optional): Run that times the unprotect,
+            write_cells, checkboxes and protect phases.
+        progress (callable, optional): Called with (done, total, sheet name)
+            after every sheet.
+        cancelled (callable, optional): Checked before every sheet; once it
+            returns True the remaining sheets are skipped and result.cancelled
+            is set, so the caller can close without saving. A sheet that was
+            started is always protected again.
+
+    Returns:
+        PlanResult: What was written and how many workbook calls were made.
+
+    Raises:
+        UnprotectError: If a sheet cannot be unprotected; nothing is saved.
+    """
+    result = PlanResult()
+    result.legacy_calls = plan.legacy_calls
+    total = len(plan.sheets)
+    for done, idx in enumerate(sorted(plan.sheets), start=1):
+        sheet_plan = plan.sheets[idx]
+        if cancelled and cancelled():
+            logger.info(f"Write plan cancelled after {done - 1} of {total} sheet(s)")
+            result.cancelled = True
+            break
+        if progress:
+            progress(done - 1, total, sheet_plan.name)
+        try:
+            with timer.span("sheet"):
+                sheet = wb.sheet(sheet_plan.name)
+        except Exception as e:
+            logger.warning(f"Sheet not found: {sheet_plan.name} - {e}")
+            result.sheets_missing.append(sheet_plan.name)
+            continue
+
+        try:
+            with timer.span("unprotect"):
+                sheet.unprotect(password)
+        except Exception as e:
+            logger.error(f"Could not unprotect sheet {sheet_plan.name}: {e}")
+            raise UnprotectError(sheet_plan.name, e) from e
+        result.calls += 1
+        logger.debug(f"Unprotected sheet {sheet_plan.name}")
+
+        if sheet_plan.values:
+            try:
+                with timer.span("write_cells"):
+                    result.calls += sheet.write_cells(sheet_plan.values)
+                for cell, value in sheet_plan.values.items():
+                    logger.info(f"Written '{value}' to {sheet_plan.name} {cell}")
+            except Exception as e:
+                logger.error(f"Failed to write to {sheet_plan.name}: {e}")
+
+        if sheet_plan.checkboxes:
+            result.calls += 1
+            try:
+                with timer.span("checkboxes"):
+                    missing = sheet.set_checkboxes(sheet_plan.checkboxes)
+            except Exception as e:
+                logger.warning(f"Failed to check {', '.join(sheet_plan.checkboxes)} on {sheet_plan.name}: {e}")
+            else:
+                for name in sheet_plan.checkboxes:
+                    if name in missing:
+                        logger.warning(f"Failed to check {name} on {sheet_plan.name}: checkbox not found")
+                    else:
+                        logger.info(f"Checked {name} on {sheet_plan.name}")
+
+        try:
+            with timer.span("protect"):
+                sheet.protect(password)
+            logger.debug(f"Protected sheet {sheet_plan.name}")
+        except Exception as e:
+            logger.warning(f"Could not protect sheet {sheet_plan.name}: {e}")
+        result.calls += 1
+        result.sheets_written.append(sheet_plan.name)
+        if progress:
+            progress(done, total, sheet_plan.name)
+
+    if result.cancelled:
+        return result
+    logger.info(
+        f"Write plan applied to {len(result.sheets_written)} sheet(s) with {result.calls} workbook calls "
+        f"({result.calls_saved} saved compared to per-line processing)"
+    )
+    return result
@@ -0,0 +1,294 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BOOKS = 4
+
+
+def xlwings_app_factory():
+    """
+    Start a hidden, silent Excel instance through xlwings.
+    """
+    import xlwings as xw
+
+    app = xw.App(visible=False, add_book=False)
+    app.display_alerts = False
+    app.screen_updating = False
+    return app
+
+
+class ExcelSession:
+    """
+    Keeps one hidden Excel instance warm for the lifetime of the application.
+
+    All Excel (COM) calls run on a single dedicated thread, because COM objects
+    may only be used from the thread that created them. Open workbooks are kept
+    in an LRU keyed by (path, mtime): opening an unchanged workbook again is
+    served from the cache, a workbook that changed on disk is reopened.
+
+    After shutdown() no call is accepted: calls still waiting in the queue fail
+    with RuntimeError, and no new Excel instance is started.
+    """
+
+    def __init__(self, app_factory=None, max_books=DEFAULT_MAX_BOOKS):
+        """
+        Args:
+            app_factory (callable, optional): Returns a new xlwings-like App.
+                Defaults to a hidden xlwings Excel instance.
+            max_books (int): Maximum number of workbooks kept open.
+        """
+        self._app_factory = app_factory or xlwings_app_factory
+        self.max_books = max_books
+        self._app = None
+        self._books = OrderedDict()
+        self._queue = queue.Queue()
+        # Guards _closed together with putting work on the queue
+        self._lock = threading.Lock()
+        self._closed = False
+        self._shutting_down = False
+        self._thread = threading.Thread(target=self._worker, name="ExcelSession", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            func, args, kwargs, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the Excel thread and return its result.
+
+        Calls made from the Excel thread itself run inline.
+
+        Raises:
+            RuntimeError: If the session has been shut down, also when that
+                happens while the call is waiting in the queue.
+        """
+        if threading.current_thread() is self._thread:
+            return func(*args, **kwargs)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Excel session has been shut down")
+            self._queue.put((func, args, kwargs, future))
+        return self._wait(future)
+
+    def _wait(self, future):
+        # A call can take long (opening a large workbook), so there is no
+        # overall timeout; only a dead Excel thread ends the wait early
+        while True:
+            try:
+                return future.result(timeout=1)
+            except FutureTimeoutError:
+                if not self._thread.is_alive() and not future.done():
+                    raise RuntimeError("Excel thread has stopped") from None
+
+    def _fail_queued(self):
+        # Called with _lock held, after _closed was set: nothing is added anymore
+        failed = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[3].set_running_or_notify_cancel():
+                item[3].set_exception(RuntimeError("Excel session has been shut down"))
+                failed += 1
+        if failed:
+            logger.info(f"Excel session shut down with {failed} queued call(s) cancelled")
+
+    @property
+    def app(self):
+        """
+        The warm Excel instance, started on first use and restarted if it died.
+        """
+        return self.run(self._ensure_app)
+
+    def _ensure_app(self):
+        if self._shutting_down:
+            raise RuntimeError("Excel session has been shut down")
+        if self._app is not None:
+            try:
+                self._app.books
+                return self._app
+            except Exception as e:
+                logger.warning(f"Excel instance no longer responding, restarting: {e}")
+                self._app = None
+                self._books.clear()
+        start = time.perf_counter()
+        self._app = self._app_factory()
+        logger.info(f"Excel instance started in {time.perf_counter() - start:.2f}s")
+        return self._app
+
+    @staticmethod
+    def _key(path):
+        path = os.path.normcase(os.path.abspath(path))
+        return path, os.path.getmtime(path)
+
+    def open_book(self, path):
+        """
+        Return an open workbook for path, reusing the cached one if the file is unchanged.
+        """
+        return self.run(self._open_book, path)
+
+    def _open_book(self, path):
+        key = self._key(path)
+        book = self._books.get(key)
+        if book is not None:
+            self._books.move_to_end(key)
+            logger.debug(f"Workbook served from session cache: {path}")
+            return book
+
+        # Drop stale copies of the same file before reopening it
+        for stale in [k for k in self._books if k[0] == key[0]]:
+            self._close_key(stale)
+
+        app = self._ensure_app()
+        start = time.perf_counter()
+        book = app.books.open(path)
+        logger.info(f"Workbook opened in {time.perf_counter() - start:.2f}s: {path}")
+        self._books[key] = book
+        while len(self._books) > self.max_books:
+            self._close_key(next(iter(self._books)))
+        return book
+
+    def refresh_book(self, book, old_path, new_path=None):
+        """
+        Re-key a cached workbook after it was saved (its mtime and possibly path changed).
+        """
+        self.run(self._refresh_book, book, old_path, new_path or old_path)
+
+    def _refresh_book(self, book, old_path, new_path):
+        old = os.path.normcase(os.path.abspath(old_path))
+        for key in [k for k, b in self._books.items() if k[0] == old and b is book]:
+            del self._books[key]
+        self._books[self._key(new_path)] = book
+
+    def close_book(self, path):
+        """
+        Close all cached workbooks for path without saving.
+        """
+        self.run(self._close_path, path)
+
+    def _close_path(self, path):
+        path = os.path.normcase(os.path.abspath(path))
+        for key in [k for k in self._books if k[0] == path]:
+            self._close_key(key)
+
+    def _close_key(self, key):
+        book = self._books.pop(key)
+        try:
+            book.close()
+            logger.debug(f"Workbook closed: {key[0]}")
+        except Exception as e:
+            logger.warning(f"Could not close workbook {key[0]}: {e}")
+
+    def shutdown(self):
+        """
+        Close all workbooks, quit Excel and stop the Excel thread.
+
+        Calls still waiting in the queue fail with RuntimeError; a call that is
+        running is finished first.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._fail_queued()
+            self._queue.put((self._shutdown, (), {}, future))
+            self._queue.put(None)
+        if threading.current_thread() is self._thread:
+            # Called from an Excel call: the worker runs _shutdown and stops after it
+            return
+        try:
+            self._wait(future)
+        except Exception as e:
+            logger.warning(f"Excel session shutdown failed: {e}")
+        finally:
+            self._thread.join(timeout=10)
+
+    def _shutdown(self):
+        self._shutting_down = True
+        for key in list(self._books):
+            self._close_key(key)
+        if self._app is not None:
+            try:
+                self._app.quit()
+                logger.info("Excel instance closed")
+            except Exception as e:
+                logger.warning(f"Could not quit Excel, killing the process: {e}")
+                try:
+                    self._app.kill()
+                except Exception:
+                    pass
+            self._app = None
+
+
+_session = None
+_session_lock = threading.Lock()
+_session_factory = None
+
+
+def configure_session(app_factory=None, max_books=DEFAULT_MAX_BOOKS):
+    """
+    Choose the Excel backend for the shared session (e.g. tests.fakeexcel.FakeApp).
+
+    Shuts down an existing shared session first.
+    """
+    global _session_factory
+    shutdown_session()
+    _session_factory = (app_factory, max_books)
+
+
+def get_session():
+    """
+    Return the shared ExcelSession, creating it on first use.
+    """
+    global _session
+    with _session_lock:
+        if _session is None or _session._closed:
+            app_factory, max_books = _session_factory or (None, DEFAULT_MAX_BOOKS)
+            _session = ExcelSession(app_factory, max_books)
+        return _session
+
+
+def peek_session():
+    """
+    Return the shared ExcelSession if one is running, without starting one.
+    """
+    return _session if _session is not None and not _session._closed else None
+
+
+def shutdown_session():
+    """
+    Shut down the shared session, if any. Safe to call more than once.
+    """
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.shutdown()
+
+
+atexit.register(shutdown_session)
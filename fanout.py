@@ -0,0 +1,248 @@
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+# Sources up to this size are read once and kept in memory for the plain-copy fallback
+MAX_BUFFERED_SOURCE = 64 * 1024 * 1024
+
+# Linux FICLONE ioctl: copy-on-write clone (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+# errno values that mean "this filesystem cannot do that", not "this copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOSYS, errno.EINVAL,
+                errno.EPERM, errno.ENOTTY, errno.EBADF}
+
+LINK_MODES = ("copy", "hardlink")
+
+
+class SourceFile:
+    """
+    A file that is placed into many folders.
+
+    The source is stat'ed once and, for the plain-copy fallback, read once.
+    Placement tries the cheapest method the filesystem supports and remembers
+    which methods failed so they are not retried for every target:
+
+    - hardlink (only in "hardlink" mode: all targets are the same file),
+    - reflink (copy-on-write clone, Linux FICLONE),
+    - os.copy_file_range (in-kernel copy, Linux),
+    - writing the buffered bytes (or shutil.copyfile for large files).
+
+    The source's modification time is set on every copy, like shutil.copy2.
+    """
+
+    def __init__(self, path, link_mode="copy"):
+        """
+        Args:
+            path (str): The file to place.
+            link_mode (str): "copy" for independent files, "hardlink" to link
+                every target to the source where possible.
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}', choose from {', '.join(LINK_MODES)}")
+        self.path = path
+        self.link_mode = link_mode
+        self.stat = os.stat(path)
+        self.size = self.stat.st_size
+        self._data = None
+        self._lock = threading.Lock()
+        self._disabled = set()
+        if link_mode != "hardlink":
+            self._disabled.add("hardlink")
+        if not hasattr(os, "copy_file_range"):
+            self._disabled.add("copy_file_range")
+        try:
+            import fcntl  # noqa: F401  (not available on Windows)
+        except ImportError:
+            self._disabled.add("reflink")
+
+    def _buffer(self):
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    with open(self.path, "rb") as f:
+                        self._data = f.read()
+        return self._data
+
+    def _disable(self, method, error):
+        if method not in self._disabled:
+            self._disabled.add(method)
+            logger.debug(f"{method} not available for {self.path}: {error}")
+
+    def _hardlink(self, dest):
+        os.link(self.path, dest)
+
+    def _reflink(self, dest):
+        import fcntl
+        with open(self.path, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+    def _copy_file_range(self, dest):
+        with open(self.path, "rb") as src, open(dest, "wb") as dst:
+            remaining = self.size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    raise OSError(errno.EINVAL, "copy_file_range copied nothing")
+                remaining -= copied
+
+    def _plain_copy(self, dest):
+        if self.size <= MAX_BUFFERED_SOURCE:
+            with open(dest, "wb") as dst:
+                dst.write(self._buffer())
+        else:
+            shutil.copyfile(self.path, dest)
+
+    def place(self, dest):
+        """
+        Put a copy (or link) of the source at dest, replacing an existing file.
+
+        Returns:
+            str: The method used: "hardlink", "reflink", "copy_file_range" or "copy".
+        """
+        for method, func in (("hardlink", self._hardlink), ("reflink", self._reflink),
+                             ("copy_file_range", self._copy_file_range)):
+            if method in self._disabled:
+                continue
+            try:
+                if method == "hardlink" and os.path.lexists(dest):
+                    os.remove(dest)
+                func(dest)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                self._disable(method, e)
+                continue
+            if method != "hardlink":
+                os.utime(dest, ns=(self.stat.st_atime_ns, self.stat.st_mtime_ns))
+            return method
+        self._plain_copy(dest)
+        os.utime(dest, ns=(self.stat.st_atime_ns, self.stat.st_mtime_ns))
+        return "copy"
+
+
+class FanoutResult:
+    """
+    Outcome of a fan_out run.
+
+    Attributes:
+        directories (int): Folders created or already present.
+        files (int): Files placed.
+        bytes (int): Bytes placed.
+        seconds (float): Wall time.
+        errors (list): (name, message) per failed folder.
+        methods (dict): Placement method -> number of files.
+        cancelled (bool): True if the run was cancelled before all folders were done.
+    """
+
+    def __init__(self):
+        self.directories = 0
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.errors = []
+        self.methods = {}
+        self.cancelled = False
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        methods = ", ".join(f"{count}x {method}" for method, count in sorted(self.methods.items()))
+        text = f"{self.directories} map(pen) in {self.seconds:.2f}s"
+        if self.files:
+            text += (f", {self.files} bestand(en) ({methods}): "
+                     f"{self.files_per_second:.0f} bestanden/s, {self.mb_per_second:.1f} MB/s")
+        if self.cancelled:
+            text += " (geannuleerd)"
+        return text
+
+
+def fan_out(base_path, names, source=None, target_name=None, workers=DEFAULT_WORKERS, link_mode="copy",
+            progress=None, existing=(), completed=None, cancelled=None):
+    """
+    Create base_path/<name> for every name over a thread pool and place source in each.
+
+    Failures do not stop the run; they are collected in the result.
+
+    Args:
+        base_path (str): Folder in which the folders are created.
+        names (list): Folder names.
+        source (str, optional): File to place into every folder.
+        target_name (callable, optional): name -> file name of the copy. Defaults
+            to the folder name plus the source's extension.
+        workers (int): Number of threads.
+        link_mode (str): "copy" or "hardlink", see SourceFile.
+        progress (callable, optional): Called with (done, total) after each folder,
+            on the calling thread.
+        existing (set, optional): Names whose folder is known to exist (from a
+            plan); only the file is placed there.
+        completed (callable, optional): Called with (name, file name or None)
+            for every folder that was finished without error, on the calling thread.
+        cancelled (callable, optional): Returns True once the run should stop;
+            folders not started yet are skipped, the ones in progress are finished.
+
+    Returns:
+        FanoutResult: Counts, throughput and errors.
+    """
+    start = time.perf_counter()
+    result = FanoutResult()
+    src = SourceFile(source, link_mode) if source else None
+    if src and target_name is None:
+        ext = os.path.splitext(source)[1]
+
+        def target_name(name):
+            return f"{name}{ext}"
+
+    def work(name):
+        dir_path = os.path.join(base_path, name)
+        if name not in existing:
+            os.makedirs(dir_path, exist_ok=True)
+        if src is None:
+            return None
+        return src.place(os.path.join(dir_path, target_name(name)))
+
+    total = len(names)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, total or 1))) as pool:
+        futures = {pool.submit(work, name): name for name in names}
+        for future in as_completed(futures):
+            if cancelled and not result.cancelled and cancelled():
+                result.cancelled = True
+                skipped = sum(1 for pending in futures if pending.cancel())
+                logger.info(f"Fan-out geannuleerd, {skipped} map(pen) overgeslagen")
+            if future.cancelled():
+                continue
+            name = futures[future]
+            try:
+                method = future.result()
+            except Exception as e:
+                logger.error(f"Kon map of bestand niet aanmaken voor '{name}': {e}")
+                result.errors.append((name, str(e)))
+            else:
+                result.directories += 1
+                if method:
+                    result.files += 1
+                    result.bytes += src.size
+                    result.methods[method] = result.methods.get(method, 0) + 1
+                if completed:
+                    completed(name, target_name(name) if method else None)
+            done += 1
+            if progress:
+                progress(done, total)
+
+    result.seconds = time.perf_counter() - start
+    logger.info(f"Fan-out klaar: {result.summary()}, {len(result.errors)} fout(en)")
+    return result
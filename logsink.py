@@ -0,0 +1,247 @@
+"""
+Persistent log sink: structured JSON-lines log files, written on a background thread.
+
+Log calls only put the record on a queue (logging.handlers.QueueHandler); a
+QueueListener thread formats the records and writes them to
+<log dir>/struxureguard.jsonl. The file is rotated by size
+(struxureguard.jsonl.1 is the newest rotated file) and rotated files older than
+max_age_days are removed.
+
+Every line is one JSON object:
+
+    {"ts": 1760000000.123, "level": "INFO", "logger": "Excelwriter", "msg": "...", "thread": "Thread-3"}
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from logstore import LogEntry
+
+LOG_FILE_NAME = "struxureguard.jsonl"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 10
+DEFAULT_MAX_AGE_DAYS = 30
+
+logger = logging.getLogger(__name__)
+
+_listener = None
+_queue_handler = None
+_log_dir = None
+
+
+def default_log_dir():
+    """
+    Return the folder for the log files: %LOCALAPPDATA%\\StruxureGuard\\logs on
+    Windows, ~/.struxureguard/logs elsewhere.
+    """
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return os.path.join(base, "StruxureGuard", "logs")
+    return os.path.join(os.path.expanduser("~"), ".struxureguard", "logs")
+
+
+def current_log_dir():
+    """
+    Return the folder the sink writes to, or default_log_dir() when it is not running.
+    """
+    return _log_dir or default_log_dir()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Format a record as one JSON object per line.
+    """
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SizeAgeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that also removes rotated files older than max_age_days.
+    """
+
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_age_days = max_age_days
+        self.remove_expired()
+
+    def doRollover(self):
+        super().doRollover()
+        self.remove_expired()
+
+    def remove_expired(self):
+        """
+        Delete rotated files whose last write is older than max_age_days.
+        """
+        if not self.max_age_days:
+            return
+        cutoff = time.time() - self.max_age_days * 86400
+        for path in list_log_files(os.path.dirname(self.baseFilename), os.path.basename(self.baseFilename)):
+            if path != self.baseFilename and os.path.getmtime(path) < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class _FastQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands the record over as is.
+
+    The standard prepare() formats and copies every record on the logging
+    thread; here the message is only frozen when it has arguments, everything
+    else (including the JSON formatting) happens on the listener thread.
+    """
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def start_persistent_logging(log_dir=None, level=logging.INFO, max_bytes=DEFAULT_MAX_BYTES,
+                             backup_count=DEFAULT_BACKUP_COUNT, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """
+    Attach the queue-backed JSON-lines sink to the root logger.
+
+    Calling it again while the sink is running does nothing.
+
+    Args:
+        log_dir (str, optional): Folder for the log files. Defaults to default_log_dir().
+        level (int): Minimum level written to the files.
+        max_bytes (int): Size at which the current file is rotated.
+        backup_count (int): Number of rotated files kept.
+        max_age_days (float): Rotated files older than this are removed (0 keeps them).
+
+    Returns:
+        str: Path of the current log file, or None if the folder cannot be created.
+    """
+    global _listener, _queue_handler, _log_dir
+    if _listener is not None:
+        return _listener.handlers[0].baseFilename
+    log_dir = log_dir or default_log_dir()
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Persistent logging disabled, cannot create {log_dir}: {e}")
+        return None
+
+    file_handler = SizeAgeRotatingFileHandler(os.path.join(log_dir, LOG_FILE_NAME), max_bytes, backup_count, max_age_days)
+    file_handler.setFormatter(JsonLinesFormatter())
+    file_handler.setLevel(level)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _FastQueueHandler(log_queue)
+    _queue_handler.setLevel(level)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    logging.getLogger().addHandler(_queue_handler)
+    _log_dir = log_dir
+    logger.debug(f"Persistent logging to {file_handler.baseFilename}")
+    return file_handler.baseFilename
+
+
+def stop_persistent_logging():
+    """
+    Detach the sink, write the records still queued and close the file.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _queue_handler = None
+
+
+atexit.register(stop_persistent_logging)
+
+
+def list_log_files(log_dir=None, base_name=LOG_FILE_NAME):
+    """
+    Return the existing log files, newest first (current file, .1, .2, ...).
+    """
+    log_dir = log_dir or current_log_dir()
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return []
+
+    def order(name):
+        suffix = name[len(base_name):].lstrip(".")
+        return int(suffix) if suffix.isdigit() else 0
+
+    files = [name for name in names
+             if name == base_name or (name.startswith(base_name + ".") and name[len(base_name) + 1:].isdigit())]
+    return [os.path.join(log_dir, name) for name in sorted(files, key=order)]
+
+
+def read_log_file(path):
+    """
+    Yield the records of one log file as LogEntry objects, oldest first.
+
+    Lines that are not valid JSON (e.g. a line cut off by a crash) are skipped.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            message = data.get("msg", "")
+            if data.get("exc"):
+                message += "\n" + data["exc"]
+            levelno = logging.getLevelName(data.get("level", "INFO"))
+            if not isinstance(levelno, int):
+                levelno = logging.INFO
+            yield LogEntry(data.get("ts", 0.0), levelno, data.get("logger", ""), message)
+
+
+class LogFileReader:
+    """
+    Pages through the persistent log files from newest to oldest.
+
+    Files are only opened when their page is requested, so browsing the most
+    recent file does not touch the older ones.
+    """
+
+    def __init__(self, log_dir=None):
+        self.log_dir = log_dir or current_log_dir()
+        self.files = list_log_files(self.log_dir)
+
+    def __len__(self):
+        return len(self.files)
+
+    def describe(self, index):
+        """
+        Return a short label for file index ("struxureguard.jsonl.1 (12-10 14:03, 4.9 MB)").
+        """
+        path = self.files[index]
+        stat = os.stat(path)
+        stamp = time.strftime("%d-%m %H:%M", time.localtime(stat.st_mtime))
+        return f"{os.path.basename(path)} ({stamp}, {stat.st_size / (1024 * 1024):.1f} MB)"
+
+    def page(self, index):
+        """
+        Return the records of file index (0 = current file), oldest first.
+        """
+        return list(read_log_file(self.files[index]))
@@ -0,0 +1,318 @@
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+
+# Records kept in memory for the debug log window
+MAX_LOG_RECORDS = 200000
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _words(text):
+    return set(_WORD_RE.findall(text.lower()))
+
+
+class LogEntry:
+    """
+    One structured log record as kept by the LogStore.
+
+    Attributes:
+        seq (int): Position in the store, assigned when added.
+        created (float): Timestamp (time.time()).
+        levelno (int): Logging level.
+        logger (str): Logger name.
+        message (str): The message, including exception text if any.
+    """
+    __slots__ = ("seq", "created", "levelno", "logger", "message")
+
+    def __init__(self, created, levelno, logger, message):
+        self.seq = None
+        self.created = created
+        self.levelno = levelno
+        self.logger = logger
+        self.message = message
+
+    @classmethod
+    def from_record(cls, record, formatter=None):
+        """
+        Build an entry from a logging.LogRecord.
+
+        Args:
+            record (logging.LogRecord): The record.
+            formatter (logging.Formatter, optional): Used to format exception info.
+        """
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + (formatter or logging.Formatter()).formatException(record.exc_info)
+        elif record.exc_text:
+            message += "\n" + record.exc_text
+        return cls(record.created, record.levelno, record.name, message)
+
+    @property
+    def levelname(self):
+        return logging.getLevelName(self.levelno)
+
+    def format(self):
+        """
+        Return the entry as a single display line ("12:00:01.123 INFO    logger - message").
+        """
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.created))
+        millis = int(self.created * 1000) % 1000
+        return f"{stamp}.{millis:03d} {self.levelname:<8} {self.logger} - {self.message}"
+
+
+class _Postings:
+    """
+    Ascending list of sequence numbers that can drop its oldest items in O(1).
+    """
+    __slots__ = ("seqs", "start")
+
+    def __init__(self):
+        self.seqs = []
+        self.start = 0
+
+    def __len__(self):
+        return len(self.seqs) - self.start
+
+    def add(self, seq):
+        self.seqs.append(seq)
+
+    def drop(self, seq):
+        if self.start < len(self.seqs) and self.seqs[self.start] == seq:
+            self.start += 1
+            # Compact once half of the list is dead
+            if self.start > 1024 and self.start * 2 > len(self.seqs):
+                del self.seqs[:self.start]
+                self.start = 0
+
+    def count_upto(self, seq):
+        """
+        Number of items <= seq.
+        """
+        return bisect.bisect_right(self.seqs, seq, self.start) - self.start
+
+    def iter_from(self, seq):
+        """
+        Iterate the items >= seq.
+        """
+        seqs = self.seqs
+        for idx in range(bisect.bisect_left(seqs, seq, self.start), len(seqs)):
+            yield seqs[idx]
+
+
+class LogView:
+    """
+    The records of a LogStore that match a filter, addressed by row number.
+
+    Level/logger views are never materialised: rows are located with a binary
+    search over the per (level, logger) indexes, so the cost does not depend on
+    the number of records. Text searches keep the sorted list of matches.
+    """
+
+    def __init__(self, store, min_level=logging.NOTSET, loggers=None, text=""):
+        self.store = store
+        self.min_level = min_level
+        self.loggers = set(loggers) if loggers else None
+        self.terms = sorted(_words(text), key=len, reverse=True)
+        self._matches = None
+        self._checked_seq = store.first_seq
+        if self.terms:
+            self._matches = store._search(self.terms, self._accepts)
+            self._checked_seq = store.next_seq
+
+    def _accepts_key(self, key):
+        levelno, logger_name = key
+        return levelno >= self.min_level and (self.loggers is None or logger_name in self.loggers)
+
+    def _accepts(self, entry):
+        return self._accepts_key((entry.levelno, entry.logger))
+
+    @property
+    def is_filtered(self):
+        return bool(self.terms) or self.min_level > logging.NOTSET or self.loggers is not None
+
+    def _postings(self):
+        return [postings for key, postings in self.store._by_key.items() if self._accepts_key(key)]
+
+    def refresh(self):
+        """
+        Take records added (or evicted) since the view was made into account.
+        """
+        store = self.store
+        if self._matches is not None:
+            with store._lock:
+                for seq in range(max(self._checked_seq, store.first_seq), store.next_seq):
+                    entry = store.get(seq)
+                    if self._accepts(entry) and store._matches_terms(entry, self.terms):
+                        self._matches.append(seq)
+                self._checked_seq = store.next_seq
+            first = bisect.bisect_left(self._matches, store.first_seq)
+            if first:
+                del self._matches[:first]
+
+    def __len__(self):
+        if self._matches is not None:
+            return len(self._matches)
+        if not self.is_filtered:
+            return len(self.store)
+        return sum(len(postings) for postings in self._postings())
+
+    def rows(self, start, count):
+        """
+        Return up to count entries starting at row start.
+        """
+        store = self.store
+        with store._lock:
+            total = len(self)
+            start = max(0, min(start, total))
+            end = min(total, start + count)
+            if start >= end:
+                return []
+            if self._matches is not None:
+                return [store.get(seq) for seq in self._matches[start:end]]
+            if not self.is_filtered:
+                return [store.get(store.first_seq + row) for row in range(start, end)]
+
+            postings = self._postings()
+            # Smallest seq with more than start matching records up to and including it
+            low, high = store.first_seq, store.next_seq - 1
+            while low < high:
+                mid = (low + high) // 2
+                if sum(p.count_upto(mid) for p in postings) > start:
+                    high = mid
+                else:
+                    low = mid + 1
+            merged = heapq.merge(*(p.iter_from(low) for p in postings))
+            return [store.get(seq) for seq, _ in zip(merged, range(end - start))]
+
+
+class LogStore:
+    """
+    Bounded, indexed in-memory store of structured log records.
+
+    Keeps the newest max_records entries. Besides the entries themselves it
+    maintains an index per (level, logger) and an inverted word index, so that
+    LogView can filter and search without scanning every record.
+    """
+
+    def __init__(self, max_records=MAX_LOG_RECORDS):
+        self.max_records = max_records
+        self._entries = []
+        self._offset = 0
+        self.first_seq = 0
+        self.next_seq = 0
+        self._by_key = {}
+        self._words = {}
+        self._vocabulary = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def get(self, seq):
+        return self._entries[self._offset + seq - self.first_seq]
+
+    def __iter__(self):
+        with self._lock:
+            entries = self._entries[self._offset:]
+        return iter(entries)
+
+    def extend(self, entries):
+        """
+        Add entries (in order), evicting the oldest ones beyond max_records.
+        """
+        with self._lock:
+            for entry in entries:
+                entry.seq = self.next_seq
+                self.next_seq += 1
+                self._entries.append(entry)
+                key = (entry.levelno, entry.logger)
+                postings = self._by_key.get(key)
+                if postings is None:
+                    postings = self._by_key[key] = _Postings()
+                postings.add(entry.seq)
+                for word in _words(entry.message):
+                    postings = self._words.get(word)
+                    if postings is None:
+                        postings = self._words[word] = _Postings()
+                        self._vocabulary = None
+                    postings.add(entry.seq)
+            excess = len(self) - self.max_records
+            if excess > 0:
+                self._evict(excess)
+
+    def append(self, entry):
+        self.extend((entry,))
+
+    def _evict(self, count):
+        for _ in range(count):
+            entry = self.get(self.first_seq)
+            self._by_key[(entry.levelno, entry.logger)].drop(entry.seq)
+            for word in _words(entry.message):
+                postings = self._words[word]
+                postings.drop(entry.seq)
+                if not len(postings):
+                    del self._words[word]
+                    self._vocabulary = None
+            self.first_seq += 1
+            self._offset += 1
+        # Compact the entry list once half of it is evicted
+        if self._offset * 2 > len(self._entries):
+            del self._entries[:self._offset]
+            self._offset = 0
+
+    def levels(self):
+        with self._lock:
+            return sorted({levelno for levelno, _ in self._by_key})
+
+    def loggers(self):
+        with self._lock:
+            return sorted({name for (_, name), postings in self._by_key.items() if len(postings)})
+
+    def _prefixed(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._words)
+        vocabulary = self._vocabulary
+        idx = bisect.bisect_left(vocabulary, prefix)
+        while idx < len(vocabulary) and vocabulary[idx].startswith(prefix):
+            yield vocabulary[idx]
+            idx += 1
+
+    @staticmethod
+    def _matches_terms(entry, terms):
+        words = _words(entry.message)
+        return all(any(word.startswith(term) for word in words) for term in terms)
+
+    def _search(self, terms, accepts):
+        """
+        Sorted seqs of entries where every term starts a word and accepts(entry) holds.
+        """
+        with self._lock:
+            # The term with the fewest candidate records drives the search
+            best = None
+            for term in terms:
+                candidates = [self._words[word] for word in self._prefixed(term)]
+                size = sum(len(postings) for postings in candidates)
+                if best is None or size < best[0]:
+                    best = (size, term, candidates)
+                if not size:
+                    return []
+            _, driver, candidates = best
+            rest = [term for term in terms if term != driver]
+            seqs = sorted({seq for postings in candidates for seq in postings.iter_from(self.first_seq)})
+            return [seq for seq in seqs
+                    if accepts(self.get(seq)) and (not rest or self._matches_terms(self.get(seq), rest))]
+
+    def query(self, min_level=logging.NOTSET, loggers=None, text=""):
+        """
+        Return a LogView of the records matching the filter.
+
+        Args:
+            min_level (int): Only records at or above this level.
+            loggers (iterable, optional): Only records of these loggers.
+            text (str): Every word must start a word of the message (case-insensitive).
+        """
+        return LogView(self, min_level, loggers, text)
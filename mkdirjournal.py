@@ -0,0 +1,131 @@
+"""
+Completion journal for MKDIR runs.
+
+While a run is busy, every finished folder and copy is appended as a JSON line
+to .struxureguard-mkdir.jsonl in the base path. When the run is interrupted
+(crash, VPN drop), the next run replays the journal: copies recorded for the
+same source size and modification time are trusted without touching the
+target, so resuming only costs the work that is left. A run that finishes
+without errors removes the journal.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = ".struxureguard-mkdir.jsonl"
+# Buffered entries are written at least this often
+FLUSH_INTERVAL = 0.5
+FLUSH_ENTRIES = 200
+
+
+def journal_path(base_path):
+    return os.path.join(base_path, JOURNAL_NAME)
+
+
+class JournalState:
+    """
+    What an earlier, interrupted run completed.
+
+    Attributes:
+        dirs (set): Casefolded names of created folders.
+        files (dict): Casefolded folder name -> (file name, source size, source mtime_ns).
+    """
+
+    def __init__(self):
+        self.dirs = set()
+        self.files = {}
+
+    def __len__(self):
+        return len(self.dirs) + len(self.files)
+
+    def has_copy(self, name, file_name, source_stat):
+        """
+        True if the journal records file_name in folder name, copied from a
+        source with the current size and modification time.
+        """
+        entry = self.files.get(name.casefold())
+        return entry is not None and entry == (file_name, source_stat.st_size, source_stat.st_mtime_ns)
+
+
+def load_journal(base_path):
+    """
+    Replay the journal in base_path.
+
+    Returns:
+        JournalState: Completed items; empty if there is no journal. A line cut
+        off by a crash is ignored, so that item is simply done again.
+    """
+    state = JournalState()
+    try:
+        f = open(journal_path(base_path), encoding="utf-8")
+    except OSError:
+        return state
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            key = entry.get("name", "").casefold()
+            if entry.get("op") == "dir":
+                state.dirs.add(key)
+            elif entry.get("op") == "file":
+                state.dirs.add(key)
+                state.files[key] = (entry.get("file"), entry.get("size"), entry.get("mtime_ns"))
+    if state:
+        logger.info(f"MKDIR journal gevonden in {base_path}: {len(state.dirs)} map(pen) al gedaan")
+    return state
+
+
+class JournalWriter:
+    """
+    Appends completed items to the journal, buffered and thread-safe.
+    """
+
+    def __init__(self, base_path):
+        self.path = journal_path(base_path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_dir(self, name):
+        self._append({"op": "dir", "name": name})
+
+    def record_file(self, name, file_name, source_stat):
+        self._append({"op": "file", "name": name, "file": file_name,
+                      "size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns})
+
+    def _append(self, entry):
+        with self._lock:
+            self._buffer.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            if len(self._buffer) >= FLUSH_ENTRIES or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self, completed=False):
+        """
+        Write what is buffered and close; remove the journal when the run completed.
+        """
+        with self._lock:
+            self._flush()
+            try:
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            self._file.close()
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logger.warning(f"Kon MKDIR journal niet verwijderen: {e}")
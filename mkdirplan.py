@@ -0,0 +1,211 @@
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+CREATE = "create"
+COPY = "copy"
+SKIP = "skip"
+CONFLICT = "conflict"
+
+ACTION_LABELS = {CREATE: "aanmaken", COPY: "alleen bestand kopiëren", SKIP: "overslaan", CONFLICT: "conflict"}
+
+# Characters Windows does not allow in file or folder names
+_ILLEGAL_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+_RESERVED_NAMES = {"con", "prn", "aux", "nul"} | {f"com{idx}" for idx in range(1, 10)} | {f"lpt{idx}" for idx in range(1, 10)}
+
+
+class PlanItem:
+    """
+    What MKDIR will do for one folder name.
+
+    Attributes:
+        name (str): Folder name as it will be used (stripped; the existing
+            spelling when the folder already exists in another case).
+        action (str): CREATE, COPY (folder exists, file missing or different),
+            SKIP or CONFLICT.
+        reason (str): Why, for SKIP and CONFLICT; notes such as removed spaces otherwise.
+        line (int): 1-based line number in the pasted names.
+    """
+
+    def __init__(self, name, action, reason="", line=0):
+        self.name = name
+        self.action = action
+        self.reason = reason
+        self.line = line
+
+    def __str__(self):
+        text = f"Regel {self.line}: '{self.name}' - {ACTION_LABELS[self.action]}"
+        return f"{text} ({self.reason})" if self.reason else text
+
+
+class MkdirPlan:
+    """
+    Dry-run result of plan_mkdir: one PlanItem per pasted line.
+    """
+
+    def __init__(self, base_path, source=None):
+        self.base_path = base_path
+        self.source = source
+        self.items = []
+
+    def of(self, action):
+        return [item for item in self.items if item.action == action]
+
+    @property
+    def conflicts(self):
+        return self.of(CONFLICT)
+
+    @property
+    def work(self):
+        """
+        Items that need disk operations (CREATE and COPY), in input order.
+        """
+        return [item for item in self.items if item.action in (CREATE, COPY)]
+
+    @property
+    def names(self):
+        """
+        The usable folder names (new or existing), without duplicates, in input order.
+        """
+        names, seen = [], set()
+        for item in self.items:
+            if item.action != CONFLICT and item.name.casefold() not in seen:
+                seen.add(item.name.casefold())
+                names.append(item.name)
+        return names
+
+    def counts(self):
+        counts = dict.fromkeys(ACTION_LABELS, 0)
+        for item in self.items:
+            counts[item.action] += 1
+        return counts
+
+    def summary(self):
+        counts = self.counts()
+        return ", ".join(f"{counts[action]} {label}" for action, label in ACTION_LABELS.items()
+                         if counts[action] or action in (CREATE, CONFLICT))
+
+
+def validate_name(name):
+    """
+    Return why name cannot be used as a folder name, or None if it can.
+    """
+    if not name:
+        return "lege naam"
+    if name in (".", ".."):
+        return "ongeldige naam"
+    match = _ILLEGAL_RE.search(name)
+    if match:
+        char = match.group(0)
+        return f"ongeldig teken {char!r}" if char.isprintable() else "ongeldig stuurteken"
+    if name.endswith("."):
+        return "eindigt op een punt"
+    if name.split(".")[0].strip().lower() in _RESERVED_NAMES:
+        return "gereserveerde naam in Windows"
+    if len(name) > 255:
+        return "naam langer dan 255 tekens"
+    return None
+
+
+def scan_base_path(base_path):
+    """
+    List base_path once.
+
+    Returns:
+        dict: casefolded name -> (name, is_dir). Empty if base_path does not exist.
+    """
+    entries = {}
+    try:
+        with os.scandir(base_path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries[entry.name.casefold()] = (entry.name, is_dir)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _same_file(path, source_stat):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == source_stat.st_size and int(stat.st_mtime) == int(source_stat.st_mtime)
+
+
+def plan_mkdir(base_path, lines, source=None, target_name=None, journal=None):
+    """
+    Plan an MKDIR run without touching the disk (only reads).
+
+    base_path is scanned once with os.scandir. Names are stripped and
+    validated (illegal characters, reserved names, trailing dots); exact
+    duplicates are skipped and names that only differ in case conflict, as they
+    are the same folder on Windows. A folder that exists already (in any case)
+    is skipped, unless a file has to be copied that is missing or differs in
+    size or modification time. Copies recorded in the journal of an
+    interrupted run for the same source are trusted without a stat.
+
+    Args:
+        base_path (str): Folder in which the folders are created.
+        lines (list): The pasted names, one per line; empty lines are ignored.
+        source (str, optional): File that will be copied into every folder.
+        target_name (callable, optional): name -> file name of the copy. Defaults
+            to the folder name plus the source's extension.
+        journal (mkdirjournal.JournalState, optional): Items completed by an earlier run.
+
+    Returns:
+        MkdirPlan: The plan.
+    """
+    plan = MkdirPlan(base_path, source)
+    existing = scan_base_path(base_path)
+    source_stat = os.stat(source) if source else None
+    if source and target_name is None:
+        ext = os.path.splitext(source)[1]
+
+        def target_name(name):
+            return f"{name}{ext}"
+
+    seen = {}
+    for line_no, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        name = raw.strip()
+        notes = "spaties verwijderd" if name != raw.rstrip("\r\n") else ""
+
+        problem = validate_name(name)
+        if problem:
+            plan.items.append(PlanItem(name, CONFLICT, problem, line_no))
+            continue
+
+        key = name.casefold()
+        if key in seen:
+            first_name, first_line = seen[key]
+            if first_name == name:
+                plan.items.append(PlanItem(name, SKIP, f"dubbel, zie regel {first_line}", line_no))
+            else:
+                plan.items.append(PlanItem(name, CONFLICT, f"zelfde map als '{first_name}' (regel {first_line})", line_no))
+            continue
+
+        if key in existing:
+            actual, is_dir = existing[key]
+            if not is_dir:
+                item = PlanItem(name, CONFLICT, "er bestaat al een bestand met deze naam", line_no)
+            elif source and journal is not None and journal.has_copy(actual, target_name(actual), source_stat):
+                item = PlanItem(actual, SKIP, "al gedaan volgens journal", line_no)
+            elif source and not _same_file(os.path.join(base_path, actual, target_name(actual)), source_stat):
+                item = PlanItem(actual, COPY, notes, line_no)
+            else:
+                reason = "bestaat al" if actual == name else f"bestaat al als '{actual}'"
+                item = PlanItem(actual, SKIP, reason, line_no)
+        else:
+            item = PlanItem(name, CREATE, notes, line_no)
+        seen[key] = (name, line_no)
+        plan.items.append(item)
+
+    logger.info(f"MKDIR plan voor {base_path}: {plan.summary()}")
+    return plan
@@ -0,0 +1,358 @@
+"""
+Folder-tree templates for MKDIR.
+
+A template describes the folders and seed files of one site and is expanded
+for every pasted name. JSON, or YAML when PyYAML is installed:
+
+    {
+        "root": "{name}",
+        "variables": {"jaar": "2025"},
+        "files": [{"source": "Checklist.xlsm", "name": "{name} Checklist.xlsm"}],
+        "children": [
+            {"name": "Backups"},
+            {"name": "Rapportages", "files": [{"source": "Rapport.docx", "name": "Rapport {name}.docx"}]},
+            {"name": "Foto's"},
+            {"name": "Exports", "children": [{"name": "{jaar}"}]}
+        ]
+    }
+
+Available variables: {name}, {index} (1-based position in the list), {date}
+(YYYY-MM-DD), {year} and everything under "variables". Relative "source"
+paths are resolved against the template's folder.
+
+All trees are built in one job: folders level by level (breadth-first) over a
+thread pool, then the seed files, each source read once. If anything fails,
+everything this job created is removed again; existing folders and files are
+never touched.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fanout import DEFAULT_WORKERS, FanoutResult, SourceFile
+from mkdirplan import validate_name
+
+logger = logging.getLogger(__name__)
+
+
+class TreeBuildError(RuntimeError):
+    """
+    Raised when building the trees failed; the job has been rolled back.
+
+    Attributes:
+        path (str): The folder or file that failed.
+        removed (int): Number of created folders and files removed again.
+    """
+
+    def __init__(self, path, cause, removed):
+        super().__init__(f"Kon '{path}' niet aanmaken: {cause} ({removed} aangemaakte item(s) teruggedraaid)")
+        self.path = path
+        self.removed = removed
+
+
+class _Variables(dict):
+    def __missing__(self, key):
+        raise ValueError(f"Onbekende variabele {{{key}}} in sjabloon")
+
+
+class TreeNode:
+    """
+    A folder in the template with its seed files and subfolders.
+
+    Attributes:
+        name (str): Folder name pattern.
+        files (list): (source path, file name pattern) tuples.
+        children (list): TreeNode objects.
+    """
+
+    def __init__(self, name, files=None, children=None):
+        self.name = name
+        self.files = files or []
+        self.children = children or []
+
+
+class TreeSpec:
+    """
+    A parsed folder-tree template.
+    """
+
+    def __init__(self, root, variables=None, path=None):
+        """
+        Args:
+            root (TreeNode): The site folder (its name defaults to "{name}").
+            variables (dict, optional): Extra substitution variables.
+            path (str, optional): The template file.
+        """
+        self.root = root
+        self.variables = variables or {}
+        self.path = path
+
+    def sources(self):
+        """
+        Return the set of seed file paths used by the template.
+        """
+        found, todo = set(), [self.root]
+        while todo:
+            node = todo.pop()
+            found.update(source for source, _ in node.files)
+            todo.extend(node.children)
+        return found
+
+    def expand(self, name, index=1):
+        """
+        Expand the template for one name.
+
+        Returns:
+            tuple: (levels, files) where levels is a list per depth of relative
+            folder paths and files a list of (source path, relative file path).
+
+        Raises:
+            ValueError: For an unknown variable or an invalid folder/file name.
+        """
+        today = time.localtime()
+        variables = _Variables(self.variables)
+        variables.update(name=name, index=index, date=time.strftime("%Y-%m-%d", today), year=today.tm_year)
+
+        levels, files = [], []
+        todo = [(self.root, "")]
+        while todo:
+            level, next_todo = [], []
+            for node, parent in todo:
+                folder = self._render(node.name, variables)
+                rel_path = os.path.join(parent, folder) if parent else folder
+                level.append(rel_path)
+                for source, pattern in node.files:
+                    files.append((source, os.path.join(rel_path, self._render(pattern, variables))))
+                next_todo.extend((child, rel_path) for child in node.children)
+            levels.append(level)
+            todo = next_todo
+        return levels, files
+
+    @staticmethod
+    def _render(pattern, variables):
+        value = pattern.format_map(variables).strip()
+        problem = validate_name(value)
+        if problem:
+            raise ValueError(f"Ongeldige naam '{value}' uit sjabloon '{pattern}': {problem}")
+        return value
+
+
+def _parse_node(data, base_dir, default_name=None):
+    if isinstance(data, str):
+        data = {"name": data}
+    if not isinstance(data, dict):
+        raise ValueError(f"Ongeldig sjabloonelement: {data!r}")
+    name = data.get("name", data.get("root", default_name))
+    if not name:
+        raise ValueError(f"Map zonder naam in sjabloon: {data!r}")
+    files = []
+    for entry in data.get("files") or []:
+        if isinstance(entry, str):
+            entry = {"source": entry}
+        source = os.path.join(base_dir, entry["source"])
+        files.append((source, entry.get("name") or os.path.basename(entry["source"])))
+    children = [_parse_node(child, base_dir) for child in data.get("children") or []]
+    return TreeNode(str(name), files, children)
+
+
+def load_tree_spec(path):
+    """
+    Read a folder-tree template (.json, or .yaml/.yml with PyYAML installed).
+
+    Returns:
+        TreeSpec: The template.
+
+    Raises:
+        ValueError: If the template is invalid, a seed file is missing or
+            YAML is used without PyYAML.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML-sjablonen vereisen PyYAML (pip install pyyaml); gebruik anders JSON")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Een sjabloon moet een object zijn met 'root'/'children'")
+
+    spec = TreeSpec(_parse_node(data, os.path.dirname(os.path.abspath(path)), "{name}"),
+                    {str(key): str(value) for key, value in (data.get("variables") or {}).items()}, path)
+    missing = [source for source in spec.sources() if not os.path.isfile(source)]
+    if missing:
+        raise ValueError(f"Bronbestand(en) niet gevonden: {', '.join(missing)}")
+    return spec
+
+
+def build_trees(base_path, names, spec, workers=DEFAULT_WORKERS, link_mode="copy", progress=None,
+                cancelled=None):
+    """
+    Build the template tree for every name under base_path in one job.
+
+    Folders are created breadth-first: all folders of one depth (over all
+    names) in parallel, then the next depth. Seed files follow, fanned out per
+    source. Existing folders are reused and existing files are left alone.
+
+    Args:
+        base_path (str): Folder in which the site folders are created.
+        names (list): Site names.
+        spec (TreeSpec): The template.
+        workers (int): Number of threads.
+        link_mode (str): "copy" or "hardlink", see fanout.SourceFile.
+        progress (callable, optional): Called with (done, total) on the calling thread.
+        cancelled (callable, optional): Returns True once the build should stop.
+            Everything created so far is then removed again.
+
+    Returns:
+        FanoutResult: Counts and throughput (directories counts created folders).
+            After a cancel, result.cancelled is set and the counts are zero.
+
+    Raises:
+        TreeBuildError: If a folder or file could not be created; everything
+            created by this call has been removed again.
+        ValueError: If the template cannot be expanded for a name.
+    """
+    start = time.perf_counter()
+    levels, files = [], []
+    for index, name in enumerate(names, start=1):
+        name_levels, name_files = spec.expand(name, index)
+        for depth, paths in enumerate(name_levels):
+            if depth == len(levels):
+                levels.append([])
+            levels[depth].extend(os.path.join(base_path, path) for path in paths)
+        files.extend((source, os.path.join(base_path, path)) for source, path in name_files)
+
+    total = sum(len(level) for level in levels) + len(files)
+    result = FanoutResult()
+    created_dirs, created_files = [], []
+    done = 0
+    stopped = threading.Event()
+
+    def stop():
+        # Once cancelled, the remaining work is skipped and the build is undone
+        if cancelled and not stopped.is_set() and cancelled():
+            stopped.set()
+        return stopped.is_set()
+
+    def make_dir(path):
+        if stop():
+            return None
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            if not os.path.isdir(path):
+                raise
+            return None
+        return path
+
+    sources = {}
+
+    def place(job):
+        source, dest = job
+        if stop() or os.path.lexists(dest):
+            return None, None
+        try:
+            return dest, sources[source].place(dest)
+        except BaseException:
+            # A copy that failed partway (disk full, share gone) leaves a partial
+            # file, which would keep the rollback from removing its folder
+            try:
+                os.remove(dest)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Terugdraaien: kon half geschreven {dest} niet verwijderen: {e}")
+            raise
+
+    os.makedirs(base_path, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        try:
+            # Every result of a batch is collected first, so the rollback also
+            # sees what other threads created after the first failure
+            for level in levels:
+                failure = None
+                for path, created in zip(level, pool.map(_guard(make_dir), level)):
+                    if isinstance(created, BaseException):
+                        failure = failure or (path, created)
+                    elif created:
+                        created_dirs.append(created)
+                        result.directories += 1
+                    done += 1
+                    if progress:
+                        progress(done, total)
+                if failure:
+                    raise TreeBuildError(failure[0], failure[1], 0) from failure[1]
+                if stop():
+                    files = []
+                    break
+
+            for source in {source for source, _ in files}:
+                sources[source] = SourceFile(source, link_mode)
+            failure = None
+            for (source, dest), outcome in zip(files, pool.map(_guard(place), files)):
+                if isinstance(outcome, BaseException):
+                    failure = failure or (dest, outcome)
+                    continue
+                path, method = outcome
+                if path:
+                    created_files.append(path)
+                    result.files += 1
+                    result.bytes += sources[source].size
+                    result.methods[method] = result.methods.get(method, 0) + 1
+                done += 1
+                if progress:
+                    progress(done, total)
+            if failure:
+                raise TreeBuildError(failure[0], failure[1], 0) from failure[1]
+        except TreeBuildError as e:
+            removed = _rollback(created_dirs, created_files)
+            logger.error(f"Mappenstructuur mislukt bij {e.path}: {e.__cause__}; {removed} item(s) teruggedraaid")
+            raise TreeBuildError(e.path, e.__cause__, removed) from e.__cause__
+
+    if stopped.is_set():
+        removed = _rollback(created_dirs, created_files)
+        logger.info(f"Mappenstructuur geannuleerd; {removed} item(s) teruggedraaid")
+        cancelled_result = FanoutResult()
+        cancelled_result.cancelled = True
+        cancelled_result.seconds = time.perf_counter() - start
+        return cancelled_result
+
+    result.seconds = time.perf_counter() - start
+    logger.info(f"Mappenstructuur voor {len(names)} naam/namen klaar: {result.summary()}")
+    return result
+
+
+def _guard(func):
+    """
+    Wrap func so that pool.map returns exceptions instead of raising them.
+    """
+    def call(arg):
+        try:
+            return func(arg)
+        except Exception as e:
+            return e
+    return call
+
+
+def _rollback(created_dirs, created_files):
+    removed = 0
+    for path in created_files:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Terugdraaien: kon {path} niet verwijderen: {e}")
+    # Deepest folders first
+    for path in sorted(created_dirs, key=lambda p: p.count(os.sep), reverse=True):
+        try:
+            os.rmdir(path)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Terugdraaien: kon {path} niet verwijderen: {e}")
+    return removed
@@ -0,0 +1,243 @@
+"""
+Minimal PDF writer: pages with text, lines and rectangles.
+
+Only the standard PDF fonts Helvetica and Helvetica-Bold are used, so nothing
+has to be embedded and every PDF viewer can show the result. Text is written
+in WinAnsiEncoding (cp1252), which covers Dutch accented letters and the euro
+sign; other accented letters are written as their base letter. The font widths needed for measuring and wrapping text are compiled
+once per process into lookup tables.
+"""
+import functools
+import unicodedata
+import zlib
+
+A4 = (595.28, 841.89)
+
+HELVETICA = "Helvetica"
+HELVETICA_BOLD = "Helvetica-Bold"
+
+# Advance widths (1/1000 em) of the printable ASCII characters 32..126 (Adobe AFM)
+_ASCII_WIDTHS = {
+    HELVETICA: (
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ),
+    HELVETICA_BOLD: (
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ),
+}
+# Widths of characters outside ASCII that do not follow their base letter
+_EXTRA_WIDTHS = {
+    HELVETICA: {"€": 556, "–": 556, "—": 1000, "‘": 222, "’": 222, "“": 333, "”": 333, "•": 350, "…": 1000,
+                "°": 400, "ß": 611, "æ": 889, "Æ": 1000, "ø": 611, "Ø": 778, "ì": 278, "í": 278, "î": 278, "ï": 278},
+    HELVETICA_BOLD: {"€": 556, "–": 556, "—": 1000, "‘": 278, "’": 278, "“": 500, "”": 500, "•": 350, "…": 1000,
+                     "°": 400, "ß": 611, "æ": 889, "Æ": 1000, "ø": 611, "Ø": 778},
+}
+_DEFAULT_WIDTH = 556
+
+
+@functools.lru_cache(maxsize=None)
+def font_widths(font):
+    """
+    Return the width table of a font: a dict character -> width in 1/1000 em
+    for every character that can be written in WinAnsiEncoding. Built once.
+    """
+    ascii_widths = _ASCII_WIDTHS[font]
+    widths = {chr(32 + idx): width for idx, width in enumerate(ascii_widths)}
+    for code in range(128, 256):
+        try:
+            char = bytes([code]).decode("cp1252")
+        except UnicodeDecodeError:
+            continue
+        if char in _EXTRA_WIDTHS[font]:
+            widths[char] = _EXTRA_WIDTHS[font][char]
+            continue
+        # Accented letters are as wide as their base letter
+        base = unicodedata.normalize("NFD", char)[0]
+        widths[char] = widths.get(base, _DEFAULT_WIDTH)
+    return widths
+
+
+def text_width(text, font, size):
+    """
+    Width of text in points.
+    """
+    widths = font_widths(font)
+    return sum(widths.get(char, _DEFAULT_WIDTH) for char in text) * size / 1000
+
+
+def wrap_text(text, font, size, max_width):
+    """
+    Split text into lines that fit max_width, breaking at spaces (and inside
+    words that are longer than a line). Existing line breaks are kept.
+    """
+    widths = font_widths(font)
+    limit = max_width * 1000 / size
+    lines = []
+    for paragraph in str(text).splitlines() or [""]:
+        line, line_width = "", 0
+        for word in paragraph.split(" "):
+            word_width = sum(widths.get(char, _DEFAULT_WIDTH) for char in word)
+            space = widths[" "] if line else 0
+            if line and line_width + space + word_width > limit:
+                lines.append(line)
+                line, line_width, space = "", 0, 0
+            while word_width > limit:
+                # Hard break inside a word that does not fit on a line
+                cut, cut_width = 0, 0
+                while cut < len(word) and cut_width + widths.get(word[cut], _DEFAULT_WIDTH) <= limit:
+                    cut_width += widths.get(word[cut], _DEFAULT_WIDTH)
+                    cut += 1
+                cut = max(cut, 1)
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = sum(widths.get(char, _DEFAULT_WIDTH) for char in word)
+            line = f"{line} {word}" if line else word
+            line_width += space + word_width
+        lines.append(line)
+    return lines
+
+
+def _winansi(char):
+    # "ő" -> "o"; characters without an encodable base letter become "?"
+    for candidate in (char, unicodedata.normalize("NFD", char)[0]):
+        try:
+            return candidate.encode("cp1252")
+        except UnicodeEncodeError:
+            pass
+    return b"?"
+
+
+def _pdf_string(text):
+    try:
+        data = text.encode("cp1252")
+    except UnicodeEncodeError:
+        data = b"".join(_winansi(char) for char in text)
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r") + b")"
+
+
+def _color(rgb):
+    return " ".join(f"{component:.3f}" for component in rgb)
+
+
+class PdfPage:
+    """
+    One page. Coordinates are in points from the top-left corner (y grows downwards).
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._ops = []
+        self.fonts = set()
+
+    def text(self, x, y, text, font=HELVETICA, size=10, color=(0, 0, 0)):
+        """
+        Draw text with its baseline at y.
+        """
+        self.fonts.add(font)
+        self._ops.append(b"BT /%s %.2f Tf %s rg %.2f %.2f Td %s Tj ET" % (
+            _FONT_RESOURCES[font].encode(), size, _color(color).encode(), x, self.height - y, _pdf_string(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5, color=(0, 0, 0)):
+        self._ops.append(b"%.2f w %s RG %.2f %.2f m %.2f %.2f l S" % (
+            width, _color(color).encode(), x1, self.height - y1, x2, self.height - y2))
+
+    def rect(self, x, y, width, height, fill=None, stroke=None, line_width=0.5):
+        """
+        Draw a rectangle with its top-left corner at (x, y).
+        """
+        ops = []
+        if fill is not None:
+            ops.append(b"%s rg" % _color(fill).encode())
+        if stroke is not None:
+            ops.append(b"%.2f w %s RG" % (line_width, _color(stroke).encode()))
+        paint = b"B" if fill is not None and stroke is not None else b"f" if fill is not None else b"S"
+        ops.append(b"%.2f %.2f %.2f %.2f re %s" % (x, self.height - y - height, width, height, paint))
+        self._ops.append(b" ".join(ops))
+
+    def content(self):
+        return b"\n".join(self._ops)
+
+
+_FONT_RESOURCES = {HELVETICA: "F1", HELVETICA_BOLD: "F2"}
+
+
+class PdfDocument:
+    """
+    A PDF document built page by page.
+    """
+
+    def __init__(self, page_size=A4, title=None, author=None, compress=True):
+        self.page_size = page_size
+        self.title = title
+        self.author = author
+        self.compress = compress
+        self.pages = []
+
+    def add_page(self):
+        page = PdfPage(*self.page_size)
+        self.pages.append(page)
+        return page
+
+    def to_bytes(self):
+        """
+        Serialise the document.
+        """
+        objects = []
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = add(None)
+        pages = add(None)
+        fonts = {font: add(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % font.encode())
+                 for font in _FONT_RESOURCES}
+        font_dict = b" ".join(b"/%s %d 0 R" % (_FONT_RESOURCES[font].encode(), num) for font, num in fonts.items())
+        kids = []
+        for page in self.pages:
+            stream = page.content()
+            if self.compress:
+                stream = zlib.compress(stream)
+                header = b"<< /Length %d /Filter /FlateDecode >>" % len(stream)
+            else:
+                header = b"<< /Length %d >>" % len(stream)
+            contents = add(header + b"\nstream\n" + stream + b"\nendstream")
+            kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                            % (pages, page.width, page.height, font_dict, contents)))
+        objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+        objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+        info = None
+        if self.title or self.author:
+            entries = b""
+            if self.title:
+                entries += b" /Title " + _pdf_string(self.title)
+            if self.author:
+                entries += b" /Author " + _pdf_string(self.author)
+            info = add(b"<<" + entries + b" /Producer (StruxureGuard) >>")
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for num, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root %d 0 R" % (len(objects) + 1, catalog)
+        if info:
+            out += b" /Info %d 0 R" % info
+        out += b" >>\nstartxref\n%d\n%%%%EOF\n" % xref
+        return bytes(out)
@@ -0,0 +1,291 @@
+"""
+Incrementeel bouwen van rapportages: alleen opnieuw maken wat gewijzigd is.
+
+Per rapportage wordt van elke sectie een hash gemaakt van de invoer: de
+schemasecties (klant- en contractinformatie, regelinstallatie,
+klimaatinstallaties, ...), de checklistmetingen en de opmaak (template plus
+RENDER_VERSIE van rapportpdf). De hashes van de vorige build staan in een
+manifest (MANIFEST_NAAM) in de uitvoermap, samen met grootte en
+wijzigingstijd van elk document. Een document wordt alleen opnieuw gemaakt als
+een sectiehash afwijkt of het bestand sinds de vorige build is verwijderd of
+aangepast; de gewijzigde secties worden gelogd.
+
+Een PDF wordt als geheel opgemaakt (de pagina-indeling hangt van alle secties
+af), dus een gewijzigde sectie betekent dat dat ene document opnieuw wordt
+gerenderd. De datum in de voettekst telt niet mee: een ongewijzigde rapportage
+houdt de datum van de build waarin hij gemaakt is.
+
+Usage:
+    python rapportbuild.py -o MAP [BRON ...] [--formaat pdf|xml] [--db pad] [--template t.json]
+                           [--workers N] [--alles] [--contractniveau Totaal] ...
+
+Zonder bronnen worden de huidige rapportages uit het archief (rapportstore) gebouwd.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+from rapportbulk import lees_rapporten, schrijf_xml, xml_naam
+from rapportpdf import laad_template, metingen_tabel, pdf_namen, render_batch
+from rapportschema import SCHEMA
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAAM = ".rapportbuild.json"
+MANIFEST_FORMAAT = "struxureguard-build"
+MANIFEST_VERSIE = 1
+BOUW_FORMATEN = ("pdf", "xml")
+
+CHECKLIST = "CHECKLIST"
+OPMAAK = "OPMAAK"
+TEMPLATEPAD = "TEMPLATEPAD"
+
+
+def _hash(waarde):
+    return hashlib.sha1(json.dumps(waarde, ensure_ascii=False, separators=(",", ":")).encode()).hexdigest()
+
+
+def sectie_hashes(rapport, metingen=(), formaat="pdf", template=None):
+    """
+    Hash van de invoer van elke sectie van een document.
+
+    Args:
+        rapport (dict): Rapportage (zie rapportbulk).
+        metingen (list, optional): Metingen van het checklist-werkboek (alleen voor pdf).
+        formaat (str, optional): "pdf" of "xml".
+        template (Template, optional): Opmaak voor pdf. Standaard laad_template().
+
+    Returns:
+        dict: sectienaam -> hash.
+    """
+    velden = rapport["velden"]
+    hashes = {sectie.titel: _hash([velden.get(veld.sleutel, "") for veld in sectie.velden])
+              for sectie in SCHEMA.secties}
+    if formaat == "pdf":
+        hashes[CHECKLIST] = _hash(metingen_tabel(metingen))
+        hashes[OPMAAK] = (template or laad_template()).sleutel
+    else:
+        # Het templatepad staat in de XML; metingen en opmaak niet
+        hashes[TEMPLATEPAD] = _hash(rapport.get("templatepad", ""))
+    return hashes
+
+
+class Manifest:
+    """
+    De sectiehashes van de vorige build in een uitvoermap.
+    """
+
+    def __init__(self, uitmap):
+        self.uitmap = uitmap
+        self.pad = os.path.join(uitmap, MANIFEST_NAAM)
+        self.documenten = {}
+        try:
+            with open(self.pad, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifest {self.pad} onleesbaar, alles wordt opnieuw gemaakt: {e}")
+            return
+        if data.get("formaat") != MANIFEST_FORMAAT or data.get("versie") != MANIFEST_VERSIE:
+            logger.info(f"Manifest {self.pad} heeft een ander formaat, alles wordt opnieuw gemaakt")
+            return
+        self.documenten = data.get("documenten", {})
+
+    def gewijzigde_secties(self, naam, hashes):
+        """
+        Secties van document naam die sinds de vorige build gewijzigd zijn.
+
+        Returns:
+            list: Namen van de gewijzigde secties (leeg als het document up-to-date is),
+                of None als het document niet (meer) bestaat zoals het gebouwd is.
+        """
+        vorige = self.documenten.get(naam)
+        if not vorige:
+            return None
+        try:
+            stat = os.stat(os.path.join(self.uitmap, naam))
+        except OSError:
+            return None
+        if stat.st_size != vorige.get("grootte") or stat.st_mtime_ns != vorige.get("mtime_ns"):
+            return None
+        oude = vorige.get("secties", {})
+        return [sectie for sectie, waarde in hashes.items() if oude.get(sectie) != waarde]
+
+    def bijwerken(self, naam, hashes):
+        stat = os.stat(os.path.join(self.uitmap, naam))
+        self.documenten[naam] = {"secties": hashes, "grootte": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def verwijder(self, naam):
+        self.documenten.pop(naam, None)
+
+    def opslaan(self):
+        """
+        Schrijf het manifest; via een tijdelijk bestand, zodat een afgebroken
+        build nooit een half manifest achterlaat.
+        """
+        tijdelijk = self.pad + ".tmp"
+        with open(tijdelijk, "w", encoding="utf-8") as f:
+            json.dump({"formaat": MANIFEST_FORMAAT, "versie": MANIFEST_VERSIE, "documenten": self.documenten},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tijdelijk, self.pad)
+
+
+class BouwResultaat:
+    """
+    Uitkomst van bouw(): gemaakte, ongewijzigde en mislukte documenten.
+    """
+
+    def __init__(self):
+        self.gemaakt = []
+        self.ongewijzigd = []
+        self.fouten = []
+        self.nieuw = 0
+        self.secties = Counter()
+        self.seconden = 0.0
+
+    def samenvatting(self):
+        tekst = (f"{len(self.gemaakt)} gemaakt, {len(self.ongewijzigd)} ongewijzigd, "
+                 f"{len(self.fouten)} fout(en) in {self.seconden:.2f}s")
+        if self.secties:
+            tekst += "; gewijzigd: " + ", ".join(f"{sectie} ({aantal})" for sectie, aantal in self.secties.most_common())
+        return tekst
+
+
+def _xml_namen(rapporten):
+    gebruikt = set()
+    return [xml_naam(rapport, idx, gebruikt) for idx, rapport in enumerate(rapporten)]
+
+
+def _schrijf_xml_batch(taken, uitmap, progress):
+    resultaten = []
+    for (rapport, _), naam in taken:
+        pad = os.path.join(uitmap, naam)
+        start = time.perf_counter()
+        try:
+            schrijf_xml(rapport, pad)
+            fout = None
+        except Exception as e:
+            fout = f"{type(e).__name__}: {e}"
+        resultaten.append((pad, fout, time.perf_counter() - start))
+        if progress:
+            progress(*resultaten[-1])
+    return resultaten
+
+
+def bouw(taken, uitmap, formaat="pdf", template_pad=None, workers=None, alles=False, namen=None, progress=None):
+    """
+    Maak de documenten van taken in uitmap, alleen als hun invoer sinds de
+    vorige build in die map gewijzigd is.
+
+    Args:
+        taken (list): (rapport, metingen) per rapportage.
+        uitmap (str): Map voor de documenten en het manifest (wordt aangemaakt).
+        formaat (str, optional): "pdf" of "xml".
+        template_pad (str, optional): Template (JSON) voor pdf.
+        workers (int, optional): Aantal processen voor pdf. Standaard het aantal CPU's.
+        alles (bool, optional): Alles opnieuw maken, ongeacht het manifest.
+        namen (list, optional): Bestandsnaam per rapportage. Standaard pdf_namen() of de XML-namen van rapportbulk.
+        progress (callable, optional): Aangeroepen met (pad, fout, seconden) per gemaakt document.
+
+    Returns:
+        BouwResultaat: De gemaakte en ongewijzigde bestandsnamen, fouten en per sectie hoe vaak hij gewijzigd was.
+
+    Raises:
+        ValueError: Bij een onbekend formaat of een ongeldig template.
+    """
+    if formaat not in BOUW_FORMATEN:
+        raise ValueError(f"Onbekend formaat '{formaat}', kies uit {', '.join(BOUW_FORMATEN)}")
+    start = time.perf_counter()
+    taken = [(rapport, list(metingen)) for rapport, metingen in taken]
+    template = laad_template(template_pad) if formaat == "pdf" else None
+    if namen is None:
+        rapporten = [rapport for rapport, _ in taken]
+        namen = pdf_namen(rapporten) if formaat == "pdf" else _xml_namen(rapporten)
+    os.makedirs(uitmap, exist_ok=True)
+    manifest = Manifest(uitmap)
+    resultaat = BouwResultaat()
+
+    te_maken, hashes_per_naam = [], {}
+    for (rapport, metingen), naam in zip(taken, namen):
+        hashes = sectie_hashes(rapport, metingen, formaat, template)
+        gewijzigd = None if alles else manifest.gewijzigde_secties(naam, hashes)
+        if gewijzigd == []:
+            resultaat.ongewijzigd.append(naam)
+            continue
+        if gewijzigd is None:
+            resultaat.nieuw += 1
+        else:
+            resultaat.secties.update(gewijzigd)
+            logger.debug(f"{naam}: gewijzigd in {', '.join(gewijzigd)}")
+        te_maken.append(((rapport, metingen), naam))
+        hashes_per_naam[naam] = hashes
+
+    if te_maken:
+        if formaat == "pdf":
+            resultaten = render_batch([taak for taak, _ in te_maken], uitmap, template_pad, workers, progress,
+                                      namen=[naam for _, naam in te_maken])
+        else:
+            resultaten = _schrijf_xml_batch(te_maken, uitmap, progress)
+        for (_, naam), (pad, fout, _) in zip(te_maken, resultaten):
+            if fout:
+                resultaat.fouten.append(f"{pad}: {fout}")
+                manifest.verwijder(naam)
+            else:
+                resultaat.gemaakt.append(naam)
+                manifest.bijwerken(naam, hashes_per_naam[naam])
+        manifest.opslaan()
+    resultaat.seconden = time.perf_counter() - start
+    logger.info(f"Build {formaat} naar {uitmap}: {resultaat.samenvatting()}")
+    return resultaat
+
+
+def main(argv=None):
+    from rapportstore import GEINDEXEERDE_VELDEN, RapportStore
+
+    parser = argparse.ArgumentParser(description="Maak de rapportages van een onderhoudsronde, alleen wat gewijzigd is.")
+    parser.add_argument("bronnen", nargs="*", help="XML-bestanden, mappen met XML, .jsonl- of .sgr-bestanden "
+                                                   "(standaard: de huidige rapportages uit het archief)")
+    parser.add_argument("-o", "--output", required=True, help="map voor de documenten")
+    parser.add_argument("-f", "--formaat", choices=BOUW_FORMATEN, default="pdf", help="documentformaat (standaard: pdf)")
+    parser.add_argument("--db", help="archief voor rapportages en metingen (standaard: het gebruikersarchief)")
+    parser.add_argument("--template", help="template (JSON) voor pdf")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="aantal processen (standaard: aantal CPU's)")
+    parser.add_argument("--alles", action="store_true", help="alles opnieuw maken, ook wat ongewijzigd is")
+    for sleutel in GEINDEXEERDE_VELDEN:
+        parser.add_argument(f"--{sleutel}", metavar="WAARDE", help=f"alleen rapportages met dit {sleutel} (* als joker)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    if args.formaat == "pdf":
+        try:
+            laad_template(args.template)
+        except (OSError, ValueError) as e:
+            print(f"FOUT template {args.template}: {e}")
+            return 1
+    fouten = []
+    with RapportStore(args.db) as store:
+        if args.bronnen:
+            rapporten, fouten = lees_rapporten(args.bronnen, args.workers)
+        else:
+            filters = {sleutel: getattr(args, sleutel) for sleutel in GEINDEXEERDE_VELDEN
+                       if getattr(args, sleutel) is not None}
+            rapporten = store.zoek(**filters)
+        taken = [(rapport, store.metingen(werkboek=rapport["templatepad"])
+                  if args.formaat == "pdf" and rapport.get("templatepad") else [])
+                 for rapport in rapporten]
+
+    resultaat = bouw(taken, args.output, args.formaat, args.template, args.workers, args.alles)
+    for fout in fouten + resultaat.fouten:
+        print(f"FOUT {fout}")
+    print(resultaat.samenvatting())
+    return 0 if not fouten and not resultaat.fouten else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
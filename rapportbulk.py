@@ -0,0 +1,386 @@
+"""
+Bulk import/export van rapportages.
+
+Een rapportage is een dict met "bron" (het bestand waar hij vandaan komt),
+"templatepad" en "velden" (veldsleutel -> waarde, zie rapportschema).
+
+Ondersteunde formaten:
+
+- xml: de bestaande <Rapportage><Veld naam="...">-bestanden, één rapportage
+  per bestand. Wordt gestreamd gelezen (iterparse). Een map als bron leest alle
+  .xml-bestanden erin; een map als doel krijgt één .xml per rapportage.
+- jsonl: JSON-lines. De eerste regel is een kop met formaat, versie en de
+  veldsleutels, daarna één rapportage per regel.
+- sgr: compact binair. Magic b"SGRB", versiebyte, dezelfde kop als jsonl en
+  daarna per rapportage alleen de niet-lege velden als (index, lengte, UTF-8),
+  met varints. Ongeveer een derde kleiner dan jsonl.
+
+Het sheetwachtwoord wordt nooit weggeschreven; een "Wachtwoord" in oude
+XML-bestanden wordt bij het lezen overgeslagen.
+
+XML-bestanden worden over een procespool gelezen en geschreven.
+
+Usage:
+    python rapportbulk.py BRON [BRON ...] -o DOEL [--formaat xml|jsonl|sgr] [--workers N]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from rapportschema import SCHEMA, XML_VELD
+
+logger = logging.getLogger(__name__)
+
+FORMAAT_NAAM = "struxureguard-rapporten"
+FORMAAT_VERSIE = 1
+FORMATEN = ("xml", "jsonl", "sgr")
+SGR_MAGIC = b"SGRB"
+
+# Vaste velden van een rapportage vóór de schemavelden in de sgr-veldtabel
+_META = ("bron", "templatepad")
+
+
+def lees_xml(pad):
+    """
+    Lees één rapportage-XML, gestreamd.
+
+    Returns:
+        dict: Rapportage met bron, templatepad en velden.
+
+    Raises:
+        xml.etree.ElementTree.ParseError, OSError: Als het bestand niet leesbaar is.
+    """
+    paren = []
+    for _, element in ET.iterparse(pad, events=("end",)):
+        if element.tag == XML_VELD:
+            paren.append((element.get("naam"), element.text or ""))
+            element.clear()
+    velden, meta = SCHEMA.uit_xml_paren(paren)
+    return {"bron": pad, "templatepad": meta.get("Templatepad", ""), "velden": velden}
+
+
+def schrijf_xml(rapport, pad):
+    """
+    Schrijf één rapportage als XML, zonder wachtwoord.
+    """
+    root = SCHEMA.naar_xml(rapport["velden"], {"Templatepad": rapport.get("templatepad", "")})
+    ET.ElementTree(root).write(pad, encoding="utf-8", xml_declaration=True)
+
+
+def _kop():
+    return {"formaat": FORMAAT_NAAM, "versie": FORMAAT_VERSIE, "velden": [veld.sleutel for veld in SCHEMA.velden]}
+
+
+def _controleer_kop(kop, pad):
+    if not isinstance(kop, dict) or kop.get("formaat") != FORMAAT_NAAM:
+        raise ValueError(f"{pad} is geen rapportagebestand")
+    if kop.get("versie", 0) > FORMAAT_VERSIE:
+        raise ValueError(f"{pad} heeft formaatversie {kop.get('versie')}, deze versie leest t/m {FORMAAT_VERSIE}")
+    return kop.get("velden", [])
+
+
+def _bekende_velden(velden):
+    # Velden die deze versie van het schema niet kent worden overgeslagen
+    return {sleutel: waarde for sleutel, waarde in velden.items() if sleutel in SCHEMA}
+
+
+def schrijf_jsonl(rapporten, pad):
+    """
+    Schrijf rapportages als JSON-lines met versiekop.
+
+    Returns:
+        int: Aantal geschreven rapportages.
+    """
+    aantal = 0
+    with open(pad, "w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps(_kop(), ensure_ascii=False) + "\n")
+        for rapport in rapporten:
+            f.write(json.dumps({"bron": rapport.get("bron", ""), "templatepad": rapport.get("templatepad", ""),
+                                "velden": {k: v for k, v in rapport["velden"].items() if v}},
+                               ensure_ascii=False) + "\n")
+            aantal += 1
+    return aantal
+
+
+def lees_jsonl(pad):
+    """
+    Lees rapportages uit een JSON-lines-bestand, één voor één.
+
+    Raises:
+        ValueError: Bij een onbekend formaat of een nieuwere versie.
+    """
+    with open(pad, encoding="utf-8") as f:
+        _controleer_kop(json.loads(f.readline() or "null"), pad)
+        for regel in f:
+            if regel.strip():
+                rapport = json.loads(regel)
+                rapport["velden"] = _bekende_velden(rapport.get("velden", {}))
+                yield rapport
+
+
+def _varint(getal):
+    uit = bytearray()
+    while getal >= 0x80:
+        uit.append((getal & 0x7F) | 0x80)
+        getal >>= 7
+    uit.append(getal)
+    return bytes(uit)
+
+
+def _lees_varint(data, positie):
+    getal = shift = 0
+    while True:
+        byte = data[positie]
+        positie += 1
+        getal |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return getal, positie
+        shift += 7
+
+
+def schrijf_sgr(rapporten, pad):
+    """
+    Schrijf rapportages in het compacte binaire formaat.
+
+    Returns:
+        int: Aantal geschreven rapportages.
+    """
+    kop = _kop()
+    index = {naam: idx for idx, naam in enumerate(_META + tuple(kop["velden"]))}
+    aantal = 0
+    with open(pad, "wb") as f:
+        kop_bytes = json.dumps(kop).encode("utf-8")
+        f.write(SGR_MAGIC + bytes([FORMAAT_VERSIE]) + _varint(len(kop_bytes)) + kop_bytes)
+        for rapport in rapporten:
+            items = [(naam, rapport.get(naam, "")) for naam in _META] + list(rapport["velden"].items())
+            payload = bytearray()
+            gevuld = 0
+            for naam, waarde in items:
+                if waarde and naam in index:
+                    tekst = waarde.encode("utf-8")
+                    payload += _varint(index[naam]) + _varint(len(tekst)) + tekst
+                    gevuld += 1
+            record = _varint(gevuld) + payload
+            f.write(_varint(len(record)) + record)
+            aantal += 1
+    return aantal
+
+
+def lees_sgr(pad):
+    """
+    Lees rapportages uit een sgr-bestand, één voor één.
+
+    Raises:
+        ValueError: Bij een onbekend formaat, een nieuwere versie of een afgekapt bestand.
+    """
+    with open(pad, "rb") as f:
+        data = f.read()
+    if len(data) < 5 or data[:4] != SGR_MAGIC:
+        raise ValueError(f"{pad} is geen sgr-bestand")
+    if data[4] > FORMAAT_VERSIE:
+        raise ValueError(f"{pad} heeft formaatversie {data[4]}, deze versie leest t/m {FORMAAT_VERSIE}")
+    lengte, positie = _lees_varint(data, 5)
+    namen = _META + tuple(_controleer_kop(json.loads(data[positie:positie + lengte]), pad))
+    bekend = [naam in _META or naam in SCHEMA for naam in namen]
+    positie += lengte
+    try:
+        while positie < len(data):
+            lengte, positie = _lees_varint(data, positie)
+            einde = positie + lengte
+            if einde > len(data):
+                raise IndexError
+            gevuld, positie = _lees_varint(data, positie)
+            rapport = {"bron": "", "templatepad": "", "velden": {}}
+            for _ in range(gevuld):
+                idx, positie = _lees_varint(data, positie)
+                tekst_lengte, positie = _lees_varint(data, positie)
+                waarde = data[positie:positie + tekst_lengte].decode("utf-8")
+                positie += tekst_lengte
+                if idx < len(_META):
+                    rapport[namen[idx]] = waarde
+                elif idx < len(namen) and bekend[idx]:
+                    rapport["velden"][namen[idx]] = waarde
+            positie = einde
+            yield rapport
+    except IndexError:
+        raise ValueError(f"{pad} is afgekapt of beschadigd") from None
+
+
+def formaat_van(pad):
+    """
+    Bepaal het formaat aan de extensie; een map (of pad zonder extensie) is xml.
+    """
+    ext = os.path.splitext(pad)[1].lower().lstrip(".")
+    if ext in FORMATEN:
+        return ext
+    if os.path.isdir(pad) or not ext:
+        return "xml"
+    raise ValueError(f"Onbekend formaat voor {pad}; gebruik .xml, .jsonl, .sgr of een map")
+
+
+def xml_bestanden(bronnen):
+    """
+    Alle XML-paden uit bronnen: losse bestanden en .xml-bestanden in mappen (gesorteerd).
+    """
+    paden = []
+    for bron in bronnen:
+        if os.path.isdir(bron):
+            with os.scandir(bron) as it:
+                paden.extend(sorted(entry.path for entry in it if entry.is_file() and entry.name.lower().endswith(".xml")))
+        else:
+            paden.append(bron)
+    return paden
+
+
+def _lees_xml_taak(pad):
+    # Draait in een werkproces en geeft fouten terug in plaats van ze te gooien
+    try:
+        return lees_xml(pad), None
+    except Exception as e:
+        return None, f"{pad}: {type(e).__name__}: {e}"
+
+
+def _schrijf_xml_taak(taak):
+    rapport, pad = taak
+    try:
+        schrijf_xml(rapport, pad)
+        return None
+    except Exception as e:
+        return f"{pad}: {type(e).__name__}: {e}"
+
+
+def _pool_map(func, taken, workers):
+    workers = max(1, min(workers or os.cpu_count() or 1, len(taken) or 1))
+    if workers == 1:
+        return [func(taak) for taak in taken]
+    # Eén bestand is weinig werk: in blokken versturen scheelt de meeste pooloverhead
+    chunksize = max(1, len(taken) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, taken, chunksize=chunksize))
+
+
+def lees_xml_bestanden(paden, workers=None):
+    """
+    Lees veel rapportage-XML's over een procespool.
+
+    Args:
+        paden (list): XML-bestanden.
+        workers (int, optional): Aantal processen. Standaard het aantal CPU's.
+
+    Returns:
+        tuple: (rapporten in de volgorde van paden, foutmeldingen).
+    """
+    rapporten, fouten = [], []
+    for rapport, fout in _pool_map(_lees_xml_taak, list(paden), workers):
+        if fout:
+            fouten.append(fout)
+        else:
+            rapporten.append(rapport)
+    return rapporten, fouten
+
+
+def lees_rapporten(bronnen, workers=None):
+    """
+    Lees rapportages uit bronnen van elk formaat (bestanden of mappen met XML).
+
+    Returns:
+        tuple: (rapporten, foutmeldingen).
+    """
+    rapporten, fouten = [], []
+    xml_bronnen = []
+    for bron in bronnen:
+        try:
+            formaat = formaat_van(bron)
+        except ValueError as e:
+            fouten.append(str(e))
+            continue
+        if formaat == "xml":
+            xml_bronnen.append(bron)
+            continue
+        try:
+            rapporten.extend(lees_jsonl(bron) if formaat == "jsonl" else lees_sgr(bron))
+        except (OSError, ValueError) as e:
+            fouten.append(f"{bron}: {e}")
+    if xml_bronnen:
+        gelezen, xml_fouten = lees_xml_bestanden(xml_bestanden(xml_bronnen), workers)
+        rapporten.extend(gelezen)
+        fouten.extend(xml_fouten)
+    return rapporten, fouten
+
+
+def xml_naam(rapport, idx, gebruikt):
+    """
+    Unieke bestandsnaam voor rapportage nummer idx in een XML-map; gebruikt
+    bevat de al uitgedeelde namen (casefold) en wordt bijgewerkt.
+    """
+    stam = os.path.splitext(os.path.basename(rapport.get("bron") or ""))[0] or f"rapportage_{idx + 1:05d}"
+    naam, teller = f"{stam}.xml", 1
+    while naam.casefold() in gebruikt:
+        teller += 1
+        naam = f"{stam} ({teller}).xml"
+    gebruikt.add(naam.casefold())
+    return naam
+
+
+def schrijf_rapporten(rapporten, doel, formaat=None, workers=None):
+    """
+    Schrijf rapportages naar doel: een .jsonl- of .sgr-bestand, of een map met
+    één XML per rapportage (over een procespool).
+
+    Returns:
+        tuple: (aantal geschreven, foutmeldingen).
+    """
+    formaat = formaat or formaat_van(doel)
+    if formaat == "jsonl":
+        return schrijf_jsonl(rapporten, doel), []
+    if formaat == "sgr":
+        return schrijf_sgr(rapporten, doel), []
+    os.makedirs(doel, exist_ok=True)
+    gebruikt = set()
+    taken = [(rapport, os.path.join(doel, xml_naam(rapport, idx, gebruikt))) for idx, rapport in enumerate(rapporten)]
+    fouten = [fout for fout in _pool_map(_schrijf_xml_taak, taken, workers) if fout]
+    return len(taken) - len(fouten), fouten
+
+
+def converteer(bronnen, doel, formaat=None, workers=None):
+    """
+    Lees alle bronnen en schrijf ze naar doel.
+
+    Returns:
+        dict: gelezen, geschreven, fouten en seconden.
+    """
+    start = time.perf_counter()
+    rapporten, fouten = lees_rapporten(bronnen, workers)
+    geschreven, schrijf_fouten = schrijf_rapporten(rapporten, doel, formaat, workers)
+    resultaat = {"gelezen": len(rapporten), "geschreven": geschreven, "fouten": fouten + schrijf_fouten,
+                 "seconden": time.perf_counter() - start}
+    logger.info(f"Rapportages geconverteerd: {len(rapporten)} gelezen, {geschreven} geschreven naar {doel} "
+                f"in {resultaat['seconden']:.2f}s, {len(resultaat['fouten'])} fout(en)")
+    return resultaat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converteer rapportages tussen XML, JSON-lines en sgr.")
+    parser.add_argument("bronnen", nargs="+", help="XML-bestanden, mappen met XML, .jsonl- of .sgr-bestanden")
+    parser.add_argument("-o", "--output", required=True, help="doel: .jsonl, .sgr of een map voor XML")
+    parser.add_argument("-f", "--formaat", choices=FORMATEN, help="doelformaat (standaard: aan de extensie)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="aantal processen (standaard: aantal CPU's)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    resultaat = converteer(args.bronnen, args.output, args.formaat, args.workers)
+    for fout in resultaat["fouten"]:
+        print(f"FOUT {fout}")
+    snelheid = resultaat["gelezen"] / resultaat["seconden"] if resultaat["seconden"] else 0
+    print(f"{resultaat['gelezen']} gelezen, {resultaat['geschreven']} geschreven in "
+          f"{resultaat['seconden']:.2f}s ({snelheid:.0f} rapportages/s)")
+    return 1 if resultaat["fouten"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
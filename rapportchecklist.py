@@ -0,0 +1,207 @@
+"""
+Checklist per contractniveau, uit de toelichtingstabel van het formulier.
+
+CONTRACTNIVEAU_TABEL wordt bij het importeren één keer gecompileerd tot een
+ChecklistModel: categorieën, items, per contractniveau (Basis, Standaard,
+Totaal) de vooraf berekende set verplichte items, en de rijen voor de
+toelichting op het formulier. Uit het model en een contractniveau volgen de
+verplichte punten en het checkboxplan voor de checklist-sheets van het
+werkboek (een excelplan.WritePlan, zodat ExcelWriter alles in één batch per
+sheet zet).
+
+Alleen items waarvan bekend is welke checkbox erbij hoort (CHECKBOXES) komen
+in het plan; de overige verplichte punten blijven handwerk.
+"""
+import logging
+
+from excelplan import LICENSE_CHECKBOXES, LICENSE_SHEET_COUNT, WritePlan
+
+logger = logging.getLogger(__name__)
+
+# Hardcoded data uit het Excel-bestand
+CONTRACTNIVEAU_KOLOMMEN = ["Omschrijving", "Basis", "Standaard", "Totaal"]
+CONTRACTNIVEAU_TABEL = [
+    ["HARDWARE REGELPANEEL", "", "", ""],
+    ["Voor aanvang LMRA EQUANS uitvoeren.", "x", "x", "x"],
+    ["Visuele NEN inspectie van bedrading, relais etc. in het regelpaneel", "x", "x", "x"],
+    ["Warmtebeeldcontrole van het regelpaneel", "x", "x", "x"],
+    ["Kastventilatie werkt naar behoren en is stofvrij", "x", "x", "x"],
+    ["Bedienbeeldscherm regelkast werkt naar behoren", "x", "x", "x"],
+    ["Regeltechnische omschrijving aanwezig en up-to-date, datum en versie", "x", "x", "x"],
+    ["Regelkastschema aanwezig en up-to-date, datum en versie", "x", "x", "x"],
+    ["DDC HARDWARE", "", "", ""],
+    ["Meting voedingsspanning regelaar(s)", "x", "x", "x"],
+    ["Interventieschakelaars op automatisch ingesteld", "x", "x", "x"],
+    ["Werking UPS en standtijd controleren, indien aanwezig", "x", "x", "x"],
+    ["Tekstlabels regelaar(s) en IO-modulen aanwezig", "x", "x", "x"],
+    ["DDC FIRMWARE", "", "", ""],
+    ["Benodigde licenties aanwezig", "x", "x", "x"],
+    ["Trendstorage geheugen", "x", "x", "x"],
+    ["Systeemdatum en -tijd correct", "x", "x", "x"],
+    ["Controle softwareversie op regelaar, modules en naregelingen", "x", "x", "x"],
+    ["Systeemload CPU/geheugen controleren", "x", "x", "x"],
+    ["Map Opmerkingen nakijken in regelaar (logboek)", "x", "x", "x"],
+    ["Back-up maken van controler", "x", "x", "x"],
+    ["Controleren aanwezigheid automatische back-up ", "x", "x", "x"],
+    ["Integriteit automatische back-up", "x", "x", "x"],
+    ["Systeem events (100) controleren", "x", "x", "x"],
+    ["FUNCTIONELE SOFTWARE (FYSIEK)", "", "", ""],
+    ["Map Programma's controleren", "x", "x", "x"],
+    ["Binding Diagnostics controleren", "x", "x", "x"],
+    ["Standaard loggen aanwezig", "", "x", "x"],
+    ["Extended loggen aanwezig", "", "x", "x"],
+    ["Standen softwareschakelaars op automatisch", "x", "x", "x"],
+    ["I/O softwarematig geforceerd", "x", "x", "x"],
+    ["Values geforceerd", "x", "x", "x"],
+    ["Alarmen disabled", "x", "x", "x"],
+    ["Aantal urgente en niet urgente alarmen noteren", "x", "x", "x"],
+    ["Storingen overzicht en historie vastleggen", "x", "x", "x"],
+    ["Instellingen prioriteiten storingen", "", "x", "x"],
+    ["Doormeldingen verzamelstoringen controleren", "x", "x", "x"],
+    ["Controleren werking overwerkschakelaars (software)", "", "", "x"],
+    ["Controleren klok- en vakantieprogramma's", "", "", "x"],
+    ["Controleren aanwezigheid van zomer-/winterblokkeringen", "", "x", "x"],
+    ["Werking snelkoppelingen grafische interface", "", "", "x"],
+    ["Regelkringen berekend setpoint/actuele waarde", "", "", "x"],
+    ["Werking brandschakelaars/schakelingen, volgens PVE en RTO", "", "", "x"],
+    ["Functietest scenario's: thermostaten vorst, minimaal, maximaal, druk", "", "", "x"],
+    ["Functietest schakelende servomotoren", "", "", "x"],
+    ["Warmtebeeldcontrole van aangesloten naregelingen", "", "", "x"],
+]
+
+# Omschrijving in de tabel -> checkboxes op elke checklist-sheet
+CHECKBOXES = {
+    "Benodigde licenties aanwezig": LICENSE_CHECKBOXES,
+}
+
+
+class ChecklistItem:
+    """
+    Eén controlepunt.
+
+    Attributes:
+        nummer (int): Volgnummer van het item in de checklist (0-based).
+        omschrijving (str): Tekst zoals in de tabel.
+        categorie (str): Titel van de categorie waaronder het item staat.
+        niveaus (frozenset): Contractniveaus waarvoor het item verplicht is.
+        checkboxes (tuple): Bijbehorende checkboxes op de checklist-sheets, of leeg.
+    """
+
+    def __init__(self, nummer, omschrijving, categorie, niveaus, checkboxes=()):
+        self.nummer = nummer
+        self.omschrijving = omschrijving
+        self.categorie = categorie
+        self.niveaus = niveaus
+        self.checkboxes = tuple(checkboxes)
+
+
+class Categorie:
+    """
+    Een kopregel van de tabel met de items eronder.
+    """
+
+    def __init__(self, titel):
+        self.titel = titel
+        self.items = []
+
+
+def _sleutel(tekst):
+    return " ".join(tekst.split()).casefold()
+
+
+class ChecklistModel:
+    """
+    De gecompileerde checklist.
+
+    Een rij zonder kruisje in de niveaukolommen is een categorie; elke andere
+    rij is een item, verplicht voor de niveaus met een "x".
+    """
+
+    def __init__(self, tabel, kolommen, checkboxes=None):
+        """
+        Args:
+            tabel (list): Rijen [omschrijving, kruisje per niveau, ...].
+            kolommen (list): Kolomtitels: "Omschrijving" en daarna de niveaus.
+            checkboxes (dict, optional): Omschrijving -> checkboxnamen. Standaard CHECKBOXES.
+        """
+        self.kolommen = tuple(kolommen)
+        self.niveaus = self.kolommen[1:]
+        checkboxes = {_sleutel(tekst): namen for tekst, namen in (CHECKBOXES if checkboxes is None else checkboxes).items()}
+        self.categorieen = []
+        self.items = []
+        rijen = []
+        for rij in tabel:
+            omschrijving, kruisjes = rij[0], rij[1:]
+            if not any(cel.strip() for cel in kruisjes):
+                self.categorieen.append(Categorie(omschrijving))
+                rijen.append((tuple(rij), ("categorie",)))
+                continue
+            if not self.categorieen:
+                self.categorieen.append(Categorie(""))
+            niveaus = frozenset(niveau for niveau, cel in zip(self.niveaus, kruisjes) if cel.strip())
+            item = ChecklistItem(len(self.items), omschrijving, self.categorieen[-1].titel, niveaus,
+                                 checkboxes.pop(_sleutel(omschrijving), ()))
+            self.items.append(item)
+            self.categorieen[-1].items.append(item)
+            rijen.append((tuple(rij), ()))
+        for tekst in checkboxes:
+            logger.warning(f"Checkbox-koppeling voor onbekend checklistitem '{tekst}' genegeerd")
+        # Kant-en-klare rijen (waarden, tags) voor de toelichting
+        self.rijen = tuple(rijen)
+        self._niveaus = {niveau.casefold(): niveau for niveau in self.niveaus}
+        self._index = {_sleutel(item.omschrijving): item for item in self.items}
+        self.vereist_sets = {niveau: frozenset(item.nummer for item in self.items if niveau in item.niveaus)
+                             for niveau in self.niveaus}
+        self._vereist = {niveau: tuple(item for item in self.items if item.nummer in nummers)
+                         for niveau, nummers in self.vereist_sets.items()}
+
+    def niveau(self, tekst):
+        """
+        Het contractniveau in tekst (hoofdletters en spaties maken niet uit).
+
+        Raises:
+            ValueError: Als het geen bekend contractniveau is.
+        """
+        niveau = self._niveaus.get(tekst.strip().casefold())
+        if niveau is None:
+            raise ValueError(f"Onbekend contractniveau '{tekst}', kies uit {', '.join(self.niveaus)}")
+        return niveau
+
+    def item(self, omschrijving):
+        """
+        Het item met deze omschrijving, of None.
+        """
+        return self._index.get(_sleutel(omschrijving))
+
+    def vereist(self, niveau):
+        """
+        De verplichte items voor een contractniveau, in checklistvolgorde.
+        """
+        return self._vereist[self.niveau(niveau)]
+
+    def checkbox_plan(self, niveau, plan=None, sheets=LICENSE_SHEET_COUNT):
+        """
+        Zet de checkboxes van de verplichte items met een bekende checkbox in een schrijfplan.
+
+        Args:
+            niveau (str): Contractniveau.
+            plan (WritePlan, optional): Plan om aan toe te voegen. Standaard een nieuw plan.
+            sheets (int, optional): Aantal checklist-sheets.
+
+        Returns:
+            WritePlan: Het plan.
+        """
+        plan = WritePlan() if plan is None else plan
+        items = [item for item in self.vereist(niveau) if item.checkboxes]
+        for idx in range(sheets):
+            sheet_plan = plan.sheet(idx)
+            for item in items:
+                for naam in item.checkboxes:
+                    sheet_plan.add_checkbox(naam)
+                # unprotect + checkboxes + protect
+                plan.legacy_calls += 2 + len(item.checkboxes)
+        logger.debug(f"Checkboxplan contractniveau {niveau}: {len(items)} item(s) op {sheets} sheet(s)")
+        return plan
+
+
+CHECKLIST = ChecklistModel(CONTRACTNIVEAU_TABEL, CONTRACTNIVEAU_KOLOMMEN)
@@ -0,0 +1,343 @@
+"""
+PDF-rapportages: een rapportage plus de checklistmetingen van ExcelWriter als PDF.
+
+De opmaak komt uit een template (JSON, zie STANDAARD_TEMPLATE voor de
+sleutels); een template wordt per proces één keer gelezen en gecachet op pad
+en wijzigingstijd, net als de lettertypebreedtes (zie pdfwriter). In batch
+worden rapportages over een procespool gerenderd; elk werkproces laadt het
+template één keer en gebruikt het voor al zijn rapportages.
+
+Een hele onderhoudsronde renderen (alleen wat gewijzigd is): zie rapportbuild.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from excelplan import SECTIONS, checklist_sheet_name
+from pdfwriter import A4, HELVETICA, HELVETICA_BOLD, PdfDocument, text_width, wrap_text
+from rapportschema import LINKS, RECHTS, SCHEMA
+
+logger = logging.getLogger(__name__)
+
+STANDAARD_TEMPLATE = {
+    "titel": "Onderhoudsrapportage Meet- en Regeltechniek",
+    "bedrijf": "Equans Services",
+    "kleur": "#00A0DC",
+    "lettergrootte": 9,
+    "marge": 42,
+    "voettekst": "",
+    "metingen_titel": "CHECKLIST REGELKASTEN",
+}
+
+# Verhogen als de opmaak in deze module verandert: incrementele builds
+# (rapportbuild) maken dan alle PDF's opnieuw
+RENDER_VERSIE = 2
+
+_ILLEGAL_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# Per proces: pad -> (mtime_ns, template)
+_templates = {}
+
+
+class Template:
+    """
+    Een gecompileerd template: de waarden uit de JSON plus afgeleide maten.
+    """
+
+    def __init__(self, data):
+        onbekend = set(data) - set(STANDAARD_TEMPLATE)
+        if onbekend:
+            raise ValueError(f"Onbekende sleutel(s) in template: {', '.join(sorted(onbekend))}")
+        waarden = dict(STANDAARD_TEMPLATE, **data)
+        # Identiteit van de opmaak, voor de sectiehashes van rapportbuild
+        self.sleutel = hashlib.sha1(json.dumps([RENDER_VERSIE, waarden], sort_keys=True).encode()).hexdigest()
+        self.titel = waarden["titel"]
+        self.bedrijf = waarden["bedrijf"]
+        self.kleur = _parse_kleur(waarden["kleur"])
+        self.grootte = float(waarden["lettergrootte"])
+        self.marge = float(waarden["marge"])
+        self.voettekst = waarden["voettekst"]
+        self.metingen_titel = waarden["metingen_titel"]
+        self.regel = self.grootte * 1.35
+        self.breedte, self.hoogte = A4
+        self.label_breedte = max((text_width(veld.label, HELVETICA, self.grootte) for veld in SCHEMA.velden)) + 12
+
+
+def _parse_kleur(tekst):
+    tekst = tekst.lstrip("#")
+    if not re.fullmatch(r"[0-9a-fA-F]{6}", tekst):
+        raise ValueError(f"Ongeldige kleur '#{tekst}' in template, gebruik #RRGGBB")
+    return tuple(int(tekst[idx:idx + 2], 16) / 255 for idx in (0, 2, 4))
+
+
+def laad_template(pad=None):
+    """
+    Lees een template (JSON); zonder pad het standaardtemplate. Per proces
+    gecachet op pad en wijzigingstijd.
+
+    Raises:
+        ValueError: Bij een ongeldig template.
+    """
+    if not pad:
+        pad = ""
+        mtime = 0
+    else:
+        pad = os.path.abspath(pad)
+        mtime = os.stat(pad).st_mtime_ns
+    cached = _templates.get(pad)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    data = {}
+    if pad:
+        with open(pad, encoding="utf-8") as f:
+            data = json.load(f)
+    template = Template(data)
+    _templates[pad] = (mtime, template)
+    return template
+
+
+def metingen_tabel(metingen):
+    """
+    Zet metingen (zie RapportStore.metingen) om naar rijen per checklist-sheet;
+    per sheet en sectie telt de nieuwste meting.
+
+    Returns:
+        list: (sheetnaam, {sectiesleutel: (waarde, boven drempel)}) per sheet, op volgorde.
+    """
+    drempels = {section.key: section.warn_threshold for section in SECTIONS}
+    per_sheet = {}
+    for meting in sorted(metingen, key=lambda m: m["gemeten"]):
+        drempel = drempels.get(meting["sectie"])
+        boven = drempel is not None and meting.get("getal") is not None and meting["getal"] >= drempel
+        per_sheet.setdefault(meting["sheet"], {})[meting["sectie"]] = (meting["waarde"], boven)
+    return [(checklist_sheet_name(sheet), per_sheet[sheet]) for sheet in sorted(per_sheet)]
+
+
+class _Opmaak:
+    """
+    Zet blokken onder elkaar en begint een nieuwe pagina als een blok niet meer past.
+    """
+
+    def __init__(self, doc, template):
+        self.doc = doc
+        self.t = template
+        self.page = None
+        self.y = 0
+        self.nieuwe_pagina()
+
+    @property
+    def onderkant(self):
+        return self.t.hoogte - self.t.marge - 2 * self.t.regel
+
+    def nieuwe_pagina(self):
+        self.page = self.doc.add_page()
+        self.y = self.t.marge
+
+    def ruimte(self, hoogte):
+        if self.y + hoogte > self.onderkant:
+            self.nieuwe_pagina()
+
+    def kop(self, titel):
+        t = self.t
+        self.ruimte(t.regel * 3)
+        self.y += t.regel * 0.6
+        self.page.rect(t.marge, self.y, t.breedte - 2 * t.marge, t.regel * 1.4, fill=t.kleur)
+        self.page.text(t.marge + 6, self.y + t.regel * 1.0, titel, HELVETICA_BOLD, t.grootte, (1, 1, 1))
+        self.y += t.regel * 1.4 + t.regel * 0.4
+
+    def veld(self, label, waarde):
+        t = self.t
+        waarde_x = t.marge + 6 + t.label_breedte
+        regels = wrap_text(waarde or "-", HELVETICA_BOLD, t.grootte, t.breedte - t.marge - waarde_x)
+        self.ruimte(t.regel * len(regels))
+        self.page.text(t.marge + 6, self.y + t.grootte, label, HELVETICA, t.grootte, (0.25, 0.25, 0.25))
+        for regel in regels:
+            self.page.text(waarde_x, self.y + t.grootte, regel, HELVETICA_BOLD, t.grootte)
+            self.y += t.regel
+
+    def tabel(self, kolommen, rijen):
+        """
+        Tabel met kolommen [(titel, breedte-aandeel)] en rijen [[(tekst, rood)]].
+        """
+        t = self.t
+        totaal = sum(aandeel for _, aandeel in kolommen)
+        beschikbaar = t.breedte - 2 * t.marge
+        breedtes = [beschikbaar * aandeel / totaal for _, aandeel in kolommen]
+
+        def kopregel():
+            x = t.marge
+            self.page.rect(t.marge, self.y, beschikbaar, t.regel * 1.3, fill=(0.92, 0.92, 0.92))
+            for (titel, _), breedte in zip(kolommen, breedtes):
+                self.page.text(x + 4, self.y + t.regel * 0.95, titel, HELVETICA_BOLD, t.grootte)
+                x += breedte
+            self.y += t.regel * 1.3
+
+        self.ruimte(t.regel * 2.6)
+        kopregel()
+        for rij in rijen:
+            cellen = [wrap_text(tekst, HELVETICA, t.grootte, breedte - 8) for (tekst, _), breedte in zip(rij, breedtes)]
+            hoogte = max(len(regels) for regels in cellen) * t.regel + t.regel * 0.3
+            if self.y + hoogte > self.onderkant:
+                self.nieuwe_pagina()
+                kopregel()
+            x = t.marge
+            for (tekst, rood), regels, breedte in zip(rij, cellen, breedtes):
+                kleur = (0.8, 0, 0) if rood else (0, 0, 0)
+                for idx, regel in enumerate(regels):
+                    self.page.text(x + 4, self.y + t.grootte + idx * t.regel, regel, HELVETICA, t.grootte, kleur)
+                x += breedte
+            self.y += hoogte
+            self.page.line(t.marge, self.y, t.marge + beschikbaar, self.y, 0.3, (0.75, 0.75, 0.75))
+
+
+def render_rapport(rapport, metingen=(), template=None):
+    """
+    Render een rapportage als PDF.
+
+    Args:
+        rapport (dict): Rapportage met "velden" (veldsleutel -> waarde), zie rapportbulk.
+        metingen (list, optional): Metingen van het checklist-werkboek (RapportStore.metingen).
+        template (Template, optional): Standaard laad_template().
+
+    Returns:
+        bytes: De PDF.
+    """
+    t = template or laad_template()
+    velden = rapport["velden"]
+    naam = " - ".join(filter(None, (velden.get("klantnaam"), velden.get("locatie")))) or "Rapportage"
+    doc = PdfDocument(title=f"{t.titel} {naam}", author=t.bedrijf)
+    opmaak = _Opmaak(doc, t)
+
+    page = opmaak.page
+    page.text(t.marge, opmaak.y + t.grootte * 2, t.titel, HELVETICA_BOLD, t.grootte * 2, t.kleur)
+    opmaak.y += t.grootte * 3
+    page.text(t.marge, opmaak.y + t.grootte * 1.4, naam, HELVETICA_BOLD, t.grootte * 1.4)
+    opmaak.y += t.grootte * 2.2
+    page.line(t.marge, opmaak.y, t.breedte - t.marge, opmaak.y, 1.2, t.kleur)
+    opmaak.y += t.regel * 0.5
+
+    for kolom in (LINKS, RECHTS):
+        for sectie in SCHEMA.secties:
+            if sectie.kolom != kolom:
+                continue
+            opmaak.kop(sectie.titel)
+            for veld in sectie.velden:
+                opmaak.veld(veld.label.rstrip(":"), velden.get(veld.sleutel, ""))
+
+    tabel = metingen_tabel(metingen)
+    if tabel:
+        opmaak.kop(t.metingen_titel)
+        kolommen = [("Sheet", 1.4)] + [(section.label, 1) for section in SECTIONS]
+        rijen = [[(sheet, False)] + [waarden.get(section.key, ("", False)) for section in SECTIONS]
+                 for sheet, waarden in tabel]
+        opmaak.tabel(kolommen, rijen)
+
+    gemaakt = time.strftime("%d-%m-%Y")
+    for nummer, pagina in enumerate(doc.pages, start=1):
+        y = t.hoogte - t.marge
+        pagina.line(t.marge, y - t.regel, t.breedte - t.marge, y - t.regel, 0.3, (0.6, 0.6, 0.6))
+        links = " | ".join(filter(None, (t.bedrijf, t.voettekst, gemaakt)))
+        pagina.text(t.marge, y, links, HELVETICA, t.grootte * 0.85, (0.4, 0.4, 0.4))
+        rechts = f"Pagina {nummer} van {len(doc.pages)}"
+        pagina.text(t.breedte - t.marge - text_width(rechts, HELVETICA, t.grootte * 0.85), y, rechts,
+                    HELVETICA, t.grootte * 0.85, (0.4, 0.4, 0.4))
+    return doc.to_bytes()
+
+
+def pdf_naam(rapport):
+    """
+    Bestandsnaam voor de PDF van een rapportage.
+    """
+    velden = rapport["velden"]
+    naam = " - ".join(filter(None, (velden.get("klantnaam", "").strip(), velden.get("locatie", "").strip())))
+    if not naam:
+        naam = os.path.splitext(os.path.basename(rapport.get("bron") or ""))[0] or "rapportage"
+    return f"Rapportage {_ILLEGAL_RE.sub('_', naam).rstrip('. ')}.pdf"
+
+
+def pdf_namen(rapporten):
+    """
+    Unieke bestandsnamen (pdf_naam) voor rapportages in één map, in invoervolgorde.
+    """
+    gebruikt = set()
+    namen = []
+    for rapport in rapporten:
+        naam = pdf_naam(rapport)
+        stam, teller = naam[:-4], 1
+        while naam.casefold() in gebruikt:
+            teller += 1
+            naam = f"{stam} ({teller}).pdf"
+        gebruikt.add(naam.casefold())
+        namen.append(naam)
+    return namen
+
+
+def schrijf_pdf(rapport, pad, metingen=(), template=None):
+    """
+    Render een rapportage en schrijf de PDF naar pad.
+    """
+    data = render_rapport(rapport, metingen, template)
+    with open(pad, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def _init_worker(template_pad):
+    # Eén keer per werkproces: template en lettertypebreedtes laden
+    laad_template(template_pad)
+
+
+def _render_taak(taak):
+    rapport, metingen, pad, template_pad = taak
+    start = time.perf_counter()
+    try:
+        schrijf_pdf(rapport, pad, metingen, laad_template(template_pad))
+        return pad, None, time.perf_counter() - start
+    except Exception as e:
+        return pad, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def render_batch(taken, uitmap, template_pad=None, workers=None, progress=None, namen=None):
+    """
+    Render veel rapportages over een procespool.
+
+    Args:
+        taken (list): (rapport, metingen) per rapportage.
+        uitmap (str): Map voor de PDF's (wordt aangemaakt).
+        template_pad (str, optional): Template (JSON); standaard het standaardtemplate.
+        workers (int, optional): Aantal processen. Standaard het aantal CPU's.
+        progress (callable, optional): Aangeroepen met (pad, fout, seconden) per PDF.
+        namen (list, optional): Bestandsnaam per rapportage. Standaard pdf_naam(), uniek gemaakt.
+
+    Returns:
+        list: (pad, fout of None, seconden) per rapportage, in invoervolgorde.
+    """
+    laad_template(template_pad)  # ongeldig template meteen melden, niet per rapportage
+    os.makedirs(uitmap, exist_ok=True)
+    taken = list(taken)
+    if namen is None:
+        namen = pdf_namen(rapport for rapport, _ in taken)
+    opdrachten = [(rapport, list(metingen), os.path.join(uitmap, naam), template_pad)
+                  for (rapport, metingen), naam in zip(taken, namen)]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(opdrachten) or 1))
+    logger.info(f"PDF-batch gestart: {len(opdrachten)} rapportage(s) over {workers} proces(sen)")
+    if workers == 1:
+        resultaten = []
+        for opdracht in opdrachten:
+            resultaten.append(_render_taak(opdracht))
+            if progress:
+                progress(*resultaten[-1])
+        return resultaten
+    resultaten = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template_pad,)) as pool:
+        for resultaat in pool.map(_render_taak, opdrachten, chunksize=max(1, len(opdrachten) // (workers * 4))):
+            resultaten.append(resultaat)
+            if progress:
+                progress(*resultaat)
+    return resultaten
+
@@ -0,0 +1,311 @@
+"""
+Veldschema van het rapportageformulier.
+
+Elk veld staat hier één keer beschreven: sectie, label op het formulier,
+sleutel op het tabblad 'Gegevens', naam in de XML-export, type invoerveld en
+keuzelijst. Het schema wordt bij het importeren één keer gecompileerd tot
+opzoektabellen, zodat elke vertaling (Excel -> veld, XML <-> veld) een
+dictionary-lookup is. Niets in deze module gebruikt Tk; het formulier, de
+XML-import/export en verwerking zonder venster gebruiken dezelfde functies.
+
+Waarden worden doorgegeven als dict veldsleutel -> tekst.
+"""
+import logging
+from collections import Counter
+import xml.etree.ElementTree as ET
+from xlsmreader import display_value, read_sheet
+
+logger = logging.getLogger(__name__)
+
+ENTRY = "entry"
+COMBOBOX = "combobox"
+
+LINKS = "links"
+RECHTS = "rechts"
+
+# Scheidingslijn tussen velden binnen een sectie
+SCHEIDING = None
+
+XML_ROOT = "Rapportage"
+XML_VELD = "Veld"
+# Velden in de XML die geen formulierveld zijn
+META_VELDEN = ("Wachtwoord", "Templatepad")
+
+_AANTALLEN = ("1", "2", "3", "4")
+_OPWEKKING = ("nvt", "ketel(s)", "warmtepomp(en)", "bron(nen)", "WKO (bron en WP)")
+
+
+class Veld:
+    """
+    Eén veld van het rapportageformulier.
+
+    Attributes:
+        sleutel (str): Unieke, vaste naam van het veld.
+        label (str): Tekst op het formulier (niet uniek).
+        excel (str): Sleutel in kolom A van het tabblad 'Gegevens' (zonder ':').
+        voorkomen (int): Welk voorkomen van excel bedoeld is, als de sleutel
+            vaker op het tabblad staat (1 = eerste).
+        xml (str): Naam in de XML-export.
+        xml_aliassen (tuple): Oudere XML-namen die bij importeren ook herkend worden.
+        type (str): ENTRY of COMBOBOX.
+        keuzes (tuple): Waarden in de keuzelijst.
+        hulp (bool): Toon de "?"-knop met de contractniveautabel.
+        sectie (str): Titel van de sectie (gezet bij compileren).
+        kolom (str): LINKS of RECHTS (gezet bij compileren).
+    """
+
+    def __init__(self, sleutel, label, excel=None, voorkomen=1, xml=None, xml_aliassen=(), keuzes=None, hulp=False):
+        self.sleutel = sleutel
+        self.label = label
+        self.excel = excel or label.rstrip(":")
+        self.voorkomen = voorkomen
+        self.xml = xml or label
+        self.xml_aliassen = tuple(xml_aliassen)
+        self.type = COMBOBOX if keuzes else ENTRY
+        self.keuzes = tuple(keuzes or ())
+        self.hulp = hulp
+        self.sectie = None
+        self.kolom = None
+
+    def __repr__(self):
+        return f"Veld({self.sleutel!r})"
+
+
+class Sectie:
+    """
+    Een groep velden op het formulier; items bevat Veld-objecten en SCHEIDING.
+    """
+
+    def __init__(self, kolom, titel, items):
+        self.kolom = kolom
+        self.titel = titel
+        self.items = items
+
+    @property
+    def velden(self):
+        return [item for item in self.items if item is not SCHEIDING]
+
+
+SECTIES = [
+    Sectie(LINKS, "KLANT- EN CONTRACTINFORMATIE", [
+        Veld("klantnaam", "Klantnaam/Gebouwnaam:", excel="Klantnaam"),
+        Veld("locatie", "Locatie:"),
+        Veld("adres", "Adres:"),
+        Veld("type_gebouwgebruik", "Type gebouwgebruik:", excel="Type gebouwgebruik door klant",
+             keuzes=("Kantoor (gehuurd)", "Kantoor (verhuurd)", "Kantoor eigen gebruik", "School", "Ziekenhuis", "Overig")),
+        SCHEIDING,
+        Veld("contactpersoon_td", "Contactpersoon technische dienst:",
+             excel="Contactpersoon technische dienst, indien van toepassing"),
+        Veld("telefoon_td", "Telefoonnummer contactpersoon:", voorkomen=1,
+             xml="Telefoonnummer contactpersoon technische dienst:"),
+        Veld("email_td", "Email contactpersoon:", voorkomen=1,
+             xml="Email contactpersoon technische dienst:"),
+        SCHEIDING,
+        Veld("contactpersoon_contract", "Contactpersoon contract:"),
+        # Oudere exports bevatten alleen "Telefoonnummer contactpersoon:", met de
+        # waarde van het contract-veld (het tweede veld overschreef het eerste)
+        Veld("telefoon_contract", "Telefoonnummer contactpersoon:", voorkomen=2,
+             xml="Telefoonnummer contactpersoon contract:", xml_aliassen=("Telefoonnummer contactpersoon:",)),
+        Veld("email_contract", "Email contactpersoon:", voorkomen=2,
+             xml="Email contactpersoon contract:", xml_aliassen=("Email contactpersoon:",)),
+        SCHEIDING,
+        Veld("contractjaar", "Contractjaar:"),
+        Veld("aantal_rapportages", "Aantal onderhoudsrapportages in contractjaar", keuzes=_AANTALLEN),
+        Veld("contractniveau", "Contractniveau:", keuzes=("Basis", "Standaard", "Totaal"), hulp=True),
+    ]),
+    Sectie(LINKS, "INFORMATIE EQUANS SERVICES", [
+        Veld("onderhoud_door", "Onderhoud uitgevoerd door:"),
+        Veld("opgesteld_door", "Rapportage opgesteld door:"),
+        Veld("contractmanager", "Contractmanager Services:"),
+    ]),
+    Sectie(RECHTS, "INFORMATIE ONDERHOUDSBEURT", [
+        Veld("mr_rapportage", "Meet- en regel onderhoudsrapportage", keuzes=_AANTALLEN),
+        Veld("datum_onderhoud", "Datum of periode uitgevoerde onderhoud:"),
+    ]),
+    Sectie(RECHTS, "INFORMATIE REGELINSTALLATIE", [
+        Veld("merk_regelinstallatie", "Merk regelinstallatie", keuzes=("Schneider Electric",)),
+        Veld("type_regelinstallatie", "Type regelinstallatie", keuzes=("Ecostruxure Building Operation",)),
+        Veld("versie_gbs", "Versie GBS software:", excel="Versie GBS software, indien van toepassing"),
+        Veld("aantal_regelpanelen", "Aantal centrale regelpanelen aanwezig:"),
+        Veld("naregelingen", "Naregelingen op het GBS aangesloten", excel="Naregelingen aangesloten op GBS",
+             keuzes=("geen naregelingen aanwezig", "middels BACnet IP", "middels Modbus IP", "middels BACnet MS/tp",
+                     "middels Modbus RTU", "middels diverse protocollen")),
+        Veld("type_naregelingen", "Type naregelingen",
+             keuzes=("B3 serie", "RP-C serie", "MP-C serie", "6-wegventielen", "diverse")),
+        Veld("aantal_floormanagers", "Aantal floormanagerpanelen aanwezig:"),
+        Veld("aantal_naregelingen", "Aantal naregelingen aanwezig:"),
+        Veld("aantal_ruimtebedieningen", "Aantal ruimtebedieningen aanwezig:"),
+    ]),
+    Sectie(RECHTS, "INFORMATIE KLIMAATINSTALLATIES EN ENERGIE", [
+        Veld("gasmeter", "Hoofd gasmeter uitgelezen op GBS", excel="Gasmeter op GBS", keuzes=("Nee", "Ja")),
+        Veld("elektrameter", "Hoofd elektrameter uitgelezen op GBS", excel="Elektrameter op GBS", keuzes=("Nee", "Ja")),
+        Veld("warmte", "Warmte wordt opgewekt middels", excel="Warmteopwekking", keuzes=_OPWEKKING),
+        Veld("koude", "Koude wordt opgewekt middels", excel="Koudeopwekking", keuzes=_OPWEKKING),
+        Veld("aantal_lbk", "Aantal aanwezige luchtbehandelingskasten:"),
+    ]),
+]
+
+
+def _excel_sleutel(tekst):
+    return tekst.strip().rstrip(":").strip().casefold()
+
+
+class RapportSchema:
+    """
+    Het gecompileerde schema: velden in formuliervolgorde plus opzoektabellen
+    per veldsleutel, XML-naam en (Excel-sleutel, voorkomen).
+    """
+
+    def __init__(self, secties):
+        """
+        Raises:
+            ValueError: Bij dubbele veldsleutels, XML-namen of Excel-sleutels.
+        """
+        self.secties = secties
+        self.velden = []
+        self._per_sleutel = {}
+        self._per_xml = {}
+        self._per_excel = {}
+        for sectie in secties:
+            for veld in sectie.velden:
+                veld.sectie = sectie.titel
+                veld.kolom = sectie.kolom
+                self.velden.append(veld)
+                self._voeg_toe(self._per_sleutel, veld.sleutel, veld, "veldsleutel")
+                self._voeg_toe(self._per_xml, veld.xml, veld, "XML-naam")
+                self._voeg_toe(self._per_excel, (_excel_sleutel(veld.excel), veld.voorkomen), veld, "Excel-sleutel")
+        # Het formulierlabel werkt op het tabblad ook als sleutel en oudere
+        # XML-namen blijven herkend; pas na alle echte namen, die gaan altijd voor
+        for veld in self.velden:
+            self._per_excel.setdefault((_excel_sleutel(veld.label), veld.voorkomen), veld)
+            for alias in veld.xml_aliassen:
+                self._per_xml.setdefault(alias, veld)
+        for naam in META_VELDEN:
+            if naam in self._per_xml:
+                raise ValueError(f"XML-naam '{naam}' is gereserveerd")
+
+    @staticmethod
+    def _voeg_toe(index, sleutel, veld, soort):
+        if sleutel in index:
+            raise ValueError(f"Dubbele {soort} {sleutel!r} in rapportschema ({index[sleutel]!r} en {veld!r})")
+        index[sleutel] = veld
+
+    def __contains__(self, sleutel):
+        return sleutel in self._per_sleutel
+
+    def veld(self, sleutel):
+        """
+        Raises:
+            KeyError: Als het veld niet bestaat.
+        """
+        return self._per_sleutel[sleutel]
+
+    def veld_voor_xml(self, naam):
+        return self._per_xml.get(naam)
+
+    def veld_voor_excel(self, sleutel, voorkomen=1):
+        return self._per_excel.get((_excel_sleutel(sleutel), voorkomen))
+
+    def uit_gegevens(self, paren):
+        """
+        Zet sleutel/waarde-paren van het tabblad 'Gegevens' om naar veldwaarden.
+
+        Een sleutel die vaker voorkomt (zoals "Telefoonnummer contactpersoon")
+        gaat per voorkomen naar het bijbehorende veld. Onbekende sleutels en
+        lege waarden worden overgeslagen.
+
+        Args:
+            paren (iterable): (sleutel, waarde) in de volgorde van het tabblad.
+
+        Returns:
+            dict: Veldsleutel -> waarde.
+        """
+        waarden = {}
+        geteld = {}
+        for sleutel, waarde in paren:
+            if not isinstance(sleutel, str) or not sleutel.strip():
+                continue
+            norm = _excel_sleutel(sleutel)
+            geteld[norm] = voorkomen = geteld.get(norm, 0) + 1
+            veld = self._per_excel.get((norm, voorkomen))
+            if veld is not None and waarde:
+                waarden[veld.sleutel] = waarde
+        return waarden
+
+    def naar_xml(self, waarden, meta=None):
+        """
+        Bouw het XML-element van een rapportage.
+
+        Args:
+            waarden (dict): Veldsleutel -> waarde; ontbrekende velden worden leeg geschreven.
+            meta (dict, optional): Waarden voor META_VELDEN, bijv. {"Templatepad": ...}.
+
+        Returns:
+            xml.etree.ElementTree.Element: <Rapportage> met één <Veld naam="..."> per veld.
+        """
+        root = ET.Element(XML_ROOT)
+        for naam, waarde in (meta or {}).items():
+            ET.SubElement(root, XML_VELD, naam=naam).text = waarde
+        for veld in self.velden:
+            ET.SubElement(root, XML_VELD, naam=veld.xml).text = waarden.get(veld.sleutel, "")
+        return root
+
+    def uit_xml(self, root):
+        """
+        Lees een <Rapportage>-element.
+
+        Returns:
+            tuple: (waarden, meta), zie uit_xml_paren.
+        """
+        return self.uit_xml_paren((element.get("naam"), element.text or "") for element in root.iter(XML_VELD))
+
+    def uit_xml_paren(self, paren):
+        """
+        Zet (naam, waarde)-paren uit <Veld naam="...">-elementen om naar veldwaarden.
+
+        Een oude naam die één keer voorkomt (zoals "Telefoonnummer contactpersoon:")
+        hoort bij het veld met die alias. Staat hij er vaker in, dan gaat hij per
+        voorkomen naar het veld met dat label, net als op het tabblad 'Gegevens'.
+        Een huidige XML-naam gaat altijd voor een oude naam.
+
+        Returns:
+            tuple: (waarden, meta) met veldsleutel -> waarde en META_VELDEN-naam -> waarde.
+            Onbekende namen worden overgeslagen.
+        """
+        paren = list(paren)
+        aantallen = Counter(naam for naam, _ in paren)
+        geteld = {}
+        waarden, meta = {}, {}
+        for naam, waarde in paren:
+            if naam in META_VELDEN:
+                meta[naam] = waarde
+                continue
+            veld = self._per_xml.get(naam)
+            if veld is not None and veld.xml != naam and aantallen[naam] > 1:
+                geteld[naam] = voorkomen = geteld.get(naam, 0) + 1
+                veld = self._per_excel.get((_excel_sleutel(naam), voorkomen), veld)
+            if veld is None:
+                logger.debug(f"Onbekend veld in rapportage-XML overgeslagen: {naam!r}")
+            elif veld.xml == naam or veld.sleutel not in waarden:
+                waarden[veld.sleutel] = waarde
+        return waarden, meta
+
+
+SCHEMA = RapportSchema(SECTIES)
+
+
+def lees_gegevens(excel_pad):
+    """
+    Lees het tabblad 'Gegevens' van een template en zet het om naar veldwaarden.
+
+    Leest rechtstreeks uit het .xlsm-bestand zonder Excel te starten (zie
+    xlsmreader); hetzelfde bestand opnieuw lezen komt uit de cache.
+
+    Returns:
+        dict: Veldsleutel -> waarde als tekst.
+
+    Raises:
+        KeyError: Als het tabblad 'Gegevens' ontbreekt.
+    """
+    rijen = read_sheet(excel_pad, "Gegevens", ("A", "B")).values()
+    return SCHEMA.uit_gegevens((cellen.get("A"), display_value(cellen.get("B")).strip()) for cellen in rijen)
@@ -0,0 +1,429 @@
+"""
+Lokale SQLite-opslag van alle rapportages en ExcelWriter-metingen.
+
+Elke opgeslagen rapportage wordt een nieuwe versie van zijn site (klantnaam +
+locatie), tenzij de inhoud gelijk is aan een eerdere versie; die versie wordt
+dan weer de huidige (een teruggedraaide wijziging). Per site is precies één
+versie gemarkeerd als huidig. Klantnaam, locatie, contractjaar,
+contractniveau en het type installatie staan in eigen, geïndexeerde kolommen;
+alle velden staan daarnaast als JSON in de rij, zodat ook op andere velden
+gezocht kan worden.
+
+De database staat in WAL-modus: lezen (formulier, zoekopdrachten) gaat door
+terwijl een import schrijft. Bulk-upserts gebruiken transacties per
+BATCH_SIZE rijen.
+
+Usage:
+    python rapportstore.py import BRON [BRON ...] [--db pad] [--workers N]
+    python rapportstore.py zoek [--db pad] [--contractniveau Totaal] [--naregelingen "*Modbus RTU*"] ...
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from excelplan import SECTIONS, parse_percent
+from rapportschema import SCHEMA
+
+logger = logging.getLogger(__name__)
+
+DB_NAAM = "rapportages.db"
+BATCH_SIZE = 1000
+SCHEMA_VERSIE = 1
+
+# Velden met een eigen, geïndexeerde kolom
+GEINDEXEERDE_VELDEN = ("klantnaam", "locatie", "contractjaar", "contractniveau",
+                       "type_regelinstallatie", "naregelingen", "type_naregelingen")
+
+_TABELLEN = f"""
+CREATE TABLE IF NOT EXISTS rapporten (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    versie INTEGER NOT NULL,
+    huidig INTEGER NOT NULL DEFAULT 1,
+    opgeslagen REAL NOT NULL,
+    inhoud_hash TEXT NOT NULL,
+    bron TEXT,
+    templatepad TEXT,
+    {", ".join(f"{kolom} TEXT COLLATE NOCASE" for kolom in GEINDEXEERDE_VELDEN)},
+    velden TEXT NOT NULL,
+    UNIQUE (site, inhoud_hash),
+    UNIQUE (site, versie)
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS ix_rapporten_{kolom} ON rapporten ({kolom}, huidig);" for kolom in GEINDEXEERDE_VELDEN)}
+CREATE INDEX IF NOT EXISTS ix_rapporten_huidig ON rapporten (huidig, site);
+CREATE TABLE IF NOT EXISTS metingen (
+    id INTEGER PRIMARY KEY,
+    werkboek TEXT NOT NULL,
+    sheet INTEGER NOT NULL,
+    sectie TEXT NOT NULL,
+    waarde TEXT NOT NULL,
+    getal REAL,
+    gemeten REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_metingen_werkboek ON metingen (werkboek, gemeten);
+CREATE INDEX IF NOT EXISTS ix_metingen_sectie ON metingen (sectie, getal);
+"""
+
+
+def default_db_path():
+    """
+    Return the database file: %LOCALAPPDATA%\\StruxureGuard\\rapportages.db on
+    Windows, ~/.struxureguard/rapportages.db elsewhere.
+    """
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return os.path.join(base, "StruxureGuard", DB_NAAM)
+    return os.path.join(os.path.expanduser("~"), ".struxureguard", DB_NAAM)
+
+
+def site_sleutel(rapport):
+    """
+    De identiteit van een site: klantnaam en locatie, zonder hoofdletters en
+    omringende spaties. Zonder beide valt hij terug op de bestandsnaam.
+    """
+    velden = rapport["velden"]
+    delen = [velden.get("klantnaam", "").strip().casefold(), velden.get("locatie", "").strip().casefold()]
+    if any(delen):
+        return "|".join(delen)
+    bron = rapport.get("bron") or rapport.get("templatepad") or ""
+    if not bron:
+        raise ValueError("Rapportage zonder klantnaam, locatie of bron kan niet opgeslagen worden")
+    return "bestand:" + os.path.splitext(os.path.basename(bron))[0].casefold()
+
+
+def _inhoud_hash(velden):
+    tekst = json.dumps({k: v for k, v in velden.items() if v}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(tekst.encode("utf-8")).hexdigest()
+
+
+class UpsertResultaat:
+    """
+    Uitkomst van RapportStore.upsert.
+
+    Attributes:
+        nieuw (int): Aantal opgeslagen nieuwe versies.
+        ongewijzigd (int): Aantal rapportages gelijk aan de huidige versie.
+        hersteld (int): Aantal rapportages gelijk aan een eerdere versie, die weer huidig is gemaakt.
+        fouten (list): Foutmeldingen per overgeslagen rapportage.
+        versies (list): (site, versie of None) per rapportage, in invoervolgorde.
+        seconden (float): Duur.
+    """
+
+    def __init__(self):
+        self.nieuw = 0
+        self.ongewijzigd = 0
+        self.hersteld = 0
+        self.fouten = []
+        self.versies = []
+        self.seconden = 0.0
+
+
+class RapportStore:
+    """
+    Toegang tot de rapportagedatabase. Eén object per thread; sluit het na gebruik
+    (of gebruik het als context manager).
+    """
+
+    def __init__(self, pad=None):
+        """
+        Args:
+            pad (str, optional): Databasebestand; standaard default_db_path().
+                ":memory:" geeft een tijdelijke database.
+        """
+        self.pad = pad or default_db_path()
+        if self.pad != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.pad)), exist_ok=True)
+        # Transacties worden zelf begonnen en gecommit (zie _transactie)
+        self._db = sqlite3.connect(self.pad, timeout=10, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        versie = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if versie > SCHEMA_VERSIE:
+            raise RuntimeError(f"{self.pad} is gemaakt door een nieuwere versie (schema {versie})")
+        if versie < SCHEMA_VERSIE:
+            self._db.executescript(f"BEGIN; {_TABELLEN} PRAGMA user_version={SCHEMA_VERSIE}; COMMIT;")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    @contextlib.contextmanager
+    def _transactie(self):
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    # Rapportages
+
+    def upsert(self, rapporten, progress=None):
+        """
+        Sla rapportages op als nieuwe versie van hun site.
+
+        Een rapportage met dezelfde inhoud als een bestaande versie van de site
+        wordt niet opnieuw opgeslagen; is die versie niet de huidige, dan wordt
+        hij weer huidig. Er wordt per BATCH_SIZE rapportages gecommit.
+
+        Args:
+            rapporten (iterable): Rapportages zoals in rapportbulk (bron, templatepad, velden).
+            progress (callable, optional): Aangeroepen met het aantal verwerkte rapportages na elke batch.
+
+        Returns:
+            UpsertResultaat: Aantallen en versies.
+        """
+        start = time.perf_counter()
+        resultaat = UpsertResultaat()
+        kolommen = ", ".join(GEINDEXEERDE_VELDEN)
+        plekken = ", ".join("?" for _ in GEINDEXEERDE_VELDEN)
+        insert = (f"INSERT OR IGNORE INTO rapporten (site, versie, huidig, opgeslagen, inhoud_hash, bron, templatepad, "
+                  f"{kolommen}, velden) SELECT ?, COALESCE(MAX(versie), 0) + 1, 1, ?, ?, ?, ?, {plekken}, ? "
+                  f"FROM rapporten WHERE site = ?")
+        verwerkt = 0
+        self._db.execute("BEGIN")
+        try:
+            for rapport in rapporten:
+                try:
+                    site = site_sleutel(rapport)
+                except ValueError as e:
+                    resultaat.fouten.append(f"{rapport.get('bron') or '?'}: {e}")
+                    resultaat.versies.append((None, None))
+                    continue
+                velden = {k: v for k, v in rapport["velden"].items() if v and k in SCHEMA}
+                inhoud_hash = _inhoud_hash(velden)
+                cursor = self._db.execute(insert, (
+                    site, time.time(), inhoud_hash, rapport.get("bron", ""), rapport.get("templatepad", ""),
+                    *(velden.get(kolom, "") for kolom in GEINDEXEERDE_VELDEN),
+                    json.dumps(velden, ensure_ascii=False), site))
+                if cursor.rowcount:
+                    self._db.execute("UPDATE rapporten SET huidig = 0 WHERE site = ? AND huidig = 1 AND id <> ?",
+                                     (site, cursor.lastrowid))
+                    versie = self._db.execute("SELECT versie FROM rapporten WHERE id = ?", (cursor.lastrowid,)).fetchone()[0]
+                    resultaat.nieuw += 1
+                else:
+                    rij_id, versie, huidig = self._db.execute(
+                        "SELECT id, versie, huidig FROM rapporten WHERE site = ? AND inhoud_hash = ?",
+                        (site, inhoud_hash)).fetchone()
+                    if huidig:
+                        resultaat.ongewijzigd += 1
+                    else:
+                        # Teruggedraaid naar een eerdere inhoud: die versie is weer de huidige
+                        self._db.execute("UPDATE rapporten SET huidig = (id = ?) WHERE site = ? AND (huidig = 1 OR id = ?)",
+                                         (rij_id, site, rij_id))
+                        resultaat.hersteld += 1
+                resultaat.versies.append((site, versie))
+                verwerkt += 1
+                if verwerkt % BATCH_SIZE == 0:
+                    self._db.execute("COMMIT")
+                    if progress:
+                        progress(verwerkt)
+                    self._db.execute("BEGIN")
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        if progress:
+            progress(verwerkt)
+        resultaat.seconden = time.perf_counter() - start
+        logger.info(f"Rapportages opgeslagen in {self.pad}: {resultaat.nieuw} nieuw, "
+                    f"{resultaat.ongewijzigd} ongewijzigd, {resultaat.hersteld} hersteld, {len(resultaat.fouten)} fout(en) in {resultaat.seconden:.2f}s")
+        return resultaat
+
+    def zoek(self, alle_versies=False, limiet=None, **filters):
+        """
+        Zoek rapportages, standaard alleen de huidige versie per site.
+
+        Filters zijn veldsleutels uit het schema. Een waarde is een tekst (gelijk,
+        zonder hoofdlettergevoeligheid; met * als joker), of een lijst van
+        toegestane teksten. Geïndexeerde velden (GEINDEXEERDE_VELDEN) gebruiken
+        hun index, andere velden worden uit de JSON gelezen.
+
+        Example:
+            store.zoek(contractniveau="Totaal", naregelingen="*Modbus RTU*")
+
+        Returns:
+            list: Rapportages (dict met id, site, versie, opgeslagen, bron, templatepad, velden),
+            gesorteerd op klantnaam, locatie en versie.
+
+        Raises:
+            KeyError: Voor een onbekend veld.
+        """
+        voorwaarden, parameters = [], []
+        if not alle_versies:
+            voorwaarden.append("huidig = 1")
+        for sleutel, waarde in filters.items():
+            if sleutel not in SCHEMA:
+                raise KeyError(f"Onbekend veld '{sleutel}'")
+            kolom = sleutel if sleutel in GEINDEXEERDE_VELDEN else f"json_extract(velden, '$.{sleutel}')"
+            if isinstance(waarde, (list, tuple, set)):
+                waarden = list(waarde)
+                voorwaarden.append(f"{kolom} COLLATE NOCASE IN ({', '.join('?' for _ in waarden)})")
+                parameters.extend(waarden)
+            elif "*" in waarde:
+                voorwaarden.append(f"{kolom} LIKE ? ESCAPE '\\'")
+                parameters.append(waarde.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("*", "%"))
+            else:
+                voorwaarden.append(f"{kolom} = ? COLLATE NOCASE")
+                parameters.append(waarde)
+        sql = ("SELECT id, site, versie, opgeslagen, bron, templatepad, velden FROM rapporten"
+               + (f" WHERE {' AND '.join(voorwaarden)}" if voorwaarden else "")
+               + " ORDER BY klantnaam, locatie, versie")
+        if limiet:
+            sql += f" LIMIT {int(limiet)}"
+        return [self._rapport(rij) for rij in self._db.execute(sql, parameters)]
+
+    def versies(self, site):
+        """
+        Alle versies van één site, oudste eerst.
+        """
+        rijen = self._db.execute("SELECT id, site, versie, opgeslagen, bron, templatepad, velden FROM rapporten "
+                                 "WHERE site = ? ORDER BY versie", (site,))
+        return [self._rapport(rij) for rij in rijen]
+
+    def tel(self):
+        """
+        Returns:
+            dict: sites, versies en metingen.
+        """
+        sites, versies = self._db.execute("SELECT COUNT(DISTINCT site), COUNT(*) FROM rapporten").fetchone()
+        metingen = self._db.execute("SELECT COUNT(*) FROM metingen").fetchone()[0]
+        return {"sites": sites, "versies": versies, "metingen": metingen}
+
+    @staticmethod
+    def _rapport(rij):
+        return {"id": rij["id"], "site": rij["site"], "versie": rij["versie"], "opgeslagen": rij["opgeslagen"],
+                "bron": rij["bron"], "templatepad": rij["templatepad"], "velden": json.loads(rij["velden"])}
+
+    # ExcelWriter-metingen
+
+    def voeg_metingen_toe(self, werkboek, section_lines, gemeten=None):
+        """
+        Bewaar de regels die ExcelWriter in een werkboek schreef.
+
+        Args:
+            werkboek (str): Pad van het opgeslagen werkboek.
+            section_lines (dict): Sectiesleutel (servers, trendstorage, cpu, memory)
+                -> regels; regel n hoort bij checklist-sheet n.
+            gemeten (float, optional): Tijdstip (epoch); standaard nu.
+
+        Returns:
+            int: Aantal opgeslagen metingen.
+        """
+        gemeten = gemeten or time.time()
+        percentages = {section.key for section in SECTIONS if section.warn_threshold is not None}
+        rijen = [(werkboek, idx, sectie, regel, parse_percent(regel) if sectie in percentages else None, gemeten)
+                 for sectie, regels in section_lines.items() for idx, regel in enumerate(regels) if regel]
+        with self._transactie():
+            self._db.executemany("INSERT INTO metingen (werkboek, sheet, sectie, waarde, getal, gemeten) "
+                                 "VALUES (?, ?, ?, ?, ?, ?)", rijen)
+        return len(rijen)
+
+    def metingen(self, werkboek=None, sectie=None, minimaal=None):
+        """
+        Zoek metingen, nieuwste eerst.
+
+        Args:
+            werkboek (str, optional): Alleen dit werkboek.
+            sectie (str, optional): Alleen deze sectie.
+            minimaal (float, optional): Alleen percentages vanaf deze waarde.
+
+        Returns:
+            list: Dicts met werkboek, sheet, sectie, waarde, getal en gemeten.
+        """
+        voorwaarden, parameters = [], []
+        for kolom, waarde, operator in (("werkboek", werkboek, "="), ("sectie", sectie, "="), ("getal", minimaal, ">=")):
+            if waarde is not None:
+                voorwaarden.append(f"{kolom} {operator} ?")
+                parameters.append(waarde)
+        sql = ("SELECT werkboek, sheet, sectie, waarde, getal, gemeten FROM metingen"
+               + (f" WHERE {' AND '.join(voorwaarden)}" if voorwaarden else "") + " ORDER BY gemeten DESC, id")
+        return [dict(rij) for rij in self._db.execute(sql, parameters)]
+
+
+def bewaar_metingen_op_achtergrond(werkboek, section_lines, pad=None):
+    """
+    Bewaar ExcelWriter-metingen in een eigen thread; een fout wordt alleen gelogd.
+    """
+    def bewaar():
+        try:
+            with RapportStore(pad) as store:
+                aantal = store.voeg_metingen_toe(werkboek, section_lines)
+            logger.debug(f"{aantal} meting(en) van {werkboek} opgeslagen")
+        except Exception as e:
+            logger.warning(f"Kon metingen van {werkboek} niet opslaan: {e}")
+
+    thread = threading.Thread(target=bewaar, name="metingen-opslaan", daemon=True)
+    thread.start()
+    return thread
+
+
+def importeer(bronnen, pad=None, workers=None):
+    """
+    Lees rapportages uit bronnen (zie rapportbulk.lees_rapporten) en sla ze op.
+
+    Returns:
+        tuple: (UpsertResultaat, leesfouten).
+    """
+    from rapportbulk import lees_rapporten
+
+    rapporten, fouten = lees_rapporten(bronnen, workers)
+    with RapportStore(pad) as store:
+        return store.upsert(rapporten), fouten
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapportagedatabase: importeren en zoeken.")
+    parser.add_argument("--db", help=f"databasebestand (standaard: {default_db_path()})")
+    sub = parser.add_subparsers(dest="opdracht", required=True)
+    imp = sub.add_parser("import", help="XML/jsonl/sgr-rapportages importeren")
+    imp.add_argument("bronnen", nargs="+", help="XML-bestanden, mappen met XML, .jsonl- of .sgr-bestanden")
+    imp.add_argument("-w", "--workers", type=int, default=None, help="aantal processen voor XML (standaard: aantal CPU's)")
+    zoek = sub.add_parser("zoek", help="huidige rapportages zoeken (* als joker)")
+    zoek.add_argument("--alle-versies", action="store_true", help="ook oudere versies tonen")
+    for veld in SCHEMA.velden:
+        zoek.add_argument(f"--{veld.sleutel}", metavar="WAARDE", help=argparse.SUPPRESS
+                          if veld.sleutel not in GEINDEXEERDE_VELDEN else f"filter op {veld.label.rstrip(':')}")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    if args.opdracht == "import":
+        start = time.perf_counter()
+        resultaat, fouten = importeer(args.bronnen, args.db, args.workers)
+        for fout in fouten + resultaat.fouten:
+            print(f"FOUT {fout}")
+        print(f"{resultaat.nieuw} nieuwe versie(s), {resultaat.ongewijzigd} ongewijzigd, "
+              f"{resultaat.hersteld} hersteld in "
+              f"{time.perf_counter() - start:.2f}s")
+        return 1 if fouten or resultaat.fouten else 0
+
+    filters = {veld.sleutel: getattr(args, veld.sleutel) for veld in SCHEMA.velden
+               if getattr(args, veld.sleutel) is not None}
+    with RapportStore(args.db) as store:
+        start = time.perf_counter()
+        rapporten = store.zoek(alle_versies=args.alle_versies, **filters)
+        duur = time.perf_counter() - start
+    for rapport in rapporten:
+        velden = rapport["velden"]
+        print(f"{velden.get('klantnaam', '')} - {velden.get('locatie', '')} (v{rapport['versie']}, "
+              f"{velden.get('contractjaar', '')}, {velden.get('contractniveau', '')})")
+    print(f"{len(rapporten)} rapportage(s) in {duur * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Background jobs for the tool windows.
+
+A TaskRunner belongs to one window and runs at most one job at a time on a
+shared worker pool. The job never touches Tk: it reports progress, asks for
+dialogs and schedules UI updates through a queue that the window's Tk loop
+drains every POLL_MS. Progress is merged on the worker side, so at most about
+PROGRESS_RATE updates per second reach the queue however many items the job
+processes; the last value is always delivered.
+
+Cancellation is cooperative: TaskRunner.cancel() sets a flag that the job
+reads through Job.cancelled (to pass on to fan_out and friends) or
+Job.check_cancelled(), which raises JobCancelled.
+
+Usage:
+    self.runner = TaskRunner(self)
+    self.runner.start(work, arg, on_progress=self.show_progress, on_done=self.show_result)
+
+    def work(job, arg):
+        for idx, item in enumerate(items):
+            job.check_cancelled()
+            ...
+            job.progress(idx + 1, len(items))
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_RATE = 30
+POLL_MS = 1000 // PROGRESS_RATE
+MAX_WORKERS = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    # Created on first use, shared by every window
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="TaskRunner")
+        return _pool
+
+
+class JobCancelled(Exception):
+    """
+    Raised by Job.check_cancelled() once the job has been cancelled.
+    """
+
+
+class Job:
+    """
+    The handle a job function receives as its first argument. Safe to use from any thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._cancel = threading.Event()
+        self._messages = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._interval = 1.0 / PROGRESS_RATE
+        self._last_sent = 0.0
+        self._pending = None
+        self.closed = False
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        """
+        Raise JobCancelled if the job has been cancelled.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(self.name)
+
+    def progress(self, done, total=None, text=None):
+        """
+        Report progress. Calls within 1/PROGRESS_RATE s of the last update are
+        merged: only the newest value is kept until the next update goes out.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last_sent < self._interval:
+                self._pending = (done, total, text)
+                return
+            self._last_sent = now
+            self._pending = None
+        self._messages.put(("progress", (done, total, text)))
+
+    def flush_progress(self):
+        """
+        Send the merged progress value that has not been sent yet, if any.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._last_sent = time.perf_counter()
+        if pending is not None:
+            self._messages.put(("progress", pending))
+
+    def post(self, func, *args):
+        """
+        Run func(*args) on the Tk thread at the next poll; does not wait.
+        """
+        self._messages.put(("call", (func, args, None)))
+
+    def call_in_ui(self, func, *args):
+        """
+        Run func(*args) on the Tk thread (e.g. a dialog) and wait for its result.
+
+        Returns:
+            The result of func, or None if the window was closed before it could run.
+        """
+        reply = {"done": threading.Event()}
+        self._messages.put(("call", (func, args, reply)))
+        while not reply["done"].wait(0.1):
+            if self.closed:
+                return None
+        if "error" in reply:
+            raise reply["error"]
+        return reply.get("value")
+
+
+class TaskRunner:
+    """
+    Runs one background job at a time for a window and delivers its messages on the Tk loop.
+    """
+
+    def __init__(self, widget):
+        """
+        Args:
+            widget (tk.Misc): The window whose Tk loop receives progress and results.
+        """
+        self.widget = widget
+        self.job = None
+        self._future = None
+        self._callbacks = {}
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+
+    @property
+    def busy(self):
+        return self.job is not None
+
+    def start(self, func, *args, on_progress=None, on_done=None, on_error=None, on_finish=None, name=None):
+        """
+        Run func(job, *args) on the worker pool, unless a job of this window is still running.
+
+        Args:
+            func (callable): The job; receives a Job as first argument.
+            on_progress (callable, optional): Called on the Tk thread with (done, total, text).
+            on_done (callable, optional): Called on the Tk thread with the job's return value.
+            on_error (callable, optional): Called on the Tk thread with the exception, unless
+                it is JobCancelled. Without it, the error is only logged.
+            on_finish (callable, optional): Called on the Tk thread with the Job after every
+                outcome (done, error or cancelled), after the other callbacks.
+            name (str, optional): Name for the log. Defaults to the function name.
+
+        Returns:
+            Job: The started job, or None if a job was already running.
+        """
+        if self.job is not None:
+            logger.warning(f"Job '{self.job.name}' is still running; '{name or func.__name__}' not started")
+            return None
+        job = Job(name or func.__name__)
+        self.job = job
+        self._callbacks = {"progress": on_progress, "done": on_done, "error": on_error, "finish": on_finish}
+        logger.debug(f"Job '{job.name}' started")
+        self._future = _executor().submit(func, job, *args)
+        self.widget.after(POLL_MS, self._poll)
+        return job
+
+    def cancel(self):
+        """
+        Ask the running job to stop; it ends at its next cancellation check.
+        """
+        if self.job is not None and not self.job.cancelled:
+            logger.info(f"Cancelling job '{self.job.name}'")
+            self.job.cancel()
+
+    def _on_destroy(self, event):
+        # A Toplevel also receives the Destroy events of its children
+        if event.widget is not self.widget or self.job is None:
+            return
+        # The window is gone: stop the job and release a waiting call_in_ui
+        self.job.closed = True
+        self.job.cancel()
+        self.job = None
+
+    def _deliver(self, job):
+        progress = None
+        while True:
+            try:
+                kind, payload = job._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                # Only the newest value matters
+                progress = payload
+                continue
+            func, args, reply = payload
+            try:
+                value = func(*args)
+            except Exception as e:
+                if reply is None:
+                    logger.exception(f"UI call of job '{job.name}' failed")
+                else:
+                    reply["error"] = e
+            else:
+                if reply is not None:
+                    reply["value"] = value
+            if reply is not None:
+                reply["done"].set()
+        if progress is not None and self._callbacks["progress"]:
+            self._callbacks["progress"](*progress)
+
+    def _poll(self):
+        job, future = self.job, self._future
+        if job is None:
+            return
+        if future.done():
+            job.flush_progress()
+        self._deliver(job)
+        if not future.done():
+            self.widget.after(POLL_MS, self._poll)
+            return
+
+        self.job = None
+        callbacks = self._callbacks
+        error = future.exception()
+        if error is None:
+            logger.debug(f"Job '{job.name}' done")
+            if callbacks["done"]:
+                callbacks["done"](future.result())
+        elif isinstance(error, JobCancelled):
+            logger.info(f"Job '{job.name}' cancelled")
+        else:
+            logger.error(f"Job '{job.name}' failed: {error}", exc_info=error)
+            if callbacks["error"]:
+                callbacks["error"](error)
+        if callbacks["finish"]:
+            callbacks["finish"](job)
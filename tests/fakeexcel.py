@@ -0,0 +1,245 @@
+"""
+In-process stand-ins for xlwings (App, Book, Sheet), so ExcelSession and the
+xlwings engine can be tested and benchmarked on machines without Excel.
+
+Usage:
+    session = ExcelSession(app_factory=FakeApp)
+"""
+import os
+import time
+
+import xlsmpackage as xp
+
+
+class _FakeShapeObject:
+    def __init__(self):
+        self.Value = False
+
+
+class _FakeOLEFormat:
+    def __init__(self):
+        self.Object = _FakeShapeObject()
+
+
+class _FakeShape:
+    def __init__(self, name):
+        self.Name = name
+        self.OLEFormat = _FakeOLEFormat()
+
+
+class _FakeCheckBoxGroup:
+    def __init__(self, shapes):
+        self._shapes = shapes
+
+    @property
+    def Value(self):
+        return [shape.OLEFormat.Object.Value for shape in self._shapes]
+
+    @Value.setter
+    def Value(self, value):
+        for shape in self._shapes:
+            shape.OLEFormat.Object.Value = value == 1
+
+
+class _FakeSheetApi:
+    def __init__(self, sheet):
+        self._sheet = sheet
+
+    def Unprotect(self, Password=None):
+        self._sheet.book.app.calls += 1
+        if self._sheet.protected and Password != self._sheet.password:
+            raise PermissionError(f"The password you supplied is not correct ({self._sheet.name})")
+        self._sheet.protected = False
+
+    def Protect(self, Password=None):
+        self._sheet.book.app.calls += 1
+        self._sheet.protected = True
+        self._sheet.password = Password
+
+    def CheckBoxes(self, names):
+        self._sheet.book.app.calls += 1
+        missing = [name for name in names if name not in self._sheet.shapes]
+        if missing:
+            raise KeyError(f"Unable to get the CheckBoxes property: {missing}")
+        return _FakeCheckBoxGroup([self._sheet.shapes[name] for name in names])
+
+    def Shapes(self, name):
+        self._sheet.book.app.calls += 1
+        if name not in self._sheet.shapes:
+            raise KeyError(f"The item with the specified name wasn't found: {name}")
+        return self._sheet.shapes[name]
+
+
+class _FakeRange:
+    def __init__(self, sheet, address):
+        self._sheet = sheet
+        self._address = address.replace("$", "").upper()
+
+    def _cells(self):
+        start, _, end = self._address.partition(":")
+        col1, row1 = xp.split_cell_ref(start)
+        col2, row2 = xp.split_cell_ref(end or start)
+        return [
+            [f"{xp.column_letters(c)}{r}" for c in range(xp.column_index(col1), xp.column_index(col2) + 1)]
+            for r in range(row1, row2 + 1)
+        ]
+
+    @property
+    def value(self):
+        self._sheet.book.app.calls += 1
+        rows = [[self._sheet.cells.get(ref) for ref in row] for row in self._cells()]
+        if len(rows) == 1 and len(rows[0]) == 1:
+            return rows[0][0]
+        if len(rows) == 1:
+            return rows[0]
+        if all(len(row) == 1 for row in rows):
+            return [row[0] for row in rows]
+        return rows
+
+    @value.setter
+    def value(self, value):
+        self._sheet.book.app.calls += 1
+        cells = self._cells()
+        if not isinstance(value, list):
+            self._sheet.cells[cells[0][0]] = value
+            return
+        for offset, item in enumerate(value):
+            self._sheet.cells[self._offset_ref(cells[0][0], offset)] = item
+
+    @staticmethod
+    def _offset_ref(ref, offset):
+        col, row = xp.split_cell_ref(ref)
+        return f"{xp.column_letters(xp.column_index(col) + offset)}{row}"
+
+
+class FakeSheet:
+    """
+    In-process stand-in for an xlwings Sheet: cells, protection and checkbox shapes.
+    """
+
+    def __init__(self, book, name, checkboxes=50, password=None):
+        self.book = book
+        self.name = name
+        self.cells = {}
+        self.protected = password is not None
+        self.password = password
+        self.shapes = {f"Check Box {idx}": _FakeShape(f"Check Box {idx}") for idx in range(1, checkboxes + 1)}
+        self.api = _FakeSheetApi(self)
+
+    def range(self, address):
+        return _FakeRange(self, address)
+
+
+class _FakeSheets:
+    def __init__(self, sheets):
+        self._sheets = sheets
+
+    def __getitem__(self, name):
+        if isinstance(name, int):
+            return list(self._sheets.values())[name]
+        return self._sheets[name]
+
+    def __iter__(self):
+        return iter(self._sheets.values())
+
+    def __len__(self):
+        return len(self._sheets)
+
+
+class FakeBook:
+    """
+    In-process stand-in for an xlwings Book.
+
+    Sheet names are read from the workbook package when the file is a real
+    .xlsx/.xlsm; otherwise the checklist sheets are simulated.
+    """
+
+    def __init__(self, app, path):
+        self.app = app
+        self.fullname = os.path.abspath(path)
+        self.name = os.path.basename(path)
+        self.saved = 0
+        self.closed = False
+        try:
+            package = xp.XlsmPackage(path)
+            names = list(package.sheets())
+            package.close()
+        except Exception:
+            names = ["Gegevens"] + [
+                "Checklist Regelkast" if idx == 0 else f"Checklist Regelkast ({idx + 1})"
+                for idx in range(app.checklist_sheets)
+            ]
+        self._sheets = {name: FakeSheet(self, name, password=app.sheet_password) for name in names}
+        self.sheets = _FakeSheets(self._sheets)
+
+    def save(self, path=None):
+        self.app.calls += 1
+        time.sleep(self.app.latency)
+        if path:
+            self.fullname = os.path.abspath(path)
+            self.name = os.path.basename(path)
+        target = self.fullname
+        if os.path.exists(target):
+            os.utime(target)
+        else:
+            open(target, "wb").close()
+        self.saved += 1
+
+    def close(self):
+        self.closed = True
+        self.app.books._books.remove(self)
+
+
+class _FakeBooks:
+    def __init__(self, app):
+        self._app = app
+        self._books = []
+
+    def open(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self._app.calls += 1
+        time.sleep(self._app.open_latency)
+        book = FakeBook(self._app, path)
+        self._books.append(book)
+        self._app.opened += 1
+        return book
+
+    def __iter__(self):
+        return iter(list(self._books))
+
+    def __len__(self):
+        return len(self._books)
+
+
+class FakeApp:
+    """
+    In-process stand-in for xlwings.App, so the session and the xlwings engine
+    can run (and be measured) on machines without Excel.
+
+    Class attributes configure new instances: latency is added to every save,
+    open_latency to every books.open(), sheet_password protects all sheets and
+    checklist_sheets is the number of simulated checklist sheets. Every instance
+    counts its calls and opened workbooks.
+    """
+
+    latency = 0.0
+    open_latency = 0.0
+    sheet_password = None
+    checklist_sheets = 6
+    running = 0
+
+    def __init__(self, visible=False, add_book=False):
+        self.visible = visible
+        self.display_alerts = True
+        self.screen_updating = True
+        self.calls = 0
+        self.opened = 0
+        self.books = _FakeBooks(self)
+        self.alive = True
+        FakeApp.running += 1
+
+    def quit(self):
+        if self.alive:
+            self.alive = False
+            FakeApp.running -= 1
@@ -0,0 +1,88 @@
+import math
+
+import pytest
+
+from ebotable import parse_ebo_table
+
+
+def _rows(table):
+    return table.frame[["server", "cpu", "memory", "trendstorage"]].to_dict("records")
+
+
+def _errors(table):
+    return [(error.row, error.column, error.message) for error in table.errors]
+
+
+@pytest.mark.parametrize("text", [
+    "SRV1\t45\t50,5\t10 GB\nSRV2\t80%\t20 %\t1,5GB",
+    "SRV1;45;50,5;10 GB\nSRV2;80%;20 %;1,5GB",
+    "SRV1   45   50,5   10 GB\nSRV2   80%  20 %   1,5GB",
+    "SRV1 45 50,5 10 GB\nSRV2 80% 20 % 1,5GB",
+], ids=["tab", "semicolon", "aligned", "single-space"])
+def test_separators(text):
+    table = parse_ebo_table(text)
+    assert _rows(table) == [
+        {"server": "SRV1", "cpu": 45.0, "memory": 50.5, "trendstorage": "10 GB"},
+        {"server": "SRV2", "cpu": 80.0, "memory": 20.0, "trendstorage": "1,5GB"},
+    ]
+    assert table.errors == []
+    assert table.frame["trendstorage_bytes"].tolist() == [10 * 1024.0 ** 3, 1.5 * 1024.0 ** 3]
+    assert table.over_threshold["server"].tolist() == ["SRV2"]
+
+
+def test_aligned_table_keeps_spaces_in_server_names():
+    table = parse_ebo_table("AS-P 01  45  50\nAS-P 02  12  13")
+    assert table.frame["server"].tolist() == ["AS-P 01", "AS-P 02"]
+    assert table.errors == []
+
+
+def test_header_maps_known_columns_in_any_order():
+    table = parse_ebo_table("Geheugen\tNaam\tTrend storage\tCPU load\n50\tSRV1\t2 TB\t90")
+    assert _rows(table) == [{"server": "SRV1", "cpu": 90.0, "memory": 50.0, "trendstorage": "2 TB"}]
+    assert table.section_lines() == {"servers": ["SRV1"], "trendstorage": ["2 TB"], "cpu": ["90"], "memory": ["50"]}
+
+
+def test_invalid_values_are_reported():
+    table = parse_ebo_table("SRV1\tveel\t150\t10 parsecs\n\t20\t30")
+    assert _errors(table) == [
+        (1, "cpu", "not a percentage"),
+        (1, "memory", "outside 0-100%"),
+        (1, "trendstorage", "unknown size"),
+        (2, "server", "missing server name"),
+    ]
+    lines = table.section_lines()
+    # The invalid percentage goes on as text, the out-of-range one is left out
+    assert lines["cpu"] == ["veel", "20"]
+    assert lines["memory"] == ["", "30"]
+
+
+def test_ragged_rows():
+    table = parse_ebo_table("SRV1\t45\t50\nSRV2\t60\nSRV3\t70\t80\t5 GB\textra\nSRV4\t10\t20\t\n")
+    assert table.frame["server"].tolist() == ["SRV1", "SRV2", "SRV3", "SRV4"]
+    assert math.isnan(table.frame["memory"].iat[1])
+    assert table.frame["trendstorage"].tolist() == ["", "", "5 GB", ""]
+    assert _errors(table) == [
+        (2, "memory", "missing value"),
+        (3, "column 5", "value outside the table columns"),
+    ]
+
+
+def test_section_lines_keep_rows_aligned():
+    table = parse_ebo_table("SRV1\t45\t50\nSRV2\t\t60\nSRV3\t70\t")
+    lines = table.section_lines()
+    assert lines["servers"] == ["SRV1", "SRV2", "SRV3"]
+    assert lines["cpu"] == ["45", "", "70"]
+    assert lines["memory"] == ["50", "60"]
+    assert lines["trendstorage"] == []
+
+
+def test_columns_without_values_are_not_reported_missing():
+    table = parse_ebo_table("SRV1 45\nSRV2 50")
+    assert table.errors == []
+    assert table.section_lines()["memory"] == []
+
+
+def test_empty_text():
+    table = parse_ebo_table(" \n\n")
+    assert len(table) == 0
+    assert table.errors == []
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import re
+import zipfile
+
+import pytest
+
+import xlsmpackage as xp
+import xlsmreader
+from excelbackend import get_backend
+from excelplan import apply_write_plan, build_write_plan
+from tests.xlsmfixture import PASSWORD, VBA_PROJECT, make_workbook
+
+SHEET = "Checklist Regelkast"
+
+
+def _part(path, name):
+    with zipfile.ZipFile(path) as z:
+        return z.read(name).decode("utf-8")
+
+
+def _cell(sheet_xml, ref):
+    return re.search(rf'<c r="{ref}"[^>]*?(?:/>|>.*?</c>)', sheet_xml, re.S).group(0)
+
+
+def _xf(styles_xml, index):
+    cell_xfs = re.search(r"<cellXfs\b.*?</cellXfs>", styles_xml, re.S).group(0)
+    return re.findall(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", cell_xfs, re.S)[index]
+
+
+def test_legacy_password_hash_matches_excel():
+    assert xp.legacy_password_hash("password") == "83AF"
+
+
+def test_agile_password_hash_matches_the_spec():
+    salt = bytes(range(16))
+    digest = hashlib.sha512(salt + "geheim".encode("utf-16-le")).digest()
+    for i in range(10):
+        digest = hashlib.sha512(digest + i.to_bytes(4, "little")).digest()
+    assert xp.agile_password_hash("geheim", "SHA-512", salt, 10) == base64.b64encode(digest).decode()
+
+
+@pytest.mark.parametrize("protection", ["agile", "legacy"])
+def test_unprotect_with_right_and_wrong_password(tmp_path, protection):
+    path = make_workbook(tmp_path / "t.xlsm", protection=protection)
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet(SHEET)
+    with pytest.raises(PermissionError):
+        sheet.unprotect("wrong")
+    assert "<sheetProtection" in wb.package.read_text(sheet.part)
+    sheet.unprotect(PASSWORD)
+    assert "<sheetProtection" not in wb.package.read_text(sheet.part)
+    wb.close()
+
+
+def test_protect_restores_the_original_protection(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm")
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet(SHEET)
+    original = xp.get_protection(wb.package.read_text(sheet.part))
+    sheet.unprotect(PASSWORD)
+    sheet.protect(PASSWORD)
+    assert xp.get_protection(wb.package.read_text(sheet.part)) == original
+    # A different password gets a new, valid protection
+    sheet.unprotect(PASSWORD)
+    sheet.protect("ander")
+    attrs = xp.parse_attrs(xp.get_protection(wb.package.read_text(sheet.part)))
+    assert xp.verify_protection_password(attrs, "ander")
+    assert not xp.verify_protection_password(attrs, PASSWORD)
+    wb.close()
+
+
+def test_percent_cell_is_saved_as_number_with_percent_style(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm")
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet(SHEET)
+    sheet.unprotect(PASSWORD)
+    sheet.write_cells({"F8": "34%", "F9": "12,5%", "B8": "SRV-01", "H8": "45,5%"})
+    sheet.protect(PASSWORD)
+    out = str(tmp_path / "out.xlsm")
+    wb.save(out)
+    wb.close()
+
+    sheet_xml, styles_xml = _part(out, "xl/worksheets/sheet2.xml"), _part(out, "xl/styles.xml")
+    f8 = _cell(sheet_xml, "F8")
+    assert "<v>0.34</v>" in f8 and 't="' not in f8
+    style = xp.parse_attrs(f8[:f8.index(">")])["s"]
+    xf = _xf(styles_xml, int(style))
+    # The centred, filled style of F8 with a "0%" format
+    assert 'numFmtId="9"' in xf and 'fillId="2"' in xf and '<alignment horizontal="center"/>' in xf
+    # F9 already shows a percentage: its format is kept
+    assert _cell(sheet_xml, "F9") == '<c r="F9" s="3"><v>0.125</v></c>'
+    # A new cell gets "0.00%" for a percentage with decimals
+    h8 = _cell(sheet_xml, "H8")
+    assert 'numFmtId="10"' in _xf(styles_xml, int(xp.parse_attrs(h8[:h8.index(">")])["s"]))
+    assert 't="inlineStr"' in _cell(sheet_xml, "B8")
+    xlsmreader.clear_cache()
+    assert xlsmreader.read_sheet(out, SHEET)[8]["F"] == 0.34
+
+
+def test_percent_cell_without_styles_part(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm", styles=False)
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet(SHEET)
+    sheet.unprotect(PASSWORD)
+    sheet.write_cells({"F8": "80%"})
+    out = str(tmp_path / "out.xlsm")
+    wb.save(out)
+    wb.close()
+    assert 'PartName="/xl/styles.xml"' in _part(out, "[Content_Types].xml")
+    assert 'Target="styles.xml"' in _part(out, "xl/_rels/workbook.xml.rels")
+    f8 = _cell(_part(out, "xl/worksheets/sheet2.xml"), "F8")
+    assert 'numFmtId="9"' in _xf(_part(out, "xl/styles.xml"), int(xp.parse_attrs(f8[:f8.index(">")])["s"]))
+
+
+def test_checkbox_checked_and_linked_cell_written(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm", linked={37: "$H$37"})
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet(SHEET)
+    sheet.unprotect(PASSWORD)
+    assert sheet.set_checkboxes(["Check Box 37", "Check Box 99"]) == ["Check Box 99"]
+    out = str(tmp_path / "out.xlsm")
+    wb.save(out)
+    wb.close()
+    assert 'checked="Checked"' in _part(out, "xl/ctrlProps/ctrlProp2_37.xml")
+    assert "checked" not in _part(out, "xl/ctrlProps/ctrlProp2_33.xml")
+    assert '<c r="H37" t="b"><v>1</v></c>' in _part(out, "xl/worksheets/sheet2.xml")
+    vml = _part(out, "xl/drawings/vmlDrawing2.vml")
+    assert re.search(r'_x0000_s1061".*?<x:Checked>1</x:Checked>', vml, re.S)
+    # Other sheets are untouched
+    assert "checked" not in _part(out, "xl/ctrlProps/ctrlProp3_37.xml")
+
+
+def test_write_plan_round_trip(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm", sheets=3)
+    plan = build_write_plan({"servers": ["srv1", "", "srv3"], "cpu": ["90", "10"]}, all_licenses=False)
+    wb = get_backend("xlsm").open(path)
+    result = apply_write_plan(wb, plan, PASSWORD)
+    out = str(tmp_path / "out.xlsm")
+    wb.save(out)
+    wb.close()
+
+    assert result.sheets_written == ["Checklist Regelkast", "Checklist Regelkast (2)", "Checklist Regelkast (3)"]
+    with zipfile.ZipFile(out) as z:
+        assert z.testzip() is None
+        assert z.read("xl/vbaProject.bin") == VBA_PROJECT
+    for part in ("sheet2", "sheet3", "sheet4"):
+        attrs = xp.parse_attrs(xp.get_protection(_part(out, f"xl/worksheets/{part}.xml")))
+        assert xp.verify_protection_password(attrs, PASSWORD)
+    # Checklist sheet 1: server and 90% (warning box); sheet 2: only 10%, no box
+    assert 'checked="Checked"' in _part(out, "xl/ctrlProps/ctrlProp2_33.xml")
+    assert 'checked="Checked"' in _part(out, "xl/ctrlProps/ctrlProp2_39.xml")
+    assert "checked" not in _part(out, "xl/ctrlProps/ctrlProp3_39.xml")
+    assert "<v>0.1</v>" in _cell(_part(out, "xl/worksheets/sheet3.xml"), "F8")
+
+
+def test_wrong_password_aborts_the_plan(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm")
+    plan = build_write_plan({"servers": ["srv1"]})
+    wb = get_backend("xlsm").open(path)
+    from excelplan import UnprotectError
+    with pytest.raises(UnprotectError):
+        apply_write_plan(wb, plan, "wrong")
+    wb.close()
@@ -0,0 +1,105 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+import excelbatch
+from excelbatch import format_summary, load_manifest, run_job
+from tests.xlsmfixture import PASSWORD, make_workbook
+
+
+def _write_manifest(tmp_path, manifest):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return str(path)
+
+
+def test_load_manifest_normalises_jobs(tmp_path):
+    path = _write_manifest(tmp_path, {
+        "password": PASSWORD,
+        "all_licenses": True,
+        "jobs": [
+            {"path": "A/Checklist.xlsm", "output": "A/Ingevuld.xlsm", "servers": "SRV1\n\nSRV3\n\n", "cpu": [34, " 81 "]},
+            {"path": "B/Checklist.xlsm", "password": "", "all_licenses": False, "memory": ["", ""]},
+        ],
+    })
+    first, second = load_manifest(path)
+    assert first["path"] == os.path.join(str(tmp_path), "A/Checklist.xlsm")
+    assert first["output"] == os.path.join(str(tmp_path), "A/Ingevuld.xlsm")
+    assert first["password"] == PASSWORD and first["all_licenses"] is True
+    # Inner empty lines keep their sheet, trailing ones are dropped
+    assert first["servers"] == ["SRV1", "", "SRV3"]
+    assert first["cpu"] == ["34", "81"]
+    assert first["trendstorage"] == [] and first["memory"] == []
+    assert second["output"] is None
+    assert second["password"] == "" and second["all_licenses"] is False
+    assert second["memory"] == []
+
+
+def test_load_manifest_accepts_a_plain_list(tmp_path):
+    jobs = load_manifest(_write_manifest(tmp_path, [{"path": "x.xlsm", "servers": ["SRV1"]}]))
+    assert jobs[0]["password"] == "" and jobs[0]["servers"] == ["SRV1"]
+
+
+def test_load_manifest_requires_a_path(tmp_path):
+    with pytest.raises(ValueError, match="Job 2"):
+        load_manifest(_write_manifest(tmp_path, [{"path": "x.xlsm"}, {"servers": ["SRV1"]}]))
+
+
+def test_run_job_fills_the_workbook(tmp_path):
+    make_workbook(tmp_path / "t.xlsm")
+    job, = load_manifest(_write_manifest(tmp_path, {
+        "password": PASSWORD, "jobs": [{"path": "t.xlsm", "output": "out.xlsm", "servers": ["SRV1"], "cpu": ["90", "x"]}]}))
+    result = run_job(job)
+    assert result["ok"] and result["error"] is None
+    assert result["sheets"] == 2 and result["warning"]
+    assert result["parse_errors"] == ["CPU line 2: 'x'"]
+    with zipfile.ZipFile(tmp_path / "out.xlsm") as z:
+        assert z.testzip() is None
+
+
+def test_run_job_returns_failures(tmp_path):
+    make_workbook(tmp_path / "t.xlsm")
+    job, = load_manifest(_write_manifest(tmp_path, [{"path": "t.xlsm", "password": "fout", "servers": ["SRV1"]}]))
+    result = run_job(job)
+    assert not result["ok"]
+    assert result["error"].startswith("UnprotectError")
+
+    job["servers"] = []
+    assert run_job(job)["error"] == "ValueError: No lines to write and no license checkboxes selected"
+
+
+def test_run_job_reports_a_failing_close(tmp_path, monkeypatch):
+    make_workbook(tmp_path / "t.xlsm")
+    job, = load_manifest(_write_manifest(tmp_path, [{"path": "t.xlsm", "password": PASSWORD, "servers": ["SRV1"]}]))
+    opened = excelbatch.XlsmBackend().open
+
+    def open_with_failing_close(self, path):
+        wb = opened(path)
+        close = wb.close
+
+        def failing_close():
+            close()
+            raise OSError("handle busy")
+        wb.close = failing_close
+        return wb
+    monkeypatch.setattr(excelbatch.XlsmBackend, "open", open_with_failing_close)
+    result = run_job(job)
+    assert result["ok"]
+    assert result["error"] == "OSError while closing: handle busy"
+
+
+def test_format_summary():
+    results = [
+        {"path": "a", "output": "a.xlsm", "ok": True, "error": None, "sheets": 3, "calls": 9, "warning": True,
+         "parse_errors": ["CPU line 2: 'x'"], "seconds": 0.5},
+        {"path": "b", "output": "b.xlsm", "ok": False, "error": "UnprotectError: wrong password", "sheets": 0,
+         "calls": 0, "warning": False, "parse_errors": [], "seconds": 0.25},
+    ]
+    assert format_summary(results, 2.0).splitlines() == [
+        "OK     0.50s  a.xlsm  (3 sheet(s), 9 calls, values over threshold, 1 unreadable percentage(s))",
+        "FOUT   0.25s  b.xlsm  (UnprotectError: wrong password)",
+        "1 succeeded, 1 failed in 2.00s (1.0 workbooks/s)",
+    ]
+    assert format_summary([], 0) == "0 succeeded, 0 failed in 0.00s (0.0 workbooks/s)"
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+
+import pytest
+
+from excelbackend import XlwingsBackend
+from excelsession import ExcelSession
+from tests.fakeexcel import FakeApp
+
+
+@pytest.fixture
+def session():
+    session = ExcelSession(app_factory=FakeApp, max_books=2)
+    yield session
+    session.shutdown()
+    assert FakeApp.running == 0
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    def make(name="book.xlsm"):
+        path = tmp_path / name
+        path.write_bytes(b"not a package, FakeBook simulates the checklist sheets")
+        return str(path)
+    return make
+
+
+def test_run_returns_result_on_the_excel_thread(session):
+    assert session.run(threading.current_thread).name == "ExcelSession"
+    assert session.run(lambda a, b=0: a + b, 1, b=2) == 3
+
+
+def test_run_propagates_exceptions(session):
+    with pytest.raises(ZeroDivisionError):
+        session.run(lambda: 1 / 0)
+
+
+def test_app_is_started_once(session):
+    assert session.app is session.app
+    assert FakeApp.running == 1
+
+
+def test_unchanged_workbook_is_served_from_cache(session, workbook):
+    path = workbook()
+    book = session.open_book(path)
+    assert session.open_book(path) is book
+    assert session.app.opened == 1
+
+
+def test_changed_workbook_is_reopened(session, workbook):
+    path = workbook()
+    book = session.open_book(path)
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    assert session.open_book(path) is not book
+    assert book.closed
+
+
+def test_least_recently_used_workbook_is_closed(session, workbook):
+    first, second, third = workbook("a.xlsm"), workbook("b.xlsm"), workbook("c.xlsm")
+    book = session.open_book(first)
+    session.open_book(second)
+    session.open_book(third)
+    assert book.closed
+    assert len(session.app.books) == 2
+
+
+def test_shutdown_quits_excel_and_refuses_calls(workbook):
+    session = ExcelSession(app_factory=FakeApp)
+    session.open_book(workbook())
+    session.shutdown()
+    session.shutdown()
+    assert FakeApp.running == 0
+    with pytest.raises(RuntimeError):
+        session.run(lambda: None)
+    with pytest.raises(RuntimeError):
+        session.app
+
+
+def test_shutdown_fails_queued_calls_without_starting_excel():
+    session = ExcelSession(app_factory=FakeApp)
+    running, release = threading.Event(), threading.Event()
+    outcomes = {}
+
+    def call(key, func):
+        try:
+            outcomes[key] = session.run(func)
+        except RuntimeError as e:
+            outcomes[key] = e
+
+    def busy():
+        running.set()
+        release.wait(5)
+        return "done"
+
+    blocker = threading.Thread(target=call, args=("busy", busy))
+    blocker.start()
+    assert running.wait(5)
+    # Queued behind the running call; would start an Excel instance
+    queued = threading.Thread(target=call, args=("queued", session._ensure_app))
+    queued.start()
+    while session._queue.qsize() < 1:
+        time.sleep(0.001)
+
+    stopper = threading.Thread(target=session.shutdown)
+    stopper.start()
+    queued.join(5)
+    assert isinstance(outcomes["queued"], RuntimeError)
+    release.set()
+    for thread in (blocker, stopper):
+        thread.join(5)
+        assert not thread.is_alive()
+    assert outcomes["busy"] == "done"
+    assert FakeApp.running == 0
+
+
+def test_calls_racing_shutdown_never_hang():
+    for _ in range(20):
+        session = ExcelSession(app_factory=FakeApp)
+        threads = [threading.Thread(target=lambda: _ignore_closed(session)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        session.shutdown()
+        for thread in threads:
+            thread.join(5)
+            assert not thread.is_alive()
+        assert FakeApp.running == 0
+
+
+def _ignore_closed(session):
+    try:
+        session.app
+    except RuntimeError:
+        pass
+
+
+def test_xlwings_engine_writes_cells_and_checkboxes(session, workbook):
+    engine = XlwingsBackend(session)
+    wb = engine.open(workbook())
+    sheet = wb.sheet("Checklist Regelkast")
+    sheet.unprotect("")
+    assert sheet.write_cells({"F8": "34%", "G8": "x", "F9": "y"}) == 2
+    assert sheet.set_checkboxes(["Check Box 39", "Check Box 999"]) == ["Check Box 999"]
+    sheet.protect("")
+    fake = session.open_book(wb.path).sheets["Checklist Regelkast"]
+    assert fake.cells == {"F8": "34%", "G8": "x", "F9": "y"}
+    assert fake.shapes["Check Box 39"].OLEFormat.Object.Value
+    wb.save()
+    wb.close()
@@ -0,0 +1,84 @@
+import logging
+import sys
+
+from logstore import LogEntry, LogStore
+
+
+def _entry(idx, message, levelno=logging.INFO, logger="app"):
+    return LogEntry(1700000000.0 + idx, levelno, logger, message)
+
+
+def _messages(view):
+    return [entry.message for entry in view.rows(0, len(view))]
+
+
+def test_eviction_at_capacity():
+    store = LogStore(max_records=3)
+    store.extend(_entry(idx, f"bericht {idx}", logger=f"log{idx % 2}") for idx in range(5))
+    assert len(store) == 3
+    assert (store.first_seq, store.next_seq) == (2, 5)
+    assert [entry.message for entry in store] == ["bericht 2", "bericht 3", "bericht 4"]
+    # Evicted records leave no trace in the indexes
+    assert _messages(store.query(text="bericht")) == ["bericht 2", "bericht 3", "bericht 4"]
+    assert _messages(store.query(text="1")) == []
+    assert _messages(store.query(loggers=["log0"])) == ["bericht 2", "bericht 4"]
+
+    store.append(_entry(5, "bericht 5", logger="log9"))
+    store.extend(_entry(idx, "anders", logger="log9") for idx in range(6, 9))
+    assert store.loggers() == ["log9"]
+    assert _messages(store.query(text="bericht")) == []
+
+
+def test_view_refresh_follows_additions_and_evictions():
+    store = LogStore(max_records=4)
+    store.extend([_entry(0, "start opname"), _entry(1, "ander"), _entry(2, "start")])
+    view = store.query(text="start")
+    assert len(view) == 2
+    store.extend([_entry(3, "start twee"), _entry(4, "ruis"), _entry(5, "ruis")])
+    view.refresh()
+    assert _messages(view) == ["start", "start twee"]
+
+
+def test_combined_filters():
+    store = LogStore()
+    store.extend([
+        _entry(0, "sheet written", logging.DEBUG, "excelplan"),
+        _entry(1, "sheet missing", logging.WARNING, "excelplan"),
+        _entry(2, "sheet missing", logging.WARNING, "excelbatch"),
+        _entry(3, "sheet missing", logging.ERROR, "excelplan"),
+        _entry(4, "other problem", logging.ERROR, "excelplan"),
+    ])
+    view = store.query(min_level=logging.WARNING, loggers=["excelplan"], text="missing")
+    assert [entry.seq for entry in view.rows(0, 10)] == [1, 3]
+    view = store.query(min_level=logging.WARNING, loggers=["excelplan"])
+    assert [entry.seq for entry in view.rows(0, 10)] == [1, 3, 4]
+    assert [entry.seq for entry in view.rows(1, 1)] == [3]
+    assert len(store.query(min_level=logging.CRITICAL)) == 0
+    assert store.levels() == [logging.DEBUG, logging.WARNING, logging.ERROR]
+
+
+def test_search_matches_word_prefixes_only():
+    store = LogStore()
+    store.extend([
+        _entry(0, "Connection timeout after 30s"),
+        _entry(1, "layout updated"),
+        _entry(2, "Time-out on SRV-01"),
+    ])
+    assert _messages(store.query(text="time")) == ["Connection timeout after 30s", "Time-out on SRV-01"]
+    # Not a substring search: "out" only finds words that start with it
+    assert _messages(store.query(text="out")) == ["Time-out on SRV-01"]
+    assert _messages(store.query(text="imeout")) == []
+    # Every word must match, case-insensitively and in any order
+    assert _messages(store.query(text="SRV TIME")) == ["Time-out on SRV-01"]
+    assert _messages(store.query(text="time layout")) == []
+
+
+def test_entry_from_record_includes_exception():
+    try:
+        raise ValueError("kapot")
+    except ValueError:
+        record = logging.LogRecord("app", logging.ERROR, __file__, 1, "mislukt %s", ("x",), sys.exc_info())
+    entry = LogEntry.from_record(record)
+    assert entry.message.startswith("mislukt x\nTraceback")
+    assert entry.message.endswith("ValueError: kapot")
+    assert entry.format().split()[1:4] == ["ERROR", "app", "-"]
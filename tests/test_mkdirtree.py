@@ -0,0 +1,58 @@
+import errno
+import json
+import os
+
+import pytest
+
+import fanout
+from mkdirtree import TreeBuildError, build_trees, load_tree_spec
+
+
+@pytest.fixture
+def spec(tmp_path):
+    (tmp_path / "x.txt").write_bytes(b"seed" * 1000)
+    (tmp_path / "tree.json").write_text(json.dumps({
+        "root": "{name}",
+        "children": [{"name": "A"}, {"name": "B", "files": [{"source": "x.txt"}]}],
+    }))
+    return load_tree_spec(str(tmp_path / "tree.json"))
+
+
+def test_builds_folders_and_seed_files(tmp_path, spec):
+    out = tmp_path / "out"
+    result = build_trees(str(out), ["s1", "s2"], spec)
+    assert result.directories == 6
+    assert result.files == 2
+    assert (out / "s2" / "B" / "x.txt").read_bytes() == b"seed" * 1000
+
+
+def test_copy_failing_midway_is_rolled_back(tmp_path, spec, monkeypatch):
+    def partial_copy(self, dest):
+        with open(dest, "wb") as f:
+            f.write(b"half")
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(fanout.SourceFile, "place", partial_copy)
+    out = tmp_path / "out"
+    with pytest.raises(TreeBuildError) as info:
+        build_trees(str(out), ["s1", "s2"], spec)
+    assert info.value.removed == 6
+    assert os.listdir(out) == []
+
+
+def test_existing_folders_and_files_are_kept_on_rollback(tmp_path, spec, monkeypatch):
+    out = tmp_path / "out"
+    (out / "s1" / "B").mkdir(parents=True)
+    (out / "s1" / "B" / "x.txt").write_text("mine")
+    monkeypatch.setattr(fanout.SourceFile, "place", lambda self, dest: (_ for _ in ()).throw(OSError(errno.EIO, "I/O")))
+    with pytest.raises(TreeBuildError):
+        build_trees(str(out), ["s1", "s2"], spec)
+    assert (out / "s1" / "B" / "x.txt").read_text() == "mine"
+    assert sorted(os.listdir(out)) == ["s1"]
+
+
+def test_cancel_rolls_back(tmp_path, spec):
+    out = tmp_path / "out"
+    result = build_trees(str(out), [f"s{i}" for i in range(50)], spec, cancelled=lambda: True)
+    assert result.cancelled
+    assert os.listdir(out) == []
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from rapportbuild import CHECKLIST, MANIFEST_NAAM, OPMAAK, Manifest, bouw, sectie_hashes
+
+KLANT = "KLANT- EN CONTRACTINFORMATIE"
+REGELINSTALLATIE = "INFORMATIE REGELINSTALLATIE"
+
+
+def _taken(**wijzigingen):
+    rapporten = [
+        {"bron": "a.xml", "templatepad": "", "velden": {"klantnaam": "ACME", "locatie": "Utrecht", "versie_gbs": "3.2"}},
+        {"bron": "b.xml", "templatepad": "", "velden": {"klantnaam": "Beta", "locatie": "Delft"}},
+    ]
+    rapporten[0]["velden"].update(wijzigingen)
+    return [(rapporten[0], [{"sheet": 0, "sectie": "cpu", "waarde": "50", "getal": 50.0, "gemeten": 1.0}]),
+            (rapporten[1], [])]
+
+
+def test_gewijzigde_secties_reports_exactly_the_changed_section(tmp_path):
+    uitmap = str(tmp_path)
+    bouw(_taken(), uitmap, workers=1)
+    manifest = Manifest(uitmap)
+    naam = "Rapportage ACME - Utrecht.pdf"
+    rapport, metingen = _taken()[0]
+    assert manifest.gewijzigde_secties(naam, sectie_hashes(rapport, metingen)) == []
+    rapport, metingen = _taken(versie_gbs="4.0")[0]
+    assert manifest.gewijzigde_secties(naam, sectie_hashes(rapport, metingen)) == [REGELINSTALLATIE]
+    assert manifest.gewijzigde_secties(naam, sectie_hashes(rapport, [])) == [REGELINSTALLATIE, CHECKLIST]
+    assert manifest.gewijzigde_secties("onbekend.pdf", sectie_hashes(rapport, [])) is None
+
+
+def test_incremental_pdf_build(tmp_path):
+    uitmap = str(tmp_path)
+    eerste = bouw(_taken(), uitmap, workers=1)
+    assert sorted(eerste.gemaakt) == ["Rapportage ACME - Utrecht.pdf", "Rapportage Beta - Delft.pdf"]
+    assert eerste.nieuw == 2 and not eerste.fouten
+    assert os.path.exists(os.path.join(uitmap, MANIFEST_NAAM))
+
+    tweede = bouw(_taken(), uitmap, workers=1)
+    assert tweede.gemaakt == [] and len(tweede.ongewijzigd) == 2
+
+    derde = bouw(_taken(adres="Nieuwe straat 1"), uitmap, workers=1)
+    assert derde.gemaakt == ["Rapportage ACME - Utrecht.pdf"]
+    assert dict(derde.secties) == {KLANT: 1} and derde.nieuw == 0
+    assert "gewijzigd: KLANT- EN CONTRACTINFORMATIE (1)" in derde.samenvatting()
+
+    assert len(bouw(_taken(adres="Nieuwe straat 1"), uitmap, workers=1, alles=True).gemaakt) == 2
+
+
+def test_template_change_rebuilds_everything(tmp_path):
+    uitmap = str(tmp_path / "uit")
+    bouw(_taken(), uitmap, workers=1)
+    template = tmp_path / "t.json"
+    template.write_text('{"voettekst": "Vertrouwelijk"}', encoding="utf-8")
+    resultaat = bouw(_taken(), uitmap, template_pad=str(template), workers=1)
+    assert len(resultaat.gemaakt) == 2 and dict(resultaat.secties) == {OPMAAK: 2}
+
+
+@pytest.mark.parametrize("aanpassing", ["verwijderd", "bewerkt"])
+def test_deleted_or_edited_output_is_rebuilt(tmp_path, aanpassing):
+    uitmap = str(tmp_path)
+    bouw(_taken(), uitmap, workers=1)
+    pad = os.path.join(uitmap, "Rapportage Beta - Delft.pdf")
+    if aanpassing == "verwijderd":
+        os.remove(pad)
+    else:
+        with open(pad, "ab") as f:
+            f.write(b"% bewerkt\n")
+    resultaat = bouw(_taken(), uitmap, workers=1)
+    assert resultaat.gemaakt == ["Rapportage Beta - Delft.pdf"]
+    assert resultaat.ongewijzigd == ["Rapportage ACME - Utrecht.pdf"]
+    assert resultaat.nieuw == 1
+    with open(pad, "rb") as f:
+        assert not f.read().endswith(b"% bewerkt\n")
+
+
+def test_unreadable_manifest_rebuilds_everything(tmp_path):
+    uitmap = str(tmp_path)
+    bouw(_taken(), uitmap, workers=1)
+    with open(os.path.join(uitmap, MANIFEST_NAAM), "w", encoding="utf-8") as f:
+        f.write("{kapot")
+    assert len(bouw(_taken(), uitmap, workers=1).gemaakt) == 2
+
+
+def test_incremental_xml_build(tmp_path):
+    uitmap = str(tmp_path)
+    assert sorted(bouw(_taken(), uitmap, formaat="xml").gemaakt) == ["a.xml", "b.xml"]
+    # Metingen staan niet in de XML
+    taken = _taken()
+    taken[0] = (taken[0][0], [])
+    assert bouw(taken, uitmap, formaat="xml").gemaakt == []
+    taken[1][0]["templatepad"] = "C:/nieuw.xlsm"
+    resultaat = bouw(taken, uitmap, formaat="xml")
+    assert resultaat.gemaakt == ["b.xml"] and dict(resultaat.secties) == {"TEMPLATEPAD": 1}
+    with pytest.raises(ValueError):
+        bouw(taken, uitmap, formaat="docx")
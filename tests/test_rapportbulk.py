@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+import rapportbulk as rb
+from rapportschema import SCHEMA
+
+RAPPORTEN = [
+    {"bron": "a.xml", "templatepad": "C:/Templates/a.xlsm",
+     "velden": {"klantnaam": "ACME", "locatie": "Utrecht", "contractniveau": "Totaal", "adres": "Straße 1 – ☃"}},
+    {"bron": "", "templatepad": "", "velden": {"klantnaam": "Beta", "telefoon_td": "010", "telefoon_contract": "020"}},
+    {"bron": "c.xml", "templatepad": "", "velden": {veld.sleutel: f"w{idx}" * 50 for idx, veld in enumerate(SCHEMA.velden)}},
+]
+
+
+@pytest.mark.parametrize("formaat", ["jsonl", "sgr"])
+def test_file_round_trip(tmp_path, formaat):
+    pad = str(tmp_path / f"rapporten.{formaat}")
+    assert rb.schrijf_rapporten(RAPPORTEN, pad) == (3, [])
+    gelezen, fouten = rb.lees_rapporten([pad])
+    assert fouten == []
+    assert gelezen == RAPPORTEN
+
+
+def test_sgr_is_smaller_than_jsonl(tmp_path):
+    rb.schrijf_jsonl(RAPPORTEN * 20, str(tmp_path / "r.jsonl"))
+    rb.schrijf_sgr(RAPPORTEN * 20, str(tmp_path / "r.sgr"))
+    assert os.path.getsize(tmp_path / "r.sgr") < os.path.getsize(tmp_path / "r.jsonl")
+
+
+def test_xml_round_trip(tmp_path):
+    doel = str(tmp_path / "xml")
+    rapporten = RAPPORTEN + [dict(RAPPORTEN[0])]
+    assert rb.schrijf_rapporten(rapporten, doel, workers=1) == (4, [])
+    # Gelijke bronnamen krijgen elk een eigen bestand
+    assert sorted(os.listdir(doel)) == ["a (2).xml", "a.xml", "c.xml", "rapportage_00002.xml"]
+    gelezen, fouten = rb.lees_rapporten([doel], workers=1)
+    assert fouten == []
+    # XML schrijft elk veld, ook de lege
+    assert all(len(rapport["velden"]) == len(SCHEMA.velden) for rapport in gelezen)
+    assert [{k: v for k, v in rapport["velden"].items() if v} for rapport in gelezen] == [
+        RAPPORTEN[0]["velden"], RAPPORTEN[0]["velden"], RAPPORTEN[2]["velden"], RAPPORTEN[1]["velden"]]
+    assert gelezen[0]["templatepad"] == "C:/Templates/a.xlsm"
+    # Over een procespool in dezelfde volgorde
+    assert rb.lees_rapporten([doel], workers=2) == (gelezen, [])
+    with open(os.path.join(doel, "a.xml"), encoding="utf-8") as f:
+        assert "Wachtwoord" not in f.read()
+
+
+def test_converteer_between_formats(tmp_path):
+    rb.schrijf_sgr(RAPPORTEN, str(tmp_path / "r.sgr"))
+    resultaat = rb.converteer([str(tmp_path / "r.sgr")], str(tmp_path / "r.jsonl"))
+    assert (resultaat["gelezen"], resultaat["geschreven"], resultaat["fouten"]) == (3, 3, [])
+    assert list(rb.lees_jsonl(str(tmp_path / "r.jsonl"))) == RAPPORTEN
+
+
+def test_truncated_sgr(tmp_path):
+    pad = str(tmp_path / "r.sgr")
+    rb.schrijf_sgr(RAPPORTEN, pad)
+    with open(pad, "rb") as f:
+        data = f.read()
+    with open(pad, "wb") as f:
+        f.write(data[:-10])
+    with pytest.raises(ValueError, match="afgekapt"):
+        list(rb.lees_sgr(pad))
+    _, fouten = rb.lees_rapporten([pad])
+    assert len(fouten) == 1 and "afgekapt" in fouten[0]
+
+
+def test_newer_sgr_version(tmp_path):
+    pad = str(tmp_path / "r.sgr")
+    rb.schrijf_sgr(RAPPORTEN, pad)
+    with open(pad, "r+b") as f:
+        f.seek(4)
+        f.write(bytes([rb.FORMAAT_VERSIE + 1]))
+    with pytest.raises(ValueError, match="formaatversie 2"):
+        list(rb.lees_sgr(pad))
+
+
+def test_not_an_sgr_file(tmp_path):
+    pad = tmp_path / "r.sgr"
+    pad.write_bytes(b"PK\x03\x04rest")
+    with pytest.raises(ValueError, match="geen sgr-bestand"):
+        list(rb.lees_sgr(str(pad)))
+
+
+def test_newer_jsonl_version_and_unknown_fields(tmp_path):
+    pad = tmp_path / "r.jsonl"
+    kop = {"formaat": rb.FORMAAT_NAAM, "versie": rb.FORMAAT_VERSIE, "velden": ["klantnaam", "nieuw_veld"]}
+    pad.write_text(json.dumps(kop) + "\n" + json.dumps({"velden": {"klantnaam": "ACME", "nieuw_veld": "x"}}) + "\n",
+                   encoding="utf-8")
+    assert [rapport["velden"] for rapport in rb.lees_jsonl(str(pad))] == [{"klantnaam": "ACME"}]
+
+    kop["versie"] = rb.FORMAAT_VERSIE + 1
+    pad.write_text(json.dumps(kop) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="formaatversie"):
+        list(rb.lees_jsonl(str(pad)))
+
+
+def test_formaat_van(tmp_path):
+    assert rb.formaat_van("x.SGR") == "sgr"
+    assert rb.formaat_van(str(tmp_path)) == "xml"
+    assert rb.formaat_van("uitvoer") == "xml"
+    with pytest.raises(ValueError):
+        rb.formaat_van("x.csv")
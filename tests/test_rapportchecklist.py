@@ -0,0 +1,72 @@
+import pytest
+
+from excelplan import WritePlan, build_write_plan
+from rapportchecklist import CHECKLIST, ChecklistModel
+
+LICENTIE_CHECKBOXES = [f"Check Box {nummer}" for nummer in range(35, 41)]
+
+
+@pytest.mark.parametrize("niveau, aantal", [("Basis", 30), ("Standaard", 34), ("Totaal", 42)])
+def test_vereist_per_niveau(niveau, aantal):
+    vereist = CHECKLIST.vereist(niveau)
+    assert len(vereist) == aantal
+    assert [item.nummer for item in vereist] == sorted(item.nummer for item in vereist)
+    assert all(niveau in item.niveaus for item in vereist)
+
+
+def test_higher_levels_include_lower_levels():
+    basis, standaard, totaal = (CHECKLIST.vereist_sets[niveau] for niveau in ("Basis", "Standaard", "Totaal"))
+    assert basis < standaard < totaal
+    assert len(totaal) == len(CHECKLIST.items)
+
+
+def test_niveau_is_case_insensitive():
+    assert CHECKLIST.niveau(" totaal ") == "Totaal"
+    assert len(CHECKLIST.vereist("STANDAARD")) == 34
+    with pytest.raises(ValueError, match="Onbekend contractniveau"):
+        CHECKLIST.vereist("Premium")
+
+
+def test_only_the_license_item_has_checkboxes():
+    items = [item for item in CHECKLIST.items if item.checkboxes]
+    assert [item.omschrijving for item in items] == ["Benodigde licenties aanwezig"]
+    assert list(items[0].checkboxes) == LICENTIE_CHECKBOXES
+    assert CHECKLIST.item("benodigde  LICENTIES aanwezig") is items[0]
+
+
+@pytest.mark.parametrize("niveau", ["Basis", "Standaard", "Totaal"])
+def test_checkbox_plan(niveau):
+    plan = CHECKLIST.checkbox_plan(niveau)
+    assert sorted(plan.sheets) == [0, 1, 2, 3, 4, 5]
+    for sheet_plan in plan.sheets.values():
+        assert sheet_plan.checkboxes == LICENTIE_CHECKBOXES
+        assert sheet_plan.values == {}
+    assert plan.sheets[5].name == "Checklist Regelkast (6)"
+    assert plan.legacy_calls == 6 * (2 + 6)
+
+
+def test_checkbox_plan_adds_to_an_existing_plan():
+    plan = build_write_plan({"servers": ["SRV1"], "cpu": ["", "", "", "", "", "", "80"]})
+    CHECKLIST.checkbox_plan("Totaal", plan)
+    assert plan.sheets[0].values == {"F8": "SRV1"}
+    assert plan.sheets[0].checkboxes == ["Check Box 33"] + LICENTIE_CHECKBOXES
+    # Sheet 7 heeft geen licentiecheckboxes
+    assert plan.sheets[6].checkboxes == ["Check Box 39"]
+    # Dubbele checkboxes worden één keer gezet
+    CHECKLIST.checkbox_plan("Basis", plan)
+    assert plan.sheets[0].checkboxes == ["Check Box 33"] + LICENTIE_CHECKBOXES
+    assert len(CHECKLIST.checkbox_plan("Basis", WritePlan(), sheets=2).sheets) == 2
+
+
+def test_model_from_a_table():
+    model = ChecklistModel([
+        ["Los item", "x", "", ""],
+        ["CATEGORIE", "", "", ""],
+        ["Item A", "", "x", "x"],
+        ["Item B", " ", " ", "x"],
+    ], ["Omschrijving", "Basis", "Standaard", "Totaal"], checkboxes={"item a": ["Check Box 1"], "Onbekend": ["X"]})
+    assert [categorie.titel for categorie in model.categorieen] == ["", "CATEGORIE"]
+    assert [item.categorie for item in model.items] == ["", "CATEGORIE", "CATEGORIE"]
+    assert [item.omschrijving for item in model.vereist("Totaal")] == ["Item A", "Item B"]
+    assert model.item("Item A").checkboxes == ("Check Box 1",)
+    assert model.rijen[1] == (("CATEGORIE", "", "", ""), ("categorie",))
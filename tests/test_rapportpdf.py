@@ -0,0 +1,75 @@
+import re
+import zlib
+
+import pytest
+
+import rapportpdf
+from pdfwriter import _pdf_string
+from rapportschema import SCHEMA
+
+
+def _pdf_text(data):
+    """
+    Check the file structure and return the decoded content streams.
+    """
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.endswith(b"%%EOF\n")
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    assert data[startxref:].startswith(b"xref\n")
+    count = int(re.match(rb"xref\n0 (\d+)\n", data[startxref:]).group(1))
+    offsets = re.findall(rb"(\d{10}) 00000 n \n", data[startxref:])
+    assert len(offsets) == count - 1
+    for num, offset in enumerate(offsets, start=1):
+        assert data[int(offset):].startswith(b"%d 0 obj\n" % num)
+    text = b""
+    for match in re.finditer(rb"<< /Length (\d+) /Filter /FlateDecode >>\nstream\n", data):
+        length = int(match.group(1))
+        text += zlib.decompress(data[match.end():match.end() + length])
+    assert text
+    return text
+
+
+def test_render_with_non_cp1252_text():
+    rapport = {"velden": {"klantnaam": "Zoë & Søn (Łódź)", "locatie": "Győr ☃", "adres": "Straße 1, € 5 – 7",
+                          "contractniveau": "Totaal"}}
+    data = rapportpdf.render_rapport(rapport, [
+        {"sheet": 0, "sectie": "cpu", "waarde": "90%", "getal": 90.0, "gemeten": 1.0},
+        {"sheet": 1, "sectie": "servers", "waarde": "SRV-02", "getal": None, "gemeten": 1.0},
+    ])
+    text = _pdf_text(data)
+    # cp1252 letters as WinAnsi bytes, others as their base letter or "?"
+    assert b"(Zo\xeb & S\xf8n \\(?\xf3dz\\) - Gyor ?)" in text
+    assert b"(Stra\xdfe 1, \x80 5 \x96 7)" in text
+    assert b"(Totaal)" in text
+    assert b"(CHECKLIST REGELKASTEN)" in text and b"(SRV-02)" in text
+    assert b"(Pagina 1 van 1)" in text
+    assert b"/Title (Onderhoudsrapportage Meet- en Regeltechniek Zo\xeb & S\xf8n \\(?\xf3dz\\) - Gyor ?)" in data
+
+
+def test_long_values_flow_onto_more_pages():
+    rapport = {"velden": {veld.sleutel: "lange tekst " * 60 for veld in SCHEMA.velden}}
+    text = _pdf_text(rapportpdf.render_rapport(rapport))
+    pages = int(re.search(rb"\(Pagina 1 van (\d+)\)", text).group(1))
+    assert pages > 1
+    assert b"(Pagina %d van %d)" % (pages, pages) in text
+
+
+def test_pdf_string_escapes():
+    assert _pdf_string("a(b)\\c") == b"(a\\(b\\)\\\\c)"
+
+
+def test_pdf_namen_are_unique_and_safe():
+    rapporten = [{"velden": {"klantnaam": "A/B", "locatie": "C:"}}, {"velden": {"klantnaam": "a/b", "locatie": "c:"}},
+                 {"bron": "map/x.xml", "velden": {}}]
+    assert rapportpdf.pdf_namen(rapporten) == ["Rapportage A_B - C_.pdf", "Rapportage a_b - c_ (2).pdf", "Rapportage x.pdf"]
+
+
+def test_template(tmp_path):
+    pad = tmp_path / "t.json"
+    pad.write_text('{"kleur": "#FF0000", "titel": "Eigen"}', encoding="utf-8")
+    template = rapportpdf.laad_template(str(pad))
+    assert template.kleur == (1.0, 0.0, 0.0) and template.titel == "Eigen"
+    assert template.sleutel != rapportpdf.laad_template().sleutel
+    pad.write_text('{"kleurtje": "#FF0000"}', encoding="utf-8")
+    with pytest.raises(ValueError, match="kleurtje"):
+        rapportpdf.laad_template(str(pad))
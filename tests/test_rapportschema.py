@@ -0,0 +1,83 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from rapportschema import SCHEMA, SECTIES, RapportSchema, Sectie, Veld, LINKS, lees_gegevens
+from tests.xlsmfixture import make_workbook
+
+
+def _baseline_xml(velden):
+    # Zoals de oude export: labels als naam, wachtwoord en templatepad voorop
+    root = ET.Element("Rapportage")
+    for naam, waarde in [("Wachtwoord", "geheim"), ("Templatepad", "C:/t.xlsm")] + velden:
+        ET.SubElement(root, "Veld", naam=naam).text = waarde
+    return ET.fromstring(ET.tostring(root))
+
+
+def test_baseline_xml_with_one_duplicate_label():
+    # De oude export schreef een dict per label: alleen de waarde van het contract-veld bleef over
+    waarden, meta = SCHEMA.uit_xml(_baseline_xml([
+        ("Klantnaam/Gebouwnaam:", "ACME"),
+        ("Telefoonnummer contactpersoon:", "0612345678"),
+        ("Email contactpersoon:", "contract@acme.nl"),
+    ]))
+    assert meta == {"Wachtwoord": "geheim", "Templatepad": "C:/t.xlsm"}
+    assert waarden == {"klantnaam": "ACME", "telefoon_contract": "0612345678", "email_contract": "contract@acme.nl"}
+
+
+def test_baseline_xml_with_both_duplicate_labels():
+    waarden, _ = SCHEMA.uit_xml(_baseline_xml([
+        ("Telefoonnummer contactpersoon:", "010-1111111"),
+        ("Email contactpersoon:", "td@acme.nl"),
+        ("Telefoonnummer contactpersoon:", "020-2222222"),
+        ("Email contactpersoon:", "contract@acme.nl"),
+    ]))
+    assert waarden == {"telefoon_td": "010-1111111", "email_td": "td@acme.nl",
+                       "telefoon_contract": "020-2222222", "email_contract": "contract@acme.nl"}
+
+
+def test_current_names_win_over_old_names():
+    waarden, _ = SCHEMA.uit_xml_paren([
+        ("Telefoonnummer contactpersoon contract:", "nieuw"),
+        ("Telefoonnummer contactpersoon:", "oud"),
+        ("Onbekend veld", "x"),
+    ])
+    assert waarden == {"telefoon_contract": "nieuw"}
+
+
+def test_xml_round_trip_keeps_every_field():
+    waarden = {veld.sleutel: f"waarde {idx}" for idx, veld in enumerate(SCHEMA.velden)}
+    root = SCHEMA.naar_xml(waarden, {"Templatepad": "t.xlsm"})
+    names = [element.get("naam") for element in root]
+    assert names[0] == "Templatepad" and "Wachtwoord" not in names
+    assert len(set(names)) == len(names)
+    assert SCHEMA.uit_xml(root) == (waarden, {"Templatepad": "t.xlsm"})
+
+
+def test_uit_gegevens_maps_repeated_keys_per_occurrence():
+    waarden = SCHEMA.uit_gegevens([
+        ("Klantnaam", "ACME"),
+        ("Telefoonnummer contactpersoon:", "1"),
+        ("Email contactpersoon", "td@acme.nl"),
+        ("telefoonnummer contactpersoon", "2"),
+        ("Locatie", ""),
+        (None, "x"),
+        ("Onbekend", "y"),
+    ])
+    assert waarden == {"klantnaam": "ACME", "telefoon_td": "1", "email_td": "td@acme.nl", "telefoon_contract": "2"}
+
+
+def test_lees_gegevens_reads_the_template(tmp_path):
+    waarden = lees_gegevens(make_workbook(tmp_path / "t.xlsm"))
+    assert waarden["klantnaam"] == "ACME"
+    assert waarden["locatie"] == "Utrecht"
+    assert waarden["contractniveau"] == "Totaal"
+    assert waarden["telefoon_td"] == "612345678"
+
+
+def test_duplicate_keys_are_rejected():
+    with pytest.raises(ValueError, match="veldsleutel"):
+        RapportSchema([Sectie(LINKS, "A", [Veld("a", "Een:"), Veld("a", "Twee:")])])
+    with pytest.raises(ValueError, match="gereserveerd"):
+        RapportSchema([Sectie(LINKS, "A", [Veld("a", "Wachtwoord")])])
+    assert len(SCHEMA.velden) == sum(len(sectie.velden) for sectie in SECTIES)
@@ -0,0 +1,98 @@
+import pytest
+
+from rapportstore import RapportStore, site_sleutel
+
+
+def _rapport(klant, locatie="Utrecht", **velden):
+    return {"bron": f"{klant}.xml", "templatepad": "", "velden": {"klantnaam": klant, "locatie": locatie, **velden}}
+
+
+@pytest.fixture
+def store():
+    with RapportStore(":memory:") as store:
+        yield store
+
+
+def _huidig(store, site):
+    return [rapport["versie"] for rapport in store.zoek() if rapport["site"] == site]
+
+
+def test_upsert_new_unchanged_and_reverted(store):
+    v1 = _rapport("ACME", contractniveau="Basis")
+    v2 = _rapport("ACME", contractniveau="Totaal")
+
+    resultaat = store.upsert([v1])
+    assert (resultaat.nieuw, resultaat.ongewijzigd, resultaat.hersteld) == (1, 0, 0)
+    assert resultaat.versies == [("acme|utrecht", 1)]
+
+    # Lege velden tellen niet als wijziging
+    resultaat = store.upsert([_rapport("ACME", contractniveau="Basis", adres="")])
+    assert (resultaat.nieuw, resultaat.ongewijzigd, resultaat.hersteld) == (0, 1, 0)
+    assert resultaat.versies == [("acme|utrecht", 1)]
+
+    resultaat = store.upsert([v2])
+    assert (resultaat.nieuw, resultaat.versies) == (1, [("acme|utrecht", 2)])
+    assert _huidig(store, "acme|utrecht") == [2]
+
+    # Terug naar de inhoud van versie 1: geen nieuwe versie, versie 1 is weer huidig
+    resultaat = store.upsert([v1])
+    assert (resultaat.nieuw, resultaat.ongewijzigd, resultaat.hersteld) == (0, 0, 1)
+    assert resultaat.versies == [("acme|utrecht", 1)]
+    assert _huidig(store, "acme|utrecht") == [1]
+    assert store.zoek()[0]["velden"]["contractniveau"] == "Basis"
+    assert store.tel() == {"sites": 1, "versies": 2, "metingen": 0}
+
+    # Een andere schrijfwijze van de klantnaam is dezelfde site, met een nieuwe versie
+    assert store.upsert([_rapport("acme ", contractniveau="Basis")]).versies == [("acme|utrecht", 3)]
+
+
+def test_upsert_reports_reports_without_identity(store):
+    resultaat = store.upsert([{"bron": "", "templatepad": "", "velden": {}}, _rapport("ACME")])
+    assert resultaat.nieuw == 1
+    assert len(resultaat.fouten) == 1
+    assert resultaat.versies[0] == (None, None)
+
+
+def test_site_sleutel_falls_back_to_file_name():
+    assert site_sleutel({"bron": "C:/Sites/Gebouw A.xml", "velden": {}}) == "bestand:gebouw a"
+    assert site_sleutel({"velden": {"klantnaam": " ACME ", "locatie": ""}}) == "acme|"
+
+
+def test_zoek_with_wildcards_and_lists(store):
+    store.upsert([
+        _rapport("ACME", "Utrecht", contractniveau="Totaal", naregelingen="middels Modbus RTU", aantal_lbk="4"),
+        _rapport("ACME", "Zwolle", contractniveau="Basis", naregelingen="middels BACnet IP", aantal_lbk="2"),
+        _rapport("Beta_50%", "Delft", contractniveau="Standaard", naregelingen="middels Modbus IP"),
+    ])
+
+    def sites(**filters):
+        return [rapport["site"] for rapport in store.zoek(**filters)]
+
+    assert sites(contractniveau="totaal") == ["acme|utrecht"]
+    assert sites(naregelingen="*modbus*") == ["acme|utrecht", "beta_50%|delft"]
+    assert sites(naregelingen="middels Modbus*", contractniveau=["Basis", "standaard"]) == ["beta_50%|delft"]
+    assert sites(klantnaam=["ACME"]) == ["acme|utrecht", "acme|zwolle"]
+    # Niet-geïndexeerde velden komen uit de JSON
+    assert sites(aantal_lbk="2") == ["acme|zwolle"]
+    assert sites(aantal_lbk=["4", "2"]) == ["acme|utrecht", "acme|zwolle"]
+    # % en _ zijn geen jokers, alleen *
+    assert sites(klantnaam="Beta_50%*") == ["beta_50%|delft"]
+    assert sites(klantnaam="Beta%") == []
+    assert sites(klantnaam="B_ta*") == []
+    assert sites(limiet=1) == ["acme|utrecht"]
+    with pytest.raises(KeyError):
+        store.zoek(bestaat_niet="x")
+
+
+def test_zoek_alle_versies(store):
+    store.upsert([_rapport("ACME", contractniveau="Basis"), _rapport("ACME", contractniveau="Totaal")])
+    assert [rapport["versie"] for rapport in store.zoek(klantnaam="ACME")] == [2]
+    assert [rapport["versie"] for rapport in store.zoek(alle_versies=True, klantnaam="ACME")] == [1, 2]
+
+
+def test_metingen(store):
+    aantal = store.voeg_metingen_toe("wb.xlsm", {"servers": ["SRV1", "", "SRV3"], "cpu": ["90", "12,5"]}, gemeten=1.0)
+    assert aantal == 4
+    hoog = store.metingen(sectie="cpu", minimaal=50)
+    assert [(meting["sheet"], meting["getal"]) for meting in hoog] == [(0, 90.0)]
+    assert {meting["sheet"] for meting in store.metingen(werkboek="wb.xlsm", sectie="servers")} == {0, 2}
@@ -0,0 +1,73 @@
+import pytest
+
+import xlsmpackage as xp
+from xlsmcontrols import CheckboxIndex, set_vml_states
+from tests.xlsmfixture import make_workbook
+
+SHEET = "Checklist Regelkast"
+
+
+@pytest.fixture
+def package(tmp_path):
+    package = xp.XlsmPackage(make_workbook(tmp_path / "t.xlsm", linked={37: "$H$37", 39: "'Gegevens'!$C$2"}))
+    yield package
+    package.close()
+
+
+def test_index_maps_controls_to_their_parts(package):
+    index = CheckboxIndex(package)
+    assert sorted(index.controls(SHEET)) == ["Check Box 33", "Check Box 37", "Check Box 39", "Check Box 41"]
+    control = index.find("Checklist Regelkast (2)", "Check Box 37")
+    assert control.shape_id == "1061"
+    assert control.ctrl_part == "xl/ctrlProps/ctrlProp3_37.xml"
+    assert control.vml_part == "xl/drawings/vmlDrawing3.vml"
+    assert index.controls("Gegevens") == {}
+    assert index.find(SHEET, "Check Box 99") is None
+
+
+def test_set_checked_patches_ctrl_props_and_vml(package):
+    index = CheckboxIndex(package)
+    updated, missing, linked = index.set_checked([
+        (SHEET, "Check Box 33", True),
+        (SHEET, "Check Box 41", True),
+        (SHEET, "Check Box 99", True),
+        ("Onbekend", "Check Box 33", True),
+    ])
+    assert updated == [(SHEET, "Check Box 33"), (SHEET, "Check Box 41")]
+    assert missing == [(SHEET, "Check Box 99"), ("Onbekend", "Check Box 33")]
+    assert linked == {}
+    assert xp.get_form_control_attrs(package.read_text("xl/ctrlProps/ctrlProp2_33.xml"))["checked"] == "Checked"
+    assert "checked" not in xp.get_form_control_attrs(package.read_text("xl/ctrlProps/ctrlProp2_37.xml"))
+    vml = package.read_text("xl/drawings/vmlDrawing2.vml")
+    assert vml.count("<x:Checked>1</x:Checked>") == 2
+    # One write per part, and nothing on the other sheets
+    assert package.dirty_parts == {
+        "xl/ctrlProps/ctrlProp2_33.xml", "xl/ctrlProps/ctrlProp2_41.xml", "xl/drawings/vmlDrawing2.vml"}
+
+    index.set_checked([(SHEET, "Check Box 33", False)])
+    assert "checked" not in xp.get_form_control_attrs(package.read_text("xl/ctrlProps/ctrlProp2_33.xml"))
+    assert package.read_text("xl/drawings/vmlDrawing2.vml").count("<x:Checked>1</x:Checked>") == 1
+
+
+def test_set_checked_reports_linked_cells(package):
+    _, _, linked = CheckboxIndex(package).set_checked([
+        (SHEET, "Check Box 37", True),
+        (SHEET, "Check Box 39", False),
+    ])
+    assert linked == {SHEET: {"H37": True}, "Gegevens": {"C2": False}}
+
+
+def test_set_vml_states_leaves_other_shapes_alone():
+    vml = ('<xml><v:shape id="_x0000_s1057" type="#t"><x:ClientData ObjectType="Checkbox">'
+           '<x:Checked>1</x:Checked></x:ClientData></v:shape>'
+           '<v:shape id="_x0000_s1061" type="#t"><x:ClientData ObjectType="Checkbox"></x:ClientData></v:shape></xml>')
+    patched = set_vml_states(vml, {"1061": True})
+    assert patched.count("<x:Checked>1</x:Checked>") == 2
+    patched = set_vml_states(patched, {"1057": False, "1061": False})
+    assert "<x:Checked>" not in patched
+    assert set_vml_states(vml, {}) == vml
+
+
+def test_set_form_control_checked_requires_form_control():
+    with pytest.raises(ValueError):
+        xp.set_form_control_checked("<other/>", True)
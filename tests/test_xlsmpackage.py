@@ -0,0 +1,104 @@
+import os
+import stat
+import zipfile
+
+import pytest
+
+import xlsmpackage as xp
+from tests.xlsmfixture import VBA_PROJECT, make_workbook
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return make_workbook(tmp_path / "template.xlsm")
+
+
+def _members(path):
+    with zipfile.ZipFile(path) as z:
+        assert z.testzip() is None
+        return {info.filename: (info.CRC, info.compress_type, z.read(info.filename)) for info in z.infolist()}
+
+
+def test_save_streams_unchanged_members_and_regenerates_changed_ones(workbook, tmp_path):
+    before = _members(workbook)
+    package = xp.XlsmPackage(workbook)
+    part = "xl/worksheets/sheet2.xml"
+    xml, _ = xp.set_cell_value(package.read_text(part), "F8", "server-01")
+    package.write_part(part, xml)
+    out = str(tmp_path / "out.xlsm")
+    package.save(out)
+    package.close()
+
+    after = _members(out)
+    assert set(after) == set(before)
+    assert after["xl/vbaProject.bin"] == before["xl/vbaProject.bin"]
+    assert after["xl/vbaProject.bin"][2] == VBA_PROJECT
+    assert "server-01" in after[part][2].decode()
+    unchanged = [name for name in before if name != part]
+    assert all(after[name] == before[name] for name in unchanged)
+    # The source is left as it was
+    assert _members(workbook) == before
+
+
+def test_in_place_save_keeps_package_usable(workbook):
+    package = xp.XlsmPackage(workbook)
+    package.write_part("xl/worksheets/sheet2.xml",
+                       xp.set_cell_value(package.read_text("xl/worksheets/sheet2.xml"), "B8", 42)[0])
+    package.save()
+    assert package.dirty_parts == set()
+    assert '<c r="B8"><v>42</v></c>' in package.read_text("xl/worksheets/sheet2.xml")
+    package.close()
+    assert '<c r="B8"><v>42</v></c>' in _members(workbook)["xl/worksheets/sheet2.xml"][2].decode()
+
+
+def test_removed_and_added_parts(workbook, tmp_path):
+    package = xp.XlsmPackage(workbook)
+    package.write_part("xl/extra.xml", "<extra/>")
+    package.remove_part("xl/drawings/vmlDrawing2.vml")
+    out = str(tmp_path / "out.xlsm")
+    package.save(out)
+    package.close()
+    members = _members(out)
+    assert members["xl/extra.xml"][2] == b"<extra/>"
+    assert "xl/drawings/vmlDrawing2.vml" not in members
+
+
+def test_writing_back_the_original_content_is_not_a_change(workbook):
+    package = xp.XlsmPackage(workbook)
+    original = package.read_part("xl/workbook.xml")
+    package.write_part("xl/workbook.xml", b"<changed/>")
+    package.write_part("xl/workbook.xml", original)
+    assert package.dirty_parts == set()
+    package.close()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permissions")
+def test_save_keeps_permissions(workbook, tmp_path):
+    os.chmod(workbook, 0o644)
+    package = xp.XlsmPackage(workbook)
+    package.write_part("xl/extra.xml", "<extra/>")
+    package.save()
+    assert stat.S_IMODE(os.stat(workbook).st_mode) == 0o644
+
+    out = str(tmp_path / "new.xlsm")
+    package.save(out)
+    package.close()
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(os.stat(out).st_mode) == 0o666 & ~umask
+
+
+def test_failed_save_leaves_source_and_no_temp_file(workbook, tmp_path, monkeypatch):
+    before = _members(workbook)
+    package = xp.XlsmPackage(workbook)
+    package.write_part("xl/extra.xml", "<extra/>")
+
+    def broken(tmp_path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(package, "_stream_to", broken)
+    with pytest.raises(OSError):
+        package.save()
+    package.close()
+    assert _members(workbook) == before
+    assert os.listdir(tmp_path) == ["template.xlsm"]
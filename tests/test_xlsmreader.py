@@ -0,0 +1,78 @@
+import datetime
+import os
+
+import pytest
+
+import xlsmreader
+from excelbackend import get_backend
+from xlsmreader import SheetNotFoundError, display_value, read_sheet
+from tests.xlsmfixture import PASSWORD, make_workbook
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    xlsmreader.clear_cache()
+    yield
+    xlsmreader.clear_cache()
+
+
+def test_cell_types(tmp_path):
+    rows = read_sheet(make_workbook(tmp_path / "t.xlsm"), "Gegevens")
+    assert list(rows) == [1, 2, 3, 4, 5, 6, 7]
+    values = {row["A"]: row["B"] for row in rows.values()}
+    assert values == {
+        "Klantnaam": "ACME",                              # shared string
+        "Locatie": "Utrecht",                             # inline string
+        "Contractniveau": "Totaal",
+        "Telefoonnummer contactpersoon:": 612345678,      # whole number
+        "Factor": 1234.5678,
+        "Datum": datetime.datetime(2025, 1, 1),           # date-formatted serial
+        "Actief": True,
+    }
+
+
+def test_columns_and_missing_sheet(tmp_path):
+    path = make_workbook(tmp_path / "t.xlsm")
+    assert read_sheet(path, "Gegevens", columns=["b"])[1] == {"B": "ACME"}
+    # A formula cell returns its cached value
+    assert read_sheet(path, "Checklist Regelkast") == {9: {"G": 0}}
+    with pytest.raises(SheetNotFoundError):
+        read_sheet(path, "Bestaat niet")
+
+
+def test_display_value():
+    assert display_value(None) == ""
+    assert display_value(612345678.0) == "612345678"
+    assert display_value(1234.5678) == "1234.5678"
+    assert display_value(0.1 + 0.2) == "0.30000000000000004"
+    assert display_value(datetime.datetime(2025, 1, 1)) == "01-01-2025"
+    assert display_value(datetime.datetime(2025, 1, 1, 9, 30)) == "01-01-2025 09:30"
+    assert display_value("ACME") == "ACME"
+    assert display_value(True) == "True"
+
+
+def test_cache_hit_and_stale_cache(tmp_path, monkeypatch):
+    path = make_workbook(tmp_path / "t.xlsm")
+    parsed = []
+    parse = xlsmreader._parse_sheet
+    monkeypatch.setattr(xlsmreader, "_parse_sheet", lambda *args: parsed.append(args) or parse(*args))
+
+    first = read_sheet(path, "Gegevens")
+    assert read_sheet(path, "Gegevens") is first
+    assert len(parsed) == 1
+
+    # Same size, newer modification time
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert read_sheet(path, "Gegevens") is not first
+    assert len(parsed) == 2
+
+    # Rewritten contents
+    wb = get_backend("xlsm").open(path)
+    sheet = wb.sheet("Gegevens")
+    sheet.unprotect(PASSWORD)
+    sheet.write_cells({"B1": "Nieuwe klant"})
+    wb.save()
+    wb.close()
+    assert read_sheet(path, "Gegevens")[1]["B"] == "Nieuwe klant"
+    assert len(parsed) == 3
@@ -0,0 +1,183 @@
+"""
+Builds small but complete .xlsm packages for the tests: a Gegevens sheet with
+shared, inline, numeric and date cells, and protected checklist sheets with
+form-control checkboxes (sheet control, ctrlProps and VML), a styles part and
+a vbaProject.bin.
+
+Usage:
+    path = make_workbook(tmp_path / "template.xlsm")
+"""
+import base64
+import zipfile
+from xml.sax.saxutils import escape
+
+import xlsmpackage as xp
+
+PASSWORD = "geheim"
+VBA_PROJECT = bytes(range(256)) * 64
+SALT = bytes(range(16))
+SPIN_COUNT = 1000
+
+NS = ('xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"')
+NS_EXTRA = ('xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+            'xmlns:x14ac="http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac" '
+            'xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" mc:Ignorable="x14ac"')
+HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Gegevens: label in A, value in B; values cover every cell type the reader handles
+GEGEVENS = [
+    ("Klantnaam", "ACME"),
+    ("Locatie", ("inline", "Utrecht")),
+    ("Contractniveau", "Totaal"),
+    ("Telefoonnummer contactpersoon:", 612345678),
+    ("Factor", 1234.5678),
+    ("Datum", ("date", 45658)),  # 2025-01-01
+    ("Actief", ("bool", True)),
+]
+# cellXfs: 0 default, 1 a date, 2 centred with a fill (the F8 style), 3 already a percentage
+STYLES = (
+    HEADER + f'<styleSheet {NS} {NS_EXTRA}>'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="0.0%"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFFFFF00"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="0" fillId="2" borderId="0" xfId="0" applyFill="1"><alignment horizontal="center"/></xf>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>'
+)
+
+
+def _checklist_name(idx):
+    return "Checklist Regelkast" if idx == 0 else f"Checklist Regelkast ({idx + 1})"
+
+
+def _protection(mode, password):
+    if mode == "agile":
+        hash_value = xp.agile_password_hash(password, "SHA-512", SALT, SPIN_COUNT)
+        return (f'<sheetProtection algorithmName="SHA-512" hashValue="{hash_value}" '
+                f'saltValue="{base64.b64encode(SALT).decode()}" spinCount="{SPIN_COUNT}" sheet="1" objects="1"/>')
+    if mode == "legacy":
+        return f'<sheetProtection password="{xp.legacy_password_hash(password)}" sheet="1" objects="1"/>'
+    return ""
+
+
+def _gegevens_sheet(strings):
+    rows = ""
+    for row, (label, value) in enumerate(GEGEVENS, 1):
+        cells = f'<c r="A{row}" t="s"><v>{strings.index(label)}</v></c>'
+        kind, value = value if isinstance(value, tuple) else ("plain", value)
+        if kind == "inline":
+            cells += f'<c r="B{row}" t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+        elif kind == "date":
+            cells += f'<c r="B{row}" s="1"><v>{value}</v></c>'
+        elif kind == "bool":
+            cells += f'<c r="B{row}" t="b"><v>{int(value)}</v></c>'
+        elif isinstance(value, str):
+            cells += f'<c r="B{row}" t="s"><v>{strings.index(value)}</v></c>'
+        else:
+            cells += f'<c r="B{row}"><v>{value!r}</v></c>'
+        rows += f'<row r="{row}">{cells}</row>'
+    return HEADER + f'<worksheet {NS}><sheetData>{rows}</sheetData></worksheet>'
+
+
+def _checklist_sheet(checkboxes, protection):
+    controls = "".join(
+        f'<control shapeId="{1024 + cb}" r:id="rId{cb + 1}" name="Check Box {cb}"/>' for cb in checkboxes)
+    return (HEADER + f'<worksheet {NS} {NS_EXTRA}><dimension ref="A1:F9"/><sheetData>'
+            '<row r="8" spans="1:6" x14ac:dyDescent="0.25"><c r="B8"/><c r="F8" s="2"/></row>'
+            '<row r="9"><c r="F9" s="3"/><c r="G9"><f>F8*2</f><v>0</v></c></row>'
+            f'</sheetData>{protection}<legacyDrawing r:id="rId1"/>'
+            f'<mc:AlternateContent><mc:Choice Requires="x14"><controls>{controls}</controls></mc:Choice></mc:AlternateContent>'
+            '</worksheet>')
+
+
+def _vml(checkboxes):
+    shapes = "".join(
+        f'<v:shape id="_x0000_s{1024 + cb}" type="#_x0000_t201"><x:ClientData ObjectType="Checkbox">'
+        f'<x:AutoFill>False</x:AutoFill></x:ClientData></v:shape>' for cb in checkboxes)
+    return ('<xml xmlns:v="urn:schemas-microsoft-com:vml" xmlns:o="urn:schemas-microsoft-com:office:office" '
+            f'xmlns:x="urn:schemas-microsoft-com:office:excel">{shapes}</xml>')
+
+
+def make_workbook(path, sheets=2, checkboxes=(33, 37, 39, 41), protection="agile", password=PASSWORD,
+                  linked=None, styles=True):
+    """
+    Write a test workbook.
+
+    Args:
+        path: Output path.
+        sheets (int): Number of "Checklist Regelkast" sheets.
+        checkboxes (iterable): Checkbox numbers on every checklist sheet.
+        protection (str): "agile" (SHA-512), "legacy" (16-bit hash) or "" for unprotected sheets.
+        password (str): Sheet protection password.
+        linked (dict, optional): Checkbox number -> linked cell (fmlaLink), e.g. {37: "$H$37"}.
+        styles (bool): Include xl/styles.xml.
+
+    Returns:
+        str: The path.
+    """
+    path = str(path)
+    linked = linked or {}
+    names = ["Gegevens"] + [_checklist_name(idx) for idx in range(sheets)]
+    strings = [label for label, _ in GEGEVENS] + [v for _, v in GEGEVENS if isinstance(v, str)]
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for n in range(1, len(names) + 1))
+    if styles:
+        overrides += f'<Override PartName="/xl/styles.xml" ContentType="{xp.STYLES_CONTENT_TYPE}"/>'
+    workbook_rels = "".join(
+        f'<Relationship Id="rId{n}" Type="{REL}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+        for n in range(1, len(names) + 1))
+    workbook_rels += (f'<Relationship Id="rId{len(names) + 1}" Type="{REL}/sharedStrings" Target="sharedStrings.xml"/>'
+                      f'<Relationship Id="rId{len(names) + 2}" Type="http://schemas.microsoft.com/office/2006/'
+                      f'relationships/vbaProject" Target="vbaProject.bin"/>')
+    if styles:
+        workbook_rels += f'<Relationship Id="rId{len(names) + 3}" Type="{REL}/styles" Target="styles.xml"/>'
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", HEADER + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Default Extension="vml" ContentType="application/vnd.openxmlformats-officedocument.vmlDrawing"/>'
+            '<Default Extension="bin" ContentType="application/vnd.ms-office.vbaProject"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.ms-excel.sheet.macroEnabled.main+xml"/>'
+            f'{overrides}</Types>'))
+        z.writestr("_rels/.rels", HEADER + (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'))
+        z.writestr("xl/workbook.xml", HEADER + f'<workbook {NS}><sheets>' + "".join(
+            f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>' for n, name in enumerate(names, 1))
+            + '</sheets></workbook>')
+        z.writestr("xl/_rels/workbook.xml.rels", HEADER + (
+            f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{workbook_rels}'
+            '</Relationships>'))
+        z.writestr("xl/sharedStrings.xml", HEADER + f'<sst {NS} count="{len(strings)}" uniqueCount="{len(strings)}">'
+                   + "".join(f"<si><t>{escape(s)}</t></si>" for s in strings) + "</sst>")
+        if styles:
+            z.writestr("xl/styles.xml", STYLES)
+        z.writestr("xl/worksheets/sheet1.xml", _gegevens_sheet(strings))
+        for n in range(2, len(names) + 1):
+            z.writestr(f"xl/worksheets/sheet{n}.xml", _checklist_sheet(checkboxes, _protection(protection, password)))
+            rels = f'<Relationship Id="rId1" Type="{REL}/vmlDrawing" Target="../drawings/vmlDrawing{n}.vml"/>'
+            rels += "".join(
+                f'<Relationship Id="rId{cb + 1}" Type="http://schemas.microsoft.com/office/2007/relationships/ctrlProp" '
+                f'Target="../ctrlProps/ctrlProp{n}_{cb}.xml"/>' for cb in checkboxes)
+            z.writestr(f"xl/worksheets/_rels/sheet{n}.xml.rels", HEADER + (
+                f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}'
+                '</Relationships>'))
+            z.writestr(f"xl/drawings/vmlDrawing{n}.vml", _vml(checkboxes))
+            for cb in checkboxes:
+                link = f' fmlaLink="{linked[cb]}"' if cb in linked else ""
+                z.writestr(f"xl/ctrlProps/ctrlProp{n}_{cb}.xml", HEADER + (
+                    '<formControlPr xmlns="http://schemas.microsoft.com/office/spreadsheetml/2009/9/main" '
+                    f'objectType="CheckBox"{link} lockText="1" noThreeD="1"/>'))
+        z.writestr("xl/vbaProject.bin", VBA_PROJECT, compress_type=zipfile.ZIP_STORED)
+    return path
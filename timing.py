@@ -0,0 +1,254 @@
+"""
+Per-phase timing of tool runs.
+
+A run collects spans: named phases timed with time.perf_counter. Each phase
+keeps its count, total and longest duration, so a span inside a loop (one per
+folder, one per sheet) adds up instead of flooding the log. Spans may nest; a
+phase's time includes the phases inside it. When the run finishes, the
+per-phase summary is logged and one JSON line is appended to the metrics file
+(<log dir>/metrics.jsonl):
+
+    {"ts": 1760000000.1, "run": "excelwriter", "seconds": 2.31, "context": {...},
+     "phases": {"books.open": {"count": 1, "seconds": 1.2, "max": 1.2}, ...}}
+
+Usage:
+    run = timing.start_run("excelwriter", workbook="x.xlsm")
+    with run.span("books.open"):
+        ...
+    run.finish(sheets=6)
+
+Timing is on unless the environment variable STRUXUREGUARD_TIMING is "0" or
+enable(False) is called. When it is off, start_run returns NULL_RUN, whose
+span() hands out one shared do-nothing context manager: no clock reads, no
+allocations, no locking.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import logsink
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "STRUXUREGUARD_TIMING"
+METRICS_FILE_NAME = "metrics.jsonl"
+MAX_METRICS_BYTES = 5 * 1024 * 1024
+
+_enabled = os.environ.get(ENV_VAR, "1") != "0"
+_metrics_path = None
+_write_lock = threading.Lock()
+
+
+def enable(flag=True):
+    """
+    Switch timing on or off for runs started from now on.
+    """
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+def set_metrics_path(path):
+    """
+    Write metrics to path instead of <log dir>/metrics.jsonl; None restores the default.
+    """
+    global _metrics_path
+    _metrics_path = path
+
+
+def metrics_path():
+    """
+    Return the metrics file: the configured path, or metrics.jsonl next to the log files.
+    """
+    return _metrics_path or os.path.join(logsink.current_log_dir(), METRICS_FILE_NAME)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _NullRun:
+    """
+    The run handed out while timing is off: every call is a no-op.
+    """
+
+    name = None
+
+    def __bool__(self):
+        return False
+
+    def span(self, phase):
+        return _NULL_SPAN
+
+    def add(self, phase, seconds):
+        pass
+
+    def finish(self, **context):
+        return None
+
+
+NULL_RUN = _NullRun()
+
+
+class _Span:
+    __slots__ = ("run", "phase", "start")
+
+    def __init__(self, run, phase):
+        self.run = run
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.run.add(self.phase, time.perf_counter() - self.start)
+        return False
+
+
+class TimingRun:
+    """
+    The phases of one run. Spans can be recorded from any thread.
+    """
+
+    def __init__(self, name, **context):
+        self.name = name
+        self.context = context
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.seconds = None
+        # phase -> [count, total seconds, longest], in the order phases first finished
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return True
+
+    def span(self, phase):
+        """
+        Return a context manager that times one occurrence of phase.
+        """
+        return _Span(self, phase)
+
+    def add(self, phase, seconds):
+        """
+        Record one occurrence of phase that took seconds.
+        """
+        with self._lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                self.phases[phase] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def to_dict(self):
+        with self._lock:
+            phases = {phase: {"count": count, "seconds": round(total, 6), "max": round(longest, 6)}
+                      for phase, (count, total, longest) in self.phases.items()}
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self._start
+        return {"ts": round(self.started, 3), "run": self.name, "seconds": round(seconds, 6),
+                "context": self.context, "phases": phases}
+
+    def summary(self):
+        """
+        Return the per-phase summary as text, one phase per line, slowest first.
+        """
+        data = self.to_dict()
+        total = data["seconds"] or 1e-9
+        lines = [f"Timing {self.name}: {data['seconds']:.3f}s"]
+        for phase, stats in sorted(data["phases"].items(), key=lambda item: -item[1]["seconds"]):
+            line = f"  {phase:<20s} {stats['seconds']:9.3f}s {stats['seconds'] / total * 100:5.1f}%"
+            if stats["count"] > 1:
+                line += f"  {stats['count']}x, max {stats['max'] * 1000:.1f} ms"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def finish(self, **context):
+        """
+        End the run: log the summary and append it to the metrics file.
+
+        Args:
+            **context: Extra facts about the run (sheet count, errors, ...) stored with it.
+
+        Returns:
+            dict: The run as written to the metrics file.
+        """
+        self.seconds = time.perf_counter() - self._start
+        self.context.update(context)
+        logger.info(self.summary())
+        data = self.to_dict()
+        _append_metrics(data)
+        return data
+
+
+def start_run(name, **context):
+    """
+    Start timing a run; returns NULL_RUN when timing is off.
+
+    Args:
+        name (str): Name of the run, e.g. "excelwriter".
+        **context: Facts about the run stored with it in the metrics file (JSON-serialisable).
+    """
+    if not _enabled:
+        return NULL_RUN
+    return TimingRun(name, **context)
+
+
+def _append_metrics(data):
+    path = metrics_path()
+    line = json.dumps(data, ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            try:
+                if os.path.getsize(path) > MAX_METRICS_BYTES:
+                    os.replace(path, path + ".1")
+            except OSError:
+                pass
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+
+
+def read_metrics(path=None, run=None):
+    """
+    Read the runs from a metrics file, oldest first.
+
+    Args:
+        path (str, optional): Metrics file. Defaults to metrics_path().
+        run (str, optional): Only runs with this name.
+
+    Returns:
+        list: The runs as dicts; unreadable lines are skipped.
+    """
+    runs = []
+    try:
+        with open(path or metrics_path(), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    continue
+                if run is None or data.get("run") == run:
+                    runs.append(data)
+    except FileNotFoundError:
+        pass
+    return runs
@@ -0,0 +1,152 @@
+import logging
+import re
+import xlsmpackage as xp
+
+logger = logging.getLogger(__name__)
+
+_DRAWING_RE = re.compile(r'<drawing\b([^>]*)/>')
+_CNVPR_RE = re.compile(r'<xdr:cNvPr\b([^>]*?)/?>')
+_VML_SHAPE_RE = re.compile(r'(<v:shape\b[^>]*\bid="_x0000_s(\d+)"[^>]*>)(.*?)(</v:shape>)', re.S)
+_VML_CHECKED_RE = re.compile(r'\s*<x:Checked>[^<]*</x:Checked>')
+
+
+class FormControl:
+    """
+    A form control on a worksheet and the package parts that hold its state.
+
+    Attributes:
+        sheet (str): Worksheet name.
+        name (str): Shape name, e.g. "Check Box 37".
+        shape_id (str): Shape id shared by the sheet XML, the drawing and the VML.
+        ctrl_part (str): ctrlProps part path, or None for legacy-only controls.
+        vml_part (str): VML drawing part path, or None.
+    """
+
+    def __init__(self, sheet, name, shape_id, ctrl_part, vml_part):
+        self.sheet = sheet
+        self.name = name
+        self.shape_id = shape_id
+        self.ctrl_part = ctrl_part
+        self.vml_part = vml_part
+
+
+class CheckboxIndex:
+    """
+    Index of all form controls in a workbook package, built once.
+
+    Maps (sheet name, shape name) to the control's ctrlProps and VML parts so
+    that checkbox states can be changed in bulk: every affected part is read and
+    patched exactly once, no matter how many checkboxes it holds.
+    """
+
+    def __init__(self, package):
+        """
+        Args:
+            package (XlsmPackage): The opened workbook package.
+        """
+        self.package = package
+        self._controls = {}
+        for sheet_name, sheet_part in package.sheets().items():
+            self._controls[sheet_name] = self._index_sheet(sheet_name, sheet_part)
+        total = sum(len(controls) for controls in self._controls.values())
+        logger.debug(f"Indexed {total} form control(s) on {len(self._controls)} sheet(s)")
+
+    def _index_sheet(self, sheet_name, sheet_part):
+        sheet_xml = self.package.read_text(sheet_part)
+        rels = self.package.relationships(sheet_part)
+        vml_rid = xp.find_legacy_drawing_rid(sheet_xml)
+        vml_part = rels[vml_rid][1] if vml_rid in rels else None
+
+        # Shape names from the DrawingML part, for controls without a name attribute
+        drawing_names = {}
+        drawing = _DRAWING_RE.search(sheet_xml)
+        drawing_rid = xp.parse_attrs(drawing.group(1)).get("r:id") if drawing else None
+        if drawing_rid in rels and self.package.has_part(rels[drawing_rid][1]):
+            for match in _CNVPR_RE.finditer(self.package.read_text(rels[drawing_rid][1])):
+                attrs = xp.parse_attrs(match.group(1))
+                drawing_names[attrs.get("id")] = attrs.get("name")
+
+        controls = {}
+        for attrs in xp.iter_controls(sheet_xml):
+            shape_id = attrs.get("shapeId")
+            name = attrs.get("name") or drawing_names.get(shape_id)
+            if not name:
+                continue
+            rid = attrs.get("r:id")
+            ctrl_part = rels[rid][1] if rid in rels else None
+            controls[name] = FormControl(sheet_name, name, shape_id, ctrl_part, vml_part)
+        return controls
+
+    def controls(self, sheet_name):
+        """
+        Return the controls of a sheet as a dict of shape name -> FormControl.
+        """
+        return self._controls.get(sheet_name, {})
+
+    def find(self, sheet_name, name):
+        return self.controls(sheet_name).get(name)
+
+    def set_checked(self, updates):
+        """
+        Set the checked state of many checkboxes at once.
+
+        Args:
+            updates (iterable): (sheet name, shape name, checked) tuples.
+
+        Returns:
+            tuple: (list of updated (sheet, name), list of (sheet, name) not found,
+            dict of sheet name -> {linked cell: value} for checkboxes with a cell link).
+        """
+        updated, missing = [], []
+        by_ctrl_part = {}
+        by_vml_part = {}
+        for sheet_name, name, checked in updates:
+            control = self.find(sheet_name, name)
+            if control is None:
+                missing.append((sheet_name, name))
+                continue
+            if control.ctrl_part:
+                by_ctrl_part[control.ctrl_part] = (control, bool(checked))
+            if control.vml_part and control.shape_id:
+                by_vml_part.setdefault(control.vml_part, {})[control.shape_id] = bool(checked)
+            updated.append((sheet_name, name))
+
+        linked = {}
+        for part, (control, checked) in by_ctrl_part.items():
+            ctrl_xml = self.package.read_text(part)
+            self.package.write_part(part, xp.set_form_control_checked(ctrl_xml, checked))
+            link = xp.get_form_control_attrs(ctrl_xml).get("fmlaLink")
+            if link:
+                sheet_name = control.sheet
+                if "!" in link:
+                    sheet_name, link = link.rsplit("!", 1)
+                    sheet_name = sheet_name.strip("'")
+                linked.setdefault(sheet_name, {})[link.replace("$", "")] = checked
+
+        for part, states in by_vml_part.items():
+            self.package.write_part(part, set_vml_states(self.package.read_text(part), states))
+
+        return updated, missing, linked
+
+
+def set_vml_states(vml_text, states):
+    """
+    Set the <x:Checked> flag of many checkbox shapes in one pass over a VML drawing.
+
+    Args:
+        vml_text (str): The VML drawing.
+        states (dict): Shape id -> checked.
+
+    Returns:
+        str: The patched VML.
+    """
+    def patch(match):
+        shape_id = match.group(2)
+        if shape_id not in states:
+            return match.group(0)
+        body = _VML_CHECKED_RE.sub("", match.group(3))
+        if states[shape_id]:
+            body = body.replace("</x:ClientData>", "<x:Checked>1</x:Checked></x:ClientData>", 1)
+        return match.group(1) + body + match.group(4)
+
+    return _VML_SHAPE_RE.sub(patch, vml_text)
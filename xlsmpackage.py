@@ -0,0 +1,762 @@
+import base64
+import copy
+import functools
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import re
+import secrets
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, unescape
+
+logger = logging.getLogger(__name__)
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Sheet XML is patched as text instead of round-tripped through ElementTree:
+# ElementTree renames namespace prefixes and drops unused declarations, which
+# breaks the mc:Ignorable attribute and makes Excel "repair" the workbook.
+_ROW_RE = re.compile(r'<row\b([^>]*?)(/>|>(.*?)</row>)', re.S)
+_CELL_RE = re.compile(r'<c\b([^>]*?)(/>|>(.*?)</c>)', re.S)
+_ATTR_RE = re.compile(r'([\w:.-]+)="([^"]*)"')
+_SHEET_DATA_RE = re.compile(r'<sheetData\s*/>|<sheetData\b[^>]*>.*?</sheetData>', re.S)
+_SHEET_CALC_PR_RE = re.compile(r'<sheetCalcPr\b[^>]*/>')
+_PROTECTION_RE = re.compile(r'<sheetProtection\b[^>]*/>')
+_CONTROL_RE = re.compile(r'<control\b([^>]*)>')
+_LEGACY_DRAWING_RE = re.compile(r'<legacyDrawing\b([^>]*)/>')
+_FORM_CONTROL_RE = re.compile(r'<formControlPr\b([^>]*?)(/?>)')
+_CELL_REF_RE = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d+)$')
+_PERCENT_TEXT_RE = re.compile(r'^\s*([-+]?\d+(?:[.,](\d+))?)\s*%\s*$')
+_CELL_XFS_RE = re.compile(r'<cellXfs\b([^>]*?)(/>|>(.*?)</cellXfs>)', re.S)
+_XF_RE = re.compile(r'<xf\b([^>]*?)(/>|>(.*?)</xf>)', re.S)
+_NUM_FMT_RE = re.compile(r'<numFmt\b([^>]*)/>')
+
+STYLES_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+STYLES_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"
+# Built-in number formats "0%" and "0.00%"
+PERCENT_FORMAT_IDS = (9, 10)
+_MINIMAL_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{NS_MAIN}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_LOCAL_HEADER = "<4s2B4HL2L2H"
+_CENTRAL_RECORD = "<4s4B4HL2L5H2L"
+_END_RECORD = "<4s4H2LH"
+_ZIP64_LIMIT = 0xFFFFFFFF
+_COPY_CHUNK = 1024 * 1024
+
+# mkstemp creates 0600 files; a saved workbook gets the mode open() would give it.
+# Read once at import: os.umask can only be read by setting it.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def split_cell_ref(ref):
+    """
+    Split an A1-style cell reference into its column letters and row number.
+
+    Args:
+        ref (str): Cell reference such as "F8" or "$F$8".
+
+    Returns:
+        tuple: (column letters in upper case, row number).
+    """
+    match = _CELL_REF_RE.match(ref.strip())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {ref}")
+    return match.group(1).upper(), int(match.group(2))
+
+
+def column_index(letters):
+    """
+    Convert column letters ("A", "AB") to a 1-based column index.
+    """
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + (ord(ch) - ord('A') + 1)
+    return index
+
+
+def column_letters(index):
+    """
+    Convert a 1-based column index to column letters.
+    """
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def parse_attrs(text):
+    """
+    Parse the attributes of a single XML start tag into a dict (values unescaped).
+    """
+    return {k: unescape(v, {"&quot;": '"', "&apos;": "'"}) for k, v in _ATTR_RE.findall(text)}
+
+
+def _format_attrs(attrs):
+    return "".join(f' {k}="{escape(str(v), {chr(34): "&quot;"})}"' for k, v in attrs.items())
+
+
+def _cell_xml(ref, value, style=None):
+    """
+    Build the XML for a single cell holding value, keeping the original style index.
+    """
+    attrs = {"r": ref}
+    if style is not None:
+        attrs["s"] = style
+    if value is None or value == "":
+        return f"<c{_format_attrs(attrs)}/>"
+    if isinstance(value, bool):
+        attrs["t"] = "b"
+        return f"<c{_format_attrs(attrs)}><v>{int(value)}</v></c>"
+    if isinstance(value, (int, float)):
+        return f"<c{_format_attrs(attrs)}><v>{value!r}</v></c>"
+    attrs["t"] = "inlineStr"
+    return f'<c{_format_attrs(attrs)}><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def percent_number(text):
+    """
+    Read text the way Excel reads a typed percentage: "34%" is the number 0.34
+    shown as 0%, "34,5 %" is 0.345 shown as 0.00%.
+
+    Returns:
+        tuple: (number, built-in number format id), or None if text is not a percentage.
+    """
+    match = _PERCENT_TEXT_RE.match(text)
+    if not match:
+        return None
+    number = float(match.group(1).replace(",", ".")) / 100
+    return number, PERCENT_FORMAT_IDS[1] if match.group(2) else PERCENT_FORMAT_IDS[0]
+
+
+def set_cell_value(sheet_xml, ref, value, restyle=None):
+    """
+    Write a value into a cell of a worksheet XML document.
+
+    Existing rows and cells are patched in place (the cell style is kept); missing
+    rows and cells are inserted in sheet order.
+
+    Args:
+        sheet_xml (str): The worksheet XML.
+        ref (str): Cell reference, e.g. "F8".
+        value: str, int, float, bool or None.
+        restyle (callable, optional): Called with the cell's current style index
+            (str, or None for a new cell); returns the style index to use.
+
+    Returns:
+        tuple: (new worksheet XML, True if the old cell contained a formula).
+    """
+    col, row_num = split_cell_ref(ref)
+    ref = f"{col}{row_num}"
+    col_idx = column_index(col)
+
+    data_match = _SHEET_DATA_RE.search(sheet_xml)
+    if not data_match:
+        raise ValueError("Worksheet has no sheetData element")
+    data_xml = data_match.group(0)
+    if data_xml.endswith("/>"):
+        open_tag, body, close_tag = "<sheetData>", "", "</sheetData>"
+    else:
+        open_end = data_xml.index(">") + 1
+        open_tag, body, close_tag = data_xml[:open_end], data_xml[open_end:-len("</sheetData>")], "</sheetData>"
+
+    had_formula = False
+    new_body = None
+    insert_at = len(body)
+    for row_match in _ROW_RE.finditer(body):
+        row_attrs = parse_attrs(row_match.group(1))
+        current = int(row_attrs.get("r", 0))
+        if current < row_num:
+            continue
+        if current > row_num:
+            insert_at = row_match.start()
+            break
+
+        # Row exists: patch or insert the cell
+        cells = row_match.group(3) or ""
+        cell_insert_at = len(cells)
+        new_cells = None
+        for cell_match in _CELL_RE.finditer(cells):
+            cell_attrs = parse_attrs(cell_match.group(1))
+            cell_col, _ = split_cell_ref(cell_attrs["r"])
+            cell_idx = column_index(cell_col)
+            if cell_idx < col_idx:
+                continue
+            if cell_idx == col_idx:
+                had_formula = "<f" in (cell_match.group(3) or "")
+                style = cell_attrs.get("s")
+                new_cell = _cell_xml(ref, value, restyle(style) if restyle else style)
+                new_cells = cells[:cell_match.start()] + new_cell + cells[cell_match.end():]
+            else:
+                cell_insert_at = cell_match.start()
+            break
+        if new_cells is None:
+            new_cells = cells[:cell_insert_at] + _cell_xml(ref, value, restyle(None) if restyle else None) + cells[cell_insert_at:]
+        row_xml = f"<row{row_match.group(1)}>{new_cells}</row>"
+        new_body = body[:row_match.start()] + row_xml + body[row_match.end():]
+        break
+
+    if new_body is None:
+        row_xml = f'<row r="{row_num}">{_cell_xml(ref, value, restyle(None) if restyle else None)}</row>'
+        new_body = body[:insert_at] + row_xml + body[insert_at:]
+
+    new_data = open_tag + new_body + close_tag
+    return sheet_xml[:data_match.start()] + new_data + sheet_xml[data_match.end():], had_formula
+
+
+def legacy_password_hash(password):
+    """
+    Compute Excel's legacy 16-bit sheet protection hash as a 4-digit hex string.
+    """
+    value = 0
+    for idx, char in enumerate(password, 1):
+        shifted = ord(char) << idx
+        value ^= (shifted & 0x7FFF) | (shifted >> 15)
+    value ^= len(password)
+    value ^= 0xCE4B
+    return f"{value:04X}"
+
+
+def _hash_name(algorithm):
+    return algorithm.replace("-", "").lower()
+
+
+@functools.lru_cache(maxsize=64)
+def agile_password_hash(password, algorithm, salt, spin_count):
+    """
+    Compute the salted, iterated sheet protection hash used by Excel 2010 and later.
+
+    Args:
+        password (str): Plain text password.
+        algorithm (str): Algorithm name as stored in the XML, e.g. "SHA-512".
+        salt (bytes): Salt bytes.
+        spin_count (int): Number of hash iterations.
+
+    Returns:
+        str: Base64 encoded hash value.
+
+    Results are cached: sheets copied inside a template share salt and hash, so
+    verifying the password once covers all of them.
+    """
+    name = _hash_name(algorithm)
+    new = getattr(hashlib, name, None) or functools.partial(hashlib.new, name)
+    digest = new(salt + password.encode("utf-16-le")).digest()
+    for i in range(spin_count):
+        digest = new(digest + i.to_bytes(4, "little")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def verify_protection_password(protection_attrs, password):
+    """
+    Check a password against the attributes of a sheetProtection element.
+
+    Returns:
+        bool: True if the password unlocks the sheet.
+    """
+    if "hashValue" in protection_attrs:
+        expected = protection_attrs["hashValue"]
+        actual = agile_password_hash(
+            password,
+            protection_attrs.get("algorithmName", "SHA-512"),
+            base64.b64decode(protection_attrs.get("saltValue", "")),
+            int(protection_attrs.get("spinCount", 0)),
+        )
+        return actual == expected
+    if "password" in protection_attrs:
+        return int(protection_attrs["password"], 16) == int(legacy_password_hash(password), 16)
+    # Protected without a password: any password unlocks it, just like in Excel
+    return True
+
+
+def build_protection_element(password, spin_count=100000):
+    """
+    Build a sheetProtection element equivalent to Excel's default Protect(Password=...).
+    """
+    attrs = {}
+    if password:
+        salt = secrets.token_bytes(16)
+        attrs.update({
+            "algorithmName": "SHA-512",
+            "hashValue": agile_password_hash(password, "SHA-512", salt, spin_count),
+            "saltValue": base64.b64encode(salt).decode("ascii"),
+            "spinCount": str(spin_count),
+        })
+    attrs.update({"sheet": "1", "objects": "1", "scenarios": "1"})
+    return f"<sheetProtection{_format_attrs(attrs)}/>"
+
+
+def get_protection(sheet_xml):
+    """
+    Return the sheetProtection element of a worksheet as text, or None if unprotected.
+    """
+    match = _PROTECTION_RE.search(sheet_xml)
+    return match.group(0) if match else None
+
+
+def remove_protection(sheet_xml):
+    """
+    Remove the sheetProtection element from a worksheet.
+    """
+    return _PROTECTION_RE.sub("", sheet_xml, count=1)
+
+
+def insert_protection(sheet_xml, element):
+    """
+    Insert (or replace) the sheetProtection element at its schema position,
+    directly after sheetData/sheetCalcPr.
+    """
+    sheet_xml = remove_protection(sheet_xml)
+    anchor = _SHEET_CALC_PR_RE.search(sheet_xml) or _SHEET_DATA_RE.search(sheet_xml)
+    if not anchor:
+        raise ValueError("Worksheet has no sheetData element")
+    return sheet_xml[:anchor.end()] + element + sheet_xml[anchor.end():]
+
+
+def iter_controls(sheet_xml):
+    """
+    Yield the attributes of every form control declared in a worksheet.
+    """
+    for match in _CONTROL_RE.finditer(sheet_xml):
+        yield parse_attrs(match.group(1))
+
+
+def find_legacy_drawing_rid(sheet_xml):
+    """
+    Return the relationship id of the worksheet's VML drawing, or None.
+    """
+    match = _LEGACY_DRAWING_RE.search(sheet_xml)
+    return parse_attrs(match.group(1)).get("r:id") if match else None
+
+
+def get_form_control_attrs(ctrl_xml):
+    """
+    Return the attributes of the formControlPr element of a ctrlProps part.
+    """
+    match = _FORM_CONTROL_RE.search(ctrl_xml)
+    return parse_attrs(match.group(1)) if match else {}
+
+
+def set_form_control_checked(ctrl_xml, checked):
+    """
+    Set or clear the checked state in a ctrlProps part.
+    """
+    match = _FORM_CONTROL_RE.search(ctrl_xml)
+    if not match:
+        raise ValueError("ctrlProps part has no formControlPr element")
+    attrs = parse_attrs(match.group(1))
+    attrs.pop("checked", None)
+    if checked:
+        attrs["checked"] = "Checked"
+    tag = f"<formControlPr{_format_attrs(attrs)}{match.group(2)}"
+    return ctrl_xml[:match.start()] + tag + ctrl_xml[match.end():]
+
+
+class CellStyles:
+    """
+    The cell formats (cellXfs) of a package, extended on demand with number-format
+    variants of existing formats. styles.xml is patched as text, like the sheets.
+    """
+
+    def __init__(self, package):
+        self.package = package
+        self.part = None
+        for rel_type, target in package.relationships("xl/workbook.xml").values():
+            if rel_type == STYLES_REL_TYPE and package.has_part(target):
+                self.part = target
+                break
+        self._variants = {}
+
+    def _ensure_part(self):
+        # Workbooks saved by Excel always have one; generated packages may not
+        if self.part is not None:
+            return
+        self.part = "xl/styles.xml"
+        self.package.write_part(self.part, _MINIMAL_STYLES)
+        types = self.package.read_text("[Content_Types].xml")
+        override = f'<Override PartName="/{self.part}" ContentType="{STYLES_CONTENT_TYPE}"/>'
+        self.package.write_part("[Content_Types].xml", types.replace("</Types>", override + "</Types>"))
+        rels_name = "xl/_rels/workbook.xml.rels"
+        rels = self.package.read_text(rels_name)
+        ids = {int(n) for n in re.findall(r'Id="rId(\d+)"', rels)}
+        rel = f'<Relationship Id="rId{max(ids, default=0) + 1}" Type="{STYLES_REL_TYPE}" Target="styles.xml"/>'
+        self.package.write_part(rels_name, rels.replace("</Relationships>", rel + "</Relationships>"))
+        logger.debug("Added styles.xml to package")
+
+    def _percent_format_ids(self, xml):
+        ids = set(PERCENT_FORMAT_IDS)
+        for match in _NUM_FMT_RE.finditer(xml):
+            attrs = parse_attrs(match.group(1))
+            # A % outside quotes or escapes makes Excel multiply by 100
+            code = re.sub(r'"[^"]*"|\\.', "", attrs.get("formatCode", ""))
+            if "%" in code:
+                ids.add(int(attrs["numFmtId"]))
+        return ids
+
+    def percent_style(self, style, format_id):
+        """
+        Return the index of a cell format that looks like style but shows a percentage.
+
+        A format that already shows a percentage is kept, like Excel does when a
+        percentage is typed into it; otherwise a copy with format_id is added once.
+
+        Args:
+            style (str): Current style index of the cell, or None.
+            format_id (int): Built-in percent number format, see percent_number().
+
+        Returns:
+            str: The style index to use.
+        """
+        base = int(style or 0)
+        key = (base, format_id)
+        if key in self._variants:
+            return self._variants[key]
+        self._ensure_part()
+        xml = self.package.read_text(self.part)
+        block = _CELL_XFS_RE.search(xml)
+        xfs = list(_XF_RE.finditer(block.group(3) or "")) if block else []
+        if not block or base >= len(xfs):
+            logger.warning(f"Cell format {base} not found in {self.part}; using the default format")
+            base = 0
+            if not xfs:
+                raise ValueError(f"{self.part} has no cell formats")
+        xf = xfs[base]
+        attrs = parse_attrs(xf.group(1))
+        if int(attrs.get("numFmtId", 0)) in self._percent_format_ids(xml):
+            self._variants[key] = str(base)
+            return self._variants[key]
+
+        attrs["numFmtId"] = str(format_id)
+        attrs["applyNumberFormat"] = "1"
+        new_xf = f"<xf{_format_attrs(attrs)}{xf.group(2)}" if xf.group(2) == "/>" else \
+            f"<xf{_format_attrs(attrs)}>{xf.group(3)}</xf>"
+        block_attrs = parse_attrs(block.group(1))
+        block_attrs["count"] = str(len(xfs) + 1)
+        new_block = f"<cellXfs{_format_attrs(block_attrs)}>{block.group(3) or ''}{new_xf}</cellXfs>"
+        self.package.write_part(self.part, xml[:block.start()] + new_block + xml[block.end():])
+        self._variants[key] = str(len(xfs))
+        logger.debug(f"Added percent format {format_id} variant of cell format {base} as {len(xfs)}")
+        return self._variants[key]
+
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def _encoded_name(info):
+    return info.filename.encode("utf-8" if info.flag_bits & 0x800 else "cp437")
+
+
+def _copy_raw_member(src, out, info):
+    """
+    Copy a member (local header, compressed data and data descriptor) verbatim.
+    """
+    src.seek(info.header_offset)
+    header = src.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_len, extra_len = struct.unpack("<2H", header[26:30])
+    remaining = name_len + extra_len + info.compress_size
+    if info.flag_bits & 0x08:
+        # Data descriptor, with or without its optional signature
+        src.seek(info.header_offset + 30 + remaining)
+        remaining += 16 if src.read(4) == b"PK\x07\x08" else 12
+        src.seek(info.header_offset + 30)
+    out.write(header)
+    while remaining:
+        chunk = src.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+        out.write(chunk)
+        remaining -= len(chunk)
+
+
+def _write_member(out, info, data, offset):
+    """
+    Compress and write a regenerated member; returns its central directory record.
+    """
+    info = copy.copy(info)
+    crc = zlib.crc32(data)
+    if info.compress_type == zipfile.ZIP_STORED:
+        payload = data
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        payload = compressor.compress(data) + compressor.flush()
+    info.compress_type = zipfile.ZIP_STORED if info.compress_type == zipfile.ZIP_STORED else zipfile.ZIP_DEFLATED
+    info.flag_bits &= 0x800
+    name = _encoded_name(info)
+    dostime, dosdate = _dos_datetime(info.date_time)
+    out.write(struct.pack(
+        _LOCAL_HEADER, b"PK\x03\x04", 20, 0, info.flag_bits, info.compress_type,
+        dostime, dosdate, crc, len(payload), len(data), len(name), 0))
+    out.write(name)
+    out.write(payload)
+    info.extra = b""
+    return _central_record(info, offset, crc, len(payload), len(data))
+
+
+def _central_record(info, offset, crc, compress_size, file_size):
+    name = _encoded_name(info)
+    dostime, dosdate = _dos_datetime(info.date_time)
+    return struct.pack(
+        _CENTRAL_RECORD, b"PK\x01\x02", info.create_version, info.create_system,
+        info.extract_version, info.reserved, info.flag_bits, info.compress_type,
+        dostime, dosdate, crc, compress_size, file_size, len(name), len(info.extra),
+        len(info.comment), 0, info.internal_attr, info.external_attr, offset,
+    ) + name + info.extra + info.comment
+
+
+class XlsmPackage:
+    """
+    Minimal reader/writer for the zip package behind an .xlsx/.xlsm workbook.
+
+    Parts are read lazily and cached; only parts passed to write_part() are
+    regenerated when the package is saved, all other members are carried over.
+    """
+
+    def __init__(self, path):
+        """
+        Open the package.
+
+        Args:
+            path (str): Path to the .xlsx/.xlsm file.
+        """
+        self.path = path
+        self._zip = zipfile.ZipFile(path, "r")
+        self._names = set(self._zip.namelist())
+        self._cache = {}
+        self._dirty = {}
+        self._removed = set()
+        self._sheets = None
+
+    def has_part(self, name):
+        return (name in self._names or name in self._dirty) and name not in self._removed
+
+    def read_part(self, name):
+        """
+        Return the bytes of a package part, including pending modifications.
+        """
+        if name in self._dirty:
+            return self._dirty[name]
+        if name not in self._cache:
+            self._cache[name] = self._zip.read(name)
+        return self._cache[name]
+
+    def read_text(self, name):
+        return self.read_part(name).decode("utf-8")
+
+    def open_part(self, name):
+        """
+        Open an unmodified part as a binary stream, without reading it into memory.
+        """
+        if name in self._dirty:
+            return io.BytesIO(self._dirty[name])
+        return self._zip.open(name)
+
+    def write_part(self, name, data):
+        """
+        Replace the content of a part; the change is written on save().
+
+        Writing back the original content clears the change again, so the part
+        is copied unchanged.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._removed.discard(name)
+        if self._cache.get(name) == data:
+            self._dirty.pop(name, None)
+            return
+        self._dirty[name] = data
+
+    def remove_part(self, name):
+        """
+        Drop a part from the package on save().
+        """
+        self._dirty.pop(name, None)
+        self._removed.add(name)
+
+    @property
+    def dirty_parts(self):
+        return set(self._dirty)
+
+    def relationships(self, part_name):
+        """
+        Read the relationships of a part.
+
+        Args:
+            part_name (str): Part path inside the package, e.g. "xl/workbook.xml".
+
+        Returns:
+            dict: Relationship id -> (type, resolved target part path).
+        """
+        folder, base = posixpath.split(part_name)
+        rels_name = posixpath.join(folder, "_rels", base + ".rels")
+        if not self.has_part(rels_name):
+            return {}
+        root = ET.fromstring(self.read_part(rels_name))
+        rels = {}
+        for rel in root.findall(f"{{{NS_PKG_REL}}}Relationship"):
+            target = rel.get("Target", "")
+            if rel.get("TargetMode") == "External":
+                continue
+            if target.startswith("/"):
+                resolved = target.lstrip("/")
+            else:
+                resolved = posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get("Id")] = (rel.get("Type", ""), resolved)
+        return rels
+
+    def sheets(self):
+        """
+        Map worksheet names to their part paths, in workbook order.
+        """
+        if self._sheets is None:
+            rels = self.relationships("xl/workbook.xml")
+            root = ET.fromstring(self.read_part("xl/workbook.xml"))
+            self._sheets = {}
+            for sheet in root.iter(f"{{{NS_MAIN}}}sheet"):
+                rid = sheet.get(f"{{{NS_REL}}}id")
+                if rid in rels:
+                    self._sheets[sheet.get("name")] = rels[rid][1]
+        return self._sheets
+
+    def drop_calc_chain(self):
+        """
+        Remove the calculation chain so Excel rebuilds it after formulas were overwritten.
+        """
+        if not self.has_part("xl/calcChain.xml"):
+            return
+        self.remove_part("xl/calcChain.xml")
+        types = self.read_text("[Content_Types].xml")
+        types = re.sub(r'<Override\b[^>]*PartName="/xl/calcChain.xml"[^>]*/>', "", types)
+        self.write_part("[Content_Types].xml", types)
+        rels_name = "xl/_rels/workbook.xml.rels"
+        rels = self.read_text(rels_name)
+        rels = re.sub(r'<Relationship\b[^>]*Target="/?(?:xl/)?calcChain.xml"[^>]*/>', "", rels)
+        self.write_part(rels_name, rels)
+        logger.debug("Removed calcChain.xml from package")
+
+    def save(self, dest=None):
+        """
+        Write the package to dest (defaults to the source path).
+
+        Unchanged members are streamed byte-for-byte from the source zip without
+        being decompressed or recompressed; only modified parts are compressed
+        again. The output is written to a temporary file first and moved into
+        place, so the source is never left half-written. An overwritten file
+        keeps its permissions; a new file gets the default ones (0666 minus umask).
+        """
+        dest = dest or self.path
+        in_place = os.path.abspath(dest) == os.path.abspath(self.path)
+        folder = os.path.dirname(os.path.abspath(dest))
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=folder)
+        os.close(fd)
+        try:
+            if self._needs_zipfile_rewrite():
+                self._rewrite_with_zipfile(tmp_path)
+            else:
+                copied = self._stream_to(tmp_path)
+                logger.debug(f"Package streamed: {copied} member(s) copied raw, {len(self._dirty)} regenerated")
+            if os.path.exists(dest):
+                shutil.copymode(dest, tmp_path)
+            else:
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+            if in_place:
+                self._zip.close()
+            os.replace(tmp_path, dest)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if in_place:
+            self._zip = zipfile.ZipFile(self.path, "r")
+            self._names = set(self._zip.namelist())
+            self._cache.update(self._dirty)
+            self._dirty = {}
+            self._removed = set()
+        logger.debug(f"Package saved to {dest}")
+
+    def _needs_zipfile_rewrite(self):
+        # Zip64 and encrypted members are rare in workbooks; leave them to zipfile
+        for info in self._zip.infolist():
+            if info.flag_bits & 0x1:
+                return True
+            if max(info.compress_size, info.file_size, info.header_offset) >= _ZIP64_LIMIT:
+                return True
+        return len(self._zip.infolist()) + len(self._dirty) >= 0xFFFF
+
+    def _rewrite_with_zipfile(self, tmp_path):
+        with zipfile.ZipFile(tmp_path, "w") as out:
+            for info in self._zip.infolist():
+                if info.filename in self._removed:
+                    continue
+                data = self._dirty.get(info.filename)
+                if data is None:
+                    data = self._zip.read(info.filename)
+                out.writestr(info, data, compress_type=info.compress_type)
+            for name, data in self._dirty.items():
+                if name not in self._names:
+                    out.writestr(name, data, compress_type=zipfile.ZIP_DEFLATED)
+
+    def _stream_to(self, tmp_path):
+        """
+        Stream the package into tmp_path in one sequential pass over the source.
+
+        Returns:
+            int: Number of members copied without recompression.
+        """
+        central = []
+        copied = 0
+        members = sorted(self._zip.infolist(), key=lambda info: info.header_offset)
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as out:
+            for info in members:
+                if info.filename in self._removed:
+                    continue
+                offset = out.tell()
+                data = self._dirty.get(info.filename)
+                if data is None:
+                    _copy_raw_member(src, out, info)
+                    central.append(_central_record(info, offset, info.CRC, info.compress_size, info.file_size))
+                    copied += 1
+                else:
+                    central.append(_write_member(out, info, data, offset))
+            for name, data in self._dirty.items():
+                if name not in self._names:
+                    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.external_attr = 0o600 << 16
+                    central.append(_write_member(out, info, data, out.tell()))
+
+            cd_offset = out.tell()
+            for record in central:
+                out.write(record)
+            cd_size = out.tell() - cd_offset
+            comment = self._zip.comment or b""
+            out.write(struct.pack(
+                _END_RECORD, b"PK\x05\x06", 0, 0, len(central), len(central), cd_size, cd_offset, len(comment)))
+            out.write(comment)
+        return copied
+
+    def close(self):
+        self._zip.close()
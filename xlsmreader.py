@@ -0,0 +1,215 @@
+import datetime
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+import xml.etree.ElementTree as ET
+import xlsmpackage as xp
+
+logger = logging.getLogger(__name__)
+
+# Parsed sheets kept in memory, keyed by path, size and modification time
+CACHE_SIZE = 16
+
+_TAG_C = f"{{{xp.NS_MAIN}}}c"
+_TAG_V = f"{{{xp.NS_MAIN}}}v"
+_TAG_T = f"{{{xp.NS_MAIN}}}t"
+_TAG_IS = f"{{{xp.NS_MAIN}}}is"
+_TAG_ROW = f"{{{xp.NS_MAIN}}}row"
+_TAG_SI = f"{{{xp.NS_MAIN}}}si"
+_TAG_RPH = f"{{{xp.NS_MAIN}}}rPh"
+_TAG_XF = f"{{{xp.NS_MAIN}}}xf"
+_TAG_NUMFMT = f"{{{xp.NS_MAIN}}}numFmt"
+_TAG_CELLXFS = f"{{{xp.NS_MAIN}}}cellXfs"
+
+_DATE1904_RE = re.compile(r'<workbookPr\b[^>]*\bdate1904="(?:1|true)"')
+
+# Built-in number formats that show a date or time
+_DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+_DATE_CODE_RE = re.compile(r'[dmyhs]', re.I)
+_FORMAT_NOISE_RE = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+_COLUMN_RE = re.compile(r'^([A-Z]+)')
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class SheetNotFoundError(KeyError):
+    """
+    Raised when the requested worksheet is not in the workbook.
+    """
+
+
+def _is_date_format(code):
+    code = _FORMAT_NOISE_RE.sub("", code)
+    return code.lower() != "general" and bool(_DATE_CODE_RE.search(code))
+
+
+def _date_styles(package, styles_part):
+    """
+    Return the set of cell style indexes (the "s" attribute) that format a date.
+    """
+    if not styles_part or not package.has_part(styles_part):
+        return set()
+    root = ET.fromstring(package.read_part(styles_part))
+    custom = {fmt.get("numFmtId"): fmt.get("formatCode", "") for fmt in root.iter(_TAG_NUMFMT)}
+    cell_xfs = root.find(_TAG_CELLXFS)
+    if cell_xfs is None:
+        return set()
+    dates = set()
+    for idx, xf in enumerate(cell_xfs.iter(_TAG_XF)):
+        fmt_id = xf.get("numFmtId", "0")
+        if (fmt_id.isdigit() and int(fmt_id) in _DATE_FORMAT_IDS) or (fmt_id in custom and _is_date_format(custom[fmt_id])):
+            dates.add(str(idx))
+    return dates
+
+
+def _shared_strings(package, part, needed):
+    """
+    Stream the shared string table up to the highest index in needed.
+    """
+    if not needed or not part or not package.has_part(part):
+        return {}
+    last = max(needed)
+    strings = {}
+    idx = 0
+    with package.open_part(part) as stream:
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            if elem.tag != _TAG_SI:
+                continue
+            if idx in needed:
+                # Rich text runs are concatenated; phonetic hints (rPh) are skipped
+                phonetic = {id(t) for rph in elem.iter(_TAG_RPH) for t in rph.iter(_TAG_T)}
+                strings[idx] = "".join(t.text or "" for t in elem.iter(_TAG_T) if id(t) not in phonetic)
+            elem.clear()
+            if idx >= last:
+                break
+            idx += 1
+    return strings
+
+
+def _excel_date(serial, date1904):
+    base = datetime.datetime(1904, 1, 1) if date1904 else datetime.datetime(1899, 12, 30)
+    return base + datetime.timedelta(days=serial)
+
+
+def _parse_sheet(path, sheet_name, columns):
+    package = xp.XlsmPackage(path)
+    try:
+        sheets = package.sheets()
+        if sheet_name not in sheets:
+            raise SheetNotFoundError(sheet_name)
+        rels = package.relationships("xl/workbook.xml")
+        # Relationship type (last path segment, e.g. "sharedStrings") -> part
+        parts = {rel_type.rsplit("/", 1)[-1]: target for rel_type, target in rels.values()}
+        date_styles = _date_styles(package, parts.get("styles"))
+        date1904 = bool(_DATE1904_RE.search(package.read_text("xl/workbook.xml")))
+
+        rows = {}
+        shared = []
+        with package.open_part(sheets[sheet_name]) as stream:
+            for _, elem in ET.iterparse(stream, events=("end",)):
+                if elem.tag == _TAG_ROW:
+                    elem.clear()
+                    continue
+                if elem.tag != _TAG_C:
+                    continue
+                ref = elem.get("r", "")
+                match = _COLUMN_RE.match(ref)
+                column = match.group(1) if match else ""
+                if columns and column not in columns:
+                    continue
+                cell_type = elem.get("t", "n")
+                if cell_type == "inlineStr":
+                    inline = elem.find(_TAG_IS)
+                    value = "".join(t.text or "" for t in inline.iter(_TAG_T)) if inline is not None else ""
+                else:
+                    v = elem.find(_TAG_V)
+                    if v is None or v.text is None:
+                        continue
+                    value = v.text
+                    if cell_type == "s":
+                        shared.append((ref, int(value)))
+                    elif cell_type == "b":
+                        value = value == "1"
+                    elif cell_type == "n":
+                        number = float(value)
+                        if elem.get("s") in date_styles:
+                            value = _excel_date(number, date1904)
+                        else:
+                            value = int(number) if number.is_integer() else number
+                row = int(ref[len(column):])
+                rows.setdefault(row, {})[column] = value
+
+        strings = _shared_strings(package, parts.get("sharedStrings"), {idx for _, idx in shared})
+        for ref, idx in shared:
+            column = _COLUMN_RE.match(ref).group(1)
+            rows[int(ref[len(column):])][column] = strings.get(idx, "")
+        return dict(sorted(rows.items()))
+    finally:
+        package.close()
+
+
+def read_sheet(path, sheet_name, columns=None):
+    """
+    Read the cell values of one worksheet straight from the workbook package.
+
+    Only the worksheet XML and (the needed part of) the shared string table are
+    streamed; Excel is not started. Only cells that exist are returned, so the
+    result is bounded by the sheet's real used range. Results are cached by
+    path, size and modification time, so reading an unchanged workbook again is
+    a dictionary lookup; the returned dict must not be modified.
+
+    Args:
+        path (str): Path to the .xlsx/.xlsm file.
+        sheet_name (str): Worksheet name.
+        columns (iterable, optional): Column letters to read, e.g. ("A", "B"). Defaults to all.
+
+    Returns:
+        dict: Row number -> {column letters: value}, in row order. Values are
+        str, int, float, bool or datetime (for date-formatted cells).
+
+    Raises:
+        SheetNotFoundError: If the sheet does not exist.
+        OSError, zipfile.BadZipFile: If the file cannot be read.
+    """
+    columns = tuple(sorted({column.upper() for column in columns})) if columns else None
+    stat = os.stat(path)
+    key = (os.path.normcase(os.path.abspath(path)), sheet_name, columns)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            _cache.move_to_end(key)
+            return cached[1]
+
+    rows = _parse_sheet(path, sheet_name, set(columns) if columns else None)
+    with _cache_lock:
+        _cache[key] = ((stat.st_size, stat.st_mtime_ns), rows)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.debug(f"Read {len(rows)} row(s) from '{sheet_name}' in {path}")
+    return rows
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def display_value(value):
+    """
+    Format a cell value the way it is shown in the form: whole numbers without
+    ".0" and dates as dd-mm-jjjj.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        if value.hour or value.minute or value.second:
+            return value.strftime("%d-%m-%Y %H:%M")
+        return value.strftime("%d-%m-%Y")
+    if isinstance(value, float):
+        # Whole numbers (a phone number stored as a number) in full, others unrounded
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)